@@ -1,6 +1,7 @@
 from gevent import monkey  # isort:skip
 monkey.patch_all()  # isort:skip
 import logging
+import multiprocessing
 import sys
 import traceback
 
@@ -13,6 +14,8 @@ log = RotkehlchenLogsAdapter(logger)
 
 
 def main() -> None:
+    # In the frozen builds this runs the worker processes of the process pool instead
+    multiprocessing.freeze_support()
     try:
         rotkehlchen_server = RotkehlchenServer()
     except (SystemPermissionError, DBSchemaError) as e:
@@ -1,5 +1,8 @@
 import logging
-from collections.abc import Iterator
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from itertools import chain, dropwhile, islice
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
@@ -11,11 +14,12 @@ from rotkehlchen.accounting.mixins.event import AccountingEventMixin
 from rotkehlchen.accounting.pot import AccountingPot
 from rotkehlchen.accounting.structures.types import ActionType
 from rotkehlchen.accounting.types import MissingPrice
-from rotkehlchen.db.reports import DBAccountingReports
+from rotkehlchen.db.reports import DBAccountingReports, get_accounting_settings_hash
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.errors.asset import UnknownAsset, UnprocessableTradePair, UnsupportedAsset
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
+from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.premium.premium import Premium
 from rotkehlchen.types import Timestamp
@@ -24,11 +28,65 @@ from rotkehlchen.user_messages import MessagesAggregator
 if TYPE_CHECKING:
     from rotkehlchen.chain.evm.accounting.aggregator import EVMAccountingAggregators
     from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.greenlets.manager import GreenletManager
 
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Seconds of event processing after which it pauses to let the other greenlets run
+PROCESSING_YIELD_INTERVAL = 0.05
+# Events read ahead of processing at a time, so that their prices are prefetched in batches
+EVENTS_READ_AHEAD = 500
+
+
+class ConsumedEventsIterator(Iterator[AccountingEventMixin]):
+    """Iterates the events to process and keeps track of how many were consumed and which
+    was the last one, so that processing does not need the whole history as a list
+
+    Events are read EVENTS_READ_AHEAD at a time and each batch is given to on_read_ahead
+    before it gets consumed.
+    """
+
+    def __init__(
+            self,
+            events: Iterable[AccountingEventMixin],
+            on_read_ahead: Optional[Callable[[list[AccountingEventMixin]], None]] = None,
+    ) -> None:
+        self.events = iter(events)
+        self.on_read_ahead = on_read_ahead
+        self.consumed = 0
+        self.last: Optional[AccountingEventMixin] = None
+        self.upcoming: deque[AccountingEventMixin] = deque()
+
+    def _read_ahead(self) -> bool:
+        """Reads the next batch of events. Returns False if there are no more events"""
+        self.upcoming.extend(islice(self.events, EVENTS_READ_AHEAD))
+        if len(self.upcoming) == 0:
+            return False
+
+        if self.on_read_ahead is not None:
+            self.on_read_ahead(list(self.upcoming))
+        return True
+
+    def __next__(self) -> AccountingEventMixin:
+        if len(self.upcoming) == 0 and self._read_ahead() is False:
+            raise StopIteration
+
+        self.last = self.upcoming.popleft()
+        self.consumed += 1
+        return self.last
+
+    def peek(self) -> Optional[AccountingEventMixin]:
+        """Returns the next event without consuming it or None if there is none"""
+        if len(self.upcoming) == 0 and self._read_ahead() is False:
+            return None
+        return self.upcoming[0]
+
+    def count_remaining(self) -> int:
+        """Consumes all the remaining events without processing them and counts them"""
+        return len(self.upcoming) + sum(1 for _ in self.events)
+
 
 class Accountant():
 
@@ -38,10 +96,11 @@ class Accountant():
             msg_aggregator: MessagesAggregator,
             evm_accounting_aggregators: 'EVMAccountingAggregators',
             premium: Optional[Premium],
+            greenlet_manager: 'GreenletManager',
     ) -> None:
         self.db = db
         self.msg_aggregator = msg_aggregator
-        self.csvexporter = CSVExporter(database=db)
+        self.csvexporter = CSVExporter(database=db, greenlet_manager=greenlet_manager)
         # TODO: Allow for setting of multiple accounting pots
         self.pots = [
             AccountingPot(
@@ -72,11 +131,13 @@ class Accountant():
     def _process_skipping_exception(
             self,
             exception: Exception,
-            events: list[AccountingEventMixin],
+            event: Optional[AccountingEventMixin],
             count: int,
             reason: str,
     ) -> int:
-        event = events[count]
+        if event is None:  # can't happen. Exceptions are raised after getting an event
+            return count + 1
+
         ts = event.get_timestamp()
         identifier = event.get_identifier()
         self.msg_aggregator.add_error(
@@ -95,17 +156,21 @@ class Accountant():
             self,
             start_ts: Timestamp,
             end_ts: Timestamp,
-            events: list[AccountingEventMixin],
+            events: Iterable[AccountingEventMixin],
     ) -> int:
         """Processes the entire history of cryptoworld actions in order to determine
         the price and time at which every asset was obtained and also
         the general and taxable profit/loss.
 
         The events history is already expected to be sorted when passed to this function.
+        It can be any iterable, including a lazy one, since it is consumed only once.
 
         start_ts here is the timestamp at which to start taking trades and other
         taxable events into account. Not where processing starts from. Processing
-        always starts from the very first event we find in the history.
+        always starts from the very first event we find in the history, unless there is
+        a valid checkpoint of the accounting state at or before start_ts that was saved
+        by an earlier report with the same accounting settings. Then processing resumes
+        from the latest such checkpoint.
 
         Returns the id of the generated report
         """
@@ -117,13 +182,17 @@ class Accountant():
             active_premium=active_premium,
         )
         events_limit = -1 if active_premium else FREE_PNL_EVENTS_LIMIT
+        # peek at the first event without consuming it since events may be a lazy iterator
+        events_iter = iter(events)
+        if (first_event := next(events_iter, None)) is not None:
+            events_iter = chain((first_event,), events_iter)
         # Ask the DB for the settings once at the start of processing so we got the
         # same settings through the entire task
         with self.db.conn.read_ctx() as cursor:
             db_settings = self.db.get_settings(cursor)
             # Create a new pnl report in the DB to be used to save each event generated
             dbpnl = DBAccountingReports(self.db)
-            first_ts = Timestamp(0) if len(events) == 0 else events[0].get_timestamp()
+            first_ts = Timestamp(0) if first_event is None else first_event.get_timestamp()
             report_id = dbpnl.add_report(
                 first_processed_timestamp=first_ts,
                 start_ts=start_ts,
@@ -139,78 +208,166 @@ class Accountant():
             self.first_processed_timestamp = first_ts
 
             count = 0
-            actions_length = len(events)
             prev_time = last_event_ts = Timestamp(0)
             ignored_ids_mapping = self.db.get_ignored_action_ids(cursor=cursor, action_type=None)
 
-        events_iter = iter(events)
-        while True:
-            try:
-                (
-                    processed_events_num,
-                    prev_time,
-                ) = self._process_event(
-                    events_iterator=events_iter,
-                    start_ts=start_ts,
-                    end_ts=end_ts,
-                    prev_time=prev_time,
-                    db_settings=db_settings,
-                    ignored_ids_mapping=ignored_ids_mapping,
-                )
-            except PriceQueryUnsupportedAsset as e:
-                count = self._process_skipping_exception(
-                    exception=e,
-                    events=events,
-                    count=count,
-                    reason='not being able to find price for an unsupported asset',
-                )
-                continue
-            except NoPriceForGivenTimestamp as e:
-                self.pots[0].cost_basis.missing_prices.add(
-                    MissingPrice(
-                        from_asset=e.from_asset,
-                        to_asset=e.to_asset,
-                        time=e.time,
-                        rate_limited=e.rate_limited,
-                    ),
-                )
-                continue
-            except RemoteError as e:
-                count = self._process_skipping_exception(
-                    exception=e,
-                    events=events,
-                    count=count,
-                    reason='inability to reach an external service at that point in time',
-                )
-                continue
-
-            if processed_events_num == 0:
-                break  # we reached the period end
-
-            last_event_ts = prev_time
-            if count % 500 == 0:
-                # This loop can take a very long time depending on the amount of events
-                # to process. We need to yield to other greenlets or else calls to the
-                # API may time out
-                gevent.sleep(0.5)
-            count += processed_events_num
-            if not active_premium and count >= FREE_PNL_EVENTS_LIMIT:
-                log.debug(
-                    f'PnL reports event processing has hit the event limit of {events_limit}. '
-                    f'Processing stopped and the results will not '
-                    f'take into account subsequent events. Total events were {len(events)}',
-                )
-                break
+        # checkpoints are not possible with a limited number of events or without past cost basis
+        checkpoints_interval = db_settings.pnl_checkpoints_interval if active_premium and db_settings.calculate_past_cost_basis else 0  # noqa: E501
+        settings_hash = get_accounting_settings_hash(db_settings)
+        last_checkpoint_ts = Timestamp(0)
+        if checkpoints_interval != 0 and (resume_ts := self._restore_checkpoint(
+                dbpnl=dbpnl,
+                settings_hash=settings_hash,
+                settings=db_settings,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                report_id=report_id,
+        )) is not None:
+            last_checkpoint_ts = checkpoint_start_ts = resume_ts
+            # the events before the checkpoint are already accounted for in its state
+            events_iter = dropwhile(lambda x: x.get_timestamp() < checkpoint_start_ts, events_iter)  # noqa: E501
+        consumed_events = ConsumedEventsIterator(
+            events=events_iter,
+            on_read_ahead=self.pots[0].prefetch_rates_in_profit_currency,
+        )
+        last_yield_at = time.monotonic()
 
+        try:
+            while True:
+                if checkpoints_interval != 0 and (upcoming_event := consumed_events.peek()) is not None:  # noqa: E501
+                    upcoming_ts = upcoming_event.get_timestamp()
+                    checkpoint_ts = Timestamp(upcoming_ts - upcoming_ts % checkpoints_interval)
+                    if consumed_events.consumed != 0 and last_checkpoint_ts < checkpoint_ts <= end_ts:  # noqa: E501
+                        self._add_checkpoint(
+                            dbpnl=dbpnl,
+                            settings_hash=settings_hash,
+                            timestamp=checkpoint_ts,
+                        )
+                        last_checkpoint_ts = checkpoint_ts
+
+                try:
+                    (
+                        processed_events_num,
+                        prev_time,
+                    ) = self._process_event(
+                        events_iterator=consumed_events,
+                        start_ts=start_ts,
+                        end_ts=end_ts,
+                        prev_time=prev_time,
+                        db_settings=db_settings,
+                        ignored_ids_mapping=ignored_ids_mapping,
+                    )
+                except PriceQueryUnsupportedAsset as e:
+                    count = self._process_skipping_exception(
+                        exception=e,
+                        event=consumed_events.last,
+                        count=count,
+                        reason='not being able to find price for an unsupported asset',
+                    )
+                    continue
+                except NoPriceForGivenTimestamp as e:
+                    self.pots[0].cost_basis.missing_prices.add(
+                        MissingPrice(
+                            from_asset=e.from_asset,
+                            to_asset=e.to_asset,
+                            time=e.time,
+                            rate_limited=e.rate_limited,
+                        ),
+                    )
+                    continue
+                except RemoteError as e:
+                    count = self._process_skipping_exception(
+                        exception=e,
+                        event=consumed_events.last,
+                        count=count,
+                        reason='inability to reach an external service at that point in time',
+                    )
+                    continue
+
+                if processed_events_num == 0:
+                    break  # we reached the period end
+
+                last_event_ts = prev_time
+                if time.monotonic() - last_yield_at >= PROCESSING_YIELD_INTERVAL:
+                    # This loop can take a very long time depending on the amount of events
+                    # to process. We need to yield to other greenlets or else calls to the
+                    # API may time out
+                    gevent.sleep(0.001)
+                    last_yield_at = time.monotonic()
+                count += processed_events_num
+                if not active_premium and count >= FREE_PNL_EVENTS_LIMIT:
+                    log.debug(
+                        f'PnL reports event processing has hit the event limit of {events_limit}. '
+                        f'Processing stopped and the results will not '
+                        'take into account subsequent events.',
+                    )
+                    break
+        finally:  # write any buffered events, also if processing got aborted
+            self.pots[0].flush_report_data()
+
+        # count the events that were not consumed to know the total number of actions
+        total_actions = consumed_events.consumed + consumed_events.count_remaining()
+        report_writer = self.pots[0].report_writer
+        assert report_writer is not None, 'report writer is initialized by the pot reset'
         dbpnl.add_report_overview(
             report_id=report_id,
             last_processed_timestamp=last_event_ts,
             processed_actions=count,
-            total_actions=actions_length,
+            total_actions=total_actions,
             pnls=self.pots[0].pnls,
+            events_flushes=report_writer.flushes,
+            events_flush_seconds=report_writer.flush_seconds,
         )
         return report_id
 
+    def _restore_checkpoint(
+            self,
+            dbpnl: DBAccountingReports,
+            settings_hash: str,
+            settings: DBSettings,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            report_id: int,
+    ) -> Optional[Timestamp]:
+        """Restores the state of the pot from the latest valid checkpoint at or before
+        start_ts. At that point no PnL has been counted yet for the report.
+
+        Returns the checkpoint's timestamp from which processing should resume or None
+        if there is no checkpoint to use.
+        """
+        if (checkpoint := dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=start_ts)) is None:  # noqa: E501
+            return None
+
+        checkpoint_ts, state = checkpoint
+        try:
+            self.pots[0].restore_state(state)
+        except DeserializationError as e:
+            log.error(f'Could not restore PnL checkpoint at {checkpoint_ts} due to {e!s}')
+            self.pots[0].reset(settings=settings, start_ts=start_ts, end_ts=end_ts, report_id=report_id)  # noqa: E501
+            return None
+
+        log.info(f'Resuming history processing from the PnL checkpoint at {checkpoint_ts}')
+        return checkpoint_ts
+
+    def _add_checkpoint(
+            self,
+            dbpnl: DBAccountingReports,
+            settings_hash: str,
+            timestamp: Timestamp,
+    ) -> None:
+        """Saves the state of the pot after processing all events before timestamp.
+
+        Nothing is saved if prices were missing, since the user may add them later.
+        """
+        if len(self.pots[0].cost_basis.missing_prices) != 0:
+            return
+
+        dbpnl.add_checkpoint(
+            settings_hash=settings_hash,
+            timestamp=timestamp,
+            state=self.pots[0].serialize_state(),
+        )
+
     def _process_event(
             self,
             events_iterator: Iterator[AccountingEventMixin],
@@ -294,17 +451,12 @@ class Accountant():
         If a directory is given, it simply exports all event.csv in the given directory.
         If no directory is given it returns the path to a zip to export
         """
-        if len(self.pots[0].processed_events) == 0:
+        report_id = self.pots[0].report_id
+        if len(self.pots[0].processed_events) == 0 or report_id is None:
             return False, 'No history processed in order to perform an export'
 
+        # the events are streamed from the DB report so that they are not all kept in memory
         if directory_path is None:
-            return self.csvexporter.create_zip(
-                events=self.pots[0].processed_events,
-                pnls=self.pots[0].pnls,
-            )
+            return self.csvexporter.create_zip(report_id=report_id)
 
-        return self.csvexporter.export(
-            events=self.pots[0].processed_events,
-            pnls=self.pots[0].pnls,
-            directory=directory_path,
-        )
+        return self.csvexporter.export_report(report_id=report_id, directory=directory_path)
@@ -5,6 +5,8 @@ from rotkehlchen.chain.evm.decoding.types import EventCategory, EventCategoryDet
 
 FREE_PNL_EVENTS_LIMIT = 1000
 FREE_REPORTS_LOOKUP_LIMIT = 20
+# How many processed events of a PnL report are buffered before writing them to the DB
+PNL_EVENTS_WRITE_CHUNK_SIZE = 1000
 
 
 DEFAULT_EVENT_CATEGORY_MAPPINGS = {
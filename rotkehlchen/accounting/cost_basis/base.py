@@ -4,7 +4,7 @@ from abc import ABCMeta, abstractmethod
 from collections import defaultdict
 from collections.abc import Iterator
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Any, Callable, Literal, NamedTuple, Optional, overload
+from typing import TYPE_CHECKING, Any, Callable, Literal, NamedTuple, Optional, Union, overload
 
 from rotkehlchen.accounting.types import MissingAcquisition, MissingPrice
 from rotkehlchen.assets.asset import Asset
@@ -12,6 +12,7 @@ from rotkehlchen.constants.assets import A_ETH, A_WETH
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.errors.serialization import DeserializationError
+from rotkehlchen.fixedval import FixedVal
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import deserialize_fval
@@ -27,6 +28,14 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 
+def _to_fval(value: FVal) -> FVal:
+    return value.to_fval() if isinstance(value, FixedVal) else value
+
+
+def _serialize_state_number(value: Union[int, FVal]) -> Union[int, str]:
+    return value if isinstance(value, int) else str(value)
+
+
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
 class AssetAcquisitionEvent:
     amount: FVal
@@ -44,11 +53,20 @@ class AssetAcquisitionEvent:
         )
 
     @classmethod
-    def from_processed_event(cls: type['AssetAcquisitionEvent'], event: 'ProcessedAccountingEvent') -> 'AssetAcquisitionEvent':  # noqa: E501
+    def from_processed_event(
+            cls: type['AssetAcquisitionEvent'],
+            event: 'ProcessedAccountingEvent',
+            fixed_point: bool = False,
+    ) -> 'AssetAcquisitionEvent':
+        """If fixed_point is True the amount and rate of the acquisition are FixedVal"""
+        amount, rate = event.taxable_amount + event.free_amount, event.price
+        if fixed_point:
+            amount, rate = FixedVal(amount), Price(FixedVal(rate))
+
         return cls(
-            amount=event.taxable_amount + event.free_amount,
+            amount=amount,
             timestamp=event.timestamp,
-            rate=event.price,
+            rate=rate,
             index=event.index,
         )
 
@@ -114,15 +132,30 @@ class AssetAcquisitionHeapElement(NamedTuple):
     For LIFO, a counter is used but negated, so the acquisition added last comes first.
     For HIFO, the amount of the acquisition is used although negated so the
     acquisition with the highest amount comes first.
+
+    The counters are plain ints since they are compared on every heap operation.
     """
-    priority: FVal  # This is only used by heapq algorithm and not accessed from our code
+    priority: Union[int, FVal]  # This is only used by heapq algorithm and not accessed from our code  # noqa: E501
     acquisition_event: AssetAcquisitionEvent
 
 
 class BaseCostBasisMethod(metaclass=ABCMeta):
-    """The base class in which every other cost basis method inherits from."""
-    def __init__(self) -> None:
+    """The base class in which every other cost basis method inherits from.
+
+    If fixed_point is True all amounts and rates handled by the method are FixedVal
+    instead of Decimal backed FVal. Callers need to convert them with to_number().
+    """
+    # Attributes that are part of the method's state apart from the acquisitions heap
+    _state_attributes: tuple[str, ...] = ()
+
+    def __init__(self, fixed_point: bool = False) -> None:
         self._acquisitions_heap: list[AssetAcquisitionHeapElement] = []
+        self.fixed_point = fixed_point
+        self.zero: FVal = FixedVal(0) if fixed_point else ZERO
+
+    def to_number(self, value: FVal) -> FVal:
+        """Converts the given value to the numeric type used by the method"""
+        return FixedVal(value) if self.fixed_point else value
 
     @abstractmethod
     def add_acquisition(self, acquisition: AssetAcquisitionEvent) -> None:
@@ -156,10 +189,10 @@ class BaseCostBasisMethod(metaclass=ABCMeta):
         """
         # this is a temporary assertion to test that new accounting tools work properly.
         # Written on 06.06.2022 and can be removed after a couple of months if everything goes well
-        assert ZERO <= used_amount <= self._acquisitions_heap[0].acquisition_event.remaining_amount, f'Used amount must be in the interval [0, {self._acquisitions_heap[0].acquisition_event.remaining_amount}] but it was {used_amount}'  # noqa: E501
+        assert self.zero <= used_amount <= self._acquisitions_heap[0].acquisition_event.remaining_amount, f'Used amount must be in the interval [0, {self._acquisitions_heap[0].acquisition_event.remaining_amount}] but it was {used_amount}'  # noqa: E501
 
         self._acquisitions_heap[0].acquisition_event.remaining_amount -= used_amount
-        if self._acquisitions_heap[0].acquisition_event.remaining_amount == ZERO:
+        if self._acquisitions_heap[0].acquisition_event.remaining_amount == self.zero:
             heapq.heappop(self._acquisitions_heap)
 
     def calculate_spend_cost_basis(
@@ -185,7 +218,7 @@ class BaseCostBasisMethod(metaclass=ABCMeta):
         been found.
         """  # noqa: E501
         remaining_sold_amount = spending_amount
-        taxfree_bought_cost = taxable_bought_cost = taxable_amount = taxfree_amount = ZERO  # noqa: E501
+        taxfree_bought_cost = taxable_bought_cost = taxable_amount = taxfree_amount = self.zero  # noqa: E501
         matched_acquisitions = []
 
         for acquisition_event in self.processing_iterator():
@@ -223,7 +256,7 @@ class BaseCostBasisMethod(metaclass=ABCMeta):
                     taxable=taxable,
                 ))
                 self.consume_result(remaining_sold_amount)
-                remaining_sold_amount = ZERO
+                remaining_sold_amount = self.zero
                 # stop iterating since we found all acquisitions to satisfy this spend
                 break
 
@@ -256,10 +289,10 @@ class BaseCostBasisMethod(metaclass=ABCMeta):
             used_acquisitions.append(acquisition_event)
             self.consume_result(acquisition_event.remaining_amount)
             # and since this event is going to be removed, reduce its remaining to zero
-            acquisition_event.remaining_amount = ZERO
+            acquisition_event.remaining_amount = self.zero
 
         is_complete = True
-        if remaining_sold_amount != ZERO:
+        if remaining_sold_amount != self.zero:
             # if we still have sold amount but no acquisitions to satisfy it then we only
             # found acquisitions to partially satisfy the sell
             adjusted_amount = spending_amount - taxfree_amount
@@ -282,6 +315,64 @@ class BaseCostBasisMethod(metaclass=ABCMeta):
             is_complete=is_complete,
         )
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Serializes the acquisitions heap and the rest of the state of the method so
+        that processing can continue from the same point at a later time"""
+        state: dict[str, Any] = {
+            attribute: _serialize_state_number(getattr(self, attribute))
+            for attribute in self._state_attributes
+        }
+        state['acquisitions'] = [{
+            'priority': _serialize_state_number(entry.priority),
+            'remaining_amount': str(entry.acquisition_event.remaining_amount),
+            **entry.acquisition_event.serialize(),
+        } for entry in self._acquisitions_heap]
+        return state
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        """Restores the state returned by serialize_state. The heap entries keep
+        their order so the heap invariant still holds.
+
+        May raise:
+        - DeserializationError if the given state is malformed
+        """
+        location = 'cost basis checkpoint'
+        acquisitions_heap = []
+        try:
+            for attribute in self._state_attributes:
+                setattr(self, attribute, self._deserialize_state_number(state[attribute], name=attribute))  # noqa: E501
+            for entry in state['acquisitions']:
+                acquisition = AssetAcquisitionEvent(
+                    amount=self.to_number(deserialize_fval(entry['full_amount'], name='full_amount', location=location)),  # noqa: E501
+                    timestamp=Timestamp(entry['timestamp']),
+                    rate=Price(self.to_number(deserialize_fval(entry['rate'], name='rate', location=location))),  # noqa: E501
+                    index=entry['index'],
+                )
+                acquisition.remaining_amount = self.to_number(deserialize_fval(
+                    value=entry['remaining_amount'],
+                    name='remaining_amount',
+                    location=location,
+                ))
+                acquisitions_heap.append(AssetAcquisitionHeapElement(
+                    priority=self._deserialize_state_number(entry['priority'], name='priority'),
+                    acquisition_event=acquisition,
+                ))
+        except KeyError as e:
+            raise DeserializationError(f'Missing key {e!s} in {location}') from e
+
+        self._acquisitions_heap = acquisitions_heap
+
+    def _deserialize_state_number(self, value: Union[int, str], name: str) -> Union[int, FVal]:
+        """Counters are kept as ints while amounts are strings converted to the numeric
+        type of the method
+
+        May raise:
+        - DeserializationError if the value is not a valid number
+        """
+        if isinstance(value, int):
+            return value
+        return self.to_number(deserialize_fval(value, name=name, location='cost basis checkpoint'))  # noqa: E501
+
     def __len__(self) -> int:
         return len(self._acquisitions_heap)
 
@@ -291,9 +382,11 @@ class FIFOCostBasisMethod(BaseCostBasisMethod):
     Accounting in FIFO (first-in-first-out) method.
     https://www.investopedia.com/terms/f/fifo.asp
     """
-    def __init__(self) -> None:
-        super().__init__()
-        self._count = ZERO
+    _state_attributes = ('_count',)
+
+    def __init__(self, fixed_point: bool = False) -> None:
+        super().__init__(fixed_point=fixed_point)
+        self._count = 0
 
     def add_acquisition(self, acquisition: AssetAcquisitionEvent) -> None:
         """Adds an acquisition to the `_acquisitions_heap` using a counter to achieve the FIFO order."""  # noqa: E501
@@ -306,9 +399,11 @@ class LIFOCostBasisMethod(BaseCostBasisMethod):
     Accounting in LIFO (last-in-first-out) method.
     https://www.investopedia.com/terms/l/lifo.asp
     """
-    def __init__(self) -> None:
-        super().__init__()
-        self._count = ZERO
+    _state_attributes = ('_count',)
+
+    def __init__(self, fixed_point: bool = False) -> None:
+        super().__init__(fixed_point=fixed_point)
+        self._count = 0
 
     def add_acquisition(self, acquisition: AssetAcquisitionEvent) -> None:
         """Adds an acquisition to the `_acquisitions_heap` using a negated counter to achieve the LIFO order."""  # noqa: E501
@@ -343,13 +438,15 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
     For more details and explanations go here:
         https://github.com/rotki/rotki/issues/5561#issuecomment-1423338938
     """  # noqa: E501
-    def __init__(self) -> None:
-        super().__init__()
-        self._count = ZERO
+    _state_attributes = ('_count', 'current_amount', 'current_total_acb')
+
+    def __init__(self, fixed_point: bool = False) -> None:
+        super().__init__(fixed_point=fixed_point)
+        self._count = 0
         # keeps track of the amount of the asset remaining after every acquisition or spend
-        self.current_amount = ZERO
+        self.current_amount = self.zero
         # the current total cost basis of the asset
-        self.current_total_acb = ZERO
+        self.current_total_acb = self.zero
 
     def add_acquisition(self, acquisition: AssetAcquisitionEvent) -> None:
         """
@@ -391,7 +488,7 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
             average_cost_basis: Optional[FVal] = None,  # pylint: disable=unused-argument
     ) -> 'CostBasisInfo':
         """Calculates the cost basis of the spend using the average cost basis method."""
-        if self.current_amount == ZERO:
+        if self.current_amount == self.zero:
             missing_acquisitions.append(
                 MissingAcquisition(
                     asset=spending_asset,
@@ -403,8 +500,8 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
 
             return CostBasisInfo(
                 taxable_amount=spending_amount,
-                taxable_bought_cost=ZERO,
-                taxfree_bought_cost=ZERO,
+                taxable_bought_cost=self.zero,
+                taxfree_bought_cost=self.zero,
                 matched_acquisitions=[],
                 is_complete=False,
             )
@@ -426,16 +523,16 @@ class AverageCostBasisMethod(BaseCostBasisMethod):
 
 
 class CostBasisEvents:
-    def __init__(self, cost_basis_method: CostBasisMethod) -> None:
+    def __init__(self, cost_basis_method: CostBasisMethod, fixed_point: bool = False) -> None:
         """This class contains data about acquisitions and spends."""
         if cost_basis_method == CostBasisMethod.FIFO:
-            self.acquisitions_manager: BaseCostBasisMethod = FIFOCostBasisMethod()
+            self.acquisitions_manager: BaseCostBasisMethod = FIFOCostBasisMethod(fixed_point)
         elif cost_basis_method == CostBasisMethod.LIFO:
-            self.acquisitions_manager = LIFOCostBasisMethod()
+            self.acquisitions_manager = LIFOCostBasisMethod(fixed_point)
         elif cost_basis_method == CostBasisMethod.HIFO:
-            self.acquisitions_manager = HIFOCostBasisMethod()
+            self.acquisitions_manager = HIFOCostBasisMethod(fixed_point)
         elif cost_basis_method == CostBasisMethod.ACB:
-            self.acquisitions_manager = AverageCostBasisMethod()
+            self.acquisitions_manager = AverageCostBasisMethod(fixed_point)
         self.spends: list[AssetSpendEvent] = []
         self.used_acquisitions: list[AssetAcquisitionEvent] = []
 
@@ -496,6 +593,19 @@ class CostBasisInfo(NamedTuple):
     matched_acquisitions: list[MatchedAcquisition]
     is_complete: bool
 
+    def to_fval(self) -> 'CostBasisInfo':
+        """Returns a copy where the amounts used for the PnL calculation are Decimal backed
+        FVals. To be used on results calculated with FixedVal before they are passed out
+        of the cost basis calculation. Matched acquisitions are only serialized so they
+        are kept as they are."""
+        return CostBasisInfo(
+            taxable_amount=_to_fval(self.taxable_amount),
+            taxable_bought_cost=_to_fval(self.taxable_bought_cost),
+            taxfree_bought_cost=_to_fval(self.taxfree_bought_cost),
+            matched_acquisitions=self.matched_acquisitions,
+            is_complete=self.is_complete,
+        )
+
     def serialize(self) -> dict[str, Any]:
         """Turn to a dict to be exported into the DB"""
         return {
@@ -503,6 +613,15 @@ class CostBasisInfo(NamedTuple):
             'matched_acquisitions': [x.serialize() for x in self.matched_acquisitions],
         }
 
+    def serialize_for_db(self) -> dict[str, Any]:
+        """Like serialize but also keeps the bought costs, since the CSV export of a saved
+        report shows them for the average cost basis method"""
+        return {
+            **self.serialize(),
+            'taxable_bought_cost': str(self.taxable_bought_cost),
+            'taxfree_bought_cost': str(self.taxfree_bought_cost),
+        }
+
     @classmethod
     def deserialize(cls: type['CostBasisInfo'], data: dict[str, Any]) -> Optional['CostBasisInfo']:
         """Creates a CostBasisInfo object from a json dict made from serialize()
@@ -518,10 +637,13 @@ class CostBasisInfo(NamedTuple):
         except KeyError as e:
             raise DeserializationError(f'Could not decode CostBasisInfo json from the DB due to missing key {e!s}') from e  # noqa: E501
 
-        return CostBasisInfo(  # the 0 are not serialized and not used at recall so is okay to skip
+        # reports saved before the bought costs were kept don't have them
+        taxable_bought_cost = deserialize_fval(data.get('taxable_bought_cost', '0'), name='taxable_bought_cost', location='cost basis info decoding')  # noqa: E501
+        taxfree_bought_cost = deserialize_fval(data.get('taxfree_bought_cost', '0'), name='taxfree_bought_cost', location='cost basis info decoding')  # noqa: E501
+        return CostBasisInfo(  # taxable amount is not serialized and not used at recall so is okay to skip  # noqa: E501
             taxable_amount=ZERO,
-            taxable_bought_cost=ZERO,
-            taxfree_bought_cost=ZERO,
+            taxable_bought_cost=taxable_bought_cost,
+            taxfree_bought_cost=taxfree_bought_cost,
             is_complete=is_complete,
             matched_acquisitions=matched_acquisitions,
         )
@@ -567,10 +689,41 @@ class CostBasisCalculator(CustomizableDateMixin):
     def reset(self, settings: DBSettings) -> None:
         self.settings = settings
         self.profit_currency = settings.main_currency
-        self._events: defaultdict[Asset, CostBasisEvents] = defaultdict(lambda: CostBasisEvents(settings.cost_basis_method))  # noqa: E501
+        self._events: defaultdict[Asset, CostBasisEvents] = defaultdict(lambda: CostBasisEvents(settings.cost_basis_method, settings.fixed_point_cost_basis))  # noqa: E501
         self.missing_acquisitions: list[MissingAcquisition] = []
         self.missing_prices: set[MissingPrice] = set()
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Serializes the acquisitions of all assets and the missing acquisitions found"""
+        return {
+            'assets': {
+                asset.identifier: asset_events.acquisitions_manager.serialize_state()
+                for asset, asset_events in self._events.items()
+            },
+            'missing_acquisitions': [x.serialize() for x in self.missing_acquisitions],
+        }
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        """Restores the state returned by serialize_state. Should be called right after
+        a reset with the same settings as the ones the state was created with.
+
+        May raise:
+        - DeserializationError if the given state is malformed
+        """
+        location = 'cost basis checkpoint'
+        try:
+            for identifier, asset_state in state['assets'].items():
+                self._events[Asset(identifier)].acquisitions_manager.restore_state(asset_state)
+
+            self.missing_acquisitions = [MissingAcquisition(
+                asset=Asset(entry['asset']),
+                time=Timestamp(entry['time']),
+                found_amount=deserialize_fval(entry['found_amount'], name='found_amount', location=location),  # noqa: E501
+                missing_amount=deserialize_fval(entry['missing_amount'], name='missing_amount', location=location),  # noqa: E501
+            ) for entry in state['missing_acquisitions']]
+        except KeyError as e:
+            raise DeserializationError(f'Missing key {e!s} in {location}') from e
+
     def get_events(self, asset: Asset) -> CostBasisEvents:
         """Custom getter for events so that we have common cost basis for some assets"""
         if asset == A_WETH:
@@ -591,18 +744,20 @@ class CostBasisCalculator(CustomizableDateMixin):
         if len(asset_events.acquisitions_manager) == 0:
             return False
 
+        manager = asset_events.acquisitions_manager
+        amount = manager.to_number(amount)
         remaining_amount = amount
-        for acquisition_event in asset_events.acquisitions_manager.processing_iterator():
+        for acquisition_event in manager.processing_iterator():
             if remaining_amount < acquisition_event.remaining_amount:
-                asset_events.acquisitions_manager.consume_result(remaining_amount)
-                remaining_amount = ZERO
+                manager.consume_result(remaining_amount)
+                remaining_amount = manager.zero
                 # stop iterating since we found all acquisitions to satisfy reduction
                 break
 
             remaining_amount -= acquisition_event.remaining_amount
-            asset_events.acquisitions_manager.consume_result(acquisition_event.remaining_amount)
+            manager.consume_result(acquisition_event.remaining_amount)
 
-        if remaining_amount != ZERO:
+        if remaining_amount != manager.zero:
             if not asset.is_fiat():
                 self.missing_acquisitions.append(
                     MissingAcquisition(
@@ -621,7 +776,10 @@ class CostBasisCalculator(CustomizableDateMixin):
             event: 'ProcessedAccountingEvent',
     ) -> None:
         """Adds an acquisition event for an asset"""
-        asset_event = AssetAcquisitionEvent.from_processed_event(event=event)
+        asset_event = AssetAcquisitionEvent.from_processed_event(
+            event=event,
+            fixed_point=self.settings.fixed_point_cost_basis,
+        )
         asset_events = self.get_events(event.asset)
         asset_events.acquisitions_manager.add_acquisition(asset_event)
 
@@ -687,8 +845,8 @@ class CostBasisCalculator(CustomizableDateMixin):
         asset_events = self.get_events(asset)
         asset_events.spends.append(event)
         if not asset.is_fiat() and taxable_spend:
-            return asset_events.acquisitions_manager.calculate_spend_cost_basis(
-                spending_amount=amount,
+            cost_basis_info = asset_events.acquisitions_manager.calculate_spend_cost_basis(
+                spending_amount=asset_events.acquisitions_manager.to_number(amount),
                 spending_asset=asset,
                 timestamp=timestamp,
                 missing_acquisitions=self.missing_acquisitions,
@@ -696,6 +854,7 @@ class CostBasisCalculator(CustomizableDateMixin):
                 settings=self.settings,
                 timestamp_to_date=self.timestamp_to_date,
             )
+            return cost_basis_info.to_fval() if self.settings.fixed_point_cost_basis else cost_basis_info  # noqa: E501
         # just reduce the amount's acquisition without counting anything
         self.reduce_asset_amount(asset=asset, amount=amount, timestamp=timestamp)
         return None
@@ -709,4 +868,4 @@ class CostBasisCalculator(CustomizableDateMixin):
         amount = ZERO
         for acquisition_event in asset_events.acquisitions_manager.get_acquisitions():
             amount += acquisition_event.remaining_amount
-        return amount if amount != ZERO else None
+        return _to_fval(amount) if amount != ZERO else None
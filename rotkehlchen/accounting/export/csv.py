@@ -1,13 +1,20 @@
+import io
 import json
 import logging
+from collections import deque
 from csv import DictWriter
 from pathlib import Path
 from tempfile import mkdtemp
-from typing import TYPE_CHECKING, Any, Literal
+from typing import TYPE_CHECKING, Any, Literal, Optional, TextIO
 from zipfile import ZIP_DEFLATED, ZipFile
 
+import gevent
+
 from rotkehlchen.accounting.pnl import PnlTotals
+from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
 from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.errors.misc import ProcessPoolError
+from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import CostBasisMethod, Timestamp
@@ -15,8 +22,8 @@ from rotkehlchen.utils.mixins.customizable_date import CustomizableDateMixin
 from rotkehlchen.utils.version_check import get_current_version
 
 if TYPE_CHECKING:
-    from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
     from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.greenlets.manager import GreenletManager
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -34,6 +41,11 @@ ACCOUNTING_SETTINGS = (
 )
 
 CSV_INDEX_OFFSET = 2  # skip title row and since counting starts from 1
+# How many events are sent at once to a worker process to be turned to CSV rows
+CSV_EXPORT_CHUNK_SIZE = 1000
+# How many chunks of events read from the DB are turned to CSV rows at the same time
+# when streaming a report. Bounds the number of events in memory.
+CSV_EXPORT_CHUNKS_IN_FLIGHT = 4
 
 
 class CSVWriteError(Exception):
@@ -67,10 +79,20 @@ class CSVExporter(CustomizableDateMixin):
     def __init__(
             self,
             database: 'DBHandler',
+            greenlet_manager: 'GreenletManager',
     ):
         super().__init__(database=database)
+        self.greenlet_manager = greenlet_manager
         self.reset(start_ts=Timestamp(0), end_ts=Timestamp(0))
 
+    def __getstate__(self) -> dict[str, Any]:
+        """The exporter is sent to the worker processes along with its export jobs.
+        Everything but the DB and the greenlet manager is needed there"""
+        state = self.__dict__.copy()
+        del state['database']
+        del state['greenlet_manager']
+        return state
+
     def reset(self, start_ts: Timestamp, end_ts: Timestamp) -> None:
         self.start_ts = start_ts
         self.end_ts = end_ts
@@ -103,7 +125,7 @@ class CSVExporter(CustomizableDateMixin):
 
     def _add_pnl_type(
             self,
-            event: 'ProcessedAccountingEvent',
+            event: ProcessedAccountingEvent,
             dict_event: dict[str, Any],
             amount_column: str,
             name: Literal['free', 'taxable'],
@@ -160,13 +182,14 @@ class CSVExporter(CustomizableDateMixin):
 
         dict_event[f'cost_basis_{name}'] = cost_basis
 
-    def _maybe_add_summary(self, events: list[dict[str, Any]], pnls: PnlTotals) -> None:
-        """Depending on given settings, adds a few summary lines at the end of
-        the all events PnL report"""
+    def _summary_rows(self, events_num: int, pnls: PnlTotals) -> list[dict[str, Any]]:
+        """Depending on given settings, returns the summary lines that go after the
+        events_num events of the all events PnL report"""
+        events: list[dict[str, Any]] = []
         if self.settings.pnl_csv_have_summary is False:
-            return
+            return events
 
-        length = len(events) + 1
+        length = events_num + 1
         template: dict[str, Any] = {
             'type': '',
             'notes': '',
@@ -191,7 +214,8 @@ class CSVExporter(CustomizableDateMixin):
 
         start_sums_index = length + 4
         sums = 0
-        for name, value in pnls.items():
+        # in a fixed order since the totals of a streamed report are summed in another order
+        for name, value in sorted(pnls.items(), key=lambda x: str(x[0])):
             if value.taxable == ZERO and value.free == ZERO:
                 continue
             sums += 1
@@ -235,28 +259,26 @@ class CSVExporter(CustomizableDateMixin):
             entry['taxable_amount'] = str(getattr(self.settings, setting))
             events.append(entry)
 
-    def create_zip(
-            self,
-            events: list['ProcessedAccountingEvent'],
-            pnls: PnlTotals,
-    ) -> tuple[bool, str]:
+        return events
+
+    def create_zip(self, report_id: int) -> tuple[bool, str]:
+        """Export the events of the report and the summary as CSV in a zip, written
+        straight into the zip as they are read from the DB. Returns the path of the zip."""
         # TODO: Find a way to properly delete the directory after send is complete
         dirpath = Path(mkdtemp())
-        success, msg = self.export(events=events, pnls=pnls, directory=dirpath)
+        try:
+            with ZipFile(file=dirpath / 'csv.zip', mode='w', compression=ZIP_DEFLATED) as csv_zip:  # noqa: E501
+                # the size of the CSV is not known in advance so allow it to exceed 2 GiB
+                zipped_file = csv_zip.open(FILENAME_ALL_CSV, mode='w', force_zip64=True)
+                # closing the text wrapper also closes the file in the zip
+                with io.TextIOWrapper(zipped_file, encoding='utf-8', newline='') as csvfile:
+                    success, msg = self._write_report_csv(report_id=report_id, csvfile=csvfile)
+        except PermissionError as e:
+            return False, str(e)
+
         if not success:
             return False, msg
 
-        files: list[tuple[Path, str]] = [
-            (dirpath / FILENAME_ALL_CSV, FILENAME_ALL_CSV),
-        ]
-        with ZipFile(file=dirpath / 'csv.zip', mode='w', compression=ZIP_DEFLATED) as csv_zip:
-            for path, filename in files:
-                if not path.exists():
-                    continue
-
-                csv_zip.write(path, filename)
-                path.unlink()
-
         success = False
         filename = ''
         if csv_zip.filename is not None:
@@ -265,7 +287,95 @@ class CSVExporter(CustomizableDateMixin):
 
         return success, filename
 
-    def to_csv_entry(self, event: 'ProcessedAccountingEvent') -> dict[str, Any]:
+    def export_report(self, report_id: int, directory: Path) -> tuple[bool, str]:
+        """Export the events of the report and the summary as CSV in the given directory,
+        written to the file as they are read from the DB"""
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / FILENAME_ALL_CSV, 'w', newline='', encoding='utf-8') as csvfile:  # noqa: E501
+                return self._write_report_csv(report_id=report_id, csvfile=csvfile)
+        except PermissionError as e:
+            return False, str(e)
+
+    def _write_report_csv(self, report_id: int, csvfile: TextIO) -> tuple[bool, str]:
+        """Writes the events of the report and the summary as CSV in the given file
+
+        The events are read from the DB in chunks of CSV_EXPORT_CHUNK_SIZE. Each chunk is
+        turned to CSV text in the process pool while the next ones are read and the text
+        is written as soon as it is ready, in the order of the events. The PnL totals
+        of the summary are summed up from the events as they are read. So the memory use
+        does not depend on the size of the report.
+        """
+        pnls = PnlTotals()
+        fieldnames: Optional[list[str]] = None
+        rows_num = 0
+        jobs: deque[gevent.Greenlet] = deque()
+
+        def write_rows(job: gevent.Greenlet) -> None:
+            nonlocal fieldnames
+            job_fieldnames, text = job.get()
+            if fieldnames is None:
+                fieldnames = job_fieldnames
+            elif job_fieldnames != fieldnames:
+                raise CSVWriteError(
+                    f'Failed to write {FILENAME_ALL_CSV} CSV due to events with '
+                    f'different fields {job_fieldnames} than {fieldnames}',
+                )
+            csvfile.write(text)
+
+        try:
+            with self.database.conn_transient.read_ctx() as cursor:
+                cursor.execute(
+                    'SELECT timestamp, data FROM pnl_events WHERE report_id=? ORDER BY identifier',  # noqa: E501
+                    (report_id,),
+                )
+                while len(entries := cursor.fetchmany(CSV_EXPORT_CHUNK_SIZE)) != 0:
+                    events = []
+                    for timestamp, data in entries:
+                        try:
+                            event = ProcessedAccountingEvent.deserialize_from_db(timestamp, data)  # noqa: E501
+                        except DeserializationError as e:
+                            log.error(f'Skipping PnL report event in the CSV export due to {e!s}')  # noqa: E501
+                            continue
+
+                        pnls[event.type] += event.pnl
+                        events.append(event)
+
+                    if len(events) == 0:
+                        continue
+
+                    jobs.append(self.greenlet_manager.spawn_in_process(
+                        task_name='PnL report CSV rows',
+                        method=self._to_csv_text,
+                        events=events,
+                        with_header=rows_num == 0,
+                    ))
+                    rows_num += len(events)
+                    if len(jobs) >= CSV_EXPORT_CHUNKS_IN_FLIGHT:
+                        write_rows(jobs.popleft())
+
+            while len(jobs) != 0:
+                write_rows(jobs.popleft())
+
+            if rows_num == 0:
+                return False, f'No events found for PnL report {report_id} to export'
+
+            assert fieldnames is not None, 'fieldnames are set since there are rows'
+            writer = DictWriter(csvfile, fieldnames=fieldnames)
+            try:
+                writer.writerows(self._summary_rows(events_num=rows_num, pnls=pnls))
+            except ValueError as e:
+                raise CSVWriteError(f'Failed to write {FILENAME_ALL_CSV} CSV due to {e!s}') from e  # noqa: E501
+        except ProcessPoolError as e:
+            return False, f'Failed to export the PnL report CSV due to {e!s}'
+        except CSVWriteError as e:
+            return False, str(e)
+        finally:
+            gevent.killall(jobs)
+
+        return True, ''
+
+    def to_csv_entry(self, event: ProcessedAccountingEvent) -> dict[str, Any]:
         dict_event = event.to_exported_dict(
             ts_converter=self.timestamp_to_date,
             eth_explorer=self.eth_explorer,
@@ -281,21 +391,25 @@ class CSVExporter(CustomizableDateMixin):
         self._add_pnl_type(event=event, dict_event=dict_event, amount_column='G', name='taxable')
         return dict_event
 
-    def export(
+    def _to_csv_text(
             self,
-            events: list['ProcessedAccountingEvent'],
-            pnls: PnlTotals,
-            directory: Path,
-    ) -> tuple[bool, str]:
-        serialized_events = [self.to_csv_entry(x) for idx, x in enumerate(events)]
-        self._maybe_add_summary(events=serialized_events, pnls=pnls)
+            events: list[ProcessedAccountingEvent],
+            with_header: bool,
+    ) -> tuple[list[str], str]:
+        """Turns the events to CSV rows. Returns the fieldnames and the CSV text
+
+        May raise:
+        - CSVWriteError if an event has fields not in the fieldnames of the first one
+        """
+        entries = [self.to_csv_entry(x) for x in events]
+        fieldnames = list(entries[0].keys())
+        text = io.StringIO(newline='')
+        writer = DictWriter(text, fieldnames=fieldnames)
+        if with_header:
+            writer.writeheader()
         try:
-            directory.mkdir(parents=True, exist_ok=True)
-            _dict_to_csv_file(
-                directory / FILENAME_ALL_CSV,
-                serialized_events,
-            )
-        except (CSVWriteError, PermissionError) as e:
-            return False, str(e)
+            writer.writerows(entries)
+        except ValueError as e:
+            raise CSVWriteError(f'Failed to write {FILENAME_ALL_CSV} CSV due to {e!s}') from e  # noqa: E501
 
-        return True, ''
+        return fieldnames, text.getvalue()
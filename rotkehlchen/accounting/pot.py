@@ -1,4 +1,5 @@
 import logging
+from contextlib import suppress
 from typing import TYPE_CHECKING, Any, Literal, Optional
 
 from rotkehlchen.accounting.cost_basis import CostBasisCalculator
@@ -6,16 +7,17 @@ from rotkehlchen.accounting.cost_basis.prefork import (
     handle_prefork_asset_acquisitions,
     handle_prefork_asset_spends,
 )
-from rotkehlchen.accounting.mixins.event import AccountingEventType
+from rotkehlchen.accounting.mixins.event import AccountingEventMixin, AccountingEventType
 from rotkehlchen.accounting.pnl import PNL, PnlTotals
 from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
 from rotkehlchen.accounting.transactions import TransactionsAccountant
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.assets import A_KFEE
 from rotkehlchen.constants.misc import ONE, ZERO, ZERO_PRICE
-from rotkehlchen.db.reports import DBAccountingReports
+from rotkehlchen.db.reports import DBReportDataWriter
 from rotkehlchen.db.settings import DBSettings
-from rotkehlchen.errors.misc import InputError, RemoteError
+from rotkehlchen.errors.asset import UnknownAsset, UnprocessableTradePair, UnsupportedAsset
+from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
 from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
@@ -61,18 +63,17 @@ class AccountingPot(CustomizableDateMixin):
         )
         self.query_start_ts = self.query_end_ts = Timestamp(0)
         self.report_id: Optional[int] = None
+        self.report_writer: Optional[DBReportDataWriter] = None
 
     def _add_processed_event(self, event: ProcessedAccountingEvent) -> None:
-        dbpnl = DBAccountingReports(self.database)
         self.processed_events.append(event)
+        if self.report_writer is None:
+            log.error(f'Could not write {event} data to the DB since no report is being generated')  # noqa: E501
+            return
+
         try:
-            dbpnl.add_report_data(
-                report_id=self.report_id,  # type: ignore # report id is initialized by now
-                time=event.timestamp,
-                ts_converter=self.timestamp_to_date,
-                event=event,
-            )
-        except (DeserializationError, InputError) as e:
+            self.report_writer.add(event=event, ts_converter=self.timestamp_to_date)
+        except DeserializationError as e:
             log.error(str(e))
             return
 
@@ -98,6 +99,22 @@ class AccountingPot(CustomizableDateMixin):
             )
         return rate
 
+    def prefetch_rates_in_profit_currency(self, events: list[AccountingEventMixin]) -> None:
+        """Prefetch the profit_currency prices of the assets of the given events at their
+        timestamps, so that get_rate_in_profit_currency finds them without a DB query each"""
+        queries: set[tuple[Asset, Asset, Timestamp]] = set()
+        for event in events:
+            if (timestamp := event.get_timestamp()) > self.query_end_ts:
+                break  # events are sorted and processing stops at the end of the report
+
+            with suppress(UnknownAsset, UnsupportedAsset, UnprocessableTradePair):
+                queries.update(
+                    (asset, self.profit_currency, timestamp) for asset in event.get_assets()
+                    if asset != self.profit_currency and asset.identifier not in self.ignored_asset_ids  # noqa: E501
+                )
+
+        PriceHistorian().prefetch_historical_prices(queries=list(queries))
+
     def reset(
             self,
             settings: DBSettings,
@@ -109,6 +126,7 @@ class AccountingPot(CustomizableDateMixin):
         with self.database.conn.read_ctx() as cursor:
             self.ignored_asset_ids = self.database.get_ignored_asset_ids(cursor)
         self.report_id = report_id
+        self.report_writer = DBReportDataWriter(database=self.database, report_id=report_id)
         self.profit_currency = self.settings.main_currency.resolve_to_asset_with_oracles()
         self.query_start_ts = start_ts
         self.query_end_ts = end_ts
@@ -117,6 +135,31 @@ class AccountingPot(CustomizableDateMixin):
         self.transactions.reset()
         self.processed_events = []
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Serializes the state that is needed to continue processing events from
+        the current point in a later report"""
+        return {
+            'cost_basis': self.cost_basis.serialize_state(),
+            'evm_accountants': self.transactions.evm_accounting_aggregators.serialize_state(),
+        }
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        """Restores the state returned by serialize_state. Should be called after reset.
+
+        May raise:
+        - DeserializationError if the given state is malformed
+        """
+        try:
+            self.cost_basis.restore_state(state['cost_basis'])
+            self.transactions.evm_accounting_aggregators.restore_state(state['evm_accountants'])
+        except KeyError as e:
+            raise DeserializationError(f'Missing key {e!s} in accounting checkpoint') from e
+
+    def flush_report_data(self) -> None:
+        """Writes any processed events still buffered to the DB"""
+        if self.report_writer is not None:
+            self.report_writer.flush()
+
     def add_acquisition(
             self,  # pylint: disable=unused-argument
             event_type: AccountingEventType,
@@ -111,6 +111,8 @@ class ProcessedAccountingEvent:
         )
         data['extra_data'] = self.extra_data
         data['notes'] = self.notes  # undo the tx_hash addition to notes before going to the DB
+        if self.cost_basis is not None:
+            data['cost_basis'] = self.cost_basis.serialize_for_db()
         data['index'] = self.index
         data['count_entire_amount_spend'] = self.count_entire_amount_spend
         data['count_cost_basis_pnl'] = self.count_cost_basis_pnl
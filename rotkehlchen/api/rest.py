@@ -156,8 +156,13 @@ from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.exchanges.utils import query_binance_exchange_pairs
 from rotkehlchen.fval import FVal
 from rotkehlchen.globaldb.assets_management import export_assets_from_file, import_assets_from_file
-from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.globaldb.handler import (
+    DEFAULT_HISTORICAL_PRICE_MISSES_TTL,
+    HISTORICAL_PRICE_MISSES_TTL_SETTING,
+    GlobalDBHandler,
+)
 from rotkehlchen.globaldb.updates import ASSETS_VERSION_KEY
+from rotkehlchen.greenlets.manager import get_process_jobs_stats
 from rotkehlchen.history.price import PriceHistorian
 from rotkehlchen.history.types import NOT_EXPOSED_SOURCES, HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.icons import (
@@ -172,6 +177,7 @@ from rotkehlchen.rotkehlchen import Rotkehlchen
 from rotkehlchen.serialization.serialize import process_result, process_result_list
 from rotkehlchen.types import (
     AVAILABLE_MODULES_MAP,
+    EVM_CHAINS_WITH_TRANSACTIONS_TYPE,
     EVM_LOCATIONS,
     SUPPORTED_BITCOIN_CHAINS,
     SUPPORTED_CHAIN_IDS,
@@ -435,6 +441,8 @@ class RestAPI():
                         }
                         if status_code:
                             returned_task_result['status_code'] = status_code
+                        if len(process_jobs := get_process_jobs_stats(greenlet)) != 0:
+                            returned_task_result['process_jobs'] = [x.serialize() for x in process_jobs]  # noqa: E501
                         result_dict = {
                             'result': returned_task_result,
                             'message': '',
@@ -443,8 +451,11 @@ class RestAPI():
                         self.rotkehlchen.api_task_greenlets.pop(idx)
                         return api_response(result=result_dict, status_code=HTTPStatus.OK)
                     # else task is still pending and the greenlet is running
+                    pending_task_result: dict[str, Any] = {'status': 'pending', 'outcome': None}
+                    if len(process_jobs := get_process_jobs_stats(greenlet)) != 0:
+                        pending_task_result['process_jobs'] = [x.serialize() for x in process_jobs]  # noqa: E501
                     result_dict = {
-                        'result': {'status': 'pending', 'outcome': None},
+                        'result': pending_task_result,
                         'message': f'The task with id {task_id} is still pending',
                     }
                     return api_response(result=result_dict, status_code=HTTPStatus.OK)
@@ -1705,12 +1716,13 @@ class RestAPI():
         )
         return api_response(result_dict, status_code=HTTPStatus.OK)
 
-    def export_processed_history_csv(self, directory_path: Path) -> Response:
+    @async_api_call()
+    def export_processed_history_csv(self, directory_path: Path) -> dict[str, Any]:
         success, msg = self.rotkehlchen.accountant.export(directory_path)
         if success is False:
-            return api_response(wrap_in_fail_result(msg), status_code=HTTPStatus.CONFLICT)
+            return wrap_in_fail_result(msg, status_code=HTTPStatus.CONFLICT)
 
-        return api_response(OK_RESULT, status_code=HTTPStatus.OK)
+        return OK_RESULT
 
     def download_processed_history_csv(self) -> Response:
         success, zipfile = self.rotkehlchen.accountant.export(directory_path=None)
@@ -2315,6 +2327,11 @@ class RestAPI():
         result_dict = _wrap_in_ok_result(process_result_list(list(nodes)))
         return api_response(result_dict, status_code=HTTPStatus.OK)
 
+    def get_rpc_nodes_stats(self, blockchain: EVM_CHAINS_WITH_TRANSACTIONS_TYPE) -> Response:
+        manager = self.rotkehlchen.chains_aggregator.get_chain_manager(blockchain)
+        result = manager.node_inquirer.get_nodes_stats()
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
+
     def add_rpc_node(self, node: WeightedNode) -> Response:
         try:
             self.rotkehlchen.data.db.add_rpc_node(node)
@@ -2799,24 +2816,15 @@ class RestAPI():
 
         message = ''
         status_code = HTTPStatus.OK
-        if only_cache is False:  # we query the chain
-            for chain_id in chain_ids:
-                evm_manager = self.rotkehlchen.chains_aggregator.get_evm_manager(chain_id)
-                try:
-                    evm_manager.transactions.query_chain(filter_query)
-                except RemoteError as e:
-                    transactions = None
-                    status_code = HTTPStatus.BAD_GATEWAY
-                    message = str(e)
-                    break
-                except sqlcipher.OperationalError as e:  # pylint: disable=no-member
-                    transactions = None
-                    status_code = HTTPStatus.BAD_REQUEST
-                    message = str(e)
-                    break
-
-            if status_code != HTTPStatus.OK:
-                return {'result': None, 'message': message, 'status_code': status_code}
+        if only_cache is False:  # we query the chains concurrently
+            errors = self.rotkehlchen.chains_aggregator.query_evm_transactions(
+                filter_query=filter_query,
+                chain_ids=chain_ids,
+            )
+            if len(errors) != 0:
+                error = next(iter(errors.values()))
+                status_code = HTTPStatus.BAD_GATEWAY if isinstance(error, RemoteError) else HTTPStatus.BAD_REQUEST  # noqa: E501
+                return {'result': None, 'message': str(error), 'status_code': status_code}
 
         # if needed, chain will have been queried by now so let's get everything from DB
         dbevmtx = DBEvmTx(self.rotkehlchen.data.db)
@@ -3284,6 +3292,41 @@ class RestAPI():
             status_code=HTTPStatus.CONFLICT,
         )
 
+    @staticmethod
+    def get_historical_price_misses(
+            from_asset: Optional[Asset],
+            to_asset: Optional[Asset],
+    ) -> Response:
+        globaldb = GlobalDBHandler()
+        result = {
+            'entries': globaldb.get_all_historical_price_misses(from_asset, to_asset),
+            'ttl': globaldb.get_setting_value(
+                name=HISTORICAL_PRICE_MISSES_TTL_SETTING,
+                default_value=DEFAULT_HISTORICAL_PRICE_MISSES_TTL,
+            ),
+        }
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
+
+    @staticmethod
+    def set_historical_price_misses_ttl(ttl: int) -> Response:
+        GlobalDBHandler().add_setting_value(name=HISTORICAL_PRICE_MISSES_TTL_SETTING, value=ttl)
+        return api_response(OK_RESULT, status_code=HTTPStatus.OK)
+
+    @staticmethod
+    def delete_historical_price_misses(
+            from_asset: Optional[Asset],
+            to_asset: Optional[Asset],
+            oracle: Optional[HistoricalPriceOracle],
+            only_expired: bool,
+    ) -> Response:
+        deleted = GlobalDBHandler().delete_historical_price_misses(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            oracle=oracle,
+            only_expired=only_expired,
+        )
+        return api_response(_wrap_in_ok_result(deleted), status_code=HTTPStatus.OK)
+
     @async_api_call()
     def get_avalanche_transactions(
             self,
@@ -83,6 +83,7 @@ from rotkehlchen.api.v1.resources import (
     ExchangesResource,
     ExternalServicesResource,
     HistoricalAssetsPriceResource,
+    HistoricalPriceMissesResource,
     HistoryActionableItemsResource,
     HistoryDownloadingResource,
     HistoryEventResource,
@@ -121,6 +122,7 @@ from rotkehlchen.api.v1.resources import (
     RefreshGeneralCacheResource,
     ReverseEnsResource,
     RpcNodesResource,
+    RpcNodesStatsResource,
     SettingsResource,
     StakingResource,
     StatisticsAssetBalanceResource,
@@ -272,6 +274,7 @@ URLS_V1: URLS = [
     ('/blockchains/evm/accounts', EvmAccountsResource),
     ('/blockchains/<string:blockchain>/accounts', BlockchainsAccountsResource),
     ('/blockchains/<string:blockchain>/nodes', RpcNodesResource),
+    ('/blockchains/<string:blockchain>/nodes/stats', RpcNodesStatsResource),
     ('/blockchains/<string:blockchain>/tokens/detect', DetectTokensResource),
     ('/blockchains/<string:blockchain>/xpub', BTCXpubResource),
     ('/blockchains/evm/transactions/add-hash', EvmTransactionsHashResource),
@@ -292,6 +295,7 @@ URLS_V1: URLS = [
     ('/assets/prices/latest', LatestAssetsPriceResource),
     ('/assets/prices/latest/all', AllLatestAssetsPriceResource),
     ('/assets/prices/historical', HistoricalAssetsPriceResource),
+    ('/assets/prices/historical/misses', HistoricalPriceMissesResource),
     ('/assets/ignored', IgnoredAssetsResource),
     ('/assets/updates', AssetUpdatesResource),
     ('/assets/user', UserAssetsResource),
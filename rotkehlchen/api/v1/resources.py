@@ -89,6 +89,8 @@ from rotkehlchen.api.v1.schemas import (
     ExternalServicesResourceDeleteSchema,
     FileListSchema,
     HistoricalAssetsPriceSchema,
+    HistoricalPriceMissesDeleteSchema,
+    HistoricalPriceMissesTTLSchema,
     HistoryEventSchema,
     HistoryExportingSchema,
     HistoryProcessingDebugImportSchema,
@@ -125,6 +127,7 @@ from rotkehlchen.api.v1.schemas import (
     RpcNodeEditSchema,
     RpcNodeListDeleteSchema,
     RpcNodeSchema,
+    RpcNodesStatsSchema,
     SingleAssetIdentifierSchema,
     SingleAssetWithOraclesIdentifierSchema,
     SingleFileSchema,
@@ -192,6 +195,7 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.history.types import HistoricalPriceOracle
 from rotkehlchen.serialization.serialize import process_result
 from rotkehlchen.types import (
+    EVM_CHAINS_WITH_TRANSACTIONS_TYPE,
     SUPPORTED_CHAIN_IDS,
     SUPPORTED_EVM_CHAINS,
     AddressbookEntry,
@@ -635,6 +639,16 @@ class RpcNodesResource(BaseMethodView):
         return self.rest_api.delete_rpc_node(identifier=identifier, blockchain=blockchain)
 
 
+class RpcNodesStatsResource(BaseMethodView):
+
+    get_schema = RpcNodesStatsSchema()
+
+    @require_loggedin_user()
+    @use_kwargs(get_schema, location='view_args')
+    def get(self, blockchain: EVM_CHAINS_WITH_TRANSACTIONS_TYPE) -> Response:
+        return self.rest_api.get_rpc_nodes_stats(blockchain=blockchain)
+
+
 class ExternalServicesResource(BaseMethodView):
 
     put_schema = ExternalServicesResourceAddSchema()
@@ -1453,8 +1467,11 @@ class HistoryExportingResource(BaseMethodView):
 
     @require_loggedin_user()
     @use_kwargs(get_schema, location='json_and_query')
-    def get(self, directory_path: Path) -> Response:
-        return self.rest_api.export_processed_history_csv(directory_path=directory_path)
+    def get(self, async_query: bool, directory_path: Path) -> Response:
+        return self.rest_api.export_processed_history_csv(
+            async_query=async_query,
+            directory_path=directory_path,
+        )
 
 
 class HistoryDownloadingResource(BaseMethodView):
@@ -2399,6 +2416,36 @@ class HistoricalAssetsPriceResource(BaseMethodView):
         )
 
 
+class HistoricalPriceMissesResource(BaseMethodView):
+
+    get_schema = ManualPriceRegisteredSchema()
+    patch_schema = HistoricalPriceMissesTTLSchema()
+    delete_schema = HistoricalPriceMissesDeleteSchema()
+
+    @use_kwargs(get_schema, location='json_and_query')
+    def get(self, from_asset: Optional[Asset], to_asset: Optional[Asset]) -> Response:
+        return self.rest_api.get_historical_price_misses(from_asset=from_asset, to_asset=to_asset)  # noqa: E501
+
+    @use_kwargs(patch_schema, location='json')
+    def patch(self, ttl: int) -> Response:
+        return self.rest_api.set_historical_price_misses_ttl(ttl=ttl)
+
+    @use_kwargs(delete_schema, location='json')
+    def delete(
+            self,
+            from_asset: Optional[Asset],
+            to_asset: Optional[Asset],
+            oracle: Optional[HistoricalPriceOracle],
+            only_expired: bool,
+    ) -> Response:
+        return self.rest_api.delete_historical_price_misses(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            oracle=oracle,
+            only_expired=only_expired,
+        )
+
+
 class NamedOracleCacheResource(BaseMethodView):
 
     post_schema = NamedOracleCacheCreateSchema()
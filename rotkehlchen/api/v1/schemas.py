@@ -79,6 +79,7 @@ from rotkehlchen.types import (
     AVAILABLE_MODULES_MAP,
     DEFAULT_ADDRESS_NAME_PRIORITY,
     EVM_CHAIN_IDS_WITH_TRANSACTIONS,
+    EVM_CHAINS_WITH_TRANSACTIONS,
     EVM_LOCATIONS,
     NON_EVM_CHAINS,
     SUPPORTED_CHAIN_IDS,
@@ -1239,6 +1240,15 @@ class ModifiableSettingsSchema(Schema):
         validate=webargs.validate.OneOf(choices=DEFAULT_ADDRESS_NAME_PRIORITY),
     ), load_default=DEFAULT_ADDRESS_NAME_PRIORITY)
     include_fees_in_cost_basis = fields.Boolean(load_default=None)
+    pnl_checkpoints_interval = fields.Integer(
+        strict=True,
+        validate=webargs.validate.Range(
+            min=0,
+            error='The PnL report checkpoints interval should be >= 0',
+        ),
+        load_default=None,
+    )
+    fixed_point_cost_basis = fields.Boolean(load_default=None)
 
     @validates_schema
     def validate_settings_schema(
@@ -1290,6 +1300,8 @@ class ModifiableSettingsSchema(Schema):
             eth_staking_taxable_after_withdrawal_enabled=data['eth_staking_taxable_after_withdrawal_enabled'],  # noqa: 501
             address_name_priority=data['address_name_priority'],
             include_fees_in_cost_basis=data['include_fees_in_cost_basis'],
+            pnl_checkpoints_interval=data['pnl_checkpoints_interval'],
+            fixed_point_cost_basis=data['fixed_point_cost_basis'],
         )
 
 
@@ -1515,7 +1527,7 @@ class AccountingReportDataSchema(DBPaginationSchema, DBOrderBySchema):
         }
 
 
-class HistoryExportingSchema(Schema):
+class HistoryExportingSchema(AsyncQueryArgumentSchema):
     directory_path = DirectoryField(required=True)
 
 
@@ -2480,6 +2492,15 @@ class ManualPriceDeleteSchema(Schema):
     timestamp = TimestampField(required=True)
 
 
+class HistoricalPriceMissesDeleteSchema(ManualPriceRegisteredSchema):
+    oracle = HistoricalPriceOracleField(load_default=None)
+    only_expired = fields.Boolean(load_default=False)
+
+
+class HistoricalPriceMissesTTLSchema(Schema):
+    ttl = fields.Integer(required=True, validate=webargs.validate.Range(min=0))
+
+
 class AvalancheTransactionQuerySchema(AsyncQueryArgumentSchema):
     address = EvmAddressField(required=True)
     from_timestamp = TimestampField(load_default=Timestamp(0))
@@ -2839,6 +2860,13 @@ class RpcNodeSchema(Schema):
     blockchain = BlockchainField(required=True, exclude_types=(SupportedBlockchain.ETHEREUM_BEACONCHAIN,))  # noqa: E501
 
 
+class RpcNodesStatsSchema(Schema):
+    blockchain = BlockchainField(
+        required=True,
+        exclude_types=tuple(x for x in SupportedBlockchain if x not in EVM_CHAINS_WITH_TRANSACTIONS),  # noqa: E501
+    )
+
+
 class RpcAddNodeSchema(Schema):
     blockchain = BlockchainField(required=True, exclude_types=(SupportedBlockchain.ETHEREUM_BEACONCHAIN,))  # noqa: E501
     name = fields.String(
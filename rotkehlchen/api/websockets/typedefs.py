@@ -22,6 +22,7 @@ class WSMessageType(Enum):
     MISSING_API_KEY = auto()
     HISTORY_EVENTS_STATUS = auto()
     REFRESH_BALANCES = auto()
+    EVM_TRANSACTIONS_SYNC_STATUS = auto()
 
     def __str__(self) -> str:
         return self.name.lower()  # pylint: disable=no-member
@@ -38,6 +39,15 @@ class TransactionStatusStep(Enum):
         return self.name.lower()  # pylint: disable=no-member
 
 
+class EvmTransactionsSyncStep(Enum):
+    QUERYING_CHAIN_STARTED = auto()
+    QUERYING_CHAIN_STATUS_UPDATE = auto()
+    QUERYING_CHAIN_FINISHED = auto()
+
+    def __str__(self) -> str:
+        return self.name.lower()  # pylint: disable=no-member
+
+
 class HistoryEventsStep(Enum):
     QUERYING_EVENTS_STARTED = auto()
     QUERYING_EVENTS_STATUS_UPDATE = auto()
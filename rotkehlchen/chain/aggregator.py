@@ -4,9 +4,22 @@ from collections import defaultdict
 from collections.abc import Iterator
 from importlib import import_module
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, TypeVar, cast, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+    cast,
+    get_args,
+    overload,
+)
 
+import gevent
 from gevent.lock import Semaphore
+from pysqlcipher3 import dbapi2 as sqlcipher
 from web3.exceptions import BadFunctionCallOutput
 
 from rotkehlchen.accounting.structures.balance import Balance, BalanceSheet
@@ -95,6 +108,7 @@ if TYPE_CHECKING:
     from rotkehlchen.chain.substrate.manager import SubstrateManager
     from rotkehlchen.db.dbhandler import DBHandler
     from rotkehlchen.db.drivers.gevent import DBCursor
+    from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
     from rotkehlchen.externalapis.beaconchain import BeaconChain
 
 logger = logging.getLogger(__name__)
@@ -1264,6 +1278,39 @@ class ChainsAggregator(CacheableMixIn, LockableQueryMixIn):
     ) -> 'EvmManager':  # type ignore below due to inability to understand limitation
         return self.get_chain_manager(chain_id.to_blockchain())  # type: ignore[arg-type]
 
+    def query_evm_transactions(
+            self,
+            filter_query: 'EvmTransactionsFilterQuery',
+            chain_ids: Optional[tuple[SUPPORTED_CHAIN_IDS, ...]] = None,
+    ) -> dict[SUPPORTED_CHAIN_IDS, Union[RemoteError, sqlcipher.OperationalError]]:  # pylint: disable=no-member  # noqa: E501
+        """Queries the transactions of the filter's accounts in the given evm chains, or all
+        of them if not given. Each chain is queried in its own greenlet since they use
+        different etherscan instances with separate rate limits.
+
+        A chain query that fails does not stop the rest. Returns the errors per chain.
+        """
+        if chain_ids is None:
+            chain_ids = get_args(SUPPORTED_CHAIN_IDS)
+
+        def query_chain(chain_id: SUPPORTED_CHAIN_IDS) -> Optional[Union[RemoteError, sqlcipher.OperationalError]]:  # pylint: disable=no-member  # noqa: E501
+            try:
+                self.get_evm_manager(chain_id).transactions.query_chain(filter_query)
+            except (RemoteError, sqlcipher.OperationalError) as e:  # pylint: disable=no-member
+                log.error(f'Failed to query {chain_id.to_name()} transactions due to {e!s}')
+                return e
+            return None
+
+        greenlets = {chain_id: gevent.spawn(query_chain, chain_id) for chain_id in chain_ids}
+        try:
+            gevent.joinall(list(greenlets.values()), raise_error=True)
+        finally:  # don't leave queries running if a query failed or we got killed
+            gevent.killall(list(greenlets.values()))
+
+        return {
+            chain_id: error for chain_id, greenlet in greenlets.items()
+            if (error := greenlet.get()) is not None
+        }
+
     def is_contract(self, address: ChecksumEvmAddress, chain: SUPPORTED_EVM_CHAINS) -> bool:
         return self.get_chain_manager(chain).node_inquirer.get_code(address) != '0x'
 
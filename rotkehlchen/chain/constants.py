@@ -3,6 +3,8 @@ from typing import Final
 from rotkehlchen.types import SUPPORTED_BLOCKCHAIN_TO_CHAINID, SupportedBlockchain
 
 DEFAULT_EVM_RPC_TIMEOUT = 10
+# Number of calls sent in a single JSON-RPC batch request to evm nodes
+DEFAULT_EVM_RPC_BATCH_SIZE = 50
 NON_BITCOIN_CHAINS = [
     SupportedBlockchain.AVALANCHE,
     SupportedBlockchain.POLKADOT,
@@ -16,6 +16,7 @@ from rotkehlchen.chain.evm.decoding.structures import (
     TransferEnrichmentOutput,
 )
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
+from rotkehlchen.chain.evm.decoding.utils import decoding_rule_for
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants.assets import A_1INCH, A_ETH, A_GTC
@@ -75,6 +76,7 @@ class EthereumTransactionDecoder(EVMTransactionDecoder):
             ],
         )
 
+    @decoding_rule_for(GTC_CLAIM, ONEINCH_CLAIM, GNOSIS_CHAIN_BRIDGE_RECEIVE)
     def _maybe_enrich_transfers(
             self,
             token: Optional[EvmToken],  # pylint: disable=unused-argument
@@ -120,6 +122,7 @@ class EthereumTransactionDecoder(EVMTransactionDecoder):
 
         return DEFAULT_DECODING_OUTPUT
 
+    @decoding_rule_for(GOVERNORALPHA_PROPOSE)
     def _maybe_decode_governance(
             self,
             token: Optional[EvmToken],  # pylint: disable=unused-argument
@@ -32,8 +32,7 @@ class DefiChad():
             addresses: Sequence[ChecksumEvmAddress],
     ) -> dict[ChecksumEvmAddress, list[DefiProtocolBalances]]:
         defi_balances = defaultdict(list)
-        for account in addresses:
-            balances = self.zerion_sdk.all_balances_for_account(account)
+        for account, balances in self.zerion_sdk.all_balances_for_accounts(addresses).items():
             if len(balances) != 0:
                 defi_balances[account] = balances
         return defi_balances
@@ -1,5 +1,10 @@
 import logging
-from typing import TYPE_CHECKING, Optional
+from collections.abc import Iterable, Sequence
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, Optional
+
+import gevent
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.structures.balance import Balance
 from rotkehlchen.assets.asset import EvmToken
@@ -13,6 +18,7 @@ from rotkehlchen.chain.ethereum.defi.structures import (
 from rotkehlchen.chain.ethereum.utils import token_normalized_value_decimals
 from rotkehlchen.chain.evm.constants import ETH_SPECIAL_ADDRESS
 from rotkehlchen.chain.evm.contracts import EvmContract
+from rotkehlchen.chain.evm.tokens import get_chunk_size_call_order
 from rotkehlchen.chain.evm.types import NodeName, WeightedNode, string_to_evm_address
 from rotkehlchen.constants.assets import A_DAI, A_USDC
 from rotkehlchen.constants.misc import ONE, ZERO, ZERO_PRICE
@@ -37,6 +43,13 @@ log = RotkehlchenLogsAdapter(logger)
 
 
 PROTOCOLS_QUERY_NUM = 40  # number of protocols to query in a single call
+ZERION_QUERY_CONCURRENCY = 4  # number of multicalls of protocol balances queried at once
+# Rough upper bound of the gas a getProtocolBalances call of PROTOCOLS_QUERY_NUM protocols
+# takes and the gas that most open nodes allow a single eth_call to use. Multicalls of
+# protocol balances are sized by them since a single getBalances call of all the protocols
+# already goes above the limits of open nodes https://github.com/rotki/rotki/issues/1969
+PROTOCOL_BALANCES_CALL_GAS = 5_000_000
+ETH_CALL_GAS_LIMIT = 25_000_000
 KNOWN_ZERION_PROTOCOL_NAMES = (
     'Curve • Vesting',
     'Curve • Liquidity Gauges',
@@ -288,12 +301,140 @@ class ZerionSDK():
 
         return result
 
+    def _query_protocol_balances_chunk(
+            self,
+            calls: list[tuple[ChecksumEvmAddress, list[str]]],
+            call_order: Sequence[WeightedNode],
+    ) -> list[tuple[ChecksumEvmAddress, list]]:
+        """Queries the getProtocolBalances calls of many accounts in one multicall and
+        decodes their results. Calls that fail inside the multicall are queried again
+        on their own and so are all the calls if the whole multicall fails, for example
+        by running out of gas.
+
+        May raise:
+        - RemoteError
+        """
+        try:
+            output = self.ethereum.multicall_2(
+                calls=[(
+                    self.contract.address,
+                    self.contract.encode(method_name='getProtocolBalances', arguments=[account, protocol_names]),  # noqa: E501
+                ) for account, protocol_names in calls],
+                require_success=False,
+                call_order=call_order,
+            )
+        except RemoteError as e:
+            log.debug(f'Zerion protocol balances multicall of {len(calls)} calls failed due to {e!s}. Querying them one by one')  # noqa: E501
+            output = [(False, b'')] * len(calls)
+
+        results = []
+        for (account, protocol_names), (success, data) in zip(calls, output):
+            if success is True:
+                result = self.contract.decode(data, 'getProtocolBalances', arguments=[account, protocol_names])[0]  # noqa: E501
+            else:
+                log.debug(f'Zerion protocol balances query of {account} failed in multicall. Querying it on its own')  # noqa: E501
+                result = self.contract.call(
+                    node_inquirer=self.ethereum,
+                    method_name='getProtocolBalances',
+                    arguments=[account, protocol_names],
+                )
+            results.append((account, result))
+
+        return results
+
+    def _query_chain_for_accounts_balances(
+            self,
+            accounts: Sequence[ChecksumEvmAddress],
+    ) -> dict[ChecksumEvmAddress, list]:
+        """Queries the getProtocolBalances results of many accounts
+
+        The calls of all accounts are packed in multicalls of as many calls as fit in the
+        gas limit of an eth_call. The multicalls are queried concurrently, each one
+        starting from a different node of the call order.
+
+        May raise:
+        - RemoteError
+        """
+        _, call_order = get_chunk_size_call_order(self.ethereum)
+        protocol_chunks: list[list[str]] = list(get_chunks(
+            list(self._get_protocol_names()),
+            n=PROTOCOLS_QUERY_NUM,
+        ))
+        calls = [
+            (account, protocol_names)
+            for account in accounts
+            for protocol_names in protocol_chunks
+        ]
+        pool = Pool(size=ZERION_QUERY_CONCURRENCY)
+        greenlets = [pool.spawn(
+            self._query_protocol_balances_chunk,
+            calls=chunk,
+            call_order=call_order[idx % len(call_order):] + call_order[:idx % len(call_order)],
+        ) for idx, chunk in enumerate(get_chunks(calls, n=ETH_CALL_GAS_LIMIT // PROTOCOL_BALANCES_CALL_GAS))]  # noqa: E501
+        try:
+            for greenlet in gevent.iwait(greenlets):
+                greenlet.get()  # re-raise the error of a failed multicall
+        finally:  # don't leave queries running if a query failed or we got killed
+            gevent.killall(greenlets)
+
+        results: dict[ChecksumEvmAddress, list] = {account: [] for account in accounts}
+        for greenlet in greenlets:  # in the order of the calls to keep the protocols order
+            for account, result in greenlet.value:
+                results[account].extend(result)
+
+        return results
+
+    def all_balances_for_accounts(
+            self,
+            accounts: Sequence[ChecksumEvmAddress],
+    ) -> dict[ChecksumEvmAddress, list[DefiProtocolBalances]]:
+        """Gets all protocol balances of many accounts
+
+        With an own node each account is queried as in all_balances_for_account. Otherwise
+        the protocol balances of all accounts are queried together in multicalls.
+        The prices of all the tokens found are queried together before the balances
+        are deserialized.
+
+        May raise:
+        - RemoteError
+        """
+        if self.ethereum.get_own_node_info() is not None:
+            return {account: self.all_balances_for_account(account) for account in accounts}
+
+        results = self._query_chain_for_accounts_balances(accounts=accounts)
+        self._query_tokens_prices(results.values())
+        return {
+            account: self._deserialize_protocol_balances(result)
+            for account, result in results.items()
+        }
+
+    @staticmethod
+    def _query_tokens_prices(results: Iterable[list]) -> None:
+        """Queries the USD prices of the known tokens of the given getProtocolBalances results
+        together so that the prices are cached when the balances get deserialized"""
+        tokens = set()
+        for result in results:
+            for entry in result:
+                for adapter_balance in entry[1]:
+                    for balances in adapter_balance[1]:
+                        for balance in (balances[0], *balances[1]):
+                            with suppress(DeserializationError, UnknownAsset, WrongAssetType):
+                                tokens.add(EvmToken(ethaddress_to_identifier(deserialize_evm_address(balance[0][0]))))  # noqa: E501
+
+        if len(tokens) != 0:
+            Inquirer.find_usd_prices(assets=list(tokens))
+
     def all_balances_for_account(self, account: ChecksumEvmAddress) -> list[DefiProtocolBalances]:
         """Calls the contract's getBalances() to get all protocol balances for account
 
         https://docs.zerion.io/smart-contracts/adapterregistry-v3#getbalances
         """
         result = self._query_chain_for_all_balances(account=account)
+        return self._deserialize_protocol_balances(result)
+
+    def _deserialize_protocol_balances(self, result: list[Any]) -> list[DefiProtocolBalances]:
+        """Deserializes the protocol balances of an account from the result of the
+        getBalances or getProtocolBalances calls"""
         protocol_balances = []
         for entry in result:
             protocol = DefiProtocol(
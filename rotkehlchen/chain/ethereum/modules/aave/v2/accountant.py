@@ -1,6 +1,6 @@
 from collections import defaultdict
 from collections.abc import Iterator
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.accounting.structures.evm_event import get_tx_event_type_identifier
@@ -10,7 +10,9 @@ from rotkehlchen.chain.evm.accounting.interfaces import ModuleAccountantInterfac
 from rotkehlchen.chain.evm.accounting.structures import TxEventSettings
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
+from rotkehlchen.serialization.deserialize import deserialize_evm_address, deserialize_fval
 from rotkehlchen.types import ChecksumEvmAddress
 
 from ..constants import CPT_AAVE_V2
@@ -26,6 +28,21 @@ class Aavev2Accountant(ModuleAccountantInterface):
         self.assets_borrowed: dict[tuple[ChecksumEvmAddress, Asset], FVal] = defaultdict(FVal)
         self.assets_supplied: dict[tuple[ChecksumEvmAddress, Asset], FVal] = defaultdict(FVal)
 
+    def serialize_state(self) -> dict[str, Any]:
+        return {
+            name: [(address, asset.identifier, str(amount)) for (address, asset), amount in balances.items()]  # noqa: E501
+            for name, balances in (('borrowed', self.assets_borrowed), ('supplied', self.assets_supplied))  # noqa: E501
+        }
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        location = 'aave v2 accounting checkpoint'
+        try:
+            for name, balances in (('borrowed', self.assets_borrowed), ('supplied', self.assets_supplied)):  # noqa: E501
+                for address, asset_identifier, amount in state[name]:
+                    balances[(deserialize_evm_address(address), Asset(asset_identifier))] = deserialize_fval(amount, name=f'{name} amount', location=location)  # noqa: E501
+        except (KeyError, ValueError) as e:
+            raise DeserializationError(f'Malformed {location}: {e!s}') from e
+
     def _process_borrow(
             self,
             pot: 'AccountingPot',  # pylint: disable=unused-argument
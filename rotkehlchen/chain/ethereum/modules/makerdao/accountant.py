@@ -1,6 +1,6 @@
 from collections import defaultdict
 from collections.abc import Iterator
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Any, cast
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.accounting.structures.evm_event import get_tx_event_type_identifier
@@ -9,7 +9,9 @@ from rotkehlchen.chain.evm.accounting.interfaces import ModuleAccountantInterfac
 from rotkehlchen.chain.evm.accounting.structures import TxAccountingTreatment, TxEventSettings
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_DAI
+from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
+from rotkehlchen.serialization.deserialize import deserialize_evm_address, deserialize_fval
 from rotkehlchen.types import ChecksumEvmAddress
 
 from .constants import CPT_DSR, CPT_MIGRATION, CPT_VAULT
@@ -25,6 +27,22 @@ class MakerdaoAccountant(ModuleAccountantInterface):
         self.vault_balances: dict[str, FVal] = defaultdict(FVal)
         self.dsr_balances: dict[ChecksumEvmAddress, FVal] = defaultdict(FVal)
 
+    def serialize_state(self) -> dict[str, Any]:
+        return {
+            'vault_balances': {cdp_id: str(x) for cdp_id, x in self.vault_balances.items()},
+            'dsr_balances': {address: str(x) for address, x in self.dsr_balances.items()},
+        }
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        location = 'makerdao accounting checkpoint'
+        try:
+            for cdp_id, balance in state['vault_balances'].items():
+                self.vault_balances[cdp_id] = deserialize_fval(balance, name='vault balance', location=location)  # noqa: E501
+            for address, balance in state['dsr_balances'].items():
+                self.dsr_balances[deserialize_evm_address(address)] = deserialize_fval(balance, name='dsr balance', location=location)  # noqa: E501
+        except KeyError as e:
+            raise DeserializationError(f'Missing key {e!s} in {location}') from e
+
     def _process_vault_dai_generation(
             self,
             pot: 'AccountingPot',  # pylint: disable=unused-argument
@@ -18,6 +18,7 @@ from rotkehlchen.chain.evm.decoding.structures import (
     TransferEnrichmentOutput,
 )
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails, EventCategory
+from rotkehlchen.chain.evm.decoding.utils import decoding_rule_for
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.types import SUSHISWAP_PROTOCOL, DecoderEventMappingType, EvmTransaction
@@ -36,6 +37,7 @@ SUSHISWAP_V2_INIT_CODE_HASH = '0xe18a34eb0e04b04f7a0ac29a6e80748dca96319b42c54d6
 
 class SushiswapDecoder(DecoderInterface):
 
+    @decoding_rule_for(SWAP_SIGNATURE)
     def _maybe_decode_v2_swap(
             self,
             token: Optional[EvmToken],  # pylint: disable=unused-argument
@@ -57,6 +59,7 @@ class SushiswapDecoder(DecoderInterface):
             )
         return DEFAULT_DECODING_OUTPUT
 
+    @decoding_rule_for(MINT_SIGNATURE, BURN_SIGNATURE)
     def _maybe_decode_v2_liquidity_addition_and_removal(
             self,
             token: Optional[EvmToken],  # pylint: disable=unused-argument
@@ -7,7 +7,7 @@ from rotkehlchen.chain.ethereum.modules.aave.v1.decoder import DEFAULT_DECODING_
 from rotkehlchen.chain.evm.decoding.interfaces import DecoderInterface
 from rotkehlchen.chain.evm.decoding.structures import ActionItem, DecodingOutput
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails, EventCategory
-from rotkehlchen.chain.evm.decoding.utils import maybe_reshuffle_events
+from rotkehlchen.chain.evm.decoding.utils import decoding_rule_for, maybe_reshuffle_events
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -31,6 +31,7 @@ ETH_PURCHASE = b'\x7f@\x91\xb4l3\xe9\x18\xa0\xf3\xaaB0vA\xd1{\xb6p)BzSi\xe5K59\x
 
 class Uniswapv1Decoder(DecoderInterface):
 
+    @decoding_rule_for(TOKEN_PURCHASE, ETH_PURCHASE)
     def _maybe_decode_swap(
             self,
             token: Optional[EvmToken],  # pylint: disable=unused-argument
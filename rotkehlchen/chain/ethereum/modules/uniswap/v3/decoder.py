@@ -20,6 +20,7 @@ from rotkehlchen.chain.evm.decoding.structures import (
     TransferEnrichmentOutput,
 )
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails, EventCategory
+from rotkehlchen.chain.evm.decoding.utils import decoding_rule_for
 from rotkehlchen.chain.evm.structures import EvmTxReceiptLog, SwapData
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants.assets import A_ETH, A_WETH
@@ -162,6 +163,7 @@ class Uniswapv3Decoder(DecoderInterface):
 
         return DEFAULT_DECODING_OUTPUT
 
+    @decoding_rule_for(SWAP_SIGNATURE)
     def _maybe_decode_v3_swap(
             self,
             token: Optional[EvmToken],  # pylint: disable=unused-argument
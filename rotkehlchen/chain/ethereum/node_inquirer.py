@@ -12,7 +12,7 @@ from eth_typing import BlockNumber, HexStr
 from web3 import Web3
 from web3.exceptions import TransactionNotFound
 
-from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_TIMEOUT
+from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_BATCH_SIZE, DEFAULT_EVM_RPC_TIMEOUT
 from rotkehlchen.chain.ethereum.constants import (
     ARCHIVE_NODE_CHECK_ADDRESS,
     ARCHIVE_NODE_CHECK_BLOCK,
@@ -73,6 +73,7 @@ class EthereumInquirer(EvmNodeInquirer, LockableQueryMixIn):
             database: 'DBHandler',
             connect_at_start: Sequence[WeightedNode],
             rpc_timeout: int = DEFAULT_EVM_RPC_TIMEOUT,
+            rpc_batch_size: int = DEFAULT_EVM_RPC_BATCH_SIZE,
     ) -> None:
         etherscan = EthereumEtherscan(
             database=database,
@@ -90,6 +91,7 @@ class EthereumInquirer(EvmNodeInquirer, LockableQueryMixIn):
             contracts=contracts,
             connect_at_start=connect_at_start,
             rpc_timeout=rpc_timeout,
+            rpc_batch_size=rpc_batch_size,
             contract_multicall=contracts.contract(string_to_evm_address('0x5BA1e12693Dc8F9c48aAD8770482f4739bEeD696')),  # noqa: E501
             contract_scan=contracts.contract(string_to_evm_address('0x86F25b64e1Fe4C5162cDEeD5245575D32eC549db')),  # noqa: E501
             dsproxy_registry=contracts.contract(string_to_evm_address('0x4678f0a6958e4D2Bc4F1BAF7Bc52E8F3564f3fE4')),  # noqa: E501
@@ -2,7 +2,7 @@ import abc
 import logging
 from functools import reduce
 from operator import mul
-from typing import TYPE_CHECKING, NamedTuple, Optional
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
 
 from eth_utils import to_checksum_address
 from web3.types import BlockIdentifier
@@ -15,21 +15,34 @@ from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants.assets import A_DAI, A_ETH, A_USD, A_USDC, A_USDT, A_WETH
 from rotkehlchen.constants.misc import ONE, ZERO, ZERO_PRICE
 from rotkehlchen.constants.resolver import ethaddress_to_identifier
+from rotkehlchen.constants.timing import DAY_IN_SECONDS, MONTH_IN_SECONDS
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.defi import DefiPoolError
 from rotkehlchen.errors.price import PriceQueryUnsupportedAsset
 from rotkehlchen.fval import FVal
+from rotkehlchen.globaldb.cache import (
+    compute_cache_key,
+    globaldb_delete_general_cache,
+    globaldb_get_general_cache_last_queried_ts_by_key,
+    globaldb_get_general_cache_values,
+    globaldb_set_general_cache_values,
+)
+from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.interfaces import CurrentPriceOracleInterface
 from rotkehlchen.logging import RotkehlchenLogsAdapter
-from rotkehlchen.types import ChecksumEvmAddress, EvmTokenKind, Price
-from rotkehlchen.utils.mixins.cacheable import CacheableMixIn, cache_response_timewise
+from rotkehlchen.types import ChecksumEvmAddress, EvmTokenKind, GeneralCacheType, Price
+from rotkehlchen.utils.misc import ts_now
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.node_inquirer import EthereumInquirer
 
 UNISWAP_FACTORY_DEPLOYED_BLOCK = 12369621
 SINGLE_SIDE_USD_POOL_LIMIT = 5000
+# Pools and routes cached in the global DB are queried again after these many seconds. The
+# ones that were not found sooner, since new pools can be created any time.
+POOLS_CACHE_TTL = MONTH_IN_SECONDS
+NO_POOLS_CACHE_TTL = DAY_IN_SECONDS * 3
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -48,13 +61,21 @@ class PoolPrice(NamedTuple):
         )
 
 
-class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
+class UniswapOracle(CurrentPriceOracleInterface):
     """
     Provides shared logic between Uniswap V2 and Uniswap V3 to use them as price oracles.
+
+    The pools of each pair of tokens and the routes of pools between tokens are cached in
+    the global DB, since pools never change once deployed. They are queried again once
+    they are older than POOLS_CACHE_TTL, or NO_POOLS_CACHE_TTL if none was found, so that
+    changes of the liquidity of the pools are taken into account.
     """
+    # Method of the pool contracts that returns what the price is calculated from
+    pool_price_method: str
+
     def __init__(self, ethereum_inquirer: 'EthereumInquirer', version: int):
-        CacheableMixIn.__init__(self)
         CurrentPriceOracleInterface.__init__(self, oracle_name=f'Uniswap V{version} oracle')
+        self.version = version
         self.ethereum = ethereum_inquirer
         self.weth = A_WETH.resolve_to_evm_token()
         self.routing_assets = [
@@ -75,9 +96,20 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
             token_0: EvmToken,
             token_1: EvmToken,
     ) -> list[str]:
-        """Given two tokens returns a list of pools where they can be swapped"""
+        """Given two tokens queries the chain for a list of pools where they can be swapped"""
+
+    @abc.abstractmethod
+    def get_pool_contract(self, pool_addr: ChecksumEvmAddress) -> EvmContract:
+        """Returns the contract of the pool at the given address"""
 
     @abc.abstractmethod
+    def decode_pool_price(self, pool_contract: EvmContract, output: list[bytes]) -> PoolPrice:
+        """Returns the PoolPrice of the pool from the output of its pool_price_method,
+        token0 and token1 calls.
+        May raise:
+        - DefiPoolError
+        """
+
     def get_pool_price(
             self,
             pool_addr: ChecksumEvmAddress,
@@ -88,6 +120,65 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
         May raise:
         - DefiPoolError
         """
+        return self.get_pools_prices(pool_addrs=[pool_addr], block_identifier=block_identifier)[0]  # noqa: E501
+
+    def get_pools_prices(
+            self,
+            pool_addrs: list[ChecksumEvmAddress],
+            block_identifier: BlockIdentifier = 'latest',
+    ) -> list[PoolPrice]:
+        """Returns the PoolPrice of each of the given pools, all queried in one multicall.
+        May raise:
+        - DefiPoolError
+        """
+        pool_contracts = [self.get_pool_contract(x) for x in pool_addrs]
+        calls = [
+            (pool_contract.address, pool_contract.encode(method_name=method_name))
+            for pool_contract in pool_contracts
+            for method_name in (self.pool_price_method, 'token0', 'token1')
+        ]
+        output = self.ethereum.multicall(
+            calls=calls,
+            require_success=True,
+            block_identifier=block_identifier,
+        )
+        return [
+            self.decode_pool_price(pool_contract=pool_contract, output=output[idx * 3:idx * 3 + 3])  # noqa: E501
+            for idx, pool_contract in enumerate(pool_contracts)
+        ]
+
+    def get_cached_pool(
+            self,
+            token_0: EvmToken,
+            token_1: EvmToken,
+    ) -> list[ChecksumEvmAddress]:
+        """Returns the pools where the two tokens can be swapped. Uses the pools cached in
+        the global DB if they are recent enough, otherwise queries and caches them."""
+        key_parts: tuple[Union[str, GeneralCacheType], ...] = (
+            GeneralCacheType.UNISWAP_POOLS,
+            str(self.version),
+            *sorted((token_0.evm_address, token_1.evm_address)),
+        )
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            values = globaldb_get_general_cache_values(cursor=cursor, key_parts=key_parts)
+            last_queried_ts = globaldb_get_general_cache_last_queried_ts_by_key(cursor=cursor, key_parts=key_parts)  # noqa: E501
+        if len(values) != 0:
+            ttl = NO_POOLS_CACHE_TTL if values == [ZERO_ADDRESS] else POOLS_CACHE_TTL
+            if ts_now() - last_queried_ts < ttl:
+                return [string_to_evm_address(x) for x in values if x != ZERO_ADDRESS]
+
+        pools = [
+            to_checksum_address(x) for x in self.get_pool(token_0, token_1)
+            if x != ZERO_ADDRESS
+        ]
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=key_parts)
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=key_parts,
+                values=pools if len(pools) != 0 else [ZERO_ADDRESS],
+            )
+        return pools
 
     def _find_pool_for(
             self,
@@ -95,7 +186,7 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
             link_asset: EvmToken,
             path: list[str],
     ) -> bool:
-        pools = self.get_pool(asset, link_asset)
+        pools = self.get_cached_pool(asset, link_asset)
         for pool in pools:
             if pool != ZERO_ADDRESS:
                 path.append(pool)
@@ -103,7 +194,44 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
 
         return False
 
+    def _route_key_parts(
+            self,
+            from_asset: EvmToken,
+            to_asset: EvmToken,
+    ) -> tuple[Union[str, GeneralCacheType], ...]:
+        return (
+            GeneralCacheType.UNISWAP_ROUTE,
+            str(self.version),
+            from_asset.evm_address,
+            to_asset.evm_address,
+        )
+
     def find_route(self, from_asset: EvmToken, to_asset: EvmToken) -> list[str]:
+        """
+        Return the list of pools needed to jump through to go from from_asset to to_asset.
+        Uses the route cached in the global DB if it is recent enough, otherwise calculates
+        and caches it.
+        """
+        key_parts = self._route_key_parts(from_asset=from_asset, to_asset=to_asset)
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            values = globaldb_get_general_cache_values(cursor=cursor, key_parts=key_parts)
+            last_queried_ts = globaldb_get_general_cache_last_queried_ts_by_key(cursor=cursor, key_parts=key_parts)  # noqa: E501
+        if len(values) != 0:
+            ttl = NO_POOLS_CACHE_TTL if values == [''] else POOLS_CACHE_TTL
+            if ts_now() - last_queried_ts < ttl:
+                return values[0].split(',') if values[0] != '' else []
+
+        route = self._calculate_route(from_asset=from_asset, to_asset=to_asset)
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=key_parts)
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=key_parts,
+                values=[','.join(route)],
+            )
+        return route
+
+    def _calculate_route(self, from_asset: EvmToken, to_asset: EvmToken) -> list[str]:
         """
         Calculate the path needed to go from from_asset to to_asset and return a
         list of the pools needed to jump through to do that.
@@ -169,7 +297,7 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
         # finally find the step of glue asset A <2nd link> glue asset B
         assert second_link_asset is not None
         assert link_asset is not None
-        pools = self.get_pool(link_asset, second_link_asset)
+        pools = self.get_cached_pool(link_asset, second_link_asset)
         for pool in pools:
             if pool != ZERO_ADDRESS:
                 output.insert(1, pool)
@@ -220,15 +348,24 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
             return ZERO_PRICE
         log.debug(f'Found price route {route} for {from_token} to {to_token} using {self.name}')
 
-        prices_and_tokens = []
-        for step in route:
-            log.debug(f'Getting pool price for {step}')
-            prices_and_tokens.append(
-                self.get_pool_price(
-                    pool_addr=to_checksum_address(step),
-                    block_identifier=block_identifier,
-                ),
+        try:
+            prices_and_tokens = self.get_pools_prices(
+                pool_addrs=[to_checksum_address(step) for step in route],
+                block_identifier=block_identifier,
             )
+        except DefiPoolError:
+            # The pools of the route may no longer have the liquidity they had when they
+            # were cached, so query the pools and find a route again at the next query
+            with GlobalDBHandler().conn.write_ctx() as write_cursor:
+                globaldb_delete_general_cache(
+                    write_cursor=write_cursor,
+                    key_parts=self._route_key_parts(from_asset=from_token, to_asset=to_token),
+                )
+                write_cursor.executemany(
+                    'DELETE FROM general_cache WHERE key LIKE ? AND value=?',
+                    [(f'{compute_cache_key((GeneralCacheType.UNISWAP_POOLS, str(self.version)))}%', pool) for pool in route],  # noqa: E501
+                )
+            raise
 
         # Looking at which one is token0 and token1 we need to see if we need price or 1/price
         if prices_and_tokens[0].token_0 != from_token:
@@ -276,13 +413,13 @@ class UniswapOracle(CurrentPriceOracleInterface, CacheableMixIn):
 
 
 class UniswapV3Oracle(UniswapOracle):
+    pool_price_method = 'slot0'
 
     def __init__(self, ethereum_inquirer: 'EthereumInquirer'):
         super().__init__(ethereum_inquirer=ethereum_inquirer, version=3)
         self.uniswap_v3_pool_abi = self.ethereum.contracts.abi('UNISWAP_V3_POOL')
         self.uniswap_v3_factory = self.ethereum.contracts.contract(string_to_evm_address('0x1F98431c8aD98523631AE4a59f267346ea31F984'))  # noqa: E501
 
-    @cache_response_timewise()
     def get_pool(
             self,
             token_0: EvmToken,
@@ -297,66 +434,43 @@ class UniswapV3Oracle(UniswapOracle):
                 fee,
             ] for fee in (3000, 500, 10000)],
         )
+        pool_contracts = [
+            self.get_pool_contract(to_checksum_address(query[0]))
+            for query in result if query[0] != ZERO_ADDRESS
+        ]
+        if len(pool_contracts) == 0:
+            return []
 
         # get liquidity for each pool and choose the pool with the highest liquidity
-        best_pool, max_liquidity = to_checksum_address(result[0][0]), 0
-        for query in result:
-            if query[0] == ZERO_ADDRESS:
-                continue
-            pool_address = to_checksum_address(query[0])
-            pool_contract = EvmContract(
-                address=pool_address,
-                abi=self.uniswap_v3_pool_abi,
-                deployed_block=UNISWAP_FACTORY_DEPLOYED_BLOCK,
-            )
-            pool_liquidity = pool_contract.call(
-                node_inquirer=self.ethereum,
-                method_name='liquidity',
-                arguments=[],
-                call_order=None,
-            )
+        output = self.ethereum.multicall(
+            calls=[(x.address, x.encode(method_name='liquidity')) for x in pool_contracts],
+        )
+        best_pool, max_liquidity = None, 0
+        for pool_contract, pool_output in zip(pool_contracts, output):
+            pool_liquidity = pool_contract.decode(pool_output, 'liquidity')[0]
             if pool_liquidity > max_liquidity:
-                best_pool = pool_address
+                best_pool = pool_contract.address
                 max_liquidity = pool_liquidity
 
-        if max_liquidity == 0:
+        if best_pool is None:
             # if there is no pool with assets don't return any pool
             return []
         return [best_pool]
 
-    def get_pool_price(
-            self,
-            pool_addr: ChecksumEvmAddress,
-            block_identifier: BlockIdentifier = 'latest',
-    ) -> PoolPrice:
+    def get_pool_contract(self, pool_addr: ChecksumEvmAddress) -> EvmContract:
+        return EvmContract(
+            address=pool_addr,
+            abi=self.uniswap_v3_pool_abi,
+            deployed_block=UNISWAP_FACTORY_DEPLOYED_BLOCK,
+        )
+
+    def decode_pool_price(self, pool_contract: EvmContract, output: list[bytes]) -> PoolPrice:
         """
         Returns the units of token1 that one token0 can buy
 
         May raise:
         - DefiPoolError
         """
-        pool_contract = EvmContract(
-            address=pool_addr,
-            abi=self.uniswap_v3_pool_abi,
-            deployed_block=UNISWAP_FACTORY_DEPLOYED_BLOCK,
-        )
-        calls = [
-            (
-                pool_contract.address,
-                pool_contract.encode(method_name='slot0'),
-            ), (
-                pool_contract.address,
-                pool_contract.encode(method_name='token0'),
-            ), (
-                pool_contract.address,
-                pool_contract.encode(method_name='token1'),
-            ),
-        ]
-        output = self.ethereum.multicall(
-            calls=calls,
-            require_success=True,
-            block_identifier=block_identifier,
-        )
         token_0 = EvmToken(
             ethaddress_to_identifier(to_checksum_address(pool_contract.decode(output[1], 'token0')[0])),  # noqa: E501 pylint:disable=unsubscriptable-object
         )
@@ -380,13 +494,13 @@ class UniswapV3Oracle(UniswapOracle):
 
 
 class UniswapV2Oracle(UniswapOracle):
+    pool_price_method = 'getReserves'
 
     def __init__(self, ethereum_inquirer: 'EthereumInquirer'):
-        super().__init__(ethereum_inquirer=ethereum_inquirer, version=3)
+        super().__init__(ethereum_inquirer=ethereum_inquirer, version=2)
         self.uniswap_v2_lp_abi = self.ethereum.contracts.abi('UNISWAP_V2_LP')
         self.uniswap_v2_factory = self.ethereum.contracts.contract(string_to_evm_address('0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f'))  # noqa: E501
 
-    @cache_response_timewise()
     def get_pool(
             self,
             token_0: EvmToken,
@@ -402,40 +516,20 @@ class UniswapV2Oracle(UniswapOracle):
         )
         return [result]
 
-    def get_pool_price(
-            self,
-            pool_addr: ChecksumEvmAddress,
-            block_identifier: BlockIdentifier = 'latest',
-    ) -> PoolPrice:
+    def get_pool_contract(self, pool_addr: ChecksumEvmAddress) -> EvmContract:
+        return EvmContract(
+            address=pool_addr,
+            abi=self.uniswap_v2_lp_abi,
+            deployed_block=10000835,  # Factory deployment block
+        )
+
+    def decode_pool_price(self, pool_contract: EvmContract, output: list[bytes]) -> PoolPrice:
         """
         Returns the units of token1 that one token0 can buy
 
         May raise:
         - DefiPoolError
         """
-        pool_contract = EvmContract(
-            address=pool_addr,
-            abi=self.uniswap_v2_lp_abi,
-            deployed_block=10000835,  # Factory deployment block
-        )
-        calls = [
-            (
-                pool_contract.address,
-                pool_contract.encode(method_name='getReserves'),
-            ), (
-                pool_contract.address,
-                pool_contract.encode(method_name='token0'),
-            ), (
-                pool_contract.address,
-                pool_contract.encode(method_name='token1'),
-            ),
-        ]
-        output = self.ethereum.multicall(
-            calls=calls,
-            require_success=True,
-            block_identifier=block_identifier,
-        )
-
         token_0_address = pool_contract.decode(output[1], 'token0')[0]  # noqa: E501 pylint:disable=unsubscriptable-object
         token_1_address = pool_contract.decode(output[2], 'token1')[0]  # noqa: E501 pylint:disable=unsubscriptable-object
 
@@ -2,7 +2,7 @@ import importlib
 import logging
 import pkgutil
 from types import ModuleType
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Any, Union
 
 from rotkehlchen.accounting.ledger_actions import LedgerActionType
 from rotkehlchen.accounting.structures.types import HistoryEventSubType, HistoryEventType
@@ -96,6 +96,23 @@ class EVMAccountingAggregator():
         for accountant in self.accountants.values():
             accountant.reset()
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Serialize the state of all submodule accountants that keep any"""
+        return {
+            name: state for name, accountant in self.accountants.items()
+            if len(state := accountant.serialize_state()) != 0
+        }
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        """Restore the state of the submodule accountants from serialize_state's output
+
+        May raise:
+        - DeserializationError if the state of an accountant is malformed
+        """
+        for name, accountant_state in state.items():
+            if (accountant := self.accountants.get(name)) is not None:
+                accountant.restore_state(accountant_state)
+
 
 class EVMAccountingAggregators():
     """
@@ -217,3 +234,20 @@ class EVMAccountingAggregators():
         """Reset the state of all initialized submodule accountants"""
         for aggregator in self.aggregators:
             aggregator.reset()
+
+    def serialize_state(self) -> dict[str, Any]:
+        """Serialize the state of the submodule accountants of all chains"""
+        return {
+            aggregator.node_inquirer.chain_name: aggregator.serialize_state()
+            for aggregator in self.aggregators
+        }
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        """Restore the state of the submodule accountants of all chains
+
+        May raise:
+        - DeserializationError if the state of an accountant is malformed
+        """
+        for aggregator in self.aggregators:
+            if (chain_state := state.get(aggregator.node_inquirer.chain_name)) is not None:
+                aggregator.restore_state(chain_state)
@@ -1,7 +1,7 @@
 import logging
 from abc import ABCMeta, abstractmethod
 from collections.abc import Iterator
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.accounting.structures.types import HistoryEventType
@@ -47,6 +47,20 @@ class ModuleAccountantInterface(metaclass=ABCMeta):
         """Subclasses may implement this to reset state between accounting runs"""
         return None
 
+    def serialize_state(self) -> dict[str, Any]:
+        """Subclasses that keep state between events implement this to serialize it
+        so that accounting can continue from a checkpoint"""
+        return {}
+
+    def restore_state(self, state: dict[str, Any]) -> None:  # pylint: disable=unused-argument
+        """Subclasses that keep state implement this to restore it from the output
+        of serialize_state. It is called right after reset.
+
+        May raise:
+        - DeserializationError if the state is malformed
+        """
+        return None
+
 
 class DepositableAccountantInterface(ModuleAccountantInterface):
     """
@@ -5,7 +5,7 @@ from abc import ABCMeta, abstractmethod
 from contextlib import suppress
 from dataclasses import dataclass
 from types import ModuleType
-from typing import TYPE_CHECKING, Any, Callable, Optional, Protocol, Union
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Protocol, Union
 
 from gevent.lock import Semaphore
 
@@ -19,6 +19,7 @@ from rotkehlchen.api.websockets.typedefs import WSMessageType
 from rotkehlchen.assets.asset import AssetWithOracles, EvmToken
 from rotkehlchen.assets.utils import TokenSeenAt, get_or_create_evm_token
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
+from rotkehlchen.chain.evm.constants import GENESIS_HASH
 from rotkehlchen.chain.evm.decoding.interfaces import ReloadableDecoderMixin
 from rotkehlchen.chain.evm.decoding.types import CounterpartyDetails
 from rotkehlchen.chain.evm.structures import EvmTxReceipt, EvmTxReceiptLog
@@ -31,11 +32,11 @@ from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.misc import InputError, ModuleLoadingError, NotERC20Conformant, RemoteError
 from rotkehlchen.errors.serialization import ConversionError, DeserializationError
 from rotkehlchen.fval import FVal
-from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import (
     ChecksumEvmAddress,
     DecoderEventMappingType,
+    EvmInternalTransaction,
     EvmTokenKind,
     EvmTransaction,
     EVMTxHash,
@@ -43,6 +44,7 @@ from rotkehlchen.types import (
 from rotkehlchen.utils.misc import (
     combine_dicts,
     from_wei,
+    get_chunks,
     hex_or_bytes_to_address,
     hex_or_bytes_to_int,
 )
@@ -58,7 +60,13 @@ from .structures import (
     EnricherContext,
     TransferEnrichmentOutput,
 )
-from .utils import maybe_reshuffle_events
+from .token_cache import EvmTokenCache
+from .utils import (
+    RULE_TOKEN_KINDS_ATTRIBUTE,
+    RULE_TOPICS_ATTRIBUTE,
+    decoding_rule_for,
+    maybe_reshuffle_events,
+)
 
 if TYPE_CHECKING:
     from rotkehlchen.accounting.structures.evm_event import EvmEvent
@@ -72,6 +80,9 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# How many transactions have their receipts and data loaded from the DB at once when decoding
+DECODING_BATCH_SIZE = 500
+
 
 class EventDecoderFunction(Protocol):
 
@@ -87,6 +98,12 @@ class EventDecoderFunction(Protocol):
         ...
 
 
+class EventRule(NamedTuple):
+    rule: EventDecoderFunction
+    # if given the rule only runs for logs of tokens of these kinds
+    token_kinds: Optional[tuple[EvmTokenKind, ...]]
+
+
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=True)
 class DecodingRules():
     address_mappings: dict[ChecksumEvmAddress, tuple[Any, ...]]
@@ -170,6 +187,10 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
         # Recursively check all submodules to get all decoder address mappings and rules
         rules = self._recursively_initialize_decoders(self.chain_modules_root)
         self.rules += rules
+        self.event_rules_by_topic, self.catch_all_event_rules = self._build_event_rules_dispatch()
+        # instrumentation of the generic event rules. Logs given to them and rule calls made
+        self.event_rule_logs = self.event_rule_calls = 0
+        self.token_cache = EvmTokenCache(chain_id=self.evm_inquirer.chain_id)
         self.undecoded_tx_query_lock = Semaphore()
 
     def _recursively_initialize_decoders(
@@ -242,10 +263,36 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
 
         return results
 
+    def _build_event_rules_dispatch(self) -> tuple[dict[bytes, list[EventRule]], list[EventRule]]:  # noqa: E501
+        """Group the generic event rules by the topic0 they declared with decoding_rule_for()
+        so that a log is only given to the rules that can decode it.
+
+        Returns the rules for each declared topic and the rules for all other logs. Rules that
+        declared no topic are in all the lists. The lists keep the order in which the rules
+        were registered, since the first rule that decodes a log wins.
+        """
+        rules_by_topic: dict[bytes, list[EventRule]] = {}
+        catch_all_rules: list[EventRule] = []
+        for rule in self.rules.event_rules:
+            event_rule = EventRule(rule=rule, token_kinds=getattr(rule, RULE_TOKEN_KINDS_ATTRIBUTE, None))  # noqa: E501
+            if len(topics := getattr(rule, RULE_TOPICS_ATTRIBUTE, ())) == 0:
+                catch_all_rules.append(event_rule)
+                for topic_rules in rules_by_topic.values():
+                    topic_rules.append(event_rule)
+                continue
+
+            for topic in topics:
+                if topic not in rules_by_topic:
+                    rules_by_topic[topic] = catch_all_rules.copy()
+                rules_by_topic[topic].append(event_rule)
+
+        return rules_by_topic, catch_all_rules
+
     def reload_data(self, cursor: 'DBCursor') -> None:
         """Reload all related settings from DB and data that any decoder may require from the chain
         so that decoding happens with latest data"""
         self.base.refresh_tracked_accounts(cursor)
+        self.token_cache.clear()
         for _, decoder in self.decoders.items():
             if isinstance(decoder, CustomizableDateMixin):
                 decoder.reload_settings(cursor)
@@ -267,8 +314,18 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
         Execute event rules for the current tx log. Returns None when no
         new event or actions need to be propagated.
         """
-        for rule in self.rules.event_rules:
-            decoding_output = rule(token=token, tx_log=tx_log, transaction=transaction, decoded_events=decoded_events, action_items=action_items, all_logs=all_logs)  # noqa: E501
+        if len(tx_log.topics) == 0:  # anonymous event
+            event_rules = self.catch_all_event_rules
+        else:
+            event_rules = self.event_rules_by_topic.get(tx_log.topics[0], self.catch_all_event_rules)  # noqa: E501
+
+        self.event_rule_logs += 1
+        for event_rule in event_rules:
+            if event_rule.token_kinds is not None and (token is None or token.token_kind not in event_rule.token_kinds):  # noqa: E501
+                continue
+
+            self.event_rule_calls += 1
+            decoding_output = event_rule.rule(token=token, tx_log=tx_log, transaction=transaction, decoded_events=decoded_events, action_items=action_items, all_logs=all_logs)  # noqa: E501
             if decoding_output.event is not None or len(decoding_output.action_items) > 0:
                 return decoding_output
 
@@ -359,9 +416,34 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
         Decodes an evm transaction and its receipt and saves result in the DB.
         Returns the list of decoded events and a flag which is True if balances refresh is needed.
         """
+        events, refresh_balances = self._decode_transaction_events(
+            transaction=transaction,
+            tx_receipt=tx_receipt,
+        )
+        with self.database.user_write() as write_cursor:
+            self._write_decoded_events(
+                write_cursor=write_cursor,
+                transaction=transaction,
+                events=events,
+            )
+
+        events = sorted(events, key=lambda x: x.sequence_index, reverse=False)
+        return events, refresh_balances  # Propagate for post processing in the caller
+
+    def _decode_transaction_events(
+            self,
+            transaction: EvmTransaction,
+            tx_receipt: EvmTxReceipt,
+            internal_txs: Optional[list[EvmInternalTransaction]] = None,
+    ) -> tuple[list['EvmEvent'], bool]:
+        """
+        Decodes an evm transaction and its receipt without saving anything in the DB.
+        If the internal transactions are not given they are read from the DB.
+        Returns the list of decoded events and a flag which is True if balances refresh is needed.
+        """
         self.base.reset_sequence_counter()
         # check if any eth transfer happened in the transaction, including in internal transactions
-        events = self._maybe_decode_simple_transactions(transaction, tx_receipt)
+        events = self._maybe_decode_simple_transactions(transaction, tx_receipt, internal_txs)
         action_items: list[ActionItem] = []
         counterparties = set()
         refresh_balances = False
@@ -378,10 +460,7 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
                 events.append(decoding_output.event)
                 continue
 
-            token = GlobalDBHandler.get_evm_token(
-                address=tx_log.address,
-                chain_id=self.evm_inquirer.chain_id,
-            )
+            token = self.token_cache.get(tx_log.address)
             rules_decoding_output = self.try_all_rules(
                 token=token,
                 tx_log=tx_log,
@@ -409,28 +488,33 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
         if len(events) == 0 and (eth_event := self._get_eth_transfer_event(transaction)) is not None:  # noqa: E501
             events = [eth_event]
 
-        with self.database.user_write() as write_cursor:
-            if len(events) > 0:
-                self.dbevents.add_history_events(
+        return events, refresh_balances
+
+    def _write_decoded_events(
+            self,
+            write_cursor: 'DBCursor',
+            transaction: EvmTransaction,
+            events: list['EvmEvent'],
+    ) -> None:
+        """Saves the decoded events of a transaction in the DB and marks it as decoded"""
+        if len(events) > 0:
+            self.dbevents.add_history_events(
+                write_cursor=write_cursor,
+                history=events,
+            )
+        else:
+            # This is probably a phishing zero value token transfer tx.
+            # Details here: https://github.com/rotki/rotki/issues/5749
+            with suppress(InputError):  # We don't care if it's already in the DB
+                self.database.add_to_ignored_action_ids(
                     write_cursor=write_cursor,
-                    history=events,
+                    action_type=ActionType.EVM_TRANSACTION,
+                    identifiers=[transaction.identifier],
                 )
-            else:
-                # This is probably a phishing zero value token transfer tx.
-                # Details here: https://github.com/rotki/rotki/issues/5749
-                with suppress(InputError):  # We don't care if it's already in the DB
-                    self.database.add_to_ignored_action_ids(
-                        write_cursor=write_cursor,
-                        action_type=ActionType.EVM_TRANSACTION,
-                        identifiers=[transaction.identifier],
-                    )
-            write_cursor.execute(
-                'INSERT OR IGNORE INTO evm_tx_mappings(tx_hash, chain_id, value) VALUES(?, ?, ?)',
-                (transaction.tx_hash, self.evm_inquirer.chain_id.serialize_for_db(), HISTORY_MAPPING_STATE_DECODED),  # noqa: E501
-            )
-
-        events = sorted(events, key=lambda x: x.sequence_index, reverse=False)
-        return events, refresh_balances  # Propagate for post processing in the caller
+        write_cursor.execute(
+            'INSERT OR IGNORE INTO evm_tx_mappings(tx_hash, chain_id, value) VALUES(?, ?, ?)',
+            (transaction.tx_hash, self.evm_inquirer.chain_id.serialize_for_db(), HISTORY_MAPPING_STATE_DECODED),  # noqa: E501
+        )
 
     def get_and_decode_undecoded_transactions(
             self,
@@ -466,6 +550,8 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
         """
         events: list['EvmEvent'] = []
         refresh_balances = False
+        event_rule_logs, event_rule_calls = self.event_rule_logs, self.event_rule_calls
+        token_cache_hits, token_cache_misses = self.token_cache.hits, self.token_cache.misses
         with self.database.conn.read_ctx() as cursor:
             self.reload_data(cursor)
             # If no transaction hashes are passed, decode all transactions.
@@ -478,30 +564,161 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
                 for entry in cursor:
                     tx_hashes.append(EVMTxHash(entry[0]))
 
-        for tx_hash in tx_hashes:
-            try:
-                receipt = self.transactions.get_or_query_transaction_receipt(tx_hash)
-            except RemoteError as e:
-                raise InputError(f'{self.evm_inquirer.chain_name} hash {tx_hash.hex()} does not correspond to a transaction') from e  # noqa: E501
+        for chunk in get_chunks(tx_hashes, n=DECODING_BATCH_SIZE):
+            batch_events, batch_refresh_balances = self._decode_batch(
+                tx_hashes=chunk,
+                ignore_cache=ignore_cache,
+            )
+            events.extend(batch_events)
+            if batch_refresh_balances is True:
+                refresh_balances = True
 
-            # TODO: Change this if transaction filter query can accept multiple hashes
-            with self.database.conn.read_ctx() as cursor:
-                txs = self.dbevmtx.get_evm_transactions(
+        log.debug(
+            f'Decoded {len(tx_hashes)} {self.evm_inquirer.chain_name} transactions with '
+            f'{self.event_rule_calls - event_rule_calls} generic event rule calls for '
+            f'{self.event_rule_logs - event_rule_logs} logs. Token cache hits: '
+            f'{self.token_cache.hits - token_cache_hits}, misses: '
+            f'{self.token_cache.misses - token_cache_misses}',
+        )
+        self._post_process(refresh_balances=refresh_balances)
+        return events
+
+    def _decode_batch(
+            self,
+            tx_hashes: list[EVMTxHash],
+            ignore_cache: bool,
+    ) -> tuple[list['EvmEvent'], bool]:
+        """Get or decode the events of a batch of transaction hashes in three stages.
+
+        1. Load the transactions, receipts, internal transactions and already decoded
+        events of the whole batch from the DB with a few bulk queries.
+        2. Decode the transactions that are not decoded yet in memory.
+        3. Save the events and the decoded state of all of them in a single DB transaction.
+        If ignore_cache is True the old events are deleted in the same transaction so that
+        they are kept if decoding fails.
+
+        Returns the events of all transactions in the order of the given hashes and a flag
+        which is True if balances refresh is needed.
+
+        May raise:
+        - DeserializationError if there is a problem with conacting a remote to get receipts
+        - RemoteError if there is a problem with contacting a remote to get receipts
+        - InputError if the transaction hash is not found in the DB
+        """
+        chain_id = self.evm_inquirer.chain_id
+        # stage 1: bulk load everything the batch needs
+        cached_events: dict[EVMTxHash, list['EvmEvent']] = {}
+        with self.database.conn.read_ctx() as cursor:
+            if ignore_cache is False:  # see if events are already decoded to return them
+                decoded_hashes = self.dbevmtx.get_decoded_transaction_hashes(
                     cursor=cursor,
-                    filter_=EvmTransactionsFilterQuery.make(tx_hash=tx_hash, chain_id=self.evm_inquirer.chain_id),  # noqa: E501
+                    tx_hashes=tx_hashes,
+                    chain_id=chain_id,
+                )
+                if len(decoded_hashes) != 0:
+                    cached_events = {x: [] for x in decoded_hashes}
+                    for event in self.dbevents.get_history_events(
+                        cursor=cursor,
+                        filter_query=EvmEventFilterQuery.make(tx_hashes=decoded_hashes),
+                        has_premium=True,  # for this function we don't limit anything
+                    ):
+                        cached_events[event.tx_hash].append(event)
+
+            to_decode = [x for x in tx_hashes if x not in cached_events]
+            receipts = self.dbevmtx.get_receipts(
+                cursor=cursor,
+                tx_hashes=to_decode,
+                chain_id=chain_id,
+            )
+            transactions: dict[EVMTxHash, EvmTransaction] = {}
+            internal_txs: dict[EVMTxHash, list[EvmInternalTransaction]] = {}
+            if len(receipts) != 0:
+                for transaction in self.dbevmtx.get_evm_transactions(
+                    cursor=cursor,
+                    filter_=EvmTransactionsFilterQuery.make(tx_hashes=list(receipts), chain_id=chain_id),  # noqa: E501
                     has_premium=True,  # ignore limiting here
+                ):
+                    transactions[transaction.tx_hash] = transaction
+                internal_txs = self.dbevmtx.get_evm_internal_transactions_by_parent(
+                    cursor=cursor,
+                    parent_tx_hashes=list(receipts),
+                    chain_id=chain_id,
                 )
-            new_events, new_refresh_balances = self._get_or_decode_transaction_events(
-                transaction=txs[0],
+
+        # stage 2: decode in memory
+        decoded: dict[EVMTxHash, tuple[EvmTransaction, list['EvmEvent']]] = {}
+        refresh_balances = False
+        for tx_hash in to_decode:
+            if tx_hash in decoded:
+                continue  # hash given more than once
+
+            receipt, tx = receipts.get(tx_hash), transactions.get(tx_hash)
+            tx_internal_txs: Optional[list[EvmInternalTransaction]] = internal_txs.get(tx_hash, [])  # noqa: E501
+            if receipt is None or tx is None or tx_hash == GENESIS_HASH:
+                receipt, tx = self._get_or_query_transaction_and_receipt(tx_hash)
+                tx_internal_txs = None  # may have been queried now. Read them when decoding
+
+            tx_events, tx_refresh_balances = self._decode_transaction_events(
+                transaction=tx,
                 tx_receipt=receipt,
-                ignore_cache=ignore_cache,
+                internal_txs=tx_internal_txs,
             )
-            events.extend(new_events)
-            if new_refresh_balances is True:
+            decoded[tx_hash] = (tx, tx_events)
+            if tx_refresh_balances is True:
                 refresh_balances = True
 
-        self._post_process(refresh_balances=refresh_balances)
-        return events
+        # stage 3: save the whole batch at once
+        if len(decoded) != 0:
+            with self.database.user_write() as write_cursor:
+                if ignore_cache is True:  # delete all previously decoded events
+                    self.dbevents.delete_events_by_tx_hash(
+                        write_cursor=write_cursor,
+                        tx_hashes=list(decoded),
+                        chain_id=chain_id,
+                    )
+                    write_cursor.executemany(
+                        'DELETE from evm_tx_mappings WHERE tx_hash=? AND chain_id=? AND value=?',  # noqa: E501
+                        [(x, chain_id.serialize_for_db(), HISTORY_MAPPING_STATE_DECODED) for x in decoded],  # noqa: E501
+                    )
+                for tx, tx_events in decoded.values():
+                    self._write_decoded_events(
+                        write_cursor=write_cursor,
+                        transaction=tx,
+                        events=tx_events,
+                    )
+
+        events: list['EvmEvent'] = []
+        for tx_hash in tx_hashes:
+            if tx_hash in cached_events:
+                events.extend(cached_events[tx_hash])
+            else:
+                events.extend(sorted(decoded[tx_hash][1], key=lambda x: x.sequence_index))
+        return events, refresh_balances
+
+    def _get_or_query_transaction_and_receipt(
+            self,
+            tx_hash: EVMTxHash,
+    ) -> tuple[EvmTxReceipt, EvmTransaction]:
+        """Get the receipt and the transaction for a hash that could not be found in the DB
+        together with the rest of its batch, querying them from the remote if needed.
+
+        May raise:
+        - DeserializationError if there is a problem with conacting a remote to get receipts
+        - RemoteError if there is a problem with contacting a remote to get receipts
+        - InputError if the transaction hash is not found in the DB
+        """
+        try:
+            receipt = self.transactions.get_or_query_transaction_receipt(tx_hash)
+        except RemoteError as e:
+            raise InputError(f'{self.evm_inquirer.chain_name} hash {tx_hash.hex()} does not correspond to a transaction') from e  # noqa: E501
+
+        with self.database.conn.read_ctx() as cursor:
+            txs = self.dbevmtx.get_evm_transactions(
+                cursor=cursor,
+                filter_=EvmTransactionsFilterQuery.make(tx_hash=tx_hash, chain_id=self.evm_inquirer.chain_id),  # noqa: E501
+                has_premium=True,  # ignore limiting here
+            )
+        return receipt, txs[0]
 
     def _get_or_decode_transaction_events(
             self,
@@ -549,18 +766,20 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
             tx: EvmTransaction,
             tx_receipt: EvmTxReceipt,
             events: list['EvmEvent'],
+            internal_txs: Optional[list[EvmInternalTransaction]] = None,
     ) -> None:
         """
         check for internal transactions if the transaction is not canceled. This function mutates
-        the events argument.
+        the events argument. If the internal transactions are not given they are read from the DB.
         """
         if tx_receipt.status is False:
             return
 
-        internal_txs = self.dbevmtx.get_evm_internal_transactions(
-            parent_tx_hash=tx.tx_hash,
-            blockchain=self.evm_inquirer.blockchain,
-        )
+        if internal_txs is None:
+            internal_txs = self.dbevmtx.get_evm_internal_transactions(
+                parent_tx_hash=tx.tx_hash,
+                blockchain=self.evm_inquirer.blockchain,
+            )
         for internal_tx in internal_txs:
             if internal_tx.to_address is None:
                 continue  # can that happen? Internal transaction deploying a contract?
@@ -615,6 +834,7 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
             counterparty=counterparty,
         )
 
+    @decoding_rule_for(ERC20_APPROVE)
     def _maybe_decode_erc20_approve(
             self,
             token: Optional[EvmToken],
@@ -667,6 +887,7 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
             self,
             tx: EvmTransaction,
             tx_receipt: EvmTxReceipt,
+            internal_txs: Optional[list[EvmInternalTransaction]] = None,
     ) -> list['EvmEvent']:
         """Decodes normal ETH transfers, internal transactions and gas cost payments"""
         events: list['EvmEvent'] = []
@@ -693,6 +914,7 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
             tx=tx,
             tx_receipt=tx_receipt,
             events=events,
+            internal_txs=internal_txs,
         )
 
         if tx_receipt.status is False or direction_result is None:
@@ -726,6 +948,7 @@ class EVMTransactionDecoder(metaclass=ABCMeta):
             events.append(eth_event)
         return events
 
+    @decoding_rule_for(ERC20_OR_ERC721_TRANSFER)
     def _maybe_decode_erc20_721_transfer(
             self,
             token: Optional[EvmToken],
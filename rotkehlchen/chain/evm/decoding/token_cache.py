@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+
+if TYPE_CHECKING:
+    from rotkehlchen.assets.asset import EvmToken
+    from rotkehlchen.types import ChainID, ChecksumEvmAddress
+
+# Maximum number of addresses, tokens or not, cached per chain
+EVM_TOKEN_CACHE_SIZE = 4096
+
+
+class EvmTokenCache():
+    """An LRU cache of the EVM tokens of a chain by address, used by the decoder to avoid
+    querying the global DB for every log.
+
+    Addresses that are not tokens are cached too since most logs that no address rule
+    matched come from the same few contracts. An address is dropped from the cache when
+    the EVM token at it is added, edited or deleted in the global DB. The decoder also
+    clears it at the start of each decoding run, so changes to the global DB by other
+    means such as asset updates are seen by the next run.
+    """
+
+    def __init__(self, chain_id: 'ChainID', maxsize: int = EVM_TOKEN_CACHE_SIZE) -> None:
+        self.chain_id = chain_id
+        self.maxsize = maxsize
+        self.cache: OrderedDict['ChecksumEvmAddress', Optional['EvmToken']] = OrderedDict()
+        self.seen_changes = len(GlobalDBHandler().evm_tokens_changes)
+        self.hits = self.misses = 0
+
+    def get(self, address: 'ChecksumEvmAddress') -> Optional['EvmToken']:
+        """Get the token at the given address or None if the address is not a known token"""
+        if len(changes := GlobalDBHandler().evm_tokens_changes) != self.seen_changes:
+            for chain_id, changed_address in changes[self.seen_changes:]:
+                if chain_id == self.chain_id:
+                    self.cache.pop(changed_address, None)
+            self.seen_changes = len(changes)
+
+        if address in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(address)
+            return self.cache[address]
+
+        self.misses += 1
+        token = GlobalDBHandler.get_evm_token(address=address, chain_id=self.chain_id)
+        self.cache[address] = token
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+
+        return token
+
+    def clear(self) -> None:
+        self.cache.clear()
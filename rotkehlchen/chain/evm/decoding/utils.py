@@ -1,7 +1,32 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
 
 if TYPE_CHECKING:
     from rotkehlchen.accounting.structures.evm_event import EvmEvent
+    from rotkehlchen.types import EvmTokenKind
+
+# Attributes with which event rules declare the logs they can decode. See decoding_rule_for()
+RULE_TOPICS_ATTRIBUTE = 'decoding_rule_topics'
+RULE_TOKEN_KINDS_ATTRIBUTE = 'decoding_rule_token_kinds'
+
+T = TypeVar('T', bound=Callable)
+
+
+def decoding_rule_for(
+        *topics: bytes,
+        token_kinds: Optional[tuple['EvmTokenKind', ...]] = None,
+) -> Callable[[T], T]:
+    """Decorator for generic event decoding rules that declares the topic0 of the logs the
+    rule can decode and optionally the kinds of the token that must have emitted them.
+
+    The decoder only calls the rule for matching logs. Rules that declare no topics are
+    called for every log that is not decoded by an address specific rule.
+    """
+    def wrapper(rule: T) -> T:
+        setattr(rule, RULE_TOPICS_ATTRIBUTE, topics)
+        setattr(rule, RULE_TOKEN_KINDS_ATTRIBUTE, token_kinds)
+        return rule
+
+    return wrapper
 
 
 def _swap_event_indices(event1: 'EvmEvent', event2: 'EvmEvent') -> None:
@@ -0,0 +1,189 @@
+"""Block ranges and cached results of the log queries of EVM contracts"""
+import hashlib
+import json
+import logging
+from typing import Any, Optional
+
+from rotkehlchen.globaldb.cache import (
+    compute_cache_key,
+    globaldb_delete_general_cache,
+    globaldb_get_general_cache_values,
+    globaldb_set_general_cache_values,
+)
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import ChainID, ChecksumEvmAddress, GeneralCacheType
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+ETHERSCAN_LOGQUERY_BLOCK_RANGE = 300000
+ETHERSCAN_LOGQUERY_MIN_BLOCK_RANGE = 100
+WEB3_LOGQUERY_MIN_BLOCK_RANGE = 50
+# Etherscan returns at most this many logs per query
+ETHERSCAN_LOGS_PAGE_SIZE = 1000
+# Number of logs per query that block ranges are sized for. Half of what the nodes return at
+# most, so that a denser stretch of blocks does not immediately need a smaller range.
+ETHERSCAN_LOGS_TARGET = 500
+WEB3_LOGS_TARGET = 5000
+# Logs of the latest blocks are not cached since these blocks could still get reorganized
+LOGS_CACHE_REORG_BLOCKS = 64
+# Logs of queries that return more than this are not cached
+LOGS_CACHE_MAX_EVENTS = 10000
+
+
+class LogQueryRange():
+    """The block range of the log queries of a contract event to a kind of node
+
+    The range starts from the last good range saved in the global DB for the same kind of
+    node, contract and event. After each query it is sized so that the next query would
+    return about target_logs logs at the density of the last one, growing at most twice
+    as big per query. It is halved when the node rejects a query for returning too many
+    results or taking too long.
+    """
+
+    def __init__(
+            self,
+            node_kind: str,
+            chain_id: ChainID,
+            contract_address: ChecksumEvmAddress,
+            event_name: str,
+            max_range: int,
+            min_range: int,
+            target_logs: int,
+    ) -> None:
+        self.key_parts = (
+            GeneralCacheType.LOG_QUERY_RANGE,
+            node_kind,
+            '|',
+            str(chain_id.value),
+            contract_address,
+            event_name,
+        )
+        self.max_range = max_range
+        self.min_range = min_range
+        self.target_logs = target_logs
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            values = globaldb_get_general_cache_values(cursor=cursor, key_parts=self.key_parts)
+        self.saved_range = int(values[0]) if len(values) != 0 else None
+        self.block_range = min(self.saved_range or max_range, max_range)
+
+    def shrink(self) -> bool:
+        """Halves the range. Returns False if it can't get any smaller"""
+        if self.block_range // 2 < self.min_range:
+            return False
+
+        self.block_range //= 2
+        return True
+
+    def update(self, logs_num: int, blocks_num: int) -> None:
+        """Sizes the range of the next query by the logs a query of blocks_num blocks got"""
+        if logs_num == 0:
+            new_range = self.block_range * 2
+        else:
+            new_range = blocks_num * self.target_logs // logs_num
+        self.block_range = max(min(new_range, self.block_range * 2, self.max_range), self.min_range)  # noqa: E501
+
+    def save(self) -> None:
+        """Saves the range in the global DB as the start of the next queries"""
+        if self.block_range == self.saved_range:
+            return
+
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=self.key_parts)
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=self.key_parts,
+                values=[str(self.block_range)],
+            )
+        self.saved_range = self.block_range
+
+
+class LogsCache():
+    """The logs of a contract for some topics that were already queried, kept in the global
+    DB along with the range of blocks they cover so that later queries of the same logs
+    only need to query the blocks after it.
+    """
+
+    def __init__(
+            self,
+            chain_id: ChainID,
+            contract_address: ChecksumEvmAddress,
+            topics: list[Optional[Any]],
+    ) -> None:
+        topics_hash = hashlib.sha256(json.dumps(topics).encode()).hexdigest()
+        key = (str(chain_id.value), contract_address, topics_hash)
+        self.blocks_key_parts = (GeneralCacheType.LOG_QUERY_BLOCKS, *key)
+        self.events_key_parts = (GeneralCacheType.LOG_QUERY_EVENTS, *key)
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            values = globaldb_get_general_cache_values(cursor=cursor, key_parts=self.blocks_key_parts)  # noqa: E501
+        self.cached_blocks: Optional[tuple[int, int]] = None
+        if len(values) != 0:
+            from_block, to_block = values[0].split('|')
+            self.cached_blocks = int(from_block), int(to_block)
+        self.continues_cache = False
+
+    def get(self, from_block: int, to_block: int) -> tuple[list[dict[str, Any]], int]:
+        """Returns the cached logs from from_block to to_block and the block from which
+        the logs still need to be queried"""
+        if self.cached_blocks is None or not self.cached_blocks[0] <= from_block <= self.cached_blocks[1] + 1:  # noqa: E501
+            return [], from_block
+
+        self.continues_cache = True
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            values = globaldb_get_general_cache_values(cursor=cursor, key_parts=self.events_key_parts)  # noqa: E501
+        events = [
+            event for event in (json.loads(x) for x in values)
+            if from_block <= event['blockNumber'] <= to_block
+        ]
+        events.sort(key=lambda x: (x['blockNumber'], x['logIndex']))
+        return events, self.cached_blocks[1] + 1
+
+    def add(self, from_block: int, to_block: int, events: list[dict[str, Any]]) -> None:
+        """Adds the logs queried from from_block up to to_block, a block that can no longer
+        get reorganized, to the cache. Logs of later blocks are ignored."""
+        if self.continues_cache is True:
+            assert self.cached_blocks is not None, 'cache continued only if it exists'
+            from_block = self.cached_blocks[0]
+            to_block = max(to_block, self.cached_blocks[1])
+
+        if to_block < from_block:
+            return
+
+        try:
+            values = [
+                json.dumps(event, sort_keys=True) for event in events
+                if event['blockNumber'] <= to_block
+            ]
+        except TypeError as e:
+            log.error(f'Could not cache logs of {self.events_key_parts[1:]} due to {e!s}')
+            return
+
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            cached_num = 0
+            if self.continues_cache is True:
+                cached_num = write_cursor.execute(
+                    'SELECT COUNT(*) FROM general_cache WHERE key=?',
+                    (compute_cache_key(self.events_key_parts),),
+                ).fetchone()[0]
+            else:
+                globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=self.events_key_parts)  # noqa: E501
+            if cached_num + len(values) > LOGS_CACHE_MAX_EVENTS:
+                log.debug(f'Not caching the logs of {self.events_key_parts[1:]} since they are too many')  # noqa: E501
+                globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=self.events_key_parts)  # noqa: E501
+                globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=self.blocks_key_parts)  # noqa: E501
+                self.cached_blocks = None
+                return
+
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=self.events_key_parts,
+                values=values,
+            )
+            globaldb_delete_general_cache(write_cursor=write_cursor, key_parts=self.blocks_key_parts)  # noqa: E501
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=self.blocks_key_parts,
+                values=[f'{from_block}|{to_block}'],
+            )
+        self.cached_blocks = from_block, to_block
@@ -1,13 +1,16 @@
 import json
 import logging
 import random
+import time
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 from collections.abc import Callable, Sequence
 from contextlib import suppress
 from itertools import zip_longest
-from typing import TYPE_CHECKING, Any, Literal, Optional, Union
+from typing import TYPE_CHECKING, Any, Literal, Optional, Union, cast
 from urllib.parse import urlparse
 
+import gevent
 import requests
 from ens import ENS
 from eth_abi.exceptions import InsufficientDataBytes
@@ -16,6 +19,7 @@ from web3 import HTTPProvider, Web3
 from web3._utils.abi import get_abi_output_types
 from web3._utils.contracts import find_matching_event_abi
 from web3._utils.filters import construct_event_filter_params
+from web3._utils.request import make_post_request
 from web3.datastructures import MutableAttributeDict
 from web3.exceptions import (
     BadFunctionCallOutput,
@@ -26,11 +30,23 @@ from web3.exceptions import (
 from web3.middleware import geth_poa_middleware
 from web3.types import BlockIdentifier, FilterParams
 
-from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_TIMEOUT
+from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_BATCH_SIZE, DEFAULT_EVM_RPC_TIMEOUT
 from rotkehlchen.chain.ethereum.constants import DEFAULT_TOKEN_DECIMALS
 from rotkehlchen.chain.ethereum.utils import MULTICALL_CHUNKS
 from rotkehlchen.chain.evm.constants import FAKE_GENESIS_TX_RECEIPT, GENESIS_HASH
 from rotkehlchen.chain.evm.contracts import EvmContract, EvmContracts
+from rotkehlchen.chain.evm.logquery import (
+    ETHERSCAN_LOGQUERY_BLOCK_RANGE,
+    ETHERSCAN_LOGQUERY_MIN_BLOCK_RANGE,
+    ETHERSCAN_LOGS_PAGE_SIZE,
+    ETHERSCAN_LOGS_TARGET,
+    LOGS_CACHE_REORG_BLOCKS,
+    WEB3_LOGQUERY_MIN_BLOCK_RANGE,
+    WEB3_LOGS_TARGET,
+    LogQueryRange,
+    LogsCache,
+)
+from rotkehlchen.chain.evm.node_scheduler import NodeScheduler
 from rotkehlchen.chain.evm.proxies_inquirer import EvmProxiesInquirer
 from rotkehlchen.chain.evm.types import NodeName, Web3Node, WeightedNode
 from rotkehlchen.constants import ONE
@@ -69,6 +85,16 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Errors of a node query after which the next node is tried
+NODE_QUERY_ERRORS = (
+    RemoteError,
+    requests.exceptions.RequestException,
+    BlockchainQueryError,
+    BlockNotFound,
+    BadResponseFormat,
+    ValueError,  # Yabir saw this happen with mew node for unavailable method at node. Since it's generic we should replace if web3 implements https://github.com/ethereum/web3.py/issues/2448  # noqa: E501
+)
+
 
 def _is_synchronized(current_block: int, latest_block: int) -> tuple[bool, str]:
     """ Validate that the evm node is synchronized
@@ -90,27 +116,65 @@ def _is_synchronized(current_block: int, latest_block: int) -> tuple[bool, str]:
     return True, message
 
 
+def _process_raw_receipt(tx_receipt: dict[str, Any], location: str) -> dict[str, Any]:
+    """Turn the hex numbers of a receipt as returned by eth_getTransactionReceipt to ints
+
+    May raise:
+    - RemoteError if the receipt can't be deserialized
+    """
+    try:
+        block_number = int(tx_receipt['blockNumber'], 16)
+        tx_receipt['blockNumber'] = block_number
+        tx_receipt['cumulativeGasUsed'] = int(tx_receipt['cumulativeGasUsed'], 16)
+        tx_receipt['gasUsed'] = int(tx_receipt['gasUsed'], 16)
+        tx_receipt['status'] = int(tx_receipt.get('status', '0x1'), 16)
+        tx_index = int(tx_receipt['transactionIndex'], 16)
+        tx_receipt['transactionIndex'] = tx_index
+        for receipt_log in tx_receipt['logs']:
+            receipt_log['blockNumber'] = block_number
+            receipt_log['logIndex'] = deserialize_int_from_hex(
+                symbol=receipt_log['logIndex'],
+                location=f'{location} tx receipt',
+            )
+            receipt_log['transactionIndex'] = tx_index
+    except (DeserializationError, ValueError, KeyError, TypeError) as e:
+        msg = str(e)
+        if isinstance(e, KeyError):
+            msg = f'missing key {msg}'
+        log.error(
+            f'Couldnt deserialize transaction receipt {tx_receipt} data from '
+            f'{location} due to {msg}',
+        )
+        raise RemoteError(
+            f'Couldnt deserialize transaction receipt data from {location} '
+            f'due to {msg}. Check logs for details',
+        ) from e
+
+    return tx_receipt
+
+
 WEB3_LOGQUERY_BLOCK_RANGE = 250000
+# Minimum number of transactions of a block whose receipts we need for getting all the
+# receipts of the block with eth_getBlockReceipts instead of one by one
+BLOCK_RECEIPTS_MIN_TRANSACTIONS = 3
 
 
 def _query_web3_get_logs(
         web3: Web3,
         filter_args: FilterParams,
         from_block: int,
-        to_block: Union[int, Literal['latest']],
+        to_block: int,
         contract_address: ChecksumEvmAddress,
         event_name: str,
         argument_filters: dict[str, Any],
-        initial_block_range: int,
+        block_range: LogQueryRange,
 ) -> list[dict[str, Any]]:
-    until_block = web3.eth.block_number if to_block == 'latest' else to_block
     events: list[dict[str, Any]] = []
     start_block = from_block
-    block_range = initial_block_range
 
-    while start_block <= until_block:
+    while start_block <= to_block:
         filter_args['fromBlock'] = start_block
-        end_block = min(start_block + block_range, until_block)
+        end_block = min(start_block + block_range.block_range, to_block)
         filter_args['toBlock'] = end_block
         log.debug(
             'Querying web3 node for contract event',
@@ -138,8 +202,7 @@ def _query_web3_get_logs(
 
             # errors from: https://infura.io/docs/ethereum/json-rpc/eth-getLogs
             if msg in ('query returned more than 10000 results', 'query timeout exceeded'):
-                block_range = block_range // 2
-                if block_range < 50:
+                if block_range.shrink() is False:
                     raise  # stop retrying if block range gets too small
                 # repeat the query with smaller block range
                 continue
@@ -155,10 +218,9 @@ def _query_web3_get_logs(
             new_events_web3[e_idx]['topics'] = new_topics
             new_events_web3[e_idx]['transactionHash'] = event['transactionHash'].hex()
 
+        block_range.update(logs_num=len(new_events_web3), blocks_num=end_block - start_block + 1)  # noqa: E501
         start_block = end_block + 1
         events.extend(new_events_web3)
-        # end of the loop, end of 1 query. Reset the block range to max
-        block_range = initial_block_range
 
     return events
 
@@ -177,9 +239,13 @@ class EvmNodeInquirer(metaclass=ABCMeta):
     """
     methods_that_query_past_data = (
         '_get_transaction_receipt',
+        '_get_transaction_receipts',
         '_get_transaction_by_hash',
         '_get_logs',
     )
+    # Log queries can span many pages and take minutes. A duplicate query would double
+    # the load on the nodes so they are never hedged.
+    methods_not_to_hedge = ('_get_logs',)
 
     def __init__(
             self,
@@ -195,6 +261,7 @@ class EvmNodeInquirer(metaclass=ABCMeta):
             contract_multicall: 'EvmContract',
             dsproxy_registry: 'EvmContract',
             rpc_timeout: int = DEFAULT_EVM_RPC_TIMEOUT,
+            rpc_batch_size: int = DEFAULT_EVM_RPC_BATCH_SIZE,
     ) -> None:
         self.greenlet_manager = greenlet_manager
         self.database = database
@@ -209,6 +276,10 @@ class EvmNodeInquirer(metaclass=ABCMeta):
         )
         self.web3_mapping: dict[NodeName, Web3Node] = {}
         self.rpc_timeout = rpc_timeout
+        self.rpc_batch_size = rpc_batch_size
+        # endpoints of the nodes that don't support eth_getBlockReceipts
+        self.nodes_without_block_receipts: set[str] = set()
+        self.node_scheduler = NodeScheduler(database=database, blockchain=blockchain)
         self.chain_id: SUPPORTED_CHAIN_IDS = blockchain.to_chain_id()  # type: ignore[assignment]
         self.chain_name = self.blockchain.name.lower()
         # BalanceScanner from mycrypto: https://github.com/MyCryptoHQ/eth-scan
@@ -245,7 +316,8 @@ class EvmNodeInquirer(metaclass=ABCMeta):
         """Default call order for evm nodes
 
         Own node always has preference. Then all other node types are randomly queried
-        in sequence depending on a weighted probability.
+        in sequence depending on a weighted probability. The weight of each node is
+        multiplied by the score of its measured latency and error rate.
 
 
         Some benchmarks on weighted probability based random selection when compared
@@ -269,7 +341,7 @@ class EvmNodeInquirer(metaclass=ABCMeta):
         while len(selection) != 0:
             weights = []
             for entry in selection:
-                weights.append(float(entry.weight))
+                weights.append(float(entry.weight) * self.node_scheduler.get(entry.node_info).score())  # noqa: E501
             node = random.choices(selection, weights, k=1)
             ordered_list.append(node[0])
             selection.remove(node[0])
@@ -475,12 +547,44 @@ class EvmNodeInquirer(metaclass=ABCMeta):
                 connectivity_check=True,
             )
 
+    def _query_node(
+            self,
+            method: Callable,
+            node_info: NodeName,
+            web3: Optional[Web3],
+            kwargs: dict[str, Any],
+    ) -> tuple[bool, Any]:
+        """Queries a single node and records the outcome in the node's stats
+
+        Returns (True, result) if the query succeeded and (False, exception) if it raised
+        """
+        stats = self.node_scheduler.get(node_info)
+        start = time.monotonic()
+        try:
+            result = method(web3, **kwargs)
+        except TransactionNotFound:
+            result = None
+        except NODE_QUERY_ERRORS as e:
+            stats.record_error(method.__name__, time.monotonic() - start)
+            return False, e
+        except gevent.GreenletExit:  # another node responded first
+            stats.record_cancel(method.__name__, time.monotonic() - start)
+            raise
+        except Exception as e:  # pylint: disable=broad-except  # re-raised in _query
+            return False, e
+
+        stats.record_success(method.__name__, time.monotonic() - start)
+        return True, result
+
     def _query(self, method: Callable, call_order: Sequence[WeightedNode], **kwargs: Any) -> Any:
         """Queries evm related data by performing a query of the provided method to all given nodes
 
-        The first node in the call order that gets a successful response returns.
+        Nodes are queried in the call order. If a node has not responded after the hedging
+        delay that its stats give, the next node is queried too and the first successful
+        response is returned. If a node fails the next one is queried right away.
         If none get a result then RemoteError is raised
         """
+        nodes: list[tuple[NodeName, Optional[Web3]]] = []
         for weighted_node in call_order:
             node_info = weighted_node.node_info
             web3node = self.web3_mapping.get(node_info, None)
@@ -494,24 +598,35 @@ class EvmNodeInquirer(metaclass=ABCMeta):
             ):
                 continue
 
-            try:
-                web3 = web3node.web3_instance if web3node is not None else None
-                result = method(web3, **kwargs)
-            except (
-                RemoteError,
-                requests.exceptions.RequestException,
-                BlockchainQueryError,
-                BlockNotFound,
-                BadResponseFormat,
-                ValueError,  # Yabir saw this happen with mew node for unavailable method at node. Since it's generic we should replace if web3 implements https://github.com/ethereum/web3.py/issues/2448  # noqa: E501
-            ) as e:
-                log.warning(f'Failed to query {node_info} for {method!s} due to {e!s}')
-                # Catch all possible errors here and just try next node call
-                continue
-            except TransactionNotFound:
-                return None
+            nodes.append((node_info, web3node.web3_instance if web3node is not None else None))
 
-            return result
+        if len(nodes) == 1 or method.__name__ in self.methods_not_to_hedge:
+            for node_info, web3 in nodes:
+                success, value = self._query_node(method, node_info, web3, kwargs)
+                if success is True:
+                    return value
+                self._handle_failed_node_query(method=method, node_info=node_info, error=value)
+        else:
+            queries: dict[gevent.Greenlet, NodeName] = {}
+            try:
+                for idx, (node_info, web3) in enumerate(nodes):
+                    queries[gevent.spawn(self._query_node, method, node_info, web3, kwargs)] = node_info  # noqa: E501
+                    # after the last node wait for all running queries
+                    timeout = self.node_scheduler.get(node_info).hedge_delay(method.__name__) if idx != len(nodes) - 1 else None  # noqa: E501
+                    while len(queries) != 0:
+                        if len(finished := gevent.wait(list(queries), timeout=timeout, count=1)) == 0:  # noqa: E501
+                            log.debug(f'{node_info} did not respond to {method!s} after {timeout} seconds. Querying the next node too')  # noqa: E501
+                            break
+
+                        success, value = finished[0].value
+                        failed_node = queries.pop(finished[0])
+                        if success is True:
+                            return value
+                        self._handle_failed_node_query(method=method, node_info=failed_node, error=value)  # noqa: E501
+                        if idx != len(nodes) - 1:
+                            break  # query the next node right away
+            finally:  # wait for the cancelled queries so that their stats are recorded
+                gevent.killall(list(queries), block=True)
 
         # no node in the call order list was succesfully queried
         raise RemoteError(
@@ -519,6 +634,35 @@ class EvmNodeInquirer(metaclass=ABCMeta):
             f'nodes: {[str(x) for x in call_order]}. Check logs for details.',
         )
 
+    def _handle_failed_node_query(
+            self,
+            method: Callable,
+            node_info: NodeName,
+            error: Exception,
+    ) -> None:
+        """Logs a node query that failed so that the next node can be tried. If the query
+        raised an unexpected exception it is re-raised"""
+        if not isinstance(error, NODE_QUERY_ERRORS):
+            raise error
+
+        log.warning(f'Failed to query {node_info} for {method!s} due to {error!s}')
+
+    def get_nodes_stats(self) -> list[dict[str, Any]]:
+        """Returns the nodes of the chain along with the latency and error rate measured
+        for them and whether rotki is connected to them"""
+        return [{
+            'identifier': node.identifier,
+            'name': node.node_info.name,
+            'endpoint': node.node_info.endpoint,
+            'owned': node.node_info.owned,
+            'connected': node.node_info in self.web3_mapping or node.node_info.name == self.etherscan_node_name,  # noqa: E501
+            **self.node_scheduler.get(node.node_info).serialize(),
+        } for node in self.database.get_rpc_nodes(blockchain=self.blockchain)]
+
+    def save_nodes_stats(self) -> None:
+        with self.database.user_write() as write_cursor:
+            self.node_scheduler.save(write_cursor)
+
     def _get_latest_block_number(self, web3: Optional[Web3]) -> int:
         if web3 is not None:
             return web3.eth.block_number
@@ -686,35 +830,7 @@ class EvmNodeInquirer(metaclass=ABCMeta):
             if tx_receipt is None:
                 return None
 
-            try:
-                # Turn hex numbers to int
-                block_number = int(tx_receipt['blockNumber'], 16)
-                tx_receipt['blockNumber'] = block_number
-                tx_receipt['cumulativeGasUsed'] = int(tx_receipt['cumulativeGasUsed'], 16)
-                tx_receipt['gasUsed'] = int(tx_receipt['gasUsed'], 16)
-                tx_receipt['status'] = int(tx_receipt.get('status', '0x1'), 16)
-                tx_index = int(tx_receipt['transactionIndex'], 16)
-                tx_receipt['transactionIndex'] = tx_index
-                for receipt_log in tx_receipt['logs']:
-                    receipt_log['blockNumber'] = block_number
-                    receipt_log['logIndex'] = deserialize_int_from_hex(
-                        symbol=receipt_log['logIndex'],
-                        location='etherscan tx receipt',
-                    )
-                    receipt_log['transactionIndex'] = tx_index
-            except (DeserializationError, ValueError, KeyError) as e:
-                msg = str(e)
-                if isinstance(e, KeyError):
-                    msg = f'missing key {msg}'
-                log.error(
-                    f'Couldnt deserialize transaction receipt {tx_receipt} data from '
-                    f'etherscan due to {msg}',
-                )
-                raise RemoteError(
-                    f'Couldnt deserialize transaction receipt data from etherscan '
-                    f'due to {msg}. Check logs for details',
-                ) from e
-            return tx_receipt
+            return _process_raw_receipt(tx_receipt, location='etherscan')
 
         # Can raise TransactionNotFound if the user's node is pruned and transaction is old
         tx_receipt = web3.eth.get_transaction_receipt(tx_hash)  # type: ignore
@@ -748,6 +864,178 @@ class EvmNodeInquirer(metaclass=ABCMeta):
         assert tx_receipt, f'tx receipt should exist for tx hash {tx_hash.hex()}'
         return tx_receipt
 
+    def _rpc_batch_request(
+            self,
+            web3: Web3,
+            method: str,
+            params_list: list[list[Any]],
+    ) -> list[Optional[Any]]:
+        """Send the calls of the given method with each of the given params in a single
+        JSON-RPC batch request and return their results in the same order.
+
+        Calls that failed or that the node did not answer have None as result. If the node
+        rejects the batch as too big it is split in two and each half is sent separately.
+
+        May raise:
+        - RemoteError if the node rejects even a single call or returns invalid data
+        - requests.exceptions.RequestException if the node can't be reached
+        """
+        provider = cast(HTTPProvider, web3.provider)
+        endpoint = provider.endpoint_uri
+        assert endpoint is not None, 'node providers are always created with an endpoint'
+        data = json.dumps([
+            {'jsonrpc': '2.0', 'id': idx, 'method': method, 'params': params}
+            for idx, params in enumerate(params_list)
+        ]).encode()
+        try:
+            raw_response = make_post_request(
+                endpoint,
+                data,
+                **provider.get_request_kwargs(),
+            )
+            response = json.loads(raw_response)
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 413 or len(params_list) == 1:
+                raise
+            response = None  # payload too large
+        except ValueError as e:
+            raise RemoteError(f'{endpoint} returned invalid JSON for a {method} batch request') from e  # noqa: E501
+
+        if not isinstance(response, list):  # the whole batch was rejected
+            if len(params_list) == 1:
+                raise RemoteError(f'{endpoint} rejected a {method} call with {response}')  # noqa: E501
+
+            log.debug(f'{endpoint} rejected a batch of {len(params_list)} {method} calls. Splitting it')  # noqa: E501
+            half = len(params_list) // 2
+            return (
+                self._rpc_batch_request(web3=web3, method=method, params_list=params_list[:half]) +  # noqa: E501
+                self._rpc_batch_request(web3=web3, method=method, params_list=params_list[half:])
+            )
+
+        results: list[Optional[Any]] = [None] * len(params_list)
+        for entry in response:
+            if not isinstance(entry, dict) or not isinstance(idx := entry.get('id'), int) or not 0 <= idx < len(params_list):  # noqa: E501
+                continue
+            if 'error' in entry:
+                log.debug(f'{method} call with {params_list[idx]} to {endpoint} failed with {entry["error"]}')  # noqa: E501
+                continue
+            results[idx] = entry.get('result')
+
+        return results
+
+    def _rpc_batch(
+            self,
+            web3: Web3,
+            method: str,
+            params_list: list[list[Any]],
+    ) -> list[Optional[Any]]:
+        """Like _rpc_batch_request but sends the calls in batches of up to rpc_batch_size"""
+        results = []
+        for chunk in get_chunks(params_list, n=self.rpc_batch_size):
+            results.extend(self._rpc_batch_request(web3=web3, method=method, params_list=chunk))
+        return results
+
+    def _get_transaction_receipts(
+            self,
+            web3: Optional[Web3],
+            tx_hashes: list[EVMTxHash],
+            tx_blocks: dict[EVMTxHash, int],
+    ) -> dict[EVMTxHash, dict[str, Any]]:
+        """Query the receipts of the given transactions. Receipts that could not be queried
+        are missing from the result.
+
+        Etherscan is queried one transaction at a time. Nodes are queried with JSON-RPC
+        batch requests. For blocks that contain at least BLOCK_RECEIPTS_MIN_TRANSACTIONS
+        of the transactions, all receipts of the block are queried at once with
+        eth_getBlockReceipts if the node supports it.
+
+        May raise:
+        - RemoteError if a node returns invalid data
+        - requests.exceptions.RequestException if a node can't be reached
+        """
+        receipts: dict[EVMTxHash, dict[str, Any]] = {}
+        if web3 is None:
+            for tx_hash in tx_hashes:
+                try:
+                    tx_receipt = self._get_transaction_receipt(web3=None, tx_hash=tx_hash)
+                except RemoteError as e:
+                    log.warning(f'Failed to query etherscan for {self.chain_name} transaction receipt {tx_hash.hex()} due to {e!s}')  # noqa: E501
+                    continue
+                if tx_receipt is not None:
+                    receipts[tx_hash] = tx_receipt
+
+            return receipts
+
+        endpoint = cast(HTTPProvider, web3.provider).endpoint_uri
+        assert endpoint is not None, 'node providers are always created with an endpoint'
+        hashes_per_block = defaultdict(list)
+        for tx_hash in tx_hashes:
+            if tx_hash == GENESIS_HASH:
+                receipts[tx_hash] = FAKE_GENESIS_TX_RECEIPT
+            elif (block_number := tx_blocks.get(tx_hash)) is not None:
+                hashes_per_block[block_number].append(tx_hash)
+
+        blocks = [x for x, hashes in hashes_per_block.items() if len(hashes) >= BLOCK_RECEIPTS_MIN_TRANSACTIONS]  # noqa: E501
+        if len(blocks) != 0 and endpoint not in self.nodes_without_block_receipts:
+            block_results = self._rpc_batch(
+                web3=web3,
+                method='eth_getBlockReceipts',
+                params_list=[[hex(x)] for x in blocks],
+            )
+            if all(x is None for x in block_results):
+                log.debug(f'{self.chain_name} node {endpoint} does not support eth_getBlockReceipts')  # noqa: E501
+                self.nodes_without_block_receipts.add(endpoint)
+
+            wanted_hashes = {x.hex().lower(): x for x in tx_hashes}
+            for block_receipts in block_results:
+                for block_receipt in block_receipts or []:
+                    if (wanted_hash := wanted_hashes.get(str(block_receipt.get('transactionHash')).lower())) is not None:  # noqa: E501
+                        receipts[wanted_hash] = _process_raw_receipt(block_receipt, location=endpoint)  # noqa: E501
+
+        remaining_hashes = [x for x in tx_hashes if x not in receipts]
+        tx_results = self._rpc_batch(
+            web3=web3,
+            method='eth_getTransactionReceipt',
+            params_list=[[x.hex()] for x in remaining_hashes],
+        )
+        for tx_hash, raw_receipt in zip(remaining_hashes, tx_results):
+            if raw_receipt is not None:  # None if the node is pruned and the transaction is old
+                receipts[tx_hash] = _process_raw_receipt(raw_receipt, location=endpoint)
+
+        return receipts
+
+    def get_transaction_receipts(
+            self,
+            tx_hashes: list[EVMTxHash],
+            tx_blocks: Optional[dict[EVMTxHash, int]] = None,
+            call_order: Optional[Sequence[WeightedNode]] = None,
+    ) -> dict[EVMTxHash, dict[str, Any]]:
+        """Retrieves the receipts of many transactions, batching the queries to the nodes.
+
+        The block numbers of the transactions, if known, allow getting the receipts of
+        whole blocks at once. Receipts that a node fails to return are queried from the
+        next node in the call order. Transactions whose receipt could not be retrieved
+        from any node are missing from the result.
+        """
+        receipts: dict[EVMTxHash, dict[str, Any]] = {}
+        remaining_hashes = tx_hashes
+        for weighted_node in call_order if call_order is not None else self.default_call_order():  # noqa: E501
+            try:
+                node_receipts = self._query(
+                    method=self._get_transaction_receipts,
+                    call_order=[weighted_node],
+                    tx_hashes=remaining_hashes,
+                    tx_blocks=tx_blocks if tx_blocks is not None else {},
+                )
+            except RemoteError:  # node is not connected, pruned or failed
+                continue
+
+            receipts.update(node_receipts or {})
+            if len(remaining_hashes := [x for x in remaining_hashes if x not in receipts]) == 0:
+                break
+
+        return receipts
+
     def _get_transaction_by_hash(
             self,
             web3: Optional[Web3],
@@ -869,106 +1157,167 @@ class EvmNodeInquirer(metaclass=ABCMeta):
         if event_abi['anonymous']:
             # web3.py does not handle the anonymous events correctly and adds the first topic
             filter_args['topics'] = filter_args['topics'][1:]
-        events: list[dict[str, Any]] = []
-        start_block = from_block
+
         if web3 is not None:
+            node_kind = urlparse(web3.manager.provider.endpoint_uri).netloc  # type: ignore[attr-defined]  # noqa: E501
+            until_block = web3.eth.block_number if to_block == 'latest' else to_block
+        else:
+            node_kind = 'etherscan'
+            until_block = self.etherscan.get_latest_block_number() if to_block == 'latest' else to_block  # noqa: E501
+
+        logs_cache = LogsCache(
+            chain_id=self.chain_id,
+            contract_address=contract_address,
+            topics=filter_args['topics'],  # type: ignore[arg-type]
+        )
+        cached_events, start_block = logs_cache.get(from_block=from_block, to_block=until_block)
+        if start_block > until_block:
+            return cached_events
+
+        if web3 is not None:
+            block_range = LogQueryRange(
+                node_kind=node_kind,
+                chain_id=self.chain_id,
+                contract_address=contract_address,
+                event_name=event_name,
+                max_range=self.logquery_block_range(web3=web3, contract_address=contract_address),  # noqa: E501
+                min_range=WEB3_LOGQUERY_MIN_BLOCK_RANGE,
+                target_logs=WEB3_LOGS_TARGET,
+            )
             events = _query_web3_get_logs(
                 web3=web3,
                 filter_args=filter_args,
-                from_block=from_block,
-                to_block=to_block,
+                from_block=start_block,
+                to_block=until_block,
                 contract_address=contract_address,
                 event_name=event_name,
                 argument_filters=argument_filters,
-                initial_block_range=self.logquery_block_range(web3=web3, contract_address=contract_address),  # noqa: E501
+                block_range=block_range,
             )
-        else:  # etherscan
-            until_block = (
-                self.etherscan.get_latest_block_number() if to_block == 'latest' else to_block
+        else:
+            block_range = LogQueryRange(
+                node_kind=node_kind,
+                chain_id=self.chain_id,
+                contract_address=contract_address,
+                event_name=event_name,
+                max_range=ETHERSCAN_LOGQUERY_BLOCK_RANGE,
+                min_range=ETHERSCAN_LOGQUERY_MIN_BLOCK_RANGE,
+                target_logs=ETHERSCAN_LOGS_TARGET,
+            )
+            events = self._query_etherscan_get_logs(
+                contract_address=contract_address,
+                topics=filter_args['topics'],  # type: ignore[arg-type]
+                from_block=start_block,
+                to_block=until_block,
+                block_range=block_range,
             )
-            blocks_step = 300000
-            while start_block <= until_block:
-                while True:  # loop to continuously reduce block range if need b
-                    end_block = min(start_block + blocks_step, until_block)
-                    try:
-                        new_events = self.etherscan.get_logs(
-                            contract_address=contract_address,
-                            topics=filter_args['topics'],  # type: ignore
-                            from_block=start_block,
-                            to_block=end_block,
-                        )
-                    except RemoteError as e:
-                        if 'Please select a smaller result dataset' in str(e):
 
-                            blocks_step = blocks_step // 2
-                            if blocks_step < 100:
-                                raise  # stop trying
-                            # else try with the smaller step
-                            continue
+        block_range.save()
+        if to_block == 'latest':
+            logs_cache.add(
+                from_block=from_block,
+                to_block=until_block - LOGS_CACHE_REORG_BLOCKS,
+                events=events,
+            )
+        return cached_events + events
 
-                        # else some other error
-                        raise
+    def _query_etherscan_get_logs(
+            self,
+            contract_address: ChecksumEvmAddress,
+            topics: list[str],
+            from_block: int,
+            to_block: int,
+            block_range: LogQueryRange,
+    ) -> list[dict[str, Any]]:
+        """Queries logs of an evm contract from etherscan in ranges of blocks
 
-                    break  # we must have a result
+        May raise:
+        - RemoteError if there is a problem with reaching etherscan or with the returned result
+        """
+        events: list[dict[str, Any]] = []
+        start_block = from_block
+        while start_block <= to_block:
+            while True:  # loop to continuously reduce block range if need b
+                end_block = min(start_block + block_range.block_range, to_block)
+                try:
+                    new_events = self.etherscan.get_logs(
+                        contract_address=contract_address,
+                        topics=topics,
+                        from_block=start_block,
+                        to_block=end_block,
+                    )
+                except RemoteError as e:
+                    if 'Please select a smaller result dataset' in str(e):
+                        if block_range.shrink() is False:
+                            raise  # stop trying
+                        # else try with the smaller step
+                        continue
 
-                # Turn all Hex ints to ints
-                for e_idx, event in enumerate(new_events):
-                    try:
-                        block_number = deserialize_int_from_hex(
-                            symbol=event['blockNumber'],
-                            location='etherscan log query',
-                        )
-                        log_index = deserialize_int_from_hex(
-                            symbol=event['logIndex'],
-                            location='etherscan log query',
-                        )
-                        # Try to see if the event is a duplicate that got returned
-                        # in the previous iteration
-                        for previous_event in reversed(events):
-                            if previous_event['blockNumber'] < block_number:
-                                break
-
-                            same_event = (
-                                previous_event['logIndex'] == log_index and
-                                previous_event['transactionHash'] == event['transactionHash']
-                            )
-                            if same_event:
-                                events.pop()
-
-                        new_events[e_idx]['address'] = deserialize_evm_address(
-                            event['address'],
-                        )
-                        new_events[e_idx]['blockNumber'] = block_number
-                        new_events[e_idx]['timeStamp'] = deserialize_int_from_hex(
-                            symbol=event['timeStamp'],
-                            location='etherscan log query',
-                        )
-                        new_events[e_idx]['gasPrice'] = deserialize_int_from_hex(
-                            symbol=event['gasPrice'],
-                            location='etherscan log query',
-                        )
-                        new_events[e_idx]['gasUsed'] = deserialize_int_from_hex(
-                            symbol=event['gasUsed'],
-                            location='etherscan log query',
-                        )
-                        new_events[e_idx]['logIndex'] = log_index
-                        new_events[e_idx]['transactionIndex'] = deserialize_int_from_hex(
-                            symbol=event['transactionIndex'],
-                            location='etherscan log query',
+                    # else some other error
+                    raise
+
+                break  # we must have a result
+
+            # Turn all Hex ints to ints
+            for e_idx, event in enumerate(new_events):
+                try:
+                    block_number = deserialize_int_from_hex(
+                        symbol=event['blockNumber'],
+                        location='etherscan log query',
+                    )
+                    log_index = deserialize_int_from_hex(
+                        symbol=event['logIndex'],
+                        location='etherscan log query',
+                    )
+                    # Try to see if the event is a duplicate that got returned
+                    # in the previous iteration
+                    for previous_event in reversed(events):
+                        if previous_event['blockNumber'] < block_number:
+                            break
+
+                        same_event = (
+                            previous_event['logIndex'] == log_index and
+                            previous_event['transactionHash'] == event['transactionHash']
                         )
-                    except DeserializationError as e:
-                        raise RemoteError(
-                            'Couldnt decode an etherscan event due to {str(e)}}',
-                        ) from e
-
-                # etherscan will only return 1000 events in one go. If more than 1000
-                # are returned such as when no filter args are provided then continue
-                # the query from the last block
-                if len(new_events) == 1000:
-                    start_block = new_events[-1]['blockNumber']
-                else:
-                    start_block = end_block + 1
-                events.extend(new_events)
+                        if same_event:
+                            events.pop()
+
+                    new_events[e_idx]['address'] = deserialize_evm_address(
+                        event['address'],
+                    )
+                    new_events[e_idx]['blockNumber'] = block_number
+                    new_events[e_idx]['timeStamp'] = deserialize_int_from_hex(
+                        symbol=event['timeStamp'],
+                        location='etherscan log query',
+                    )
+                    new_events[e_idx]['gasPrice'] = deserialize_int_from_hex(
+                        symbol=event['gasPrice'],
+                        location='etherscan log query',
+                    )
+                    new_events[e_idx]['gasUsed'] = deserialize_int_from_hex(
+                        symbol=event['gasUsed'],
+                        location='etherscan log query',
+                    )
+                    new_events[e_idx]['logIndex'] = log_index
+                    new_events[e_idx]['transactionIndex'] = deserialize_int_from_hex(
+                        symbol=event['transactionIndex'],
+                        location='etherscan log query',
+                    )
+                except DeserializationError as e:
+                    raise RemoteError(
+                        'Couldnt decode an etherscan event due to {str(e)}}',
+                    ) from e
+
+            # etherscan will only return 1000 events in one go. If more than 1000
+            # are returned such as when no filter args are provided then continue
+            # the query from the last block
+            if len(new_events) == ETHERSCAN_LOGS_PAGE_SIZE:
+                block_range.update(logs_num=len(new_events), blocks_num=new_events[-1]['blockNumber'] - start_block + 1)  # noqa: E501
+                start_block = new_events[-1]['blockNumber']
+            else:
+                block_range.update(logs_num=len(new_events), blocks_num=end_block - start_block + 1)  # noqa: E501
+                start_block = end_block + 1
+            events.extend(new_events)
 
         return events
 
@@ -0,0 +1,143 @@
+import logging
+import math
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, Optional
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import SupportedBlockchain
+from rotkehlchen.utils.misc import ts_now
+
+if TYPE_CHECKING:
+    from rotkehlchen.chain.evm.types import NodeName
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Number of latest response times per node and method used for the hedging delay
+NODE_LATENCY_WINDOW = 50
+# Weight of a new response in the moving averages of latency and error rate
+NODE_STATS_SMOOTHING = 0.1
+# A duplicate request is sent to the next node once the first node has taken longer than
+# this percentile of its latest response times for the same method
+HEDGE_DELAY_PERCENTILE = 0.9
+# Responses of a node for a method needed before its hedging delay is based on them
+HEDGE_DELAY_MIN_SAMPLES = 5
+DEFAULT_HEDGE_DELAY = 2.0  # seconds
+MIN_HEDGE_DELAY = 0.25  # seconds
+MAX_HEDGE_DELAY = 10.0  # seconds
+# Lowest score of a node so that even nodes that always fail get queried again at some point
+MIN_NODE_SCORE = 0.05
+# Seconds between saves of the node stats in the DB
+NODE_STATS_SAVE_INTERVAL = 600
+# Methods whose response time depends on how much data they return, like log queries over
+# a block range. They are left out of the node latency by which nodes are ordered, or the
+# nodes that happened to get the big queries would look slow for all other methods
+NODE_LATENCY_EXCLUDED_METHODS = ('_get_logs',)
+
+
+class NodeStats():
+    """Rolling latency and error rate of a node
+
+    Latencies of queries that got cancelled because another node answered first are
+    counted with the time they ran for. It is a lower bound of the real latency but
+    otherwise nodes that are always slower than the others would never look slow.
+    """
+
+    def __init__(self, latency: Optional[float] = None, error_rate: float = 0.0) -> None:
+        self.latency = latency  # moving average in seconds. None if never queried
+        self.error_rate = error_rate  # moving average of failed queries in [0, 1]
+        self.method_latencies: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=NODE_LATENCY_WINDOW))  # noqa: E501
+        self.queries = self.errors = self.cancelled = 0
+
+    def _add_latency(self, method_name: str, seconds: float) -> None:
+        self.method_latencies[method_name].append(seconds)
+        if method_name in NODE_LATENCY_EXCLUDED_METHODS:
+            return
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += NODE_STATS_SMOOTHING * (seconds - self.latency)
+
+    def record_success(self, method_name: str, seconds: float) -> None:
+        self.queries += 1
+        self._add_latency(method_name, seconds)
+        self.error_rate -= NODE_STATS_SMOOTHING * self.error_rate
+
+    def record_error(self, method_name: str, seconds: float) -> None:
+        self.queries += 1
+        self.errors += 1
+        self._add_latency(method_name, seconds)
+        self.error_rate += NODE_STATS_SMOOTHING * (1 - self.error_rate)
+
+    def record_cancel(self, method_name: str, seconds: float) -> None:
+        self.cancelled += 1
+        self._add_latency(method_name, seconds)
+
+    def hedge_delay(self, method_name: str) -> float:
+        """Seconds to wait for a response of the node before asking another node too"""
+        latencies = self.method_latencies.get(method_name)
+        if latencies is None or len(latencies) < HEDGE_DELAY_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+
+        ordered = sorted(latencies)
+        delay = ordered[math.ceil(HEDGE_DELAY_PERCENTILE * len(ordered)) - 1]
+        return min(max(delay, MIN_HEDGE_DELAY), MAX_HEDGE_DELAY)
+
+    def score(self) -> float:
+        """Score in (0, 1] by which the weight of the node is multiplied when ordering nodes.
+        Nodes that were never queried get the highest score so they get tried."""
+        latency = self.latency if self.latency is not None else 0
+        return max((1 - self.error_rate) / (1 + latency), MIN_NODE_SCORE)
+
+    def serialize(self) -> dict[str, Any]:
+        """The latency is in milliseconds and the error rate is a percentage"""
+        return {
+            'latency': round(self.latency * 1000) if self.latency is not None else None,
+            'error_rate': round(self.error_rate * 100, 2),
+            'queries': self.queries,
+            'errors': self.errors,
+            'cancelled': self.cancelled,
+        }
+
+
+class NodeScheduler():
+    """Keeps the stats of the nodes of a chain, used to order and hedge node queries
+
+    The stats are loaded from the rpc_nodes table and saved back to it periodically
+    so that they survive restarts.
+    """
+
+    def __init__(self, database: 'DBHandler', blockchain: SupportedBlockchain) -> None:
+        self.database = database
+        self.blockchain = blockchain
+        with self.database.conn.read_ctx() as cursor:
+            self.saved_stats = self.database.get_rpc_nodes_stats(cursor=cursor, blockchain=blockchain)  # noqa: E501
+        self.stats: dict['NodeName', NodeStats] = {}
+        self.last_save_ts = ts_now()
+
+    def get(self, node: 'NodeName') -> NodeStats:
+        if (stats := self.stats.get(node)) is None:
+            latency, error_rate = self.saved_stats.get((node.name, node.endpoint), (None, 0.0))
+            stats = self.stats[node] = NodeStats(latency=latency, error_rate=error_rate)
+        return stats
+
+    def should_save(self) -> bool:
+        return len(self.stats) != 0 and ts_now() - self.last_save_ts >= NODE_STATS_SAVE_INTERVAL  # noqa: E501
+
+    def save(self, write_cursor: 'DBCursor') -> None:
+        """Save the latency and error rate of the nodes that were queried in the DB"""
+        stats = [
+            (node.name, node.endpoint, node_stats.latency, node_stats.error_rate)
+            for node, node_stats in self.stats.items()
+            if node_stats.latency is not None
+        ]
+        self.database.update_rpc_nodes_stats(
+            write_cursor=write_cursor,
+            blockchain=self.blockchain,
+            stats=stats,
+        )
+        self.saved_stats.update({(x[0], x[1]): (x[2], x[3]) for x in stats})
+        self.last_save_ts = ts_now()
+        log.debug(f'Saved the stats of {len(stats)} {self.blockchain.value} nodes')
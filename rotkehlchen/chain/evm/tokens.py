@@ -365,9 +365,8 @@ class EvmTokens(metaclass=ABCMeta):
             for address, balances in new_balances.items():
                 addresses_to_balances[address].update(balances)
 
-        token_usd_price: dict[EvmToken, Price] = {}
-        for token in all_tokens:
-            token_usd_price[token] = Inquirer.find_usd_price(asset=token)
+        usd_prices = Inquirer.find_usd_prices(assets=list(all_tokens))
+        token_usd_price = {token: usd_prices[token] for token in all_tokens}
 
         return dict(addresses_to_balances), token_usd_price
 
@@ -5,20 +5,26 @@ from collections.abc import Iterator
 from contextlib import contextmanager
 from typing import TYPE_CHECKING, Optional, Union
 
+import gevent
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 from pysqlcipher3 import dbapi2 as sqlcipher
 
-from rotkehlchen.api.websockets.typedefs import TransactionStatusStep, WSMessageType
+from rotkehlchen.api.websockets.typedefs import (
+    EvmTransactionsSyncStep,
+    TransactionStatusStep,
+    WSMessageType,
+)
 from rotkehlchen.chain.evm.constants import GENESIS_HASH
 from rotkehlchen.chain.evm.types import EvmAccount
 from rotkehlchen.chain.structures import TimestampOrBlockRange
-from rotkehlchen.db.evmtx import DBEvmTx
+from rotkehlchen.db.evmtx import RECEIPTS_QUERY_CHUNK_SIZE, DBEvmTx
 from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
 from rotkehlchen.db.ranges import DBQueryRanges
 from rotkehlchen.errors.misc import InputError, RemoteError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import ChecksumEvmAddress, EVMTxHash, Timestamp, deserialize_evm_tx_hash
-from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.misc import get_chunks, ts_now
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.evm.structures import EvmTxReceipt
@@ -31,6 +37,10 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Number of addresses of a chain whose transactions are queried at the same time. The
+# queries are throttled by the rate limit of etherscan anyway.
+ADDRESSES_QUERY_CONCURRENCY = 3
+
 
 class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
 
@@ -114,6 +124,7 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
         class and query only the time requested in the filter and the part of that time that has
         not yet been queried.
 
+        The addresses are queried concurrently, at most ADDRESSES_QUERY_CONCURRENCY at a time.
         Saves the results in the database.
 
         May raise:
@@ -135,12 +146,36 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
         f_to_ts = filter_query.to_ts
         from_ts = Timestamp(0) if f_from_ts is None else f_from_ts
         to_ts = ts_now() if f_to_ts is None else f_to_ts
-        for address in accounts:
-            self.single_address_query_transactions(
-                address=address,
-                start_ts=from_ts,
-                end_ts=to_ts,
-            )
+        if len(accounts) == 0:
+            return
+
+        self._send_sync_status(EvmTransactionsSyncStep.QUERYING_CHAIN_STARTED, queried=0, total=len(accounts))  # noqa: E501
+        pool = Pool(size=ADDRESSES_QUERY_CONCURRENCY)
+        greenlets = [pool.spawn(
+            self.single_address_query_transactions,
+            address=address,
+            start_ts=from_ts,
+            end_ts=to_ts,
+        ) for address in accounts]
+        try:
+            for queried, greenlet in enumerate(gevent.iwait(greenlets), start=1):
+                greenlet.get()  # re-raise the error of a failed address query
+                self._send_sync_status(EvmTransactionsSyncStep.QUERYING_CHAIN_STATUS_UPDATE, queried=queried, total=len(accounts))  # noqa: E501
+        finally:  # don't leave queries running if a query failed or we got killed
+            gevent.killall(greenlets)
+
+        self._send_sync_status(EvmTransactionsSyncStep.QUERYING_CHAIN_FINISHED, queried=len(accounts), total=len(accounts))  # noqa: E501
+
+    def _send_sync_status(self, status: EvmTransactionsSyncStep, queried: int, total: int) -> None:  # noqa: E501
+        self.msg_aggregator.add_message(
+            message_type=WSMessageType.EVM_TRANSACTIONS_SYNC_STATUS,
+            data={
+                'evm_chain': self.evm_inquirer.chain_id.to_name(),
+                'status': str(status),
+                'queried_addresses': queried,
+                'total_addresses': total,
+            },
+        )
 
     def _query_and_save_transactions_for_range(
             self,
@@ -555,7 +590,7 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
     ) -> None:
         """
         Searches the database for up to `limit` transactions that have no corresponding receipt
-        and for each one of them queries the receipt and saves it in the DB.
+        and queries their receipts in batches and saves them in the DB.
 
         It's protected by a lock to not enter the same code twice
         (i.e. from periodic tasks and from pnl report history events gathering)
@@ -583,24 +618,35 @@ class EvmTransactions(metaclass=ABCMeta):  # noqa: B024
             if len(hash_results) == 0:
                 return  # nothing to do
 
-            for entry in hash_results:
-                try:
-                    tx_receipt_data = self.evm_inquirer.get_transaction_receipt(tx_hash=entry)
-                except RemoteError as e:
-                    self.msg_aggregator.add_warning(f'Failed to query information for {self.evm_inquirer.chain_name} transaction {entry.hex()} due to {e!s}. Skipping...')  # noqa: E501
-                    continue
+            with self.database.conn.read_ctx() as cursor:
+                tx_blocks = dbevmtx.get_transaction_block_numbers(
+                    cursor=cursor,
+                    tx_hashes=hash_results,
+                    chain_id=self.evm_inquirer.chain_id,
+                )
 
-                try:
-                    with self.database.user_write() as write_cursor:
-                        dbevmtx.add_receipt_data(
-                            write_cursor=write_cursor,
-                            chain_id=self.evm_inquirer.chain_id,
-                            data=tx_receipt_data,
-                        )
-                except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
-                    if 'UNIQUE constraint failed: evmtx_receipts.tx_hash' not in str(e):
-                        log.error(f'Failed to store transaction {entry.hex()} receipt due to {e!s}')  # noqa: E501
-                        raise  # if receipt is already added by other greenlet it's fine
+            # query in chunks so that the progress is saved even if the task gets killed
+            for chunk in get_chunks(hash_results, n=RECEIPTS_QUERY_CHUNK_SIZE):
+                receipts = self.evm_inquirer.get_transaction_receipts(
+                    tx_hashes=chunk,
+                    tx_blocks=tx_blocks,
+                )
+                for entry in chunk:
+                    if entry not in receipts:
+                        self.msg_aggregator.add_warning(f'Failed to query information for {self.evm_inquirer.chain_name} transaction {entry.hex()}. Skipping...')  # noqa: E501
+
+                with self.database.user_write() as write_cursor:
+                    for entry, tx_receipt_data in receipts.items():
+                        try:
+                            dbevmtx.add_receipt_data(
+                                write_cursor=write_cursor,
+                                chain_id=self.evm_inquirer.chain_id,
+                                data=tx_receipt_data,
+                            )
+                        except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
+                            if 'UNIQUE constraint failed: evmtx_receipts.tx_hash' not in str(e):
+                                log.error(f'Failed to store transaction {entry.hex()} receipt due to {e!s}')  # noqa: E501
+                                raise  # if receipt is already added by other greenlet it's fine
 
     def add_transaction_by_hash(
             self,
@@ -7,7 +7,7 @@ from requests.exceptions import RequestException
 from web3 import Web3
 from web3.exceptions import TransactionNotFound
 
-from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_TIMEOUT
+from rotkehlchen.chain.constants import DEFAULT_EVM_RPC_BATCH_SIZE, DEFAULT_EVM_RPC_TIMEOUT
 from rotkehlchen.chain.evm.contracts import EvmContracts
 from rotkehlchen.chain.evm.node_inquirer import EvmNodeInquirer
 from rotkehlchen.chain.evm.types import WeightedNode, string_to_evm_address
@@ -41,6 +41,7 @@ class OptimismInquirer(EvmNodeInquirer):
             database: 'DBHandler',
             connect_at_start: Sequence[WeightedNode],
             rpc_timeout: int = DEFAULT_EVM_RPC_TIMEOUT,
+            rpc_batch_size: int = DEFAULT_EVM_RPC_BATCH_SIZE,
     ) -> None:
         etherscan = OptimismEtherscan(
             database=database,
@@ -57,6 +58,7 @@ class OptimismInquirer(EvmNodeInquirer):
             contracts=contracts,
             connect_at_start=connect_at_start,
             rpc_timeout=rpc_timeout,
+            rpc_batch_size=rpc_batch_size,
             contract_multicall=contracts.contract(string_to_evm_address('0x2DC0E2aa608532Da689e89e237dF582B783E552C')),  # noqa: E501
             contract_scan=contracts.contract(string_to_evm_address('0x1e21bc42FaF802A0F115dC998e2F0d522aDb1F68')),  # noqa: E501
             dsproxy_registry=contracts.contract(string_to_evm_address('0x283Cc5C26e53D66ed2Ea252D986F094B37E6e895')),  # noqa: E501
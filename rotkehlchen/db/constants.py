@@ -1,3 +1,5 @@
+from typing import Optional
+
 KRAKEN_ACCOUNT_TYPE_KEY = 'kraken_account_type'
 BINANCE_MARKETS_KEY = 'binance_selected_trade_pairs'
 USER_CREDENTIAL_MAPPING_KEYS = (KRAKEN_ACCOUNT_TYPE_KEY, BINANCE_MARKETS_KEY)
@@ -10,3 +12,27 @@ HISTORY_MAPPING_STATE_CUSTOMIZED = 1
 
 EVM_ACCOUNTS_DETAILS_LAST_QUERIED_TS = 'last_queried_timestamp'
 EVM_ACCOUNTS_DETAILS_TOKENS = 'tokens'
+
+# -- PnL report checkpoints --
+# Settings key under which the earliest timestamp affected by a history change is kept
+PNL_CHECKPOINTS_INVALID_FROM_KEY = 'pnl_checkpoints_invalid_from'
+# Transient DB settings key under which the time that price history changes were last
+# checked is kept. Prices live in the global DB so they can't be tracked by triggers.
+PNL_CHECKPOINTS_PRICES_CHECKED_KEY = 'pnl_checkpoints_prices_checked'
+# Tables whose changes affect PnL reports along with the timestamp in seconds that
+# changing a row affects and an optional condition for the rows that matter.
+# A timestamp of 0 means that the whole history is affected.
+PNL_CHECKPOINTS_TRACKED_TABLES: tuple[tuple[str, str, Optional[str]], ...] = (
+    ('trades', '{row}.timestamp', None),
+    ('asset_movements', '{row}.timestamp', None),
+    ('margin_positions', '{row}.close_time', None),
+    ('ledger_actions', '{row}.timestamp', None),
+    ('history_events', '{row}.timestamp / 1000', None),
+    ('eth2_daily_staking_details', '{row}.timestamp', None),
+    ('eth2_validators', '0', None),
+    ('ignored_actions', '0', None),
+    ('multisettings', '0', "{row}.name = 'ignored_asset'"),
+)
+# Tables whose inserts are not tracked by triggers since they are written in bulk.
+# Their write paths record the earliest inserted timestamp once per batch instead.
+PNL_CHECKPOINTS_UNTRACKED_INSERTS = ('history_events',)
@@ -53,6 +53,9 @@ from rotkehlchen.db.constants import (
     EVM_ACCOUNTS_DETAILS_LAST_QUERIED_TS,
     EVM_ACCOUNTS_DETAILS_TOKENS,
     KRAKEN_ACCOUNT_TYPE_KEY,
+    PNL_CHECKPOINTS_INVALID_FROM_KEY,
+    PNL_CHECKPOINTS_TRACKED_TABLES,
+    PNL_CHECKPOINTS_UNTRACKED_INSERTS,
     USER_CREDENTIAL_MAPPING_KEYS,
 )
 from rotkehlchen.db.drivers.gevent import DBConnection, DBConnectionType, DBCursor
@@ -139,6 +142,8 @@ log = RotkehlchenLogsAdapter(logger)
 KDF_ITER = 64000
 DBINFO_FILENAME = 'dbinfo.json'
 MAIN_DB_NAME = 'rotkehlchen.db'
+# Max number of read only connections that read contexts of the user DB can use
+USER_DB_READ_POOL_SIZE = 4
 TRANSIENT_DB_NAME = 'rotkehlchen_transient.db'
 
 
@@ -319,6 +324,44 @@ class DBHandler:
             self.conn_transient.commit()
 
         self.conn.schema_sanity_check()
+        self._create_pnl_checkpoints_triggers()
+        self._start_read_pool()
+
+    def _create_pnl_checkpoints_triggers(self) -> None:
+        """Create temporary triggers that record the earliest timestamp affected by any
+        change of the history or the ignored lists. PnL report checkpoints after that
+        timestamp are no longer valid and get deleted before the next report.
+
+        SQLite only has row level triggers. So a trigger only writes if its row is before
+        the recorded timestamp and inserts of bulk written tables are not tracked by
+        triggers at all. Their write paths call record_pnl_checkpoints_change() instead.
+        """
+        for table, timestamp, condition in PNL_CHECKPOINTS_TRACKED_TABLES:
+            for action, rows in (('INSERT', ('NEW',)), ('UPDATE', ('OLD', 'NEW')), ('DELETE', ('OLD',))):  # noqa: E501
+                if action == 'INSERT' and table in PNL_CHECKPOINTS_UNTRACKED_INSERTS:
+                    continue
+                affected_ts = ', '.join(f'COALESCE({timestamp.format(row=row)}, 0)' for row in rows)  # noqa: E501
+                if len(rows) != 1:
+                    affected_ts = f'MIN({affected_ts})'
+                when = '' if condition is None else '(' + ' OR '.join(condition.format(row=row) for row in rows) + ') AND '  # noqa: E501
+                self.conn.execute(
+                    f'CREATE TEMP TRIGGER IF NOT EXISTS pnl_checkpoints_{table}_{action.lower()} '
+                    f'AFTER {action} ON main.{table} WHEN {when}NOT EXISTS ('
+                    f"SELECT 1 FROM main.settings WHERE name='{PNL_CHECKPOINTS_INVALID_FROM_KEY}' "
+                    f'AND CAST(value AS INTEGER) <= {affected_ts}) BEGIN '
+                    f"INSERT INTO settings(name, value) VALUES('{PNL_CHECKPOINTS_INVALID_FROM_KEY}', {affected_ts}) "  # noqa: E501
+                    'ON CONFLICT(name) DO UPDATE SET value=MIN(CAST(value AS INTEGER), CAST(excluded.value AS INTEGER)); END;',  # noqa: E501
+                )
+
+    @staticmethod
+    def record_pnl_checkpoints_change(write_cursor: 'DBCursor', timestamp: Timestamp) -> None:
+        """Record that the PnL report checkpoints after the given timestamp are no longer
+        valid. For the writes that are not tracked by the PnL checkpoints triggers."""
+        write_cursor.execute(
+            'INSERT INTO settings(name, value) VALUES(?, ?) ON CONFLICT(name) DO UPDATE '
+            'SET value=MIN(CAST(value AS INTEGER), CAST(excluded.value AS INTEGER))',
+            (PNL_CHECKPOINTS_INVALID_FROM_KEY, timestamp),
+        )
 
     def get_md5hash(self, transient: bool = False) -> str:
         """Get the md5hash of the DB
@@ -428,6 +471,10 @@ class DBHandler:
             # If this goes away at any point it needs to be replaced by something
             # that checks the password is correct at this same point in the code
             conn.execute('PRAGMA cache_size = -32768')
+            if conn_attribute == 'conn':
+                # WAL is only used once the read pool starts, after the upgrades. Until then
+                # keep the DB file self-contained since upgrades and backups copy it.
+                conn.execute('PRAGMA journal_mode=DELETE')
         except sqlcipher.DatabaseError as e:  # pylint: disable=no-member
             raise AuthenticationError(
                 'Wrong password or invalid/corrupt database for user',
@@ -435,6 +482,15 @@ class DBHandler:
 
         setattr(self, conn_attribute, conn)
 
+    def _start_read_pool(self) -> None:
+        """Let read contexts of the user DB use their own read only connections
+        so that they don't have to wait for the writer"""
+        password_for_sqlcipher = _protect_password_sqlcipher(self.password)
+        script = f'PRAGMA key="{password_for_sqlcipher}";'
+        if self.sqlcipher_version == 3:
+            script += f'PRAGMA kdf_iter={KDF_ITER};'
+        self.conn.start_read_pool(size=USER_DB_READ_POOL_SIZE, setup_script=script)
+
     def _change_password(
             self,
             new_password: str,
@@ -462,13 +518,21 @@ class DBHandler:
         return True
 
     def change_password(self, new_password: str) -> bool:
-        """Changes the password for the currently logged in user"""
-        result = (
-            self._change_password(new_password, 'conn') and
-            self._change_password(new_password, 'conn_transient')
-        )
-        if result is True:
-            self.password = new_password
+        """Changes the password for the currently logged in user
+
+        The read connections are keyed with the password, so the read pool is closed
+        before the re-key and started again with the password in use after it.
+        """
+        self.conn.stop_read_pool()
+        try:
+            result = (
+                self._change_password(new_password, 'conn') and
+                self._change_password(new_password, 'conn_transient')
+            )
+            if result is True:
+                self.password = new_password
+        finally:
+            self._start_read_pool()
         return result
 
     def disconnect(self, conn_attribute: Literal['conn', 'conn_transient'] = 'conn') -> None:
@@ -529,6 +593,11 @@ class DBHandler:
                 f'Permission error when reopening the DB. {e!s}. Should never happen here',
             ) from e
         self._run_actions_after_first_connection()
+        with self.user_write() as cursor:  # the imported history may differ in any way
+            cursor.execute(
+                'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
+                (PNL_CHECKPOINTS_INVALID_FROM_KEY, '0'),
+            )
         # all went okay, remove the original temp backup
         (self.user_data_dir / 'rotkehlchen_temp_backup.db').unlink()
 
@@ -985,7 +1054,7 @@ class DBHandler:
             location: Location,
             exchange_name: Optional[str] = None,
     ) -> None:
-        """Delete the query ranges for the given exchange name"""
+        """Delete the query ranges and the trade cursors for the given exchange name"""
         names_to_delete = f'{location!s}\\_%'
         if exchange_name is not None:
             names_to_delete += f'\\_{exchange_name}'
@@ -993,6 +1062,12 @@ class DBHandler:
             'DELETE FROM used_query_ranges WHERE name LIKE ? ESCAPE ?;',
             (names_to_delete, '\\'),
         )
+        querystr = 'DELETE FROM exchange_trade_cursors WHERE exchange_location=?'
+        bindings: tuple[str, ...] = (location.serialize_for_db(),)
+        if exchange_name is not None:
+            querystr += ' AND exchange_name=?'
+            bindings += (exchange_name,)
+        write_cursor.execute(querystr, bindings)
 
     def purge_exchange_data(self, write_cursor: 'DBCursor', location: Location) -> None:
         self.delete_used_query_range_for_exchange(write_cursor=write_cursor, location=location)
@@ -1595,6 +1670,10 @@ class DBHandler:
                 'UPDATE history_events SET location_label=? WHERE location=? AND location_label=?',  # noqa: E501
                 (new_name, location.serialize_for_db(), name),
             )
+            write_cursor.execute(
+                'UPDATE exchange_trade_cursors SET exchange_name=? WHERE exchange_location=? AND exchange_name=?',  # noqa: E501
+                (new_name, location.serialize_for_db(), name),
+            )
 
     def remove_exchange(self, write_cursor: 'DBCursor', name: str, location: Location) -> None:
         write_cursor.execute(
@@ -1700,6 +1779,37 @@ class DBHandler:
                 return json.loads(data[0])
             return []
 
+    def get_exchange_trade_cursors(
+            self,
+            cursor: 'DBCursor',
+            name: str,
+            location: Location,
+    ) -> dict[str, tuple[int, Timestamp]]:
+        """Gets the id and timestamp of the last queried trade per market of an exchange"""
+        cursor.execute(
+            'SELECT market, last_trade_id, last_trade_timestamp FROM exchange_trade_cursors '
+            'WHERE exchange_name=? AND exchange_location=?',
+            (name, location.serialize_for_db()),
+        )
+        return {market: (trade_id, Timestamp(timestamp)) for market, trade_id, timestamp in cursor}  # noqa: E501
+
+    def update_exchange_trade_cursors(
+            self,
+            write_cursor: 'DBCursor',
+            name: str,
+            location: Location,
+            cursors: dict[str, tuple[int, Timestamp]],
+    ) -> None:
+        """Sets the id and timestamp of the last queried trade of the given markets"""
+        write_cursor.executemany(
+            'INSERT OR REPLACE INTO exchange_trade_cursors(exchange_name, exchange_location, '
+            'market, last_trade_id, last_trade_timestamp) VALUES (?, ?, ?, ?, ?)',
+            [
+                (name, location.serialize_for_db(), market, trade_id, timestamp)
+                for market, (trade_id, timestamp) in cursors.items()
+            ],
+        )
+
     def write_tuples(
             self,
             write_cursor: 'DBCursor',
@@ -2996,6 +3106,7 @@ class DBHandler:
             version = self.get_setting(cursor, 'version')
         new_db_filename = f'{ts_now()}_rotkehlchen_db_v{version}.backup'
         new_db_path = self.user_data_dir / new_db_filename
+        self.conn.wal_checkpoint()
         shutil.copyfile(
             self.user_data_dir / 'rotkehlchen.db',
             new_db_path,
@@ -3181,6 +3292,32 @@ class DBHandler:
                 blockchain=blockchain,
             )
 
+    def get_rpc_nodes_stats(
+            self,
+            cursor: 'DBCursor',
+            blockchain: SupportedBlockchain,
+    ) -> dict[tuple[str, str], tuple[Optional[float], float]]:
+        """Get the saved latency in seconds and error rate of the nodes of a blockchain
+        by name and endpoint. Latency is None for nodes that were never queried."""
+        cursor.execute(
+            'SELECT name, endpoint, latency, error_rate FROM rpc_nodes WHERE blockchain=?',
+            (blockchain.value,),
+        )
+        return {(entry[0], entry[1]): (entry[2], entry[3]) for entry in cursor}
+
+    def update_rpc_nodes_stats(
+            self,
+            write_cursor: 'DBCursor',
+            blockchain: SupportedBlockchain,
+            stats: list[tuple[str, str, float, float]],
+    ) -> None:
+        """Save the latency and error rate of nodes given as (name, endpoint, latency, error rate)
+        tuples. Nodes that are not in the DB are ignored."""
+        write_cursor.executemany(
+            'UPDATE rpc_nodes SET latency=?, error_rate=? WHERE name=? AND endpoint=? AND blockchain=?',  # noqa: E501
+            [(latency, error_rate, name, endpoint, blockchain.value) for name, endpoint, latency, error_rate in stats],  # noqa: E501
+        )
+
     def get_user_notes(
             self,
             filter_query: UserNotesFilterQuery,
@@ -6,7 +6,7 @@ import random
 import re
 import sqlite3
 from collections.abc import Generator, Sequence
-from contextlib import contextmanager
+from contextlib import contextmanager, suppress
 from enum import Enum, auto
 from pathlib import Path
 from types import TracebackType
@@ -14,6 +14,7 @@ from typing import TYPE_CHECKING, Any, Literal, Optional, Union
 from uuid import uuid4
 
 import gevent
+from gevent.event import Event
 from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.db.minimized_schema import MINIMIZED_USER_DB_SCHEMA
@@ -33,7 +34,6 @@ DEFAULT_SANITY_CHECK_MESSAGE = (
     'github or contact us in our discord server.'
 )
 
-CONTEXT_SWITCH_WAIT = 1  # seconds to wait for a status change in a DB context switch
 import logging
 
 logger: 'RotkehlchenLogger' = logging.getLogger(__name__)  # type: ignore
@@ -244,6 +244,7 @@ class DBConnection:
         self._conn: UnderlyingConnection
         self.in_callback = gevent.lock.Semaphore()
         self.transaction_lock = gevent.lock.Semaphore()
+        self.path = path
         self.connection_type = connection_type
         self.sql_vm_instructions_cb = sql_vm_instructions_cb
         # We need an ordered set. Python doesn't have such thing as a standalone object, but has
@@ -253,18 +254,23 @@ class DBConnection:
         # https://www.gevent.org/api/gevent.greenlet.html#gevent.Greenlet.minimal_ident
         self.savepoint_greenlet_id: Optional[str] = None
         self.write_greenlet_id: Optional[str] = None
-        if connection_type == DBConnectionType.GLOBAL:
-            self._conn = sqlite3.connect(
-                database=path,
-                check_same_thread=False,
-                isolation_level=None,
-            )
-        else:
-            self._conn = sqlcipher.connect(  # pylint: disable=no-member
-                database=path,
-                check_same_thread=False,
-                isolation_level=None,
-            )
+        # Set when there is no write transaction/savepoint so that greenlets waiting
+        # for them to finish are woken up as soon as they do
+        self.write_finished = Event()
+        self.write_finished.set()
+        self.savepoints_released = Event()
+        self.savepoints_released.set()
+        self.savepoint_waiters = 0
+        # Read only connections used by read_ctx. Only used if start_read_pool() is called
+        self.read_pool_size = 0
+        self.read_pool_paused = False
+        self.reader_setup_script = ''
+        self.readers_num = 0
+        self.idle_readers: list[UnderlyingConnection] = []
+        # greenlet -> (reader connection, number of nested read contexts using it)
+        self.lent_readers: dict[Any, tuple[UnderlyingConnection, int]] = {}
+        self.reader_returned = Event()
+        self._conn = self._connect()
         self._set_progress_handler()
         self.minimized_schema = None
         if connection_type == DBConnectionType.USER:
@@ -272,6 +278,20 @@ class DBConnection:
         elif connection_type == DBConnectionType.GLOBAL:
             self.minimized_schema = MINIMIZED_GLOBAL_DB_SCHEMA
 
+    def _connect(self) -> UnderlyingConnection:
+        if self.connection_type == DBConnectionType.GLOBAL:
+            return sqlite3.connect(
+                database=self.path,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+        # else
+        return sqlcipher.connect(  # pylint: disable=no-member
+            database=self.path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+
     def execute(self, statement: str, *bindings: Sequence) -> DBCursor:
         if __debug__:
             logger.trace(f'DB CONNECTION EXECUTE {statement}')
@@ -323,16 +343,171 @@ class DBConnection:
         return DBCursor(connection=self, cursor=self._conn.cursor())
 
     def close(self) -> None:
+        if self.read_pool_size != 0:
+            self._close_read_pool()
         self._conn.close()
         CONNECTION_MAP.pop(self.connection_type, None)
 
+    def start_read_pool(self, size: int, setup_script: str = '') -> None:
+        """Switch the DB to WAL mode and let read_ctx use up to `size` read only connections
+
+        With WAL readers don't block the writer and see the last committed state of the DB
+        while a write transaction is open, so read contexts no longer have to share the
+        writer connection. Writes always stay on the single writer connection.
+
+        The read connections are opened lazily. `setup_script` is executed on each of them
+        before use and should contain anything needed to read the DB, such as the key.
+        """
+        journal_mode = self._conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        if journal_mode != 'wal':  # in memory DBs can't use WAL
+            logger.warning(
+                f'Could not switch the {self.connection_type.name.lower()} DB to WAL mode. '
+                f'Journal mode is {journal_mode}. Not using a read connection pool',
+            )
+            return
+
+        self.reader_setup_script = setup_script
+        self.read_pool_size = size
+
+    def stop_read_pool(self) -> None:
+        """Wait for the read connections used by other greenlets to be returned and close
+        the read pool. Read contexts use the writer connection until start_read_pool()
+        is called again. Does nothing if the read pool is not used."""
+        if self.read_pool_size == 0:
+            return
+
+        self.read_pool_paused = True  # new read contexts use the writer connection
+        try:
+            self._wait_for_lent_readers()
+            self._close_read_pool()
+        finally:
+            self.read_pool_paused = False
+
+    def _wait_for_lent_readers(self) -> None:
+        """Wait until the read connections used by other greenlets are returned"""
+        current = gevent.getcurrent()
+        while any(greenlet is not current for greenlet in self.lent_readers):
+            self.reader_returned.clear()
+            self.reader_returned.wait()
+
+    def _close_read_pool(self) -> None:
+        """Close all read connections and switch the DB back to the default journal mode
+        so that the DB file is self-contained again once it's closed"""
+        with self.in_callback:
+            for reader in self.idle_readers + [x[0] for x in self.lent_readers.values()]:
+                reader.close()
+        self.idle_readers, self.lent_readers = [], {}
+        self.read_pool_size = self.readers_num = 0
+        self.reader_returned.set()
+        with suppress(sqlite3.OperationalError, sqlcipher.OperationalError):  # pylint: disable=no-member  # noqa: E501
+            self._conn.execute('PRAGMA journal_mode=DELETE')
+
+    def _connect_reader(self) -> Optional[UnderlyingConnection]:
+        try:
+            reader = self._connect()
+            reader.executescript(self.reader_setup_script + 'PRAGMA query_only=ON;')
+        except (sqlite3.Error, sqlcipher.Error) as e:  # pylint: disable=no-member
+            logger.error(
+                f'Failed to open a read connection to the {self.connection_type.name.lower()} '
+                f'DB due to {e!s}. Reads will use the writer connection',
+            )
+            self.read_pool_size = 0
+            return None
+
+        reader.set_progress_handler(CALLBACK_MAP.get(self.connection_type), self.sql_vm_instructions_cb)  # noqa: E501
+        self.readers_num += 1
+        return reader
+
+    def _acquire_reader(self) -> Optional[UnderlyingConnection]:
+        """Get a read connection for the current greenlet. Returns None if the writer
+        connection should be used instead"""
+        if self.read_pool_size == 0 or self.read_pool_paused is True:
+            return None
+
+        current = gevent.getcurrent()
+        if self._conn.in_transaction is True:
+            current_id = get_greenlet_name(current)
+            if current_id in (self.write_greenlet_id, self.savepoint_greenlet_id) or (self.write_greenlet_id is None and self.savepoint_greenlet_id is None):  # noqa: E501
+                return None  # we need to see the uncommitted changes of our own transaction
+
+        if (lent_reader := self.lent_readers.get(current)) is not None:  # nested read context
+            self.lent_readers[current] = (lent_reader[0], lent_reader[1] + 1)
+            return lent_reader[0]
+
+        if len(self.idle_readers) != 0:
+            reader = self.idle_readers.pop()
+        elif self.readers_num < self.read_pool_size:
+            if (new_reader := self._connect_reader()) is None:
+                return None
+            reader = new_reader
+        else:  # all readers are in use. Don't wait and fall back to the writer connection
+            return None
+
+        self.lent_readers[current] = (reader, 1)
+        return reader
+
+    def _release_reader(self) -> None:
+        current = gevent.getcurrent()
+        if (lent_reader := self.lent_readers.pop(current, None)) is None:
+            return  # pool got closed in the meantime
+
+        reader, depth = lent_reader
+        if depth != 1:
+            self.lent_readers[current] = (reader, depth - 1)
+            return
+
+        self.idle_readers.append(reader)
+        self.reader_returned.set()
+
+    def wal_checkpoint(self) -> None:
+        """Write all changes from the WAL file into the DB file so that it can be copied
+
+        Waits until the read connections used by other greenlets are returned and no other
+        greenlet has an open transaction. Does nothing if the read pool is not used.
+
+        May raise:
+        - ContextError if called from inside a write transaction or savepoint
+        """
+        if self.read_pool_size == 0:
+            return
+
+        current = gevent.getcurrent()
+        if get_greenlet_name(current) in (self.write_greenlet_id, self.savepoint_greenlet_id):
+            raise ContextError('Can not checkpoint the WAL file from inside a transaction')
+
+        self.read_pool_paused = True  # new read contexts use the writer connection
+        try:
+            self._wait_for_lent_readers()
+            while self.savepoint_greenlet_id is not None:
+                self._wait_for_savepoints_release()
+            with self.critical_section_and_transaction_lock():
+                busy, _, _ = self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        finally:
+            self.read_pool_paused = False
+
+        if busy != 0:
+            logger.warning(f'Could not fully checkpoint the {self.connection_type.name.lower()} DB WAL file')  # noqa: E501
+
     @contextmanager
     def read_ctx(self) -> Generator['DBCursor', None, None]:
-        cursor = self.cursor()
+        """Opens a cursor for reading from the database
+
+        If a read pool is used the cursor comes from a read only connection that sees the
+        last committed state of the DB. Inside a write transaction or savepoint of the
+        same greenlet the cursor comes from the writer so that it sees the uncommitted
+        changes. If all read connections are busy the writer connection is also used.
+        """
+        reader = self._acquire_reader()
+        if reader is None:
+            cursor = self.cursor()
+        else:
+            cursor = DBCursor(connection=self, cursor=reader.cursor())
         try:
             yield cursor
         finally:
             cursor.close()
+            if reader is not None:
+                self._release_reader()
 
     @contextmanager
     def write_ctx(self, commit_ts: bool = False) -> Generator['DBCursor', None, None]:
@@ -348,7 +523,7 @@ class DBConnection:
             if current_id != self.savepoint_greenlet_id:
                 # savepoint exists but in other greenlet. Wait till it's done.
                 while self.savepoint_greenlet_id is not None:
-                    gevent.sleep(CONTEXT_SWITCH_WAIT)
+                    self._wait_for_savepoints_release()
                 # and now continue with the normal write context logic
             else:  # open another savepoint instead of a write transaction
                 with self.savepoint_ctx() as cursor:
@@ -358,6 +533,7 @@ class DBConnection:
         with self.critical_section(), self.transaction_lock:
             cursor = self.cursor()
             self.write_greenlet_id = get_greenlet_name(gevent.getcurrent())
+            self.write_finished.clear()
             cursor.execute('BEGIN TRANSACTION')
             try:
                 yield cursor
@@ -374,6 +550,7 @@ class DBConnection:
             finally:
                 cursor.close()
                 self.write_greenlet_id = None
+                self.write_finished.set()
 
     @contextmanager
     def savepoint_ctx(
@@ -409,16 +586,21 @@ class DBConnection:
         if savepoint_name is None:
             savepoint_name = str(uuid4())
 
+        if self.savepoint_greenlet_id is None and self.savepoint_waiters != 0:
+            # Let the greenlets that waited for the previous savepoints go first. Otherwise
+            # a greenlet opening savepoints in a loop would never let them in.
+            gevent.sleep(0)
+
         current_id = get_greenlet_name(gevent.getcurrent())
         if self._conn.in_transaction is True and self.write_greenlet_id != current_id:
             # a transaction is open in a different greenlet
             while self.write_greenlet_id is not None:
-                gevent.sleep(CONTEXT_SWITCH_WAIT)  # wait until that transaction ends
+                self.write_finished.wait()  # wait until that transaction ends
 
         if self.savepoint_greenlet_id is not None:
             # savepoints exist but in other greenlet
             while self.savepoint_greenlet_id is not None and current_id != self.savepoint_greenlet_id:  # noqa: E501
-                gevent.sleep(CONTEXT_SWITCH_WAIT)  # wait until no other savepoint exists
+                self._wait_for_savepoints_release()  # wait until no other savepoint exists
         if savepoint_name in self.savepoints:
             raise ContextError(
                 f'Wanted to enter savepoint {savepoint_name} but a savepoint with the same name '
@@ -428,8 +610,16 @@ class DBConnection:
         cursor.execute(f'SAVEPOINT "{savepoint_name}"')
         self.savepoints[savepoint_name] = None
         self.savepoint_greenlet_id = current_id
+        self.savepoints_released.clear()
         return cursor, savepoint_name
 
+    def _wait_for_savepoints_release(self) -> None:
+        self.savepoint_waiters += 1
+        try:
+            self.savepoints_released.wait()
+        finally:
+            self.savepoint_waiters -= 1
+
     def _modify_savepoint(
             self,
             rollback_or_release: Literal['ROLLBACK TO', 'RELEASE'],
@@ -456,6 +646,7 @@ class DBConnection:
             self.savepoints = dict.fromkeys(list_savepoints[:list_savepoints.index(savepoint_name)])  # noqa: E501
             if len(self.savepoints) == 0:  # mark if we are out of all savepoints
                 self.savepoint_greenlet_id = None
+                self.savepoints_released.set()
 
     def rollback_savepoint(self, savepoint_name: Optional[str] = None) -> None:
         """
@@ -25,7 +25,7 @@ from rotkehlchen.types import (
     deserialize_evm_tx_hash,
 )
 from rotkehlchen.utils.hexbytes import hexstring_to_bytes
-from rotkehlchen.utils.misc import hexstr_to_int
+from rotkehlchen.utils.misc import get_chunks, hexstr_to_int
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -36,6 +36,9 @@ if TYPE_CHECKING:
 
 from rotkehlchen.constants.limits import FREE_ETH_TX_LIMIT
 
+# How many transaction hashes are put in the IN clause of the bulk queries at once
+RECEIPTS_QUERY_CHUNK_SIZE = 500
+
 TRANSACTIONS_MISSING_DECODING_QUERY = (
     'evmtx_receipts AS A LEFT OUTER JOIN evm_tx_mappings AS B ON A.tx_hash=B.tx_hash '
     'AND A.chain_id=B.chain_ID LEFT JOIN evm_transactions AS C on '
@@ -164,6 +167,37 @@ class DBEvmTx():
 
         return transactions
 
+    def get_evm_internal_transactions_by_parent(
+            self,
+            cursor: 'DBCursor',
+            parent_tx_hashes: list[EVMTxHash],
+            chain_id: ChainID,
+    ) -> dict[EVMTxHash, list[EvmInternalTransaction]]:
+        """Get all internal transactions under each of the given parent tx hashes for a chain
+
+        Parents without internal transactions are missing from the returned mapping.
+        """
+        transactions: dict[EVMTxHash, list[EvmInternalTransaction]] = {}
+        for chunk in get_chunks(parent_tx_hashes, n=RECEIPTS_QUERY_CHUNK_SIZE):
+            for result in cursor.execute(
+                'SELECT * from evm_internal_transactions WHERE chain_id=? AND '
+                f'parent_tx_hash IN ({",".join("?" * len(chunk))})',
+                (chain_id.serialize_for_db(), *chunk),
+            ).fetchall():
+                tx = EvmInternalTransaction(
+                    parent_tx_hash=deserialize_evm_tx_hash(result[0]),
+                    chain_id=ChainID.deserialize_from_db(result[1]),
+                    trace_id=result[2],
+                    timestamp=result[3],
+                    block_number=result[4],
+                    from_address=result[5],
+                    to_address=result[6],
+                    value=result[7],
+                )
+                transactions.setdefault(tx.parent_tx_hash, []).append(tx)
+
+        return transactions
+
     def get_evm_transactions(
             self,
             cursor: 'DBCursor',
@@ -307,6 +341,43 @@ class DBEvmTx():
             cursor.execute(querystr, bindings)
             return [deserialize_evm_tx_hash(x[0]) for x in cursor]
 
+    def get_decoded_transaction_hashes(
+            self,
+            cursor: 'DBCursor',
+            tx_hashes: list[EVMTxHash],
+            chain_id: ChainID,
+    ) -> list[EVMTxHash]:
+        """Get which of the given transaction hashes have already been decoded"""
+        decoded_hashes: list[EVMTxHash] = []
+        for chunk in get_chunks(tx_hashes, n=RECEIPTS_QUERY_CHUNK_SIZE):
+            cursor.execute(
+                'SELECT tx_hash FROM evm_tx_mappings WHERE chain_id=? AND value=? AND '
+                f'tx_hash IN ({",".join("?" * len(chunk))})',
+                (chain_id.serialize_for_db(), HISTORY_MAPPING_STATE_DECODED, *chunk),
+            )
+            decoded_hashes.extend(deserialize_evm_tx_hash(x[0]) for x in cursor)
+
+        return decoded_hashes
+
+    def get_transaction_block_numbers(
+            self,
+            cursor: 'DBCursor',
+            tx_hashes: list[EVMTxHash],
+            chain_id: ChainID,
+    ) -> dict[EVMTxHash, int]:
+        """Get the block numbers of the given transactions that are in the DB"""
+        block_numbers = {}
+        for chunk in get_chunks(tx_hashes, n=RECEIPTS_QUERY_CHUNK_SIZE):
+            cursor.execute(
+                'SELECT tx_hash, block_number FROM evm_transactions WHERE chain_id=? AND '
+                f'tx_hash IN ({",".join("?" * len(chunk))})',
+                (chain_id.serialize_for_db(), *chunk),
+            )
+            for tx_hash, block_number in cursor.fetchall():
+                block_numbers[deserialize_evm_tx_hash(tx_hash)] = block_number
+
+        return block_numbers
+
     def count_hashes_not_decoded(
             self,
             chain_id: Optional[ChainID],
@@ -404,46 +475,70 @@ class DBEvmTx():
             chain_id: ChainID,
     ) -> Optional[EvmTxReceipt]:
         """Get the evm receipt for the given tx_hash and chain id"""
+        return self.get_receipts(cursor=cursor, tx_hashes=[tx_hash], chain_id=chain_id).get(tx_hash)  # noqa: E501
+
+    def get_receipts(
+            self,
+            cursor: 'DBCursor',
+            tx_hashes: list[EVMTxHash],
+            chain_id: ChainID,
+    ) -> dict[EVMTxHash, EvmTxReceipt]:
+        """Get the evm receipts of the given transaction hashes and chain id
+
+        The receipts, their logs and the topics of the logs are each read with a single
+        query per chunk of hashes instead of a query per receipt and per log.
+        Transactions whose receipt is not in the DB are missing from the returned mapping.
+        """
         chain_id_serialized = chain_id.serialize_for_db()
-        cursor.execute(
-            'SELECT contract_address, status, type from evmtx_receipts WHERE tx_hash=? AND chain_id=?',  # noqa: E501
-            (tx_hash, chain_id_serialized))
-        result = cursor.fetchone()
-        if result is None:
-            return None
-
-        tx_receipt = EvmTxReceipt(
-            tx_hash=tx_hash,
-            chain_id=chain_id,
-            contract_address=result[0],
-            status=bool(result[1]),  # works since value is either 0 or 1
-            type=result[2],
-        )
+        receipts: dict[EVMTxHash, EvmTxReceipt] = {}
+        for chunk in get_chunks(tx_hashes, n=RECEIPTS_QUERY_CHUNK_SIZE):
+            hashes_placeholders = ','.join('?' * len(chunk))
+            bindings = [chain_id_serialized, *chunk]
+            chunk_receipts: dict[bytes, EvmTxReceipt] = {}
+            for result in cursor.execute(
+                'SELECT tx_hash, contract_address, status, type FROM evmtx_receipts '
+                f'WHERE chain_id=? AND tx_hash IN ({hashes_placeholders})',
+                bindings,
+            ).fetchall():
+                chunk_receipts[result[0]] = EvmTxReceipt(
+                    tx_hash=deserialize_evm_tx_hash(result[0]),
+                    chain_id=chain_id,
+                    contract_address=result[1],
+                    status=bool(result[2]),  # works since value is either 0 or 1
+                    type=result[3],
+                )
 
-        cursor.execute(
-            'SELECT log_index, data, address, removed from evmtx_receipt_logs WHERE tx_hash=? AND chain_id=?',  # noqa: E501
-            (tx_hash, chain_id_serialized))
-        with self.db.conn.read_ctx() as other_cursor:
-            for result in cursor:
-                log_index = result[0]
+            if len(chunk_receipts) == 0:
+                continue
+
+            logs: dict[tuple[bytes, int], EvmTxReceiptLog] = {}
+            for result in cursor.execute(
+                'SELECT tx_hash, log_index, data, address, removed FROM evmtx_receipt_logs '
+                f'WHERE chain_id=? AND tx_hash IN ({hashes_placeholders}) '
+                'ORDER BY tx_hash, log_index ASC',
+                bindings,
+            ).fetchall():
                 tx_receipt_log = EvmTxReceiptLog(
-                    log_index=log_index,
-                    data=result[1],
-                    address=result[2],
-                    removed=bool(result[3]),  # works since value is either 0 or 1
+                    log_index=result[1],
+                    data=result[2],
+                    address=result[3],
+                    removed=bool(result[4]),  # works since value is either 0 or 1
                 )
-                other_cursor.execute(
-                    'SELECT topic from evmtx_receipt_log_topics '
-                    'WHERE tx_hash=? AND log_index=? AND chain_id=?'
-                    'ORDER BY topic_index ASC',
-                    (tx_hash, log_index, chain_id_serialized),
-                )
-                for topic_result in other_cursor:
-                    tx_receipt_log.topics.append(topic_result[0])
+                chunk_receipts[result[0]].logs.append(tx_receipt_log)
+                logs[(result[0], result[1])] = tx_receipt_log
+
+            for result in cursor.execute(
+                'SELECT tx_hash, log_index, topic FROM evmtx_receipt_log_topics '
+                f'WHERE chain_id=? AND tx_hash IN ({hashes_placeholders}) '
+                'ORDER BY tx_hash, log_index, topic_index ASC',
+                bindings,
+            ).fetchall():
+                logs[(result[0], result[1])].topics.append(result[2])
 
-                tx_receipt.logs.append(tx_receipt_log)
+            for tx_receipt in chunk_receipts.values():
+                receipts[tx_receipt.tx_hash] = tx_receipt
 
-        return tx_receipt
+        return receipts
 
     def delete_transactions(
             self,
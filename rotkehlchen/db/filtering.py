@@ -139,6 +139,23 @@ class DBTimestampFilter(DBFilter):
         return filters, bindings
 
 
+@dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
+class DBAfterEntryFilter(DBFilter):
+    """Keeps only the entries that come after the given entry when ordering by timestamp
+    and then by a unique identifier column. Used to page through a table in order
+    without offsets, so that entries written in between queries don't shift the pages."""
+    timestamp: int
+    identifier: Union[int, str]
+    timestamp_field: str = 'timestamp'
+    identifier_field: str = 'identifier'
+
+    def prepare(self) -> tuple[list[str], list[Any]]:
+        return (
+            [f'{self.timestamp_field} > ? OR ({self.timestamp_field} = ? AND {self.identifier_field} > ?)'],  # noqa: E501
+            [self.timestamp, self.timestamp, self.identifier],
+        )
+
+
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
 class DBEvmTransactionJoinsFilter(DBFilter):
     """ This join finds transactions involving any of the address/chain combos.
@@ -446,6 +463,7 @@ class EvmTransactionsFilterQuery(DBFilterQuery, FilterWithTimestamp):
             to_ts: Optional[Timestamp] = None,
             tx_hash: Optional[EVMTxHash] = None,
             chain_id: Optional[SUPPORTED_CHAIN_IDS] = None,
+            tx_hashes: Optional[list[EVMTxHash]] = None,
     ) -> 'EvmTransactionsFilterQuery':
         if order_by_rules is None:
             order_by_rules = [('timestamp', True)]
@@ -464,8 +482,15 @@ class EvmTransactionsFilterQuery(DBFilterQuery, FilterWithTimestamp):
             to_ts=to_ts,
         )
         filters: list[DBFilter] = []
-        if tx_hash is not None:  # tx_hash means single result so make it as single filter
-            filters.append(DBEvmTransactionHashFilter(and_op=True, tx_hash=tx_hash))
+        if tx_hash is not None or tx_hashes is not None:  # only the given hashes are needed
+            if tx_hash is not None:  # tx_hash means single result so make it as single filter
+                filters.append(DBEvmTransactionHashFilter(and_op=True, tx_hash=tx_hash))
+            else:
+                filters.append(DBMultiBytesFilter(
+                    and_op=True,
+                    column='evm_transactions.tx_hash',
+                    values=tx_hashes,  # type: ignore[arg-type]  # checked above
+                ))
             if chain_id is not None:  # keep it as last (see chain_id property of this filter)
                 filters.append(DBEvmChainIDFilter(and_op=True, chain_id=chain_id))
 
@@ -570,6 +595,27 @@ class DBMultiValueFilter(Generic[T], DBFilter):
         )
 
 
+@dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
+class DBHistoryEventsExtensionFilter(Generic[T], DBFilter):
+    """Filter history events by a column of a table that extends history_events having
+    a value out of a selection of values.
+
+    The history events queries LEFT JOIN the extension tables and sqlite can't use the
+    index of a column of a LEFT JOIN-ed table to search for the matching history events.
+    It scans the whole history_events table instead. So this is done with a subquery
+    on the extension table that uses the index of the column.
+    """
+    table: Literal['evm_events_info', 'eth_staking_events_info']
+    column: str
+    values: list[T]
+
+    def prepare(self) -> tuple[list[str], list[T]]:
+        return (
+            [f'history_events.identifier IN (SELECT identifier FROM {self.table} WHERE {self.column} IN ({", ".join(["?"] * len(self.values))}))'],  # noqa: E501
+            self.values,
+        )
+
+
 class DBMultiStringFilter(DBMultiValueFilter[str]):
     """Filter a column having a string value out of a selection of values"""
 
@@ -1073,11 +1119,11 @@ class EvmEventFilterQuery(HistoryBaseEntryFilterQuery):
             exclude_ignored_assets=exclude_ignored_assets,
         )
         if counterparties is not None:
-            filter_query.filters.append(DBMultiStringFilter(
+            filter_query.filters.append(DBHistoryEventsExtensionFilter(
                 and_op=True,
+                table='evm_events_info',
                 column='counterparty',
                 values=counterparties,
-                operator='IN',
             ))
 
         if products is not None:
@@ -1089,11 +1135,11 @@ class EvmEventFilterQuery(HistoryBaseEntryFilterQuery):
             ))
 
         if tx_hashes is not None:
-            filter_query.filters.append(DBMultiBytesFilter(
+            filter_query.filters.append(DBHistoryEventsExtensionFilter(
                 and_op=True,
+                table='evm_events_info',
                 column='tx_hash',
-                values=tx_hashes,  # type: ignore  # EVMTxHash is equal to bytes
-                operator='IN',
+                values=tx_hashes,
             ))
 
         return filter_query
@@ -1155,11 +1201,11 @@ class EthStakingEventFilterQuery(HistoryBaseEntryFilterQuery):
             exclude_ignored_assets=exclude_ignored_assets,
         )
         if validator_indices is not None:
-            filter_query.filters.append(DBMultiIntegerFilter(
+            filter_query.filters.append(DBHistoryEventsExtensionFilter(
                 and_op=True,
+                table='eth_staking_events_info',
                 column='validator_index',
                 values=validator_indices,
-                operator='IN',
             ))
 
         return filter_query
@@ -1230,11 +1276,11 @@ class EthDepositEventFilterQuery(EvmEventFilterQuery, EthStakingEventFilterQuery
             tx_hashes=tx_hashes,
         )
         if validator_indices is not None:
-            filter_query.filters.append(DBMultiIntegerFilter(
+            filter_query.filters.append(DBHistoryEventsExtensionFilter(
                 and_op=True,
+                table='eth_staking_events_info',
                 column='validator_index',
                 values=validator_indices,
-                operator='IN',
             ))
 
         return filter_query  # type: ignore  # we are creating an EthDepositEventFilterQuery
@@ -87,6 +87,23 @@ class DBHistoryEvents():
         - sqlcipher.IntegrityError: If the asset of the added history event does not exist in
         the DB. Can only happen if an event with an unresolved asset is passed.
         """
+        identifier = self._add_history_event(
+            write_cursor=write_cursor,
+            event=event,
+            mapping_values=mapping_values,
+        )
+        if identifier is not None:
+            self.db.record_pnl_checkpoints_change(write_cursor, ts_ms_to_sec(event.timestamp))
+        return identifier
+
+    def _add_history_event(
+            self,
+            write_cursor: 'DBCursor',
+            event: HistoryBaseEntry,
+            mapping_values: Optional[dict[str, int]] = None,
+    ) -> Optional[int]:
+        """Like add_history_event but does not record the change for the PnL report
+        checkpoints, so that a batch of events can record it once"""
         db_tuples = event.serialize_for_db()
         write_cursor.execute(
             'INSERT OR IGNORE INTO history_events(entry_type, event_identifier, sequence_index,'
@@ -130,11 +147,16 @@ class DBHistoryEvents():
 
         Check add_history_event() to see possible Exceptions
         """
+        earliest_ts: Optional[TimestampMS] = None
         for event in history:
-            self.add_history_event(
+            if self._add_history_event(
                 write_cursor=write_cursor,
                 event=event,
-            )
+            ) is not None and (earliest_ts is None or event.timestamp < earliest_ts):
+                earliest_ts = event.timestamp
+
+        if earliest_ts is not None:
+            self.db.record_pnl_checkpoints_change(write_cursor, ts_ms_to_sec(earliest_ts))
 
     def edit_history_event(self, event: HistoryBaseEntry) -> tuple[bool, str]:
         """
@@ -400,7 +422,7 @@ class DBHistoryEvents():
         if has_premium is True:
             base_query = f'{base_prefix} {HISTORY_BASE_ENTRY_FIELDS}, {EVM_EVENT_FIELDS}, {ETH_STAKING_EVENT_FIELDS} {ALL_EVENTS_DATA_JOIN}'  # noqa: E501
         else:
-            base_query = f'{base_prefix} * FROM (SELECT {free_query_count} {HISTORY_BASE_ENTRY_FIELDS}, {EVM_EVENT_FIELDS}, {ETH_STAKING_EVENT_FIELDS} {ALL_EVENTS_DATA_JOIN} {free_query_group_by} ORDER BY timestamp DESC, sequence_index ASC LIMIT ?) '  # noqa: E501
+            base_query = f'{base_prefix} * FROM (SELECT {free_query_count} {HISTORY_BASE_ENTRY_FIELDS}, {EVM_EVENT_FIELDS}, {ETH_STAKING_EVENT_FIELDS} {ALL_EVENTS_DATA_JOIN} {free_query_group_by} ORDER BY timestamp DESC, sequence_index ASC LIMIT ?) AS history_events '  # noqa: E501
             bindings.insert(0, FREE_HISTORY_EVENTS_LIMIT)
 
         cursor.execute(base_query + prepared_query, bindings)
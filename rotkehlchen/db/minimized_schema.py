@@ -10,6 +10,7 @@ MINIMIZED_USER_DB_SCHEMA = {
     'timed_location_data': 'timestampINTEGER,locationCHAR(1)NOTNULLDEFAULT("A")REFERENCESlocation(location),usd_valueTEXT,PRIMARYKEY(timestamp,location)',
     'user_credentials': 'nameTEXTNOTNULL,locationCHAR(1)NOTNULLDEFAULT("A")REFERENCESlocation(location),api_keyTEXT,api_secretTEXT,passphraseTEXT,PRIMARYKEY(name,location)',
     'user_credentials_mappings': 'credential_nameTEXTNOTNULL,credential_locationCHAR(1)NOTNULLDEFAULT("A")REFERENCESlocation(location),setting_nameTEXTNOTNULL,setting_valueTEXTNOTNULL,FOREIGNKEY(credential_name,credential_location)REFERENCESuser_credentials(name,location)ONDELETECASCADEONUPDATECASCADE,PRIMARYKEY(credential_name,credential_location,setting_name)',
+    'exchange_trade_cursors': 'exchange_nameTEXTNOTNULL,exchange_locationCHAR(1)NOTNULLDEFAULT("A")REFERENCESlocation(location),marketTEXTNOTNULL,last_trade_idINTEGERNOTNULL,last_trade_timestampINTEGERNOTNULL,PRIMARYKEY(exchange_name,exchange_location,market)',
     'external_service_credentials': 'nameVARCHAR[30]NOTNULLPRIMARYKEY,api_keyTEXT',
     'blockchain_accounts': 'blockchainVARCHAR[24]NOTNULL,accountTEXTNOTNULL,labelTEXT,PRIMARYKEY(blockchain,account)',
     'evm_accounts_details': 'accountVARCHAR[42]NOTNULL,chain_idINTEGERNOTNULL,keyTEXTNOTNULL,valueTEXTNOTNULL,PRIMARYKEY(account,chain_id,key,value)',
@@ -48,6 +49,6 @@ MINIMIZED_USER_DB_SCHEMA = {
     'nfts': 'identifierTEXTNOTNULLPRIMARYKEY,nameTEXT,last_priceTEXT,last_price_assetTEXT,manual_priceINTEGERNOTNULLCHECK(manual_priceIN(0,1)),owner_addressTEXT,blockchainTEXTGENERATEDALWAYSAS("ETH")VIRTUAL,is_lpINTEGERNOTNULLCHECK(is_lpIN(0,1)),image_urlTEXT,collection_nameTEXT,FOREIGNKEY(blockchain,owner_address)REFERENCESblockchain_accounts(blockchain,account)ONDELETECASCADE,FOREIGNKEY(identifier)REFERENCESassets(identifier)ONUPDATECASCADE,FOREIGNKEY(last_price_asset)REFERENCESassets(identifier)ONUPDATECASCADE',
     'ens_mappings': 'addressTEXTNOTNULLPRIMARYKEY,ens_nameTEXTUNIQUE,last_updateINTEGERNOTNULL,last_avatar_updateINTEGERNOTNULLDEFAULT0',
     'address_book': 'addressTEXTNOTNULL,blockchainTEXT,nameTEXTNOTNULL,PRIMARYKEY(address,blockchain)',
-    'rpc_nodes': 'identifierINTEGERNOTNULLPRIMARYKEY,nameTEXTNOTNULL,endpointTEXTNOTNULL,ownedINTEGERNOTNULLCHECK(ownedIN(0,1)),activeINTEGERNOTNULLCHECK(activeIN(0,1)),weightTEXTNOTNULL,blockchainTEXTNOTNULL',
+    'rpc_nodes': 'identifierINTEGERNOTNULLPRIMARYKEY,nameTEXTNOTNULL,endpointTEXTNOTNULL,ownedINTEGERNOTNULLCHECK(ownedIN(0,1)),activeINTEGERNOTNULLCHECK(activeIN(0,1)),weightTEXTNOTNULL,blockchainTEXTNOTNULL,latencyREAL,error_rateREALNOTNULLDEFAULT0',
     'user_notes': 'identifierINTEGERNOTNULLPRIMARYKEY,titleTEXTNOTNULL,contentTEXTNOTNULL,locationTEXTNOTNULL,last_update_timestampINTEGERNOTNULL,is_pinnedINTEGERNOTNULLCHECK(is_pinnedIN(0,1))',
 }
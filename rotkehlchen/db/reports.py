@@ -1,18 +1,31 @@
+import hashlib
+import json
 import logging
+import time
 from copy import deepcopy
 from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, Union, overload
 
 from pysqlcipher3 import dbapi2 as sqlcipher
 
-from rotkehlchen.accounting.constants import FREE_PNL_EVENTS_LIMIT, FREE_REPORTS_LOOKUP_LIMIT
+from rotkehlchen.accounting.constants import (
+    FREE_PNL_EVENTS_LIMIT,
+    FREE_REPORTS_LOOKUP_LIMIT,
+    PNL_EVENTS_WRITE_CHUNK_SIZE,
+)
 from rotkehlchen.accounting.pnl import PnlTotals
 from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
+from rotkehlchen.db.constants import (
+    PNL_CHECKPOINTS_INVALID_FROM_KEY,
+    PNL_CHECKPOINTS_PRICES_CHECKED_KEY,
+)
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.errors.misc import InputError
 from rotkehlchen.errors.serialization import DeserializationError
+from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import Timestamp
-from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.misc import get_system_spec, ts_now
+from rotkehlchen.utils.serialization import rlk_jsondumps
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -61,6 +74,26 @@ def _get_reports_or_events_maybe_limit(
     return entries[:returning_entries_length], entries_found
 
 
+def get_accounting_settings_hash(settings: DBSettings) -> str:
+    """Hash of everything apart from the history that the processing of a PnL report
+    depends on. PnL checkpoints can only be used by reports with the same hash."""
+    return hashlib.sha256(rlk_jsondumps({
+        'version': get_system_spec()['rotkehlchen'],
+        'profit_currency': settings.main_currency.identifier,
+        'taxfree_after_period': settings.taxfree_after_period,
+        'include_crypto2crypto': settings.include_crypto2crypto,
+        'calculate_past_cost_basis': settings.calculate_past_cost_basis,
+        'include_gas_costs': settings.include_gas_costs,
+        'account_for_assets_movements': settings.account_for_assets_movements,
+        'cost_basis_method': settings.cost_basis_method.serialize(),
+        'eth_staking_taxable_after_withdrawal_enabled': settings.eth_staking_taxable_after_withdrawal_enabled,  # noqa: E501
+        'include_fees_in_cost_basis': settings.include_fees_in_cost_basis,
+        'fixed_point_cost_basis': settings.fixed_point_cost_basis,
+        'taxable_ledger_actions': sorted(x.serialize() for x in settings.taxable_ledger_actions),
+        'historical_price_oracles': [x.serialize() for x in settings.historical_price_oracles],
+    }).encode()).hexdigest()
+
+
 class DBAccountingReports():
 
     def __init__(self, database: 'DBHandler'):
@@ -112,17 +145,22 @@ class DBAccountingReports():
             processed_actions: int,
             total_actions: int,
             pnls: PnlTotals,
+            events_flushes: int = 0,
+            events_flush_seconds: float = 0.0,
     ) -> None:
         """Inserts the report overview data
 
+        events_flushes and events_flush_seconds are how many times and for how long in
+        total the report's events were written to the DB.
+
         May raise:
         - InputError if the given report id does not exist
         """
         with self.db.transient_write() as cursor:
             cursor.execute(
-                'UPDATE pnl_reports SET last_processed_timestamp=?,'
-                ' processed_actions=?, total_actions=? WHERE identifier=?',
-                (last_processed_timestamp, processed_actions, total_actions, report_id),
+                'UPDATE pnl_reports SET last_processed_timestamp=?, processed_actions=?, '
+                'total_actions=?, events_flushes=?, events_flush_seconds=? WHERE identifier=?',
+                (last_processed_timestamp, processed_actions, total_actions, events_flushes, events_flush_seconds, report_id),  # noqa: E501
             )
             if cursor.rowcount != 1:
                 raise InputError(
@@ -207,6 +245,8 @@ class DBAccountingReports():
                         'last_processed_timestamp': report[5],
                         'processed_actions': report[6],
                         'total_actions': report[7],
+                        'events_flushes': report[8],
+                        'events_flush_seconds': report[9],
                         'overview': overview,
                         'settings': settings,
                     })
@@ -239,29 +279,46 @@ class DBAccountingReports():
     def add_report_data(
             self,
             report_id: int,
-            time: Timestamp,
-            ts_converter: Callable[[Timestamp], str],
-            event: ProcessedAccountingEvent,
-    ) -> None:
-        """Adds a new entry to a transient report for the PnL history in a given time range
-        May raise:
-        - DeserializationError if there is a conflict at serialization of the event
-        - InputError if the event can not be written to the DB. Probably report id does not exist.
+            entries: list[tuple[Timestamp, str, ProcessedAccountingEvent]],
+    ) -> int:
+        """Adds new entries to a transient report for the PnL history in a given time range
+
+        Each entry is a tuple of the event timestamp, the serialized event and the event.
+        All entries are written with a single statement. If any of them can't be written
+        they are retried one by one so that the rest still make it to the DB and each
+        failure is logged.
+
+        Returns the number of entries that could not be written.
         """
-        data = event.serialize_for_db(ts_converter)
         query = """
         INSERT INTO pnl_events(
             report_id, timestamp, data
         )
         VALUES(?, ?, ?);"""
+        try:
+            with self.db.transient_write() as cursor:
+                cursor.executemany(
+                    query,
+                    [(report_id, timestamp, data) for timestamp, data, _ in entries],
+                )
+        except sqlcipher.IntegrityError:  # pylint: disable=no-member
+            pass  # the transaction got rolled back. Retry each entry on its own
+        else:
+            return 0
+
+        failed = 0
         with self.db.transient_write() as cursor:
-            try:
-                cursor.execute(query, (report_id, time, data))
-            except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
-                raise InputError(
-                    f'Could not write {event} data to the DB due to {e!s}. '
-                    f'Probably report {report_id} does not exist?',
-                ) from e
+            for timestamp, data, event in entries:
+                try:
+                    cursor.execute(query, (report_id, timestamp, data))
+                except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
+                    log.error(
+                        f'Could not write {event} data to the DB due to {e!s}. '
+                        f'Probably report {report_id} does not exist?',
+                    )
+                    failed += 1
+
+        return failed
 
     def get_report_data(
             self,
@@ -317,3 +374,137 @@ class DBAccountingReports():
             entries=records,
             with_limit=with_limit,
         )
+
+    def add_checkpoint(
+            self,
+            settings_hash: str,
+            timestamp: Timestamp,
+            state: dict[str, Any],
+    ) -> None:
+        """Saves the accounting state after processing all events before timestamp"""
+        with self.db.transient_write() as cursor:
+            cursor.execute(
+                'INSERT OR REPLACE INTO pnl_checkpoints(settings_hash, timestamp, state, '
+                'created) VALUES(?, ?, ?, ?)',
+                (settings_hash, timestamp, rlk_jsondumps(state), ts_now()),
+            )
+
+    def invalidate_checkpoints(self) -> None:
+        """Deletes the checkpoints that are after the earliest timestamp affected by a
+        change in the history or the ignored lists since the last invalidation.
+        That timestamp is recorded in the user DB by triggers.
+
+        Also deletes the checkpoints taken before a change of the price history that
+        affects them. Those changes are recorded in the global DB."""
+        self._invalidate_checkpoints_for_prices()
+        with self.db.conn.read_ctx() as cursor:
+            result = cursor.execute(
+                'SELECT value FROM settings WHERE name=?',
+                (PNL_CHECKPOINTS_INVALID_FROM_KEY,),
+            ).fetchone()
+        if result is None:
+            return
+
+        with self.db.transient_write() as cursor:
+            cursor.execute('DELETE FROM pnl_checkpoints WHERE timestamp > ?', (int(result[0]),))
+            log.debug(f'Deleted {cursor.rowcount} PnL checkpoints after {result[0]} due to history changes')  # noqa: E501
+        with self.db.user_write() as cursor:  # keep any change that was recorded meanwhile
+            cursor.execute(
+                'DELETE FROM settings WHERE name=? AND value=?',
+                (PNL_CHECKPOINTS_INVALID_FROM_KEY, result[0]),
+            )
+
+    def _invalidate_checkpoints_for_prices(self) -> None:
+        """Deletes the checkpoints that were taken at or before a price history change
+        made since the last check and are after the earliest timestamp it affects"""
+        with self.db.conn_transient.read_ctx() as cursor:
+            result = cursor.execute(
+                'SELECT value FROM settings WHERE name=?',
+                (PNL_CHECKPOINTS_PRICES_CHECKED_KEY,),
+            ).fetchone()
+        checked_ts = Timestamp(0) if result is None else Timestamp(int(result[0]))
+        now = ts_now()  # taken before the query so that no change can be missed
+        changes = GlobalDBHandler.get_price_history_changes(since=checked_ts)
+        with self.db.transient_write() as cursor:
+            cursor.executemany(
+                'DELETE FROM pnl_checkpoints WHERE timestamp > ? AND created <= ?',
+                changes,
+            )
+            if len(changes) != 0:
+                log.debug(f'Deleted {cursor.rowcount} PnL checkpoints due to {len(changes)} price history changes')  # noqa: E501
+            cursor.execute(
+                'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
+                (PNL_CHECKPOINTS_PRICES_CHECKED_KEY, str(now)),
+            )
+
+    def get_latest_checkpoint(
+            self,
+            settings_hash: str,
+            up_to_ts: Timestamp,
+    ) -> Optional[tuple[Timestamp, dict[str, Any]]]:
+        """Returns the timestamp and state of the latest valid checkpoint with the given
+        settings hash that is at or before up_to_ts, if any"""
+        self.invalidate_checkpoints()
+        with self.db.conn_transient.read_ctx() as cursor:
+            result = cursor.execute(
+                'SELECT timestamp, state FROM pnl_checkpoints WHERE settings_hash=? AND '
+                'timestamp <= ? ORDER BY timestamp DESC LIMIT 1',
+                (settings_hash, up_to_ts),
+            ).fetchone()
+        if result is None:
+            return None
+
+        try:
+            state = json.loads(result[1])
+        except json.JSONDecodeError as e:
+            log.error(f'Could not decode PnL checkpoint at {result[0]} due to {e!s}. Ignoring it')  # noqa: E501
+            return None
+
+        return Timestamp(result[0]), state
+
+
+class DBReportDataWriter():
+    """Buffers the processed events of a PnL report and writes them to the transient DB
+    in chunks instead of opening a new transaction for each event.
+
+    Whoever uses it needs to call flush() once done adding events, including when
+    processing is aborted, so that buffered events are not lost.
+    """
+
+    def __init__(
+            self,
+            database: 'DBHandler',
+            report_id: int,
+            chunk_size: int = PNL_EVENTS_WRITE_CHUNK_SIZE,
+    ) -> None:
+        self.dbreports = DBAccountingReports(database)
+        self.report_id = report_id
+        self.chunk_size = chunk_size
+        self.buffer: list[tuple[Timestamp, str, ProcessedAccountingEvent]] = []
+        self.flushes = 0
+        self.flush_seconds = 0.0
+
+    def add(self, event: ProcessedAccountingEvent, ts_converter: Callable[[Timestamp], str]) -> None:  # noqa: E501
+        """Buffers an event and writes the buffer to the DB if it reached the chunk size
+
+        May raise:
+        - DeserializationError if there is a conflict at serialization of the event
+        """
+        self.buffer.append((event.timestamp, event.serialize_for_db(ts_converter), event))
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes all buffered events to the DB and keeps track of the time it took"""
+        if len(self.buffer) == 0:
+            return
+
+        entries, self.buffer = self.buffer, []
+        start = time.perf_counter()
+        failed = self.dbreports.add_report_data(report_id=self.report_id, entries=entries)
+        self.flush_seconds += time.perf_counter() - start
+        self.flushes += 1
+        log.debug(
+            f'Wrote {len(entries) - failed}/{len(entries)} events of PnL report '
+            f'{self.report_id} to the DB',
+        )
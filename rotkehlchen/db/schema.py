@@ -221,6 +221,19 @@ CREATE TABLE IF NOT EXISTS user_credentials_mappings (
 );
 """  # noqa: E501
 
+# The id and timestamp of the last trade of each market that was queried from exchanges
+# whose trade history is queried per market by trade id
+DB_CREATE_EXCHANGE_TRADE_CURSORS = """
+CREATE TABLE IF NOT EXISTS exchange_trade_cursors (
+    exchange_name TEXT NOT NULL,
+    exchange_location CHAR(1) NOT NULL DEFAULT('A') REFERENCES location(location),
+    market TEXT NOT NULL,
+    last_trade_id INTEGER NOT NULL,
+    last_trade_timestamp INTEGER NOT NULL,
+    PRIMARY KEY (exchange_name, exchange_location, market)
+);
+"""
+
 DB_CREATE_AAVE_EVENTS = """
 CREATE TABLE IF NOT EXISTS aave_events (
     address VARCHAR[42] NOT NULL,
@@ -716,7 +729,9 @@ CREATE TABLE IF NOT EXISTS rpc_nodes(
     owned INTEGER NOT NULL CHECK (owned IN (0, 1)),
     active INTEGER NOT NULL CHECK (active IN (0, 1)),
     weight TEXT NOT NULL,
-    blockchain TEXT NOT NULL
+    blockchain TEXT NOT NULL,
+    latency REAL,
+    error_rate REAL NOT NULL DEFAULT 0
 );
 """
 
@@ -731,6 +746,33 @@ CREATE TABLE IF NOT EXISTS user_notes(
 );
 """
 
+# Secondary indexes for the filters used when querying the history tables. Most are on
+# (filter column, timestamp) so that a filtered query also gets its default
+# ordering from the index. rotkehlchen/tests/db/test_query_plans.py checks that the
+# filter queries use them.
+DB_CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_location_timestamp ON trades(location, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_base_asset_timestamp ON trades(base_asset, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_quote_asset_timestamp ON trades(quote_asset, timestamp);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_timestamp ON asset_movements(timestamp);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_location_timestamp ON asset_movements(location, timestamp);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_asset_timestamp ON asset_movements(asset, timestamp);
+CREATE INDEX IF NOT EXISTS idx_ledger_actions_timestamp ON ledger_actions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_ledger_actions_location_timestamp ON ledger_actions(location, timestamp);
+CREATE INDEX IF NOT EXISTS idx_ledger_actions_asset_timestamp ON ledger_actions(asset, timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_events_timestamp ON history_events(timestamp, sequence_index);
+CREATE INDEX IF NOT EXISTS idx_history_events_location_timestamp ON history_events(location, timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_events_asset_timestamp ON history_events(asset, timestamp);
+CREATE INDEX IF NOT EXISTS idx_evm_events_info_tx_hash ON evm_events_info(tx_hash);
+CREATE INDEX IF NOT EXISTS idx_evm_events_info_counterparty ON evm_events_info(counterparty);
+CREATE INDEX IF NOT EXISTS idx_eth_staking_events_info_validator_index ON eth_staking_events_info(validator_index);
+CREATE INDEX IF NOT EXISTS idx_evm_transactions_timestamp ON evm_transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_evmtx_address_mappings_tx_hash ON evmtx_address_mappings(tx_hash, chain_id);
+CREATE INDEX IF NOT EXISTS idx_timed_balances_currency_timestamp ON timed_balances(currency, timestamp);
+CREATE INDEX IF NOT EXISTS idx_eth2_daily_staking_details_timestamp ON eth2_daily_staking_details(timestamp);
+"""  # noqa: E501
+
 DB_SCRIPT_CREATE_TABLES = f"""
 PRAGMA foreign_keys=off;
 BEGIN TRANSACTION;
@@ -743,6 +785,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_TIMED_LOCATION_DATA}
 {DB_CREATE_USER_CREDENTIALS}
 {DB_CREATE_USER_CREDENTIALS_MAPPINGS}
+{DB_CREATE_EXCHANGE_TRADE_CURSORS}
 {DB_CREATE_EXTERNAL_SERVICE_CREDENTIALS}
 {DB_CREATE_BLOCKCHAIN_ACCOUNTS}
 {DB_CREATE_EVM_ACCOUNTS_DETAILS}
@@ -783,6 +826,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_ADDRESS_BOOK}
 {DB_CREATE_RPC_NODES}
 {DB_CREATE_USER_NOTES}
+{DB_CREATE_INDEXES}
 COMMIT;
 PRAGMA foreign_keys=on;
 """
@@ -10,7 +10,9 @@ CREATE TABLE IF NOT EXISTS pnl_reports (
     first_processed_timestamp INTEGER,
     last_processed_timestamp INTEGER NOT NULL,
     processed_actions INTEGER NOT NULL,
-    total_actions INTEGER NOT NULL
+    total_actions INTEGER NOT NULL,
+    events_flushes INTEGER NOT NULL DEFAULT 0,
+    events_flush_seconds REAL NOT NULL DEFAULT 0
 );
 """
 
@@ -47,6 +49,20 @@ CREATE TABLE IF NOT EXISTS pnl_events (
 );
 """
 
+# Snapshots of the accounting state taken during PnL report processing. Each one holds
+# the state after processing all events before its timestamp. Later reports with the
+# same accounting settings can continue processing from them. Created is the time the
+# snapshot was taken, used to know if a later price change affects it.
+DB_CREATE_PNL_CHECKPOINTS = """
+CREATE TABLE IF NOT EXISTS pnl_checkpoints (
+    settings_hash TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    created INTEGER NOT NULL,
+    PRIMARY KEY(settings_hash, timestamp)
+);
+"""
+
 DB_CREATE_SETTINGS = """
 CREATE TABLE IF NOT EXISTS settings (
     name VARCHAR[24] NOT NULL PRIMARY KEY,
@@ -61,6 +77,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_REPORT_SETTINGS}
 {DB_CREATE_REPORT_TOTALS}
 {DB_CREATE_PNL_EVENTS}
+{DB_CREATE_PNL_CHECKPOINTS}
 {DB_CREATE_SETTINGS}
 COMMIT;
 PRAGMA foreign_keys=on;
@@ -5,8 +5,9 @@ from rotkehlchen.accounting.ledger_actions import LedgerActionType
 from rotkehlchen.assets.asset import Asset, AssetWithOracles
 from rotkehlchen.chain.constants import LAST_EVM_ACCOUNTS_DETECT_KEY
 from rotkehlchen.constants.assets import A_USD
-from rotkehlchen.constants.timing import YEAR_IN_SECONDS
+from rotkehlchen.constants.timing import MONTH_IN_SECONDS, YEAR_IN_SECONDS
 from rotkehlchen.data_migrations.manager import LAST_DATA_MIGRATION
+from rotkehlchen.db.constants import PNL_CHECKPOINTS_INVALID_FROM_KEY
 from rotkehlchen.db.updates import LAST_DATA_UPDATES_KEY, UpdateType
 from rotkehlchen.db.utils import str_to_bool
 from rotkehlchen.errors.serialization import DeserializationError
@@ -24,8 +25,8 @@ from rotkehlchen.types import (
 )
 from rotkehlchen.user_messages import MessagesAggregator
 
-ROTKEHLCHEN_DB_VERSION = 37
-ROTKEHLCHEN_TRANSIENT_DB_VERSION = 1
+ROTKEHLCHEN_DB_VERSION = 38
+ROTKEHLCHEN_TRANSIENT_DB_VERSION = 3
 DEFAULT_TAXFREE_AFTER_PERIOD = YEAR_IN_SECONDS
 DEFAULT_INCLUDE_CRYPTO2CRYPTO = True
 DEFAULT_INCLUDE_GAS_COSTS = True
@@ -58,6 +59,8 @@ DEFAULT_COST_BASIS_METHOD = CostBasisMethod.FIFO
 DEFAULT_TREAT_ETH2_AS_ETH = True
 DEFAULT_ETH_STAKING_TAXABLE_AFTER_WITHDRAWAL_ENABLED = True
 DEFAULT_INCLUDE_FEES_IN_COST_BASIS = True
+DEFAULT_PNL_CHECKPOINTS_INTERVAL = MONTH_IN_SECONDS
+DEFAULT_FIXED_POINT_COST_BASIS = False
 
 
 JSON_KEYS = (
@@ -80,6 +83,7 @@ BOOLEAN_KEYS = (
     'treat_eth2_as_eth',
     'eth_staking_taxable_after_withdrawal_enabled',
     'include_fees_in_cost_basis',
+    'fixed_point_cost_basis',
 )
 INTEGER_KEYS = (
     'version',
@@ -88,6 +92,7 @@ INTEGER_KEYS = (
     'btc_derivation_gap_limit',
     'ssf_graph_multiplier',
     'last_data_migration',
+    'pnl_checkpoints_interval',
 )
 STRING_KEYS = (
     'ksm_rpc_endpoint',
@@ -96,7 +101,7 @@ STRING_KEYS = (
     'frontend_settings',
 )
 TIMESTAMP_KEYS = ('last_write_ts', 'last_data_upload_ts', 'last_balance_save')
-IGNORED_KEYS = (LAST_EVM_ACCOUNTS_DETECT_KEY, LAST_DATA_UPDATES_KEY) + tuple(x.serialize() for x in UpdateType)  # noqa: E501
+IGNORED_KEYS = (LAST_EVM_ACCOUNTS_DETECT_KEY, LAST_DATA_UPDATES_KEY, PNL_CHECKPOINTS_INVALID_FROM_KEY) + tuple(x.serialize() for x in UpdateType)  # noqa: E501
 
 
 class DBSettings(NamedTuple):
@@ -135,6 +140,8 @@ class DBSettings(NamedTuple):
     eth_staking_taxable_after_withdrawal_enabled: bool = DEFAULT_ETH_STAKING_TAXABLE_AFTER_WITHDRAWAL_ENABLED  # noqa: 501
     address_name_priority: list[AddressNameSource] = DEFAULT_ADDRESS_NAME_PRIORITY
     include_fees_in_cost_basis: bool = DEFAULT_INCLUDE_FEES_IN_COST_BASIS
+    pnl_checkpoints_interval: int = DEFAULT_PNL_CHECKPOINTS_INTERVAL
+    fixed_point_cost_basis: bool = DEFAULT_FIXED_POINT_COST_BASIS
 
     def serialize(self) -> dict[str, Any]:
         settings_dict = self._asdict()   # pylint: disable=no-member
@@ -180,6 +187,8 @@ class ModifiableDBSettings(NamedTuple):
     eth_staking_taxable_after_withdrawal_enabled: Optional[bool] = None
     address_name_priority: Optional[list[AddressNameSource]] = None
     include_fees_in_cost_basis: Optional[bool] = None
+    pnl_checkpoints_interval: Optional[int] = None
+    fixed_point_cost_basis: Optional[bool] = None
 
     def serialize(self) -> dict[str, Any]:
         settings_dict = {}
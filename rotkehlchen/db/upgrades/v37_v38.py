@@ -0,0 +1,81 @@
+import logging
+from typing import TYPE_CHECKING
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+    from rotkehlchen.db.upgrade_manager import DBUpgradeProgressHandler
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+
+def _create_indexes(write_cursor: 'DBCursor') -> None:
+    """Create the secondary indexes used by the filters of the history queries"""
+    log.debug('Enter _create_indexes')
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_location_timestamp ON trades(location, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_base_asset_timestamp ON trades(base_asset, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_quote_asset_timestamp ON trades(quote_asset, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_asset_movements_timestamp ON asset_movements(timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_asset_movements_location_timestamp ON asset_movements(location, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_asset_movements_asset_timestamp ON asset_movements(asset, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_actions_timestamp ON ledger_actions(timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_actions_location_timestamp ON ledger_actions(location, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_actions_asset_timestamp ON ledger_actions(asset, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_timestamp ON history_events(timestamp, sequence_index);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_location_timestamp ON history_events(location, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_asset_timestamp ON history_events(asset, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_events_info_tx_hash ON evm_events_info(tx_hash);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_events_info_counterparty ON evm_events_info(counterparty);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_eth_staking_events_info_validator_index ON eth_staking_events_info(validator_index);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evm_transactions_timestamp ON evm_transactions(timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_evmtx_address_mappings_tx_hash ON evmtx_address_mappings(tx_hash, chain_id);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_timed_balances_currency_timestamp ON timed_balances(currency, timestamp);')  # noqa: E501
+    write_cursor.execute('CREATE INDEX IF NOT EXISTS idx_eth2_daily_staking_details_timestamp ON eth2_daily_staking_details(timestamp);')  # noqa: E501
+    log.debug('Exit _create_indexes')
+
+
+def _add_rpc_nodes_stats(write_cursor: 'DBCursor') -> None:
+    """Add the columns for the latency and error rate that rotki measures for each node"""
+    log.debug('Enter _add_rpc_nodes_stats')
+    write_cursor.execute('ALTER TABLE rpc_nodes ADD COLUMN latency REAL;')
+    write_cursor.execute('ALTER TABLE rpc_nodes ADD COLUMN error_rate REAL NOT NULL DEFAULT 0;')  # noqa: E501
+    log.debug('Exit _add_rpc_nodes_stats')
+
+
+def _create_exchange_trade_cursors(write_cursor: 'DBCursor') -> None:
+    """Create the table of the last queried trade of each market of exchanges"""
+    log.debug('Enter _create_exchange_trade_cursors')
+    write_cursor.execute("""
+    CREATE TABLE IF NOT EXISTS exchange_trade_cursors (
+        exchange_name TEXT NOT NULL,
+        exchange_location CHAR(1) NOT NULL DEFAULT('A') REFERENCES location(location),
+        market TEXT NOT NULL,
+        last_trade_id INTEGER NOT NULL,
+        last_trade_timestamp INTEGER NOT NULL,
+        PRIMARY KEY (exchange_name, exchange_location, market)
+    );""")
+    log.debug('Exit _create_exchange_trade_cursors')
+
+
+def upgrade_v37_to_v38(db: 'DBHandler', progress_handler: 'DBUpgradeProgressHandler') -> None:
+    """Upgrades the DB from v37 to v38. This was in v1.29.0 release.
+
+        - Add secondary indexes for the history filters
+        - Add latency and error rate columns to the rpc nodes
+        - Add the exchange trade cursors table
+    """
+    log.debug('Entered userdb v37->v38 upgrade')
+    progress_handler.set_total_steps(3)
+    with db.user_write() as write_cursor:
+        _create_indexes(write_cursor)
+        progress_handler.new_step()
+        _add_rpc_nodes_stats(write_cursor)
+        progress_handler.new_step()
+        _create_exchange_trade_cursors(write_cursor)
+        progress_handler.new_step()
+
+    log.debug('Finished userdb v37->v38 upgrade')
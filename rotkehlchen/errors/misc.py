@@ -76,3 +76,7 @@ class DBSchemaError(Exception):
 
 class GreenletKilledError(Exception):
     """Raised when a greenlet is killed"""
+
+
+class ProcessPoolError(Exception):
+    """Raised when a job sent to the process pool could not be run by a worker process"""
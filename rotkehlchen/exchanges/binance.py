@@ -11,6 +11,7 @@ from uuid import uuid4
 
 import gevent
 import requests
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.ledger_actions import LedgerAction
 from rotkehlchen.accounting.structures.balance import Balance
@@ -98,6 +99,20 @@ V3_METHODS = (
 PUBLIC_METHODS = ('exchangeInfo', 'time')
 
 RETRY_AFTER_LIMIT = 60
+# Request weight that can be used per minute and the weight of the heavier methods of the
+# api endpoints. Methods not listed here have a weight of 1.
+# https://binance-docs.github.io/apidocs/spot/en/#limits
+BINANCE_REQUEST_WEIGHT_LIMIT = 6000
+BINANCEUS_REQUEST_WEIGHT_LIMIT = 1200
+API_METHODS_WEIGHT = {
+    'account': 20,
+    'myTrades': 20,
+    'exchangeInfo': 20,
+}
+# Number of markets whose trades are queried at the same time
+TRADES_QUERY_CONCURRENCY = 5
+# Limit of trades to return per myTrades query. 1000 is max limit according to docs
+TRADES_QUERY_LIMIT = 1000
 # Binance api error codes we check for (all below apis seem to have the same)
 # https://binance-docs.github.io/apidocs/spot/en/#error-codes-2
 # https://binance-docs.github.io/apidocs/futures/en/#error-codes-2
@@ -228,6 +243,14 @@ class Binance(ExchangeInterface, ExchangeWithExtras):
         self.msg_aggregator = msg_aggregator
         self.offset_ms = 0
         self.selected_pairs = binance_selected_trade_pairs
+        self.request_weight_limit = BINANCE_REQUEST_WEIGHT_LIMIT if exchange_location == Location.BINANCE else BINANCEUS_REQUEST_WEIGHT_LIMIT  # noqa: E501
+        # request weight used in the current minute as returned by binance and the
+        # weight of the requests whose response has not arrived yet
+        self.used_weight = 0
+        self.used_weight_minute = 0
+        self.pending_weight = 0
+        # cursors of the markets of the last trades query, saved along with its trades
+        self.trade_cursors_to_save: dict[str, tuple[int, Timestamp]] = {}
 
     def first_connection(self) -> None:
         if self.first_connection_made:
@@ -292,6 +315,36 @@ class Binance(ExchangeInterface, ExchangeWithExtras):
 
         return True, ''
 
+    def _wait_for_request_weight(self, weight: int) -> None:
+        """Waits until the request weight limit of the current minute allows a request of
+        the given weight and counts it as pending until its response arrives.
+
+        The used weight is the one returned by binance in the response headers since it
+        also counts requests of other clients with the same IP. Binance resets it at the
+        start of each minute of its server time.
+        """
+        if weight == 0:
+            return
+
+        while True:
+            now_ms = ts_now_in_ms() + self.offset_ms
+            minute = now_ms // 60000
+            if minute != self.used_weight_minute:
+                self.used_weight_minute = minute
+                self.used_weight = 0
+
+            if self.used_weight + self.pending_weight + weight <= self.request_weight_limit:
+                self.pending_weight += weight
+                return
+
+            wait_secs = ((minute + 1) * 60000 - now_ms) / 1000
+            log.debug(
+                f'{self.name} request weight limit reached. Waiting for the next minute',
+                used_weight=self.used_weight,
+                seconds=wait_secs,
+            )
+            gevent.sleep(wait_secs)
+
     def api_query(
             self,
             api_type: BINANCE_API_TYPE,
@@ -341,6 +394,9 @@ class Binance(ExchangeInterface, ExchangeWithExtras):
                 f'https://{api_subdomain}.{self.uri}{api_type}/v{api_version!s}/{method}?'
             )
             request_url += urlencode(call_options)
+            # only the api endpoints count the request weight per IP
+            request_weight = API_METHODS_WEIGHT.get(method, 1) if api_type == 'api' else 0
+            self._wait_for_request_weight(request_weight)
             log.debug(f'{self.name} API request', request_url=request_url)
             try:
                 response = self.session.get(request_url, timeout=DEFAULT_TIMEOUT_TUPLE)
@@ -348,6 +404,12 @@ class Binance(ExchangeInterface, ExchangeWithExtras):
                 raise RemoteError(
                     f'{self.name} API request failed due to {e!s}',
                 ) from e
+            finally:
+                self.pending_weight -= request_weight
+
+            if api_type == 'api' and (used_weight := response.headers.get('x-mbx-used-weight-1m')) is not None:  # noqa: E501
+                with suppress(ValueError):
+                    self.used_weight = max(self.used_weight, int(used_weight))
 
             if response.status_code not in (200, 418, 429):
                 code = 'no code found'
@@ -995,39 +1057,41 @@ class Binance(ExchangeInterface, ExchangeWithExtras):
         else:
             iter_markets = list(self._symbols_to_pair.keys())
 
-        raw_data = []
-        # Limit of results to return. 1000 is max limit according to docs
-        limit = 1000
+        with self.db.conn.read_ctx() as cursor:
+            trade_cursors = self.db.get_exchange_trade_cursors(
+                cursor=cursor,
+                name=self.name,
+                location=self.location,
+            )
+
+        pool = Pool(size=TRADES_QUERY_CONCURRENCY)
+        greenlets = []
         for symbol in iter_markets:
-            last_trade_id = 0
-            len_result = limit
-            while len_result == limit:
-                # We know that myTrades returns a list from the api docs
-                result = self.api_query_list(
-                    'api',
-                    'myTrades',
-                    options={
-                        'symbol': symbol,
-                        'fromId': last_trade_id,
-                        'limit': limit,
-                        # Not specifying them since binance does not seem to
-                        # respect them and always return all trades
-                    })
-                if result:
-                    try:
-                        last_trade_id = int(result[-1]['id']) + 1
-                    except (ValueError, KeyError, IndexError) as e:
-                        raise RemoteError(
-                            f'Could not parse id from Binance myTrades api query result: {result}',
-                        ) from e
-
-                len_result = len(result)
-                log.debug(f'{self.name} myTrades query result', results_num=len_result)
-                for r in result:
-                    r['symbol'] = symbol
+            from_id = 0
+            # Trade ids of a market increase with time so if all trades up to the cursor
+            # are before the queried range, only trades after the cursor need to be queried
+            if (trade_cursor := trade_cursors.get(symbol)) is not None and trade_cursor[1] < start_ts:  # noqa: E501
+                from_id = trade_cursor[0] + 1
+            greenlets.append(pool.spawn(
+                self._query_market_trades,
+                symbol=symbol,
+                from_id=from_id,
+                end_ts=end_ts,
+            ))
+
+        raw_data = []
+        new_cursors = {}
+        try:
+            for greenlet in gevent.iwait(greenlets):
+                symbol, result, new_cursor = greenlet.get()  # re-raise a failed query's error
                 raw_data.extend(result)
+                if new_cursor is not None and (symbol not in trade_cursors or new_cursor[0] > trade_cursors[symbol][0]):  # noqa: E501
+                    new_cursors[symbol] = new_cursor
+        finally:  # don't leave queries running if a query failed or we got killed
+            gevent.killall(greenlets)
 
-            raw_data.sort(key=lambda x: x['time'])
+        self.trade_cursors_to_save = new_cursors
+        raw_data.sort(key=lambda x: x['time'])
 
         trades = []
         for raw_trade in raw_data:
@@ -1080,6 +1144,68 @@ class Binance(ExchangeInterface, ExchangeWithExtras):
 
         return trades, (start_ts, end_ts)
 
+    def _query_market_trades(
+            self,
+            symbol: str,
+            from_id: int,
+            end_ts: Timestamp,
+    ) -> tuple[str, list[dict[str, Any]], Optional[tuple[int, Timestamp]]]:
+        """Queries all trades of a market starting from the trade with from_id
+
+        Returns the symbol, the raw trades and the id and timestamp of the last trade
+        up to end_ts, from which later queries can resume. Or None if there is none.
+
+        May raise:
+        - RemoteError
+        - BinancePermissionError
+        """
+        raw_data = []
+        last_trade: Optional[tuple[int, Timestamp]] = None
+        len_result = TRADES_QUERY_LIMIT
+        while len_result == TRADES_QUERY_LIMIT:
+            # We know that myTrades returns a list from the api docs
+            result = self.api_query_list(
+                'api',
+                'myTrades',
+                options={
+                    'symbol': symbol,
+                    'fromId': from_id,
+                    'limit': TRADES_QUERY_LIMIT,
+                    # Not specifying them since binance does not seem to
+                    # respect them and always return all trades
+                })
+            if result:
+                try:
+                    from_id = int(result[-1]['id']) + 1
+                except (ValueError, KeyError, IndexError) as e:
+                    raise RemoteError(
+                        f'Could not parse id from Binance myTrades api query result: {result}',
+                    ) from e
+
+            for r in result:
+                r['symbol'] = symbol
+                # trades that can't be deserialized are reported when processing them
+                with suppress(DeserializationError, KeyError, ValueError):
+                    timestamp = deserialize_timestamp_from_intms(r['time'])
+                    if timestamp <= end_ts:
+                        last_trade = int(r['id']), timestamp
+
+            len_result = len(result)
+            log.debug(f'{self.name} myTrades query result', results_num=len_result)
+            raw_data.extend(result)
+
+        return symbol, raw_data, last_trade
+
+    def save_trades_query_state(self, write_cursor: 'DBCursor') -> None:
+        if len(self.trade_cursors_to_save) != 0:
+            self.db.update_exchange_trade_cursors(
+                write_cursor=write_cursor,
+                name=self.name,
+                location=self.location,
+                cursors=self.trade_cursors_to_save,
+            )
+        self.trade_cursors_to_save = {}
+
     def _query_online_fiat_payments(self, start_ts: Timestamp, end_ts: Timestamp) -> list[Trade]:
         if self.location == Location.BINANCEUS:
             return []  # dont exist for Binance US: https://github.com/rotki/rotki/issues/3664
@@ -34,6 +34,7 @@ from rotkehlchen.utils.mixins.lockable import LockableQueryMixIn, protect_with_l
 
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -188,6 +189,14 @@ class ExchangeInterface(CacheableMixIn, LockableQueryMixIn):
             'query_online_trade_history() should only be implemented by subclasses',
         )
 
+    def save_trades_query_state(self, write_cursor: 'DBCursor') -> None:
+        """Saves where the next online trade history query can resume from
+
+        Called in the same DB transaction that saves the trades returned by the last
+        query_online_trade_history() so that the two can never get out of sync. Should be
+        implemented by subclasses that keep such state.
+        """
+
     def query_online_margin_history(
             self,
             start_ts: Timestamp,
@@ -279,6 +288,7 @@ class ExchangeInterface(CacheableMixIn, LockableQueryMixIn):
                 with self.db.user_write() as write_cursor:
                     if new_trades != []:
                         self.db.add_trades(write_cursor=write_cursor, trades=new_trades)
+                    self.save_trades_query_state(write_cursor)
 
                     # and also set the used queried timestamp range for the exchange
                     ranges.update_used_query_range(
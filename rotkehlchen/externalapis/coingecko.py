@@ -1,5 +1,6 @@
 import json
 import logging
+from collections import defaultdict
 from http import HTTPStatus
 from typing import Any, Literal, NamedTuple, Optional, Union, overload
 from urllib.parse import urlencode
@@ -19,7 +20,13 @@ from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.interfaces import HistoricalPriceOracleInterface
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import ChainID, EvmTokenKind, Price, Timestamp
-from rotkehlchen.utils.misc import create_timestamp, set_user_agent, timestamp_to_date, ts_now
+from rotkehlchen.utils.misc import (
+    create_timestamp,
+    get_chunks,
+    set_user_agent,
+    timestamp_to_date,
+    ts_now,
+)
 from rotkehlchen.utils.mixins.penalizable_oracle import PenalizablePriceOracleMixin
 
 logger = logging.getLogger(__name__)
@@ -416,6 +423,9 @@ DELISTED_ASSETS = {
 
 }
 
+# Number of coingecko ids whose prices are queried in one simple/price request
+COINGECKO_SIMPLE_PRICE_IDS_PER_QUERY = 100
+
 COINGECKO_SIMPLE_VS_CURRENCIES = [
     'btc',
     'eth',
@@ -685,6 +695,54 @@ class Coingecko(HistoricalPriceOracleInterface, PenalizablePriceOracleMixin):
             )
             return ZERO_PRICE, False
 
+    def query_multiple_current_prices(
+            self,
+            from_assets: list[AssetWithOracles],
+            to_asset: AssetWithOracles,
+    ) -> dict[AssetWithOracles, Price]:
+        """Returns the simple prices of from_assets in to_asset found in coingecko
+
+        Queries the prices of many coingecko ids at once. Assets not supported by coingecko
+        and the assets of requests that failed are not in the result.
+        """
+        vs_currency = to_asset.identifier.lower()
+        if vs_currency not in COINGECKO_SIMPLE_VS_CURRENCIES:
+            log.warning(
+                f'Tried to query coingecko simple prices to {to_asset.identifier}. '
+                f'But to_asset is not supported',
+            )
+            return {}
+
+        ids_to_assets: defaultdict[str, list[AssetWithOracles]] = defaultdict(list)
+        for from_asset in from_assets:
+            try:
+                ids_to_assets[from_asset.to_coingecko()].append(from_asset)
+            except UnsupportedAsset:
+                log.debug(f'Skipping {from_asset.identifier} in coingecko simple prices since it is not supported')  # noqa: E501
+
+        prices = {}
+        for chunk in get_chunks(list(ids_to_assets), n=COINGECKO_SIMPLE_PRICE_IDS_PER_QUERY):
+            try:
+                result = self._query(
+                    module='simple/price',
+                    options={
+                        'ids': ','.join(chunk),
+                        'vs_currencies': vs_currency,
+                    })
+            except RemoteError as e:
+                log.warning(f'Failed to query coingecko simple prices due to {e!s}')
+                break  # the rest of the assets will be queried from the next oracles
+
+            for coingecko_id in chunk:
+                try:
+                    price = Price(FVal(result[coingecko_id][vs_currency]))
+                except KeyError:
+                    continue  # coingecko has no price for it
+                for from_asset in ids_to_assets[coingecko_id]:
+                    prices[from_asset] = price
+
+        return prices
+
     def can_query_history(
             self,
             from_asset: Asset,  # pylint: disable=unused-argument
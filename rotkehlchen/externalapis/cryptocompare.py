@@ -1,6 +1,7 @@
 import logging
 import os
-from collections import deque
+from collections import defaultdict, deque
+from collections.abc import Iterator
 from json.decoder import JSONDecodeError
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal, Optional
@@ -159,6 +160,8 @@ CRYPTOCOMPARE_SPECIAL_CASES_MAPPING = {
 }
 CRYPTOCOMPARE_SPECIAL_CASES = CRYPTOCOMPARE_SPECIAL_CASES_MAPPING.keys()
 CRYPTOCOMPARE_HOURQUERYLIMIT = 2000
+# Maximum length of the comma separated symbols of a pricemulti query
+CRYPTOCOMPARE_PRICEMULTI_FSYMS_LENGTH = 300
 
 
 def _multiply_str_nums(a: str, b: str) -> str:
@@ -189,6 +192,21 @@ def _check_hourly_data_sanity(
         index += 2
 
 
+def _chunk_symbols(symbols: list[str]) -> Iterator[list[str]]:
+    """Splits symbols into chunks that fit in the fsyms of a pricemulti query"""
+    chunk: list[str] = []
+    length = 0
+    for symbol in symbols:
+        if len(chunk) != 0 and length + len(symbol) + 1 > CRYPTOCOMPARE_PRICEMULTI_FSYMS_LENGTH:
+            yield chunk
+            chunk, length = [], 0
+        chunk.append(symbol)
+        length += len(symbol) + 1  # +1 for the comma
+
+    if len(chunk) != 0:
+        yield chunk
+
+
 class Cryptocompare(ExternalServiceWithApiKey, HistoricalPriceOracleInterface, PenalizablePriceOracleMixin):  # noqa: E501
     def __init__(self, data_directory: Path, database: Optional['DBHandler']) -> None:
         HistoricalPriceOracleInterface.__init__(self, oracle_name='cryptocompare')
@@ -483,6 +501,59 @@ class Cryptocompare(ExternalServiceWithApiKey, HistoricalPriceOracleInterface, P
 
         return Price(FVal(result[cc_to_asset_symbol])), False
 
+    def query_multiple_current_prices(
+            self,
+            from_assets: list[AssetWithOracles],
+            to_asset: AssetWithOracles,
+    ) -> dict[AssetWithOracles, Price]:
+        """Returns the current prices of from_assets in to_asset found in cryptocompare
+
+        Queries the prices of many symbols at once with the pricemulti endpoint. Special
+        cases are queried one by one. Assets not supported by cryptocompare and the assets
+        of requests that failed are not in the result.
+        """
+        if to_asset.identifier in CRYPTOCOMPARE_SPECIAL_CASES:
+            return super().query_multiple_current_prices(from_assets=from_assets, to_asset=to_asset)  # noqa: E501
+
+        try:
+            cc_to_asset_symbol = to_asset.to_cryptocompare()
+        except UnsupportedAsset:
+            return {}
+
+        special_assets = []
+        symbols_to_assets: defaultdict[str, list[AssetWithOracles]] = defaultdict(list)
+        for from_asset in from_assets:
+            if from_asset.identifier in CRYPTOCOMPARE_SPECIAL_CASES:
+                special_assets.append(from_asset)
+                continue
+            try:
+                symbols_to_assets[from_asset.to_cryptocompare()].append(from_asset)
+            except UnsupportedAsset:
+                log.debug(f'Skipping {from_asset.identifier} in cryptocompare prices since it is not supported')  # noqa: E501
+
+        prices = {}
+        for chunk in _chunk_symbols(list(symbols_to_assets)):
+            try:
+                result = self._api_query(
+                    path=f'pricemulti?fsyms={",".join(chunk)}&tsyms={cc_to_asset_symbol}',
+                )
+            except RemoteError as e:
+                log.warning(f'Failed to query cryptocompare prices due to {e!s}')
+                break  # the rest of the assets will be queried from the next oracles
+
+            for symbol in chunk:
+                try:
+                    price = Price(FVal(result[symbol][cc_to_asset_symbol]))
+                except KeyError:
+                    continue  # cryptocompare has no price for it
+                for from_asset in symbols_to_assets[symbol]:
+                    prices[from_asset] = price
+
+        if len(special_assets) != 0:
+            prices.update(super().query_multiple_current_prices(from_assets=special_assets, to_asset=to_asset))  # noqa: E501
+
+        return prices
+
     def query_endpoint_pricehistorical(
             self,
             from_asset: AssetWithOracles,
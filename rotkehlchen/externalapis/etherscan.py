@@ -30,6 +30,7 @@ from rotkehlchen.serialization.deserialize import (
 )
 from rotkehlchen.types import (
     SUPPORTED_EVM_CHAINS,
+    ApiKey,
     ChecksumEvmAddress,
     EvmInternalTransaction,
     EvmTransaction,
@@ -41,6 +42,7 @@ from rotkehlchen.types import (
 )
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import hex_or_bytes_to_int, set_user_agent
+from rotkehlchen.utils.network import TokenBucket
 from rotkehlchen.utils.serialization import jsonloads_dict
 
 if TYPE_CHECKING:
@@ -48,6 +50,9 @@ if TYPE_CHECKING:
 
 ETHERSCAN_TX_QUERY_LIMIT = 10000
 TRANSACTIONS_BATCH_NUM = 10
+# Queries per second allowed by etherscan with and without an api key
+ETHERSCAN_QUERIES_PER_SECOND = 5
+ETHERSCAN_NO_KEY_QUERIES_PER_SECOND = 0.2
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -78,6 +83,8 @@ class Etherscan(ExternalServiceWithApiKey, metaclass=ABCMeta):
         self.base_url = base_url
         self.session = requests.session()
         self.warning_given = False
+        # the rate budget of each api key, shared by all greenlets querying this etherscan
+        self.rate_limits: dict[Optional[ApiKey], TokenBucket] = {}
         set_user_agent(self.session)
         # set per-chain earliest timestamps that can be turned to blocks. Never returns block 0
         if service == ExternalService.ETHERSCAN:
@@ -199,9 +206,17 @@ class Etherscan(ExternalServiceWithApiKey, metaclass=ABCMeta):
         else:
             query_str += f'&apikey={api_key}'
 
+        if (rate_limit := self.rate_limits.get(api_key)) is None:
+            queries_per_second = ETHERSCAN_NO_KEY_QUERIES_PER_SECOND if api_key is None else ETHERSCAN_QUERIES_PER_SECOND  # noqa: E501
+            rate_limit = self.rate_limits[api_key] = TokenBucket(
+                rate=queries_per_second,
+                capacity=max(queries_per_second, 1),
+            )
+
         backoff = 1
         backoff_limit = 33
         while backoff < backoff_limit:
+            rate_limit.acquire()
             log.debug(f'Querying {self.chain} etherscan: {query_str}')
             try:
                 response = self.session.get(query_str, timeout=timeout if timeout else DEFAULT_TIMEOUT_TUPLE)  # noqa: E501
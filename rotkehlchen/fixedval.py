@@ -0,0 +1,237 @@
+from decimal import MAX_EMAX, MAX_PREC, MIN_EMIN, Context, Decimal, InvalidOperation
+from typing import Any, Union
+
+from rotkehlchen.fval import FVal
+
+# Number of decimal digits kept by FixedVal. Every value is an integer multiple of 10^-18.
+FIXEDVAL_DECIMALS = 18
+FIXEDVAL_SCALE = 10 ** FIXEDVAL_DECIMALS
+
+AcceptableFixedValInitInput = Union[Decimal, int, str, FVal]
+AcceptableFixedValOtherInput = Union[int, FVal]
+# Creates an instance without going through __init__
+_new = object.__new__
+# Context for exact conversions to Decimal, whatever the number of digits
+_EXACT_CONTEXT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+
+class FixedVal(FVal):
+    """A fixed point number with 18 decimal digits stored as an integer scaled by 10^18.
+
+    It is an opt-in alternative to the Decimal backed FVal for the hot loops of the
+    accounting engine, where the cost of constructing FVals and of Decimal arithmetic
+    dominates. Since it is an FVal it can be used anywhere an FVal is expected.
+
+    Rounding rules:
+    - Addition, subtraction, negation and comparisons are exact.
+    - The results of multiplication and division are rounded to the nearest 10^-18
+    with ties going to the even neighbour. That is the same rounding mode Decimal uses,
+    but Decimal rounds to 28 significant digits instead of a fixed number of decimals.
+    - Inputs with more than 18 decimal digits are rounded the same way on conversion.
+
+    Operations between a FixedVal and an FVal convert the FVal and return a FixedVal.
+    Operations that FixedVal does not implement, such as pow, fall back to FVal and
+    return an FVal. Use to_fval() to convert back at the boundaries of the code that
+    works with FixedVal.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, data: AcceptableFixedValInitInput = 0) -> None:  # pylint: disable=super-init-not-called  # noqa: E501
+        if data.__class__ is FVal:  # the most common case, converting at a boundary
+            self.value: int = _decimal_to_scaled(data.num)  # type: ignore[union-attr]  # checked above  # noqa: E501
+        elif isinstance(data, FixedVal):
+            self.value = data.value
+        elif isinstance(data, FVal):
+            self.value = _decimal_to_scaled(data.num)
+        elif isinstance(data, bool):
+            # This elif has to come before the isinstance(int) check as bool is an int
+            raise ValueError('Invalid type bool for data given to FixedVal constructor')
+        elif isinstance(data, int):
+            self.value = data * FIXEDVAL_SCALE
+        elif isinstance(data, (Decimal, str)):
+            try:
+                self.value = _decimal_to_scaled(Decimal(data))
+            except InvalidOperation as e:
+                raise ValueError(f'Invalid value {data} given to FixedVal constructor') from e
+        else:
+            raise ValueError(f'Invalid type {type(data)} of data given to FixedVal constructor')
+
+    @classmethod
+    def from_scaled(cls: type['FixedVal'], value: int) -> 'FixedVal':
+        """Create a FixedVal directly from its scaled integer representation"""
+        result = _new(cls)
+        result.value = value
+        return result
+
+    @property
+    def num(self) -> Decimal:  # type: ignore[override]  # read only view of the slot of FVal
+        """The value as a Decimal without trailing zeros so that the methods inherited
+        from FVal work"""
+        return Decimal(self.value).scaleb(-FIXEDVAL_DECIMALS, _EXACT_CONTEXT).normalize(_EXACT_CONTEXT)  # noqa: E501
+
+    def to_fval(self) -> FVal:
+        result = _new(FVal)
+        result.num = self.num
+        return result
+
+    def __str__(self) -> str:
+        """Returns the value without trailing zeros in the fractional part"""
+        integer, fraction = divmod(abs(self.value), FIXEDVAL_SCALE)
+        sign = '-' if self.value < 0 else ''
+        if fraction == 0:
+            return f'{sign}{integer}'
+        return f'{sign}{integer}.{fraction:0{FIXEDVAL_DECIMALS}d}'.rstrip('0')
+
+    def __repr__(self) -> str:
+        return f'FixedVal({self!s})'
+
+    def __hash__(self) -> int:
+        return hash(self.num)
+
+    # The methods below take a fast path when the other operand is a FixedVal since
+    # they are called in the hot loops of the accounting engine
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is FixedVal:
+            return self.value == other.value  # type: ignore[attr-defined]  # checked above
+        if isinstance(other, FVal):
+            return self.num == other.num
+        if not isinstance(other, int) or isinstance(other, bool):
+            return False
+        return self.value == other * FIXEDVAL_SCALE
+
+    def __gt__(self, other: AcceptableFixedValOtherInput) -> bool:
+        if other.__class__ is FixedVal:
+            return self.value > other.value  # type: ignore[union-attr]  # checked above
+        if isinstance(other, FVal):
+            return self.num > other.num
+        return self.value > _evaluate_input(other)
+
+    def __lt__(self, other: AcceptableFixedValOtherInput) -> bool:
+        if other.__class__ is FixedVal:
+            return self.value < other.value  # type: ignore[union-attr]  # checked above
+        if isinstance(other, FVal):
+            return self.num < other.num
+        return self.value < _evaluate_input(other)
+
+    def __ge__(self, other: AcceptableFixedValOtherInput) -> bool:
+        if other.__class__ is FixedVal:
+            return self.value >= other.value  # type: ignore[union-attr]  # checked above
+        if isinstance(other, FVal):
+            return self.num >= other.num
+        return self.value >= _evaluate_input(other)
+
+    def __le__(self, other: AcceptableFixedValOtherInput) -> bool:
+        if other.__class__ is FixedVal:
+            return self.value <= other.value  # type: ignore[union-attr]  # checked above
+        if isinstance(other, FVal):
+            return self.num <= other.num
+        return self.value <= _evaluate_input(other)
+
+    def __add__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        result = _new(FixedVal)
+        if other.__class__ is FixedVal:
+            result.value = self.value + other.value  # type: ignore[union-attr]  # checked above
+        else:
+            result.value = self.value + _evaluate_input(other)
+        return result
+
+    def __sub__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        result = _new(FixedVal)
+        if other.__class__ is FixedVal:
+            result.value = self.value - other.value  # type: ignore[union-attr]  # checked above
+        else:
+            result.value = self.value - _evaluate_input(other)
+        return result
+
+    def __mul__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        result = _new(FixedVal)
+        if other.__class__ is FixedVal:
+            product = self.value * other.value  # type: ignore[union-attr]  # checked above
+        elif isinstance(other, int):  # no rounding needed for integers
+            result.value = self.value * (_evaluate_input(other) // FIXEDVAL_SCALE)
+            return result
+        else:
+            product = self.value * _evaluate_input(other)
+
+        quotient, remainder = divmod(product, FIXEDVAL_SCALE)
+        doubled_remainder = remainder * 2
+        if doubled_remainder > FIXEDVAL_SCALE or (doubled_remainder == FIXEDVAL_SCALE and quotient & 1):  # noqa: E501
+            quotient += 1
+        result.value = quotient
+        return result
+
+    def __truediv__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        result = _new(FixedVal)
+        result.value = _div_round(self.value * FIXEDVAL_SCALE, _evaluate_input(other))
+        return result
+
+    def __radd__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        return self.__add__(other)
+
+    def __rsub__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        return -self.__sub__(other)
+
+    def __rmul__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        return self.__mul__(other)
+
+    def __rtruediv__(self, other: AcceptableFixedValOtherInput) -> 'FixedVal':
+        result = _new(FixedVal)
+        result.value = _div_round(_evaluate_input(other) * FIXEDVAL_SCALE, self.value)
+        return result
+
+    # --- Unary operands
+
+    def __neg__(self) -> 'FixedVal':
+        result = _new(FixedVal)
+        result.value = -self.value
+        return result
+
+    def __abs__(self) -> 'FixedVal':
+        result = _new(FixedVal)
+        result.value = abs(self.value)
+        return result
+
+
+def _div_round(numerator: int, denominator: int) -> int:
+    """Integer division that rounds to the nearest integer with ties to even
+
+    May raise:
+    - ZeroDivisionError if denominator is 0
+    """
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient, remainder = divmod(numerator, denominator)
+    doubled_remainder = remainder * 2
+    if doubled_remainder > denominator or (doubled_remainder == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def _decimal_to_scaled(value: Decimal) -> int:
+    """Converts a Decimal to the scaled integer representation of FixedVal
+
+    May raise:
+    - ValueError if the value is not a finite number
+    """
+    try:
+        numerator, denominator = value.as_integer_ratio()
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f'Can not represent {value} as a FixedVal') from e
+
+    if FIXEDVAL_SCALE % denominator == 0:  # up to 18 decimal digits. No rounding needed
+        return numerator * (FIXEDVAL_SCALE // denominator)
+    return _div_round(numerator * FIXEDVAL_SCALE, denominator)
+
+
+def _evaluate_input(other: Any) -> int:
+    """Evaluate 'other' and return its scaled integer representation"""
+    if isinstance(other, FixedVal):
+        return other.value
+    if isinstance(other, FVal):
+        return _decimal_to_scaled(other.num)
+    if not isinstance(other, int) or isinstance(other, bool):
+        raise NotImplementedError(f'Expected either FVal or int. Got {type(other)}: {other}')
+    # else
+    return other * FIXEDVAL_SCALE
@@ -20,6 +20,7 @@ from rotkehlchen.assets.types import AssetData, AssetType
 from rotkehlchen.chain.evm.types import string_to_evm_address
 from rotkehlchen.constants.assets import A_ETH, A_ETH2
 from rotkehlchen.constants.misc import DEFAULT_SQL_VM_INSTRUCTIONS_CB, NFT_DIRECTIVE
+from rotkehlchen.constants.timing import HOUR_IN_SECONDS, WEEK_IN_SECONDS
 from rotkehlchen.db.drivers.gevent import DBConnection, DBConnectionType, DBCursor
 from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.misc import DBUpgradeError, InputError
@@ -27,14 +28,28 @@ from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.history.deserialization import deserialize_price
 from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.logging import RotkehlchenLogsAdapter
-from rotkehlchen.types import ChainID, ChecksumEvmAddress, EvmTokenKind, Price, Timestamp
-from rotkehlchen.utils.misc import timestamp_to_date, ts_now
+from rotkehlchen.types import (
+    ChainID,
+    ChecksumEvmAddress,
+    EvmTokenKind,
+    GeneralCacheType,
+    Price,
+    Timestamp,
+)
+from rotkehlchen.utils.misc import (
+    get_chunks,
+    timestamp_to_date,
+    timestamp_to_daystart_timestamp,
+    ts_now,
+)
 from rotkehlchen.utils.serialization import (
     deserialize_asset_with_oracles_from_db,
     deserialize_generic_asset_from_db,
 )
 
+from .cache import compute_cache_key, globaldb_set_general_cache_values
 from .migrations.manager import LAST_DATA_MIGRATION, maybe_apply_globaldb_migrations
+from .price_history_cache import PREFETCH_MAX_SECONDS_DISTANCE, PriceHistoryCache, PriceSeries
 from .schema import DB_SCRIPT_CREATE_TABLES
 from .upgrades.manager import maybe_upgrade_globaldb
 from .utils import GLOBAL_DB_FILENAME, GLOBAL_DB_VERSION, globaldb_get_setting_value
@@ -46,6 +61,15 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Requests per batched historical price query. Each request takes 4 bindings so
+# this keeps us well below the default SQLite limit of 999 host parameters.
+HISTORICAL_PRICES_BATCH_SIZE = 200
+
+# Historical price misses are remembered per hour for the pair and oracle
+HISTORICAL_PRICE_MISSES_BUCKET = HOUR_IN_SECONDS
+HISTORICAL_PRICE_MISSES_TTL_SETTING = 'historical_price_misses_ttl'
+DEFAULT_HISTORICAL_PRICE_MISSES_TTL = WEEK_IN_SECONDS
+
 
 _ALL_ASSETS_TABLES_JOINS = """
 FROM assets LEFT JOIN common_asset_details on assets.identifier=common_asset_details.identifier
@@ -184,6 +208,41 @@ def _initialize_global_db_directory(
     )
 
 
+def _closest_price_entry(
+        timestamp: Timestamp,
+        before: Optional[tuple[str, str, str, int, str]],
+        after: Optional[tuple[str, str, str, int, str]],
+) -> Optional[tuple[str, str, str, int, str]]:
+    """Pick the price_history row closest to timestamp out of the nearest row at or before
+    it and the nearest row after it. Ties are resolved in favor of the row before."""
+    if before is None:
+        return after
+    if after is None:
+        return before
+    if after[3] - timestamp < timestamp - before[3]:
+        return after
+    return before
+
+
+def _historical_price_miss_key(from_asset: 'Asset', to_asset: 'Asset', timestamp: Timestamp) -> str:  # noqa: E501
+    """The general cache key of a historical price miss. The key contains the pair and the
+    start of the time bucket of the timestamp and the values are the oracles that missed."""
+    bucket = timestamp - timestamp % HISTORICAL_PRICE_MISSES_BUCKET
+    return compute_cache_key((
+        GeneralCacheType.NO_HISTORICAL_PRICE,
+        from_asset.identifier,
+        '|',
+        to_asset.identifier,
+        '|',
+        str(bucket),
+    ))
+
+
+def _escape_like(value: str) -> str:
+    """Escape the LIKE wildcards in value so that it's matched literally with ESCAPE '\\'"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
 class GlobalDBHandler():
     """A singleton class controlling the global DB"""
     __instance: Optional['GlobalDBHandler'] = None
@@ -192,6 +251,10 @@ class GlobalDBHandler():
     conn: DBConnection
     used_backup: bool  # specifies if the global DB was restored from a backup
     packaged_db_lock: Semaphore
+    price_history_cache: PriceHistoryCache
+    # chain and address of the EVM tokens in the order that they were added, edited or
+    # deleted so that caches of them know which addresses are stale
+    evm_tokens_changes: list[tuple[ChainID, ChecksumEvmAddress]]
 
     def __new__(
             cls,
@@ -214,6 +277,8 @@ class GlobalDBHandler():
         GlobalDBHandler.__instance._data_directory = data_dir
         GlobalDBHandler.__instance.conn, GlobalDBHandler.__instance.used_backup = _initialize_global_db_directory(data_dir, sql_vm_instructions_cb)  # noqa: E501
         GlobalDBHandler.__instance.packaged_db_lock = Semaphore()
+        GlobalDBHandler.__instance.price_history_cache = PriceHistoryCache()
+        GlobalDBHandler.__instance.evm_tokens_changes = []
         return GlobalDBHandler.__instance
 
     @staticmethod
@@ -924,6 +989,8 @@ class GlobalDBHandler():
                 chain_id=entry.chain_id,
             )
 
+        GlobalDBHandler().evm_tokens_changes.append((entry.chain_id, entry.evm_address))
+
     @staticmethod
     def edit_evm_token(entry: EvmToken) -> str:
         """Edits an EVM token entry in the DB
@@ -934,6 +1001,10 @@ class GlobalDBHandler():
         """
         try:
             with GlobalDBHandler().conn.write_ctx() as write_cursor:
+                old_token = write_cursor.execute(  # chain and address may be edited too
+                    'SELECT chain, address FROM evm_tokens WHERE identifier=?',
+                    (entry.identifier,),
+                ).fetchone()
                 write_cursor.execute(
                     'UPDATE common_asset_details SET symbol=?, coingecko=?, '
                     'cryptocompare=?, forked=?, started=?, swapped_for=? WHERE identifier=?;',
@@ -999,6 +1070,9 @@ class GlobalDBHandler():
                 f'due to a constraint being hit. Make sure the new values are valid ',
             ) from e
 
+        if old_token is not None:
+            GlobalDBHandler().evm_tokens_changes.append((ChainID.deserialize_from_db(old_token[0]), old_token[1]))  # noqa: E501
+        GlobalDBHandler().evm_tokens_changes.append((entry.chain_id, entry.evm_address))
         return rotki_id
 
     @staticmethod
@@ -1109,6 +1183,10 @@ class GlobalDBHandler():
          May raise:
          - InputError if no asset with the provided identifier was found"""
         with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            token = write_cursor.execute(
+                'SELECT chain, address FROM evm_tokens WHERE identifier=?',
+                (identifier,),
+            ).fetchone()
             write_cursor.execute('DELETE FROM assets WHERE identifier=?;', (identifier,))
             if write_cursor.rowcount != 1:
                 raise InputError(
@@ -1116,6 +1194,10 @@ class GlobalDBHandler():
                     f'but it was not found in the DB',
                 )
 
+        GlobalDBHandler().price_history_cache.invalidate_asset(identifier)
+        if token is not None:
+            GlobalDBHandler().evm_tokens_changes.append((ChainID.deserialize_from_db(token[0]), token[1]))  # noqa: E501
+
     @staticmethod
     def get_assets_with_symbol(
             symbol: str,
@@ -1186,27 +1268,239 @@ class GlobalDBHandler():
     ) -> Optional['HistoricalPrice']:
         """Gets the price around a particular timestamp
 
+        The whole price series of the pair is loaded once into the in-memory price history
+        cache and subsequent lookups are a bisect in it. Pairs with too many entries to be
+        cached are looked up directly in the DB, unless their prices were prefetched by
+        prefetch_historical_prices. On equal distance the entry before the timestamp wins.
+
+        If no price can be found returns None
+        """
+        cache = GlobalDBHandler().price_history_cache
+        from_id, to_id = from_asset.identifier, to_asset.identifier
+        series = cache.get(from_asset=from_id, to_asset=to_id)
+        if series is None and cache.is_oversized(from_asset=from_id, to_asset=to_id) is False:
+            series = GlobalDBHandler._cache_price_series(from_id=from_id, to_id=to_id)
+
+        if series is None:
+            is_prefetched, price = cache.get_prefetched(
+                from_asset=from_id,
+                to_asset=to_id,
+                timestamp=timestamp,
+                max_seconds_distance=max_seconds_distance,
+                source=source,
+            )
+            if is_prefetched is True:
+                return price
+
+            return GlobalDBHandler._get_historical_price_from_db(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                timestamp=timestamp,
+                max_seconds_distance=max_seconds_distance,
+                source=source,
+            )
+
+        result = series.closest(
+            timestamp=timestamp,
+            max_seconds_distance=max_seconds_distance,
+            source_type=source.serialize_for_db() if source is not None else None,
+        )
+        if result is None:
+            return None
+
+        return HistoricalPrice.deserialize_from_db((from_id, to_id, *result))
+
+    @staticmethod
+    def _get_historical_price_from_db(
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+            timestamp: Timestamp,
+            max_seconds_distance: int,
+            source: Optional[HistoricalPriceOracle] = None,
+    ) -> Optional['HistoricalPrice']:
+        """Gets the price around a particular timestamp directly from the DB
+
+        The closest entry is found with two bounded range probes on the
+        (from_asset, to_asset, timestamp) index. One for the nearest entry at or before
+        the timestamp and one for the nearest entry after it. On equal distance the
+        entry before the timestamp wins.
+
         If no price can be found returns None
         """
+        source_filter, source_bindings = '', []
+        if source is not None:
+            source_filter = 'AND source_type=? '
+            source_bindings.append(source.serialize_for_db())
+
         querystr = (
             'SELECT from_asset, to_asset, source_type, timestamp, price FROM price_history '
-            'WHERE from_asset=? AND to_asset=? AND ABS(timestamp - ?) <= ? '
+            'WHERE from_asset=? AND to_asset=? AND timestamp {range} ' + source_filter +
+            'ORDER BY timestamp {order} LIMIT 1'
         )
-        querylist = [from_asset.identifier, to_asset.identifier, timestamp, max_seconds_distance]
-        if source is not None:
-            querystr += ' AND source_type=?'
-            querylist.append(source.serialize_for_db())
+        pair_bindings = [from_asset.identifier, to_asset.identifier]
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            before = cursor.execute(
+                querystr.format(range='BETWEEN ? AND ?', order='DESC'),
+                (*pair_bindings, timestamp - max_seconds_distance, timestamp, *source_bindings),
+            ).fetchone()
+            after = cursor.execute(
+                querystr.format(range='> ? AND timestamp <= ?', order='ASC'),
+                (*pair_bindings, timestamp, timestamp + max_seconds_distance, *source_bindings),
+            ).fetchone()
 
-        querystr += 'ORDER BY ABS(timestamp - ?) ASC LIMIT 1'
-        querylist.append(timestamp)
+        result = _closest_price_entry(timestamp=timestamp, before=before, after=after)
+        if result is None:
+            return None
+
+        return HistoricalPrice.deserialize_from_db(result)
+
+    @staticmethod
+    def _cache_price_series(from_id: str, to_id: str) -> Optional[PriceSeries]:
+        """Load the whole price series of a pair into the price history cache.
+
+        Returns None if the pair has too many entries to be cached"""
+        instance = GlobalDBHandler()
+        cache = instance.price_history_cache
+        with instance.conn.read_ctx() as cursor:
+            entries = cursor.execute(
+                'SELECT source_type, timestamp, price FROM price_history WHERE '
+                'from_asset=? AND to_asset=? ORDER BY source_type, timestamp LIMIT ?',
+                (from_id, to_id, cache.max_series_entries + 1),
+            ).fetchall()
+        return cache.add(from_asset=from_id, to_asset=to_id, entries=entries)
 
+    @staticmethod
+    def get_historical_prices(
+            queries: list[tuple['Asset', 'Asset', Timestamp]],
+            max_seconds_distance: int,
+            source: Optional[HistoricalPriceOracle] = None,
+    ) -> list[Optional['HistoricalPrice']]:
+        """Batched version of get_historical_price that goes directly to the DB.
+
+        Resolves many (from_asset, to_asset, timestamp) queries with one DB query per
+        chunk of HISTORICAL_PRICES_BATCH_SIZE queries. Each request does the same two
+        range probes as _get_historical_price_from_db, but as correlated subqueries joined
+        against an inline VALUES table.
+
+        Returns a list of the same length as the given queries with the closest price
+        entry for each query or None if no price can be found for it.
+        """
+        source_filter, source_bindings = '', []
+        if source is not None:
+            source_filter = 'AND ph.source_type=? '
+            source_bindings.append(source.serialize_for_db())
+
+        results: list[Optional[HistoricalPrice]] = [None] * len(queries)
+        indexed_queries = list(enumerate(queries))
         with GlobalDBHandler().conn.read_ctx() as cursor:
-            query = cursor.execute(querystr, tuple(querylist))
-            result = query.fetchone()
-            if result is None:
-                return None
+            for chunk in get_chunks(indexed_queries, n=HISTORICAL_PRICES_BATCH_SIZE):
+                querystr = (
+                    'WITH requests(idx, from_id, to_id, ts) AS (VALUES ' +
+                    ','.join(['(?, ?, ?, ?)'] * len(chunk)) +
+                    ') SELECT requests.idx, requests.ts, price_history.from_asset, '
+                    'price_history.to_asset, price_history.source_type, '
+                    'price_history.timestamp, price_history.price FROM requests '
+                    'INNER JOIN price_history ON price_history.rowid IN ('
+                    '(SELECT ph.rowid FROM price_history AS ph WHERE '
+                    'ph.from_asset=requests.from_id AND ph.to_asset=requests.to_id AND '
+                    'ph.timestamp BETWEEN requests.ts - ? AND requests.ts ' + source_filter +
+                    'ORDER BY ph.timestamp DESC LIMIT 1), '
+                    '(SELECT ph.rowid FROM price_history AS ph WHERE '
+                    'ph.from_asset=requests.from_id AND ph.to_asset=requests.to_id AND '
+                    'ph.timestamp > requests.ts AND ph.timestamp <= requests.ts + ? ' +
+                    source_filter + 'ORDER BY ph.timestamp ASC LIMIT 1))'
+                )
+                bindings: list[Union[int, str]] = []
+                for idx, (from_asset, to_asset, timestamp) in chunk:
+                    bindings.extend((idx, from_asset.identifier, to_asset.identifier, timestamp))  # noqa: E501
+                bindings.extend((max_seconds_distance, *source_bindings))
+                bindings.extend((max_seconds_distance, *source_bindings))
+
+                candidates: defaultdict[int, list[tuple]] = defaultdict(list)
+                for entry in cursor.execute(querystr, bindings):
+                    candidates[entry[0]].append(entry)
+
+                for idx, entries in candidates.items():
+                    before, after = None, None
+                    for entry in entries:
+                        row = (entry[2], entry[3], entry[4], entry[5], entry[6])
+                        if entry[5] <= entry[1]:
+                            before = row
+                        else:
+                            after = row
+                    result = _closest_price_entry(
+                        timestamp=entries[0][1],
+                        before=before,
+                        after=after,
+                    )
+                    if result is None:
+                        continue
 
-        return HistoricalPrice.deserialize_from_db(result)
+                    try:
+                        results[idx] = HistoricalPrice.deserialize_from_db(result)
+                    except (DeserializationError, UnknownAsset) as e:
+                        log.error(f'Failed to deserialize historical price {result} due to {e!s}')  # noqa: E501
+
+        return results
+
+    @staticmethod
+    def prefetch_historical_prices(
+            queries: list[tuple['Asset', 'Asset', Timestamp]],
+            sources: list[HistoricalPriceOracle],
+    ) -> None:
+        """Prepare the given lookups so that get_historical_price does not need a DB query
+        for each of them.
+
+        The series of the pairs are loaded into the price history cache. For the pairs
+        that are too big for it, the closest price of each source is looked up in batches
+        and kept until the next prefetch or until the prices of the pair change.
+        """
+        cache = GlobalDBHandler().price_history_cache
+        oversized_pairs = set()
+        for from_id, to_id in {(x[0].identifier, x[1].identifier) for x in queries}:
+            if cache.get(from_asset=from_id, to_asset=to_id) is None and (
+                cache.is_oversized(from_asset=from_id, to_asset=to_id) is True or
+                GlobalDBHandler._cache_price_series(from_id=from_id, to_id=to_id) is None
+            ):
+                oversized_pairs.add((from_id, to_id))
+
+        oversized_queries = list({x for x in queries if (x[0].identifier, x[1].identifier) in oversized_pairs})  # noqa: E501
+        prefetched: defaultdict[tuple[str, str], dict[tuple[HistoricalPriceOracle, Timestamp], Optional[HistoricalPrice]]] = defaultdict(dict)  # noqa: E501
+        for source in sources if len(oversized_queries) != 0 else ():
+            prices = GlobalDBHandler.get_historical_prices(
+                queries=oversized_queries,
+                max_seconds_distance=PREFETCH_MAX_SECONDS_DISTANCE,
+                source=source,
+            )
+            for (from_asset, to_asset, timestamp), price in zip(oversized_queries, prices):
+                pair = (from_asset.identifier.lower(), to_asset.identifier.lower())
+                prefetched[pair][(source, timestamp)] = price
+
+        cache.set_prefetched(dict(prefetched))
+
+    @staticmethod
+    def _record_price_history_change(write_cursor: DBCursor, timestamp: Timestamp) -> None:
+        """Remembers that the prices from the given timestamp on changed now, so that
+        PnL report checkpoints computed before with the old prices get invalidated"""
+        globaldb_set_general_cache_values(
+            write_cursor=write_cursor,
+            key_parts=(GeneralCacheType.PRICE_HISTORY_CHANGES,),
+            values=(str(timestamp_to_daystart_timestamp(timestamp)),),
+        )
+
+    @staticmethod
+    def get_price_history_changes(since: Timestamp) -> list[tuple[Timestamp, Timestamp]]:
+        """Returns the earliest timestamp affected by each price history change made at or
+        after `since`, along with the time of the change"""
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            return [
+                (Timestamp(int(value)), Timestamp(last_queried_ts))
+                for value, last_queried_ts in cursor.execute(
+                    'SELECT value, last_queried_ts FROM general_cache WHERE key=? AND '
+                    'last_queried_ts >= ?',
+                    (GeneralCacheType.PRICE_HISTORY_CHANGES.serialize(), since),
+                )
+            ]
 
     @staticmethod
     def add_historical_prices(entries: list['HistoricalPrice']) -> None:
@@ -1214,6 +1508,10 @@ class GlobalDBHandler():
 
         If any addition causes a DB error it's skipped and an error is logged
         """
+        if len(entries) == 0:
+            return
+
+        earliest_ts = min(x.timestamp for x in entries)
         try:
             with GlobalDBHandler().conn.write_ctx() as write_cursor:
                 write_cursor.executemany(
@@ -1222,6 +1520,8 @@ class GlobalDBHandler():
                     ) VALUES (?, ?, ?, ?, ?)
                     """, [x.serialize_for_db() for x in entries],
                 )
+                if write_cursor.rowcount > 0:
+                    GlobalDBHandler._record_price_history_change(write_cursor, earliest_ts)
         except sqlite3.IntegrityError as e:
             # roll back any of the executemany that may have gone in
             log.error(
@@ -1230,6 +1530,7 @@ class GlobalDBHandler():
             )
 
             with GlobalDBHandler().conn.write_ctx() as write_cursor:
+                inserted = False
                 for entry in entries:
                     try:
                         write_cursor.execute(
@@ -1242,6 +1543,15 @@ class GlobalDBHandler():
                         log.error(
                             f'Failed to add {entry!s} due to {entry_error!s}. Skipping entry addition',  # noqa: E501
                         )
+                    else:
+                        inserted |= write_cursor.rowcount > 0
+
+                if inserted:
+                    GlobalDBHandler._record_price_history_change(write_cursor, earliest_ts)
+
+        cache = GlobalDBHandler().price_history_cache
+        for from_id, to_id in {(x.from_asset.identifier, x.to_asset.identifier) for x in entries}:  # noqa: E501
+            cache.invalidate(from_asset=from_id, to_asset=to_id)
 
     @staticmethod
     def add_single_historical_price(entry: HistoricalPrice) -> bool:
@@ -1261,12 +1571,17 @@ class GlobalDBHandler():
                     """,
                     serialized,
                 )
+                GlobalDBHandler._record_price_history_change(write_cursor, entry.timestamp)
         except sqlite3.IntegrityError as e:
             log.error(
                 f'Failed to add single historical price. {e!s}. ',
             )
             return False
 
+        GlobalDBHandler().price_history_cache.invalidate(
+            from_asset=entry.from_asset.identifier,
+            to_asset=entry.to_asset.identifier,
+        )
         return True
 
     @staticmethod
@@ -1333,6 +1648,7 @@ class GlobalDBHandler():
             for entry in write_cursor:
                 pairs_to_invalidate.append((Asset(entry[0]), Asset(entry[1])))
 
+        GlobalDBHandler().price_history_cache.invalidate_asset(from_asset.identifier)
         return pairs_to_invalidate
 
     @staticmethod
@@ -1394,7 +1710,8 @@ class GlobalDBHandler():
                     f'Not found manual current price to delete for asset {asset!s}',
                 )
 
-            return pairs_to_invalidate
+        GlobalDBHandler().price_history_cache.invalidate_asset(asset.identifier)
+        return pairs_to_invalidate
 
     @staticmethod
     def get_manual_prices(
@@ -1447,6 +1764,8 @@ class GlobalDBHandler():
 
                 if write_cursor.rowcount == 0:
                     return False
+
+                GlobalDBHandler._record_price_history_change(write_cursor, entry.timestamp)
         except sqlite3.IntegrityError as e:
             log.error(
                 f'Failed to edit manual historical prices from {entry.from_asset} '
@@ -1454,6 +1773,10 @@ class GlobalDBHandler():
             )
             return False
 
+        GlobalDBHandler().price_history_cache.invalidate(
+            from_asset=entry.from_asset.identifier,
+            to_asset=entry.to_asset.identifier,
+        )
         return True
 
     @staticmethod
@@ -1485,6 +1808,12 @@ class GlobalDBHandler():
                 )
                 return False
 
+            GlobalDBHandler._record_price_history_change(write_cursor, timestamp)
+
+        GlobalDBHandler().price_history_cache.invalidate(
+            from_asset=from_asset.identifier,
+            to_asset=to_asset.identifier,
+        )
         return True
 
     @staticmethod
@@ -1493,21 +1822,31 @@ class GlobalDBHandler():
             to_asset: 'Asset',
             source: Optional[HistoricalPriceOracle] = None,
     ) -> None:
-        querystr = 'DELETE FROM price_history WHERE from_asset=? AND to_asset=?'
+        filterstr = 'FROM price_history WHERE from_asset=? AND to_asset=?'
         query_list = [from_asset.identifier, to_asset.identifier]
         if source is not None:
-            querystr += ' AND source_type=?'
+            filterstr += ' AND source_type=?'
             query_list.append(source.serialize_for_db())
 
         try:
             with GlobalDBHandler().conn.write_ctx() as write_cursor:
-                write_cursor.execute(querystr, tuple(query_list))
+                earliest_ts = write_cursor.execute(
+                    f'SELECT MIN(timestamp) {filterstr}', tuple(query_list),
+                ).fetchone()[0]
+                if earliest_ts is not None:
+                    write_cursor.execute(f'DELETE {filterstr}', tuple(query_list))
+                    GlobalDBHandler._record_price_history_change(write_cursor, earliest_ts)
         except sqlite3.IntegrityError as e:
             log.error(
                 f'Failed to delete historical prices from {from_asset} to {to_asset} '
                 f'and source: {source!s} due to {e!s}',
             )
 
+        GlobalDBHandler().price_history_cache.invalidate(
+            from_asset=from_asset.identifier,
+            to_asset=to_asset.identifier,
+        )
+
     @staticmethod
     def get_historical_price_range(
             from_asset: 'Asset',
@@ -1545,6 +1884,114 @@ class GlobalDBHandler():
                  'to_timestamp': entry[3],
                  } for entry in query]
 
+    @staticmethod
+    def get_historical_price_misses(
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+            timestamp: Timestamp,
+    ) -> set[HistoricalPriceOracle]:
+        """Returns the oracles that recently had no price for the pair in the time bucket
+        of the given timestamp. Entries older than the configured TTL are ignored."""
+        ttl = GlobalDBHandler().get_setting_value(
+            name=HISTORICAL_PRICE_MISSES_TTL_SETTING,
+            default_value=DEFAULT_HISTORICAL_PRICE_MISSES_TTL,
+        )
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            cursor.execute(
+                'SELECT value FROM general_cache WHERE key=? AND last_queried_ts > ?',
+                (
+                    _historical_price_miss_key(from_asset, to_asset, timestamp),
+                    ts_now() - ttl,
+                ),
+            )
+            return {HistoricalPriceOracle.deserialize_from_db(entry[0]) for entry in cursor}
+
+    @staticmethod
+    def add_historical_price_misses(
+            from_asset: 'Asset',
+            to_asset: 'Asset',
+            timestamp: Timestamp,
+            oracles: list[HistoricalPriceOracle],
+    ) -> None:
+        """Remember that the given oracles had no price for the pair in the time bucket
+        of the given timestamp"""
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=(_historical_price_miss_key(from_asset, to_asset, timestamp),),
+                values=[x.serialize_for_db() for x in oracles],
+            )
+
+    @staticmethod
+    def get_all_historical_price_misses(
+            from_asset: Optional['Asset'] = None,
+            to_asset: Optional['Asset'] = None,
+    ) -> list[dict[str, Any]]:
+        """Returns all remembered historical price misses, optionally filtered by pair.
+
+        Only used by the API so just returning it as a list of dicts from here"""
+        ttl = GlobalDBHandler().get_setting_value(
+            name=HISTORICAL_PRICE_MISSES_TTL_SETTING,
+            default_value=DEFAULT_HISTORICAL_PRICE_MISSES_TTL,
+        )
+        now = ts_now()
+        result = []
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            cursor.execute(
+                'SELECT key, value, last_queried_ts FROM general_cache WHERE key LIKE ? '
+                'ESCAPE ? ORDER BY key, value',
+                (f'{_escape_like(GeneralCacheType.NO_HISTORICAL_PRICE.serialize())}%', '\\'),
+            )
+            for key, value, last_queried_ts in cursor:
+                miss_from, miss_to, bucket = key[len(GeneralCacheType.NO_HISTORICAL_PRICE.serialize()):].rsplit('|', 2)  # noqa: E501
+                if from_asset is not None and miss_from != from_asset.identifier:
+                    continue
+                if to_asset is not None and miss_to != to_asset.identifier:
+                    continue
+
+                result.append({
+                    'from_asset': miss_from,
+                    'to_asset': miss_to,
+                    'timestamp': int(bucket),
+                    'oracle': str(HistoricalPriceOracle.deserialize_from_db(value)),
+                    'last_queried_ts': last_queried_ts,
+                    'expired': last_queried_ts <= now - ttl,
+                })
+
+        return result
+
+    @staticmethod
+    def delete_historical_price_misses(
+            from_asset: Optional['Asset'] = None,
+            to_asset: Optional['Asset'] = None,
+            oracle: Optional[HistoricalPriceOracle] = None,
+            only_expired: bool = False,
+    ) -> int:
+        """Purge remembered historical price misses matching the given filters.
+        With no filters all of them are purged. Returns the number of purged entries."""
+        key_prefix = _escape_like(GeneralCacheType.NO_HISTORICAL_PRICE.serialize())
+        querystr = 'DELETE FROM general_cache WHERE key LIKE ? ESCAPE ?'
+        bindings: list[Union[str, int]] = [f'{key_prefix}%', '\\']
+        if from_asset is not None:
+            querystr += ' AND key LIKE ? ESCAPE ?'
+            bindings.extend((f'{key_prefix}{_escape_like(from_asset.identifier)}|%', '\\'))
+        if to_asset is not None:
+            querystr += ' AND key LIKE ? ESCAPE ?'
+            bindings.extend((f'%|{_escape_like(to_asset.identifier)}|%', '\\'))
+        if oracle is not None:
+            querystr += ' AND value=?'
+            bindings.append(oracle.serialize_for_db())
+        if only_expired is True:
+            querystr += ' AND last_queried_ts <= ?'
+            bindings.append(ts_now() - GlobalDBHandler().get_setting_value(
+                name=HISTORICAL_PRICE_MISSES_TTL_SETTING,
+                default_value=DEFAULT_HISTORICAL_PRICE_MISSES_TTL,
+            ))
+
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            write_cursor.execute(querystr, bindings)
+            return write_cursor.rowcount
+
     def hard_reset_assets_list(
             self,
             user_db: 'DBHandler',
@@ -1623,6 +2070,7 @@ class GlobalDBHandler():
                     with self.conn.critical_section_and_transaction_lock():
                         read_cursor.execute('DETACH DATABASE "clean_db";')
 
+        self.price_history_cache.clear()
         return True, ''
 
     def soft_reset_assets_list(self) -> tuple[bool, str]:
@@ -1680,6 +2128,7 @@ class GlobalDBHandler():
                 with self.conn.transaction_lock, self.conn.read_ctx() as read_cursor:
                     read_cursor.execute('DETACH DATABASE "clean_db";')
 
+        self.price_history_cache.clear()
         return True, ''
 
     @staticmethod
@@ -0,0 +1,15 @@
+from typing import TYPE_CHECKING
+
+from rotkehlchen.globaldb.schema import DB_CREATE_PRICE_HISTORY_INDEX
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.drivers.gevent import DBConnection
+
+
+def globaldb_data_migration_2(conn: 'DBConnection') -> None:
+    """Introduced at 1.29.0
+    - Adds the (from_asset, to_asset, timestamp) index on price_history used by the
+    nearest historical price lookups
+    """
+    with conn.write_ctx() as write_cursor:
+        write_cursor.execute(DB_CREATE_PRICE_HISTORY_INDEX)
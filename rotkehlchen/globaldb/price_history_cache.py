@@ -0,0 +1,196 @@
+import logging
+import sys
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Optional
+
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
+from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import Timestamp
+from rotkehlchen.utils.data_structures import LRUSetCache
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Default memory budget for all cached price series combined
+PRICE_HISTORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# A single pair may take at most this fraction of the budget. Pairs with more entries
+# than that are not cached and are looked up via the DB index instead.
+PRICE_SERIES_MAX_BUDGET_FRACTION = 4
+# 8 bytes for the timestamp in the array and 8 for the pointer in the prices list
+ENTRY_OVERHEAD_BYTES = 16
+# Rough size of a single series entry including its price string. Used to bound how many
+# rows we load for a pair. The real size is computed after loading.
+APPROXIMATE_ENTRY_BYTES = ENTRY_OVERHEAD_BYTES + 60
+# Prices of pairs that are too big to cache are looked up in batches ahead of time within
+# this distance of the timestamps. It has to cover the distance of all oracle lookups.
+PREFETCH_MAX_SECONDS_DISTANCE = DAY_IN_SECONDS
+
+PairKey = tuple[str, str]
+
+
+class PriceSeries():
+    """All price_history entries of an asset pair kept in memory.
+
+    Entries are split per source type and for each source the timestamps are kept
+    sorted in an int64 array with the prices in a parallel list. Prices are kept as the
+    strings stored in the DB and are deserialized only when returned.
+    """
+    __slots__ = ('series', 'size')
+
+    def __init__(self, entries: Iterable[tuple[str, int, str]]) -> None:
+        """Entries are (source_type, timestamp, price) tuples ordered by source and timestamp"""
+        self.series: dict[str, tuple[array, list[str]]] = {}
+        self.size = sys.getsizeof(self.series)
+        for source_type, timestamp, price in entries:
+            if (source_series := self.series.get(source_type)) is None:
+                source_series = self.series[source_type] = (array('q'), [])
+
+            source_series[0].append(timestamp)
+            source_series[1].append(price)
+            self.size += ENTRY_OVERHEAD_BYTES + sys.getsizeof(price)
+
+    def __len__(self) -> int:
+        return sum(len(timestamps) for timestamps, _ in self.series.values())
+
+    def closest(
+            self,
+            timestamp: Timestamp,
+            max_seconds_distance: int,
+            source_type: Optional[str] = None,
+    ) -> Optional[tuple[str, Timestamp, str]]:
+        """Find the entry closest to timestamp within max_seconds_distance.
+
+        Follows the same rules as the DB lookup. On equal distance the entry at or before
+        the timestamp wins. Returns (source_type, timestamp, price) or None.
+        """
+        if source_type is not None:
+            sources: Iterable[str] = (source_type,) if source_type in self.series else ()
+        else:
+            sources = self.series.keys()
+
+        result, result_distance = None, max_seconds_distance + 1
+        for source in sources:
+            timestamps, prices = self.series[source]
+            idx = bisect_right(timestamps, timestamp)
+            if idx != 0 and (distance := timestamp - timestamps[idx - 1]) < result_distance:
+                result, result_distance = (source, Timestamp(timestamps[idx - 1]), prices[idx - 1]), distance  # noqa: E501
+            if idx != len(timestamps) and (distance := timestamps[idx] - timestamp) < result_distance:  # noqa: E501
+                result, result_distance = (source, Timestamp(timestamps[idx]), prices[idx]), distance  # noqa: E501
+
+        return result
+
+
+class PriceHistoryCache():
+    """An in-memory LRU cache of whole price_history series per asset pair
+
+    Pairs are evicted in least recently used order when the total size of the cached
+    series goes above the memory budget. Anything that writes to price_history needs to
+    invalidate the affected pairs.
+    """
+
+    def __init__(self, max_bytes: int = PRICE_HISTORY_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.cache: OrderedDict[PairKey, PriceSeries] = OrderedDict()
+        # pairs with too many entries to cache. Looked up directly in the DB.
+        self.oversized: LRUSetCache[PairKey] = LRUSetCache(maxsize=256)
+        # closest prices of oversized pairs per (source, timestamp) that were looked up in
+        # a batch ahead of time. Only the latest prefetched batch is kept.
+        self.prefetched: dict[PairKey, dict[tuple[HistoricalPriceOracle, Timestamp], Optional[HistoricalPrice]]] = {}  # noqa: E501
+
+    @property
+    def max_series_entries(self) -> int:
+        return self.max_bytes // PRICE_SERIES_MAX_BUDGET_FRACTION // APPROXIMATE_ENTRY_BYTES
+
+    def get(self, from_asset: str, to_asset: str) -> Optional[PriceSeries]:
+        key = (from_asset.lower(), to_asset.lower())
+        if (series := self.cache.get(key)) is not None:
+            self.cache.move_to_end(key)
+        return series
+
+    def is_oversized(self, from_asset: str, to_asset: str) -> bool:
+        return (from_asset.lower(), to_asset.lower()) in self.oversized
+
+    def get_prefetched(
+            self,
+            from_asset: str,
+            to_asset: str,
+            timestamp: Timestamp,
+            max_seconds_distance: int,
+            source: Optional[HistoricalPriceOracle],
+    ) -> tuple[bool, Optional[HistoricalPrice]]:
+        """Returns whether the closest price of the lookup was prefetched and the price if
+        it is within max_seconds_distance. The closest price within the prefetch distance
+        is also the closest price within any smaller distance."""
+        if source is None or max_seconds_distance > PREFETCH_MAX_SECONDS_DISTANCE:
+            return False, None
+
+        prices = self.prefetched.get((from_asset.lower(), to_asset.lower()))
+        if prices is None or (source, timestamp) not in prices:
+            return False, None
+
+        price = prices[(source, timestamp)]
+        if price is None or abs(price.timestamp - timestamp) > max_seconds_distance:
+            return True, None
+        return True, price
+
+    def set_prefetched(
+            self,
+            prefetched: dict[PairKey, dict[tuple[HistoricalPriceOracle, Timestamp], Optional[HistoricalPrice]]],  # noqa: E501
+    ) -> None:
+        """Replace the prefetched prices. Pair keys need to be lowercase."""
+        self.prefetched = prefetched
+
+    def add(
+            self,
+            from_asset: str,
+            to_asset: str,
+            entries: list[tuple[str, int, str]],
+    ) -> Optional[PriceSeries]:
+        """Cache the series of a pair from its (source_type, timestamp, price) entries.
+
+        Returns None if the pair has too many entries to be cached and remembers that.
+        """
+        key = (from_asset.lower(), to_asset.lower())
+        if len(entries) > self.max_series_entries:
+            log.debug(f'Price series of {key} has more than {self.max_series_entries} entries. Not caching it')  # noqa: E501
+            self.oversized.add(key)
+            return None
+
+        self.invalidate(from_asset=from_asset, to_asset=to_asset)
+        series = PriceSeries(entries)
+        self.cache[key] = series
+        self.size += series.size
+        while self.size > self.max_bytes and len(self.cache) > 1:
+            _, evicted = self.cache.popitem(last=False)
+            self.size -= evicted.size
+
+        return series
+
+    def invalidate(self, from_asset: str, to_asset: str) -> None:
+        """Remove a single pair from the cache"""
+        key = (from_asset.lower(), to_asset.lower())
+        self.oversized.remove(key)
+        self.prefetched.pop(key, None)
+        if (series := self.cache.pop(key, None)) is not None:
+            self.size -= series.size
+
+    def invalidate_asset(self, identifier: str) -> None:
+        """Remove all pairs that have the given asset on either side"""
+        lowered = identifier.lower()
+        for key in [x for x in self.cache if lowered in x]:
+            self.size -= self.cache.pop(key).size
+        for key in [x for x in self.oversized.get_values() if lowered in x]:
+            self.oversized.remove(key)
+        for key in [x for x in self.prefetched if lowered in x]:
+            del self.prefetched[key]
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.oversized = LRUSetCache(maxsize=256)
+        self.prefetched = {}
+        self.size = 0
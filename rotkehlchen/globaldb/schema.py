@@ -224,6 +224,12 @@ CREATE TABLE IF NOT EXISTS price_history (
 );
 """
 
+# Lets nearest price lookups do bounded range probes on timestamp regardless of source
+DB_CREATE_PRICE_HISTORY_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_price_history_pair_timestamp
+ON price_history(from_asset, to_asset, timestamp);
+"""
+
 DB_CREATE_BINANCE_PAIRS = """
 CREATE TABLE IF NOT EXISTS binance_pairs (
     pair TEXT NOT NULL,
@@ -306,6 +312,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_USER_OWNED_ASSETS}
 {DB_CREATE_PRICE_HISTORY_SOURCE_TYPES}
 {DB_CREATE_PRICE_HISTORY}
+{DB_CREATE_PRICE_HISTORY_INDEX}
 {DB_CREATE_BINANCE_PAIRS}
 {DB_CREATE_ADDRESS_BOOK}
 {DB_CREATE_CUSTOM_ASSET}
@@ -98,6 +98,7 @@ def _force_remote_asset(cursor: DBCursor, local_asset: Asset, full_insert: str)
     # Insert new entry. Since identifiers are the same, no foreign key constrains should break
     executeall(cursor, full_insert)
     AssetResolver().clean_memory_cache(local_asset.identifier.lower())
+    GlobalDBHandler().price_history_cache.invalidate_asset(local_asset.identifier)
 
 
 class ParsedAssetData(NamedTuple):
@@ -432,6 +433,7 @@ class AssetsUpdater:
                 executeall(cursor, action)
                 if local_asset is not None:
                     AssetResolver().clean_memory_cache(identifier=local_asset.identifier)
+                    GlobalDBHandler().price_history_cache.invalidate_asset(local_asset.identifier)  # noqa: E501
         except sqlite3.Error:  # https://docs.python.org/3/library/sqlite3.html#exceptions
             if local_asset is None:
                 try:  # if asset is not known then simply do an insertion
@@ -1,23 +1,59 @@
 import logging
+import time
 import traceback
+from dataclasses import dataclass
 from typing import Any, Callable, Optional
 
 import gevent
 from rotkehlchen.errors.misc import GreenletKilledError
 
+from rotkehlchen.greenlets.process_pool import ProcessPool
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.user_messages import MessagesAggregator
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+DEFAULT_PROCESS_POOL_SIZE = 2
+
+
+@dataclass
+class ProcessJobStats:
+    """Timing of the process pool jobs with the same name run by a greenlet"""
+    task_name: str
+    jobs: int = 0
+    queued_seconds: float = 0  # waiting for a free worker and sending the job to it
+    run_seconds: float = 0  # running in the worker process
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            'task_name': self.task_name,
+            'jobs': self.jobs,
+            'queued_seconds': round(self.queued_seconds, 4),
+            'run_seconds': round(self.run_seconds, 4),
+        }
+
+
+def get_process_jobs_stats(greenlet: gevent.Greenlet) -> list[ProcessJobStats]:
+    """Returns the timing of the process pool jobs run by the given greenlet"""
+    return list(getattr(greenlet, 'process_jobs', {}).values())
+
 
 class GreenletManager():
-    """A class to collect and manage greenlets spawned by various sources"""
+    """A class to collect and manage greenlets spawned by various sources
+
+    It also owns the process pool that CPU heavy jobs can be sent to, so that
+    they don't block the gevent loop.
+    """
 
-    def __init__(self, msg_aggregator: MessagesAggregator) -> None:
+    def __init__(
+            self,
+            msg_aggregator: MessagesAggregator,
+            process_pool_size: int = DEFAULT_PROCESS_POOL_SIZE,
+    ) -> None:
         self.msg_aggregator = msg_aggregator
         self.greenlets: list[gevent.Greenlet] = []
+        self.process_pool = ProcessPool(size=process_pool_size)
 
     def add(self, task_name: str, greenlet: gevent.Greenlet, exception_is_error: bool) -> None:
         greenlet.link_exception(self._handle_killed_greenlets)
@@ -26,8 +62,10 @@ class GreenletManager():
         self.greenlets.append(greenlet)
 
     def clear(self) -> None:
-        """Clears all tracked greenlets. To be called when logging out or shutting down"""
+        """Clears all tracked greenlets and stops the idle worker processes.
+        To be called when logging out or shutting down"""
         gevent.killall(self.greenlets)
+        self.process_pool.close()
 
     def clear_finished(self) -> None:
         """Remove all finished tracked greenlets from the list"""
@@ -48,6 +86,61 @@ class GreenletManager():
         self.add(task_name, greenlet, exception_is_error)
         return greenlet
 
+    def run_in_process(self, task_name: str, method: Callable, **kwargs: Any) -> Any:
+        """Run a CPU heavy job in the process pool and return its result
+
+        The method and the kwargs need to be picklable, so the method should be a module
+        level function or a method of a picklable object. The calling greenlet waits for
+        the result without blocking the others. The timing of the job is recorded in the
+        calling greenlet so that it can be shown for async tasks.
+
+        May raise:
+        - ProcessPoolError if the worker process died while running the job
+        - Any exception that the job raised
+        """
+        return self._run_in_process(
+            owner=gevent.getcurrent(),
+            task_name=task_name,
+            method=method,
+            kwargs=kwargs,
+        )
+
+    def spawn_in_process(self, task_name: str, method: Callable, **kwargs: Any) -> gevent.Greenlet:  # noqa: E501
+        """Like run_in_process but returns immediately. Call get() on the returned
+        greenlet to wait for the result, so that the caller can do other work meanwhile"""
+        return gevent.spawn(
+            self._run_in_process,
+            owner=gevent.getcurrent(),
+            task_name=task_name,
+            method=method,
+            kwargs=kwargs,
+        )
+
+    def _run_in_process(
+            self,
+            owner: gevent.Greenlet,
+            task_name: str,
+            method: Callable,
+            kwargs: dict[str, Any],
+    ) -> Any:
+        submitted_at = time.time()
+        job_result = self.process_pool.run(method=method, kwargs=kwargs)
+        try:
+            if (process_jobs := getattr(owner, 'process_jobs', None)) is None:
+                process_jobs = owner.process_jobs = {}
+        except AttributeError:  # raw greenlets may not take attributes
+            process_jobs = {}
+        if (stats := process_jobs.get(task_name)) is None:
+            stats = process_jobs[task_name] = ProcessJobStats(task_name=task_name)
+        stats.jobs += 1
+        stats.queued_seconds += max(job_result.started_at - submitted_at, 0)
+        stats.run_seconds += job_result.run_seconds
+        log.debug(
+            f'Process pool job {task_name} ran for {job_result.run_seconds:.3f} seconds '
+            f'after waiting {job_result.started_at - submitted_at:.3f} seconds',
+        )
+        return job_result.result
+
     def _handle_killed_greenlets(self, greenlet: gevent.Greenlet) -> None:
         if not greenlet.exception:
             log.error('went in handle_killed_greenlets without an exception')
@@ -0,0 +1,231 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import struct
+import time
+from contextlib import suppress
+from multiprocessing.connection import Connection
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Callable, NamedTuple, Optional
+
+import gevent
+from gevent.lock import BoundedSemaphore
+from gevent.os import nb_read, nb_write
+
+from rotkehlchen.errors.misc import ProcessPoolError
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Workers are started with spawn on all platforms. Forking a process that runs the gevent
+# hub and has open DB connections is not safe.
+MP_CONTEXT = multiprocessing.get_context('spawn')
+# Seconds to wait for an idle worker to exit before terminating it
+WORKER_EXIT_TIMEOUT = 2
+# Seconds between checks for the result of a job on windows where pipes can't be waited on
+RESULT_POLL_INTERVAL = 0.01
+
+
+class ProcessJobResult(NamedTuple):
+    result: Any
+    started_at: float  # unix timestamp at which the worker started the job
+    run_seconds: float  # how long the job ran in the worker
+
+
+def _worker_main(conn: Connection) -> None:
+    """Entry point of the worker processes. Runs the jobs it receives until it gets None"""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:  # the pool went away
+            return
+        if job is None:
+            return
+
+        method, kwargs = job
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            outcome: tuple[bool, Any] = (True, method(**kwargs))
+        except Exception as e:  # pylint: disable=broad-except  # re-raised in the pool
+            outcome = (False, e)
+        run_seconds = time.perf_counter() - start
+        try:
+            conn.send((outcome, started_at, run_seconds))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            error = ProcessPoolError(f'Could not send the result of {method} back due to {e!s}. Original outcome: {outcome[1]!r}')  # noqa: E501
+            conn.send(((False, error), started_at, run_seconds))
+
+
+class _Worker():
+    """A worker process and the pipe to it
+
+    The worker uses the blocking Connection API. On this side the messages are read and
+    written with the same framing as Connection but waiting via the gevent loop, since
+    sending a big job to a worker that is still starting could otherwise block the loop
+    until the worker reads it.
+    """
+
+    def __init__(self) -> None:
+        self.conn, child_conn = MP_CONTEXT.Pipe(duplex=True)
+        if os.name != 'nt':
+            # With a monkey patched socket module the pipe is a non-blocking socket pair
+            # but the worker expects blocking reads
+            os.set_blocking(child_conn.fileno(), True)
+            os.set_blocking(self.conn.fileno(), False)
+        self.process = MP_CONTEXT.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def _send(self, message: Any) -> None:
+        """May raise:
+        - OSError if the worker process is gone
+        - Any pickling error if the message is not picklable
+        """
+        data = ForkingPickler.dumps(message)
+        if os.name == 'nt':
+            self.conn.send_bytes(data)
+            return
+
+        size = len(data)
+        header = struct.pack('!i', size) if size <= 0x7fffffff else struct.pack('!iQ', -1, size)
+        view = memoryview(header + data)
+        while len(view) != 0:
+            view = view[nb_write(self.conn.fileno(), view):]
+
+    def _read(self, size: int) -> bytes:
+        chunks, remaining = [], size
+        while remaining != 0:
+            if len(chunk := nb_read(self.conn.fileno(), remaining)) == 0:
+                raise EOFError
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def _recv(self) -> Any:
+        """Receive the pickled result of a job. It is sent by our own worker process so
+        it is trusted data to unpickle.
+
+        May raise:
+        - EOFError or OSError if the worker process is gone
+        """
+        if os.name == 'nt':
+            while not self.conn.poll():
+                gevent.sleep(RESULT_POLL_INTERVAL)
+            return pickle.loads(self.conn.recv_bytes())  # noqa: S301
+
+        size, = struct.unpack('!i', self._read(4))
+        if size == -1:
+            size, = struct.unpack('!Q', self._read(8))
+        return pickle.loads(self._read(size))  # noqa: S301
+
+    def run(self, method: Callable, kwargs: dict[str, Any]) -> ProcessJobResult:
+        """May raise:
+        - ProcessPoolError if the worker died while running the job
+        - Any exception the job raised
+        """
+        try:
+            self._send((method, kwargs))
+            (success, value), started_at, run_seconds = self._recv()
+        except (EOFError, OSError) as e:
+            raise ProcessPoolError(f'Worker process died while running {method}') from e
+
+        if success is False:
+            raise value
+        return ProcessJobResult(result=value, started_at=started_at, run_seconds=run_seconds)
+
+    def stop(self) -> None:
+        with suppress(OSError):  # already dead
+            self.conn.send(None)
+        self.process.join(timeout=WORKER_EXIT_TIMEOUT)
+        self.terminate()
+
+    def terminate(self) -> None:
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class ProcessPool():
+    """A pool of worker processes that run CPU heavy jobs outside of the gevent loop
+
+    Jobs are functions that get called with keyword arguments in a worker process, so both
+    the function and the arguments need to be picklable. The greenlet that runs a job waits
+    for the result without blocking the other greenlets. Workers are started lazily and are
+    reused. If all of them are busy the job waits for one to become free.
+
+    With a size of 0, or if worker processes can't be started, jobs run in the calling
+    greenlet instead.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.idle_workers: list[_Worker] = []
+        self.workers_num = 0
+        self.lock = BoundedSemaphore(max(size, 1))
+
+    def run(self, method: Callable, kwargs: dict[str, Any]) -> ProcessJobResult:
+        """Run the job in a worker process and return its result
+
+        May raise:
+        - ProcessPoolError if the worker died while running the job
+        - Any exception the job raised
+        """
+        with self.lock:
+            worker = self._get_worker()
+            if worker is None:
+                return self._run_inline(method=method, kwargs=kwargs)
+
+            try:
+                result = worker.run(method=method, kwargs=kwargs)
+            except ProcessPoolError:
+                self._discard(worker)
+                raise
+            except BaseException as e:
+                if isinstance(e, Exception) and worker.process.is_alive():
+                    self.idle_workers.append(worker)  # the job raised. Worker can be reused
+                else:  # we got killed while waiting. The worker would send a stale result
+                    self._discard(worker)
+                raise
+
+            self.idle_workers.append(worker)
+            return result
+
+    def _run_inline(self, method: Callable, kwargs: dict[str, Any]) -> ProcessJobResult:
+        started_at = time.time()
+        start = time.perf_counter()
+        result = method(**kwargs)
+        return ProcessJobResult(
+            result=result,
+            started_at=started_at,
+            run_seconds=time.perf_counter() - start,
+        )
+
+    def _get_worker(self) -> Optional[_Worker]:
+        if len(self.idle_workers) != 0:
+            return self.idle_workers.pop()
+        if self.workers_num >= self.size:
+            return None  # only for size 0. Otherwise the lock guarantees a free slot
+
+        try:
+            worker = _Worker()
+        except OSError as e:
+            log.error(f'Could not start a worker process due to {e!s}. Running jobs inline')
+            self.size = 0
+            return None
+
+        self.workers_num += 1
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.terminate()
+        self.workers_num -= 1
+
+    def close(self) -> None:
+        """Stop all idle worker processes. They are started again if more jobs come"""
+        for worker in self.idle_workers:
+            worker.stop()
+        self.workers_num -= len(self.idle_workers)
+        self.idle_workers = []
@@ -1,11 +1,18 @@
+import heapq
 import logging
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import groupby
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal, Optional
+from typing import TYPE_CHECKING, Callable, Literal, Optional, TypeVar, Union
+
+import gevent
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.structures.base import HistoryBaseEntry, HistoryEvent
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.db.filtering import (
     AssetMovementsFilterQuery,
+    DBAfterEntryFilter,
     EvmTransactionsFilterQuery,
     HistoryEventFilterQuery,
     LedgerActionsFilterQuery,
@@ -19,7 +26,12 @@ from rotkehlchen.exchanges.manager import SUPPORTED_EXCHANGES, ExchangeManager
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.tasks.manager import TaskManager
-from rotkehlchen.types import EVM_CHAINS_WITH_TRANSACTIONS, Location, Timestamp
+from rotkehlchen.types import (
+    EVM_CHAINS_WITH_TRANSACTIONS,
+    SUPPORTED_CHAIN_IDS,
+    Location,
+    Timestamp,
+)
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import timestamp_to_date
 
@@ -47,6 +59,20 @@ log = RotkehlchenLogsAdapter(logger)
 # Please, update this number each time a history query step is either added or removed
 NUM_HISTORY_QUERY_STEPS_EXCL_EXCHANGES = 4 + 3 * len(EVM_CHAINS_WITH_TRANSACTIONS)
 STEPS_PER_CEX = 5
+# Number of exchanges whose history is queried at the same time
+EXCHANGES_HISTORY_QUERY_CONCURRENCY = 4
+# How many entries of each history source are read from the DB at once when streaming
+HISTORY_STREAM_CHUNK_SIZE = 1000
+
+T = TypeVar('T')
+
+
+def history_sort_key(event: 'AccountingEventMixin') -> tuple[int, int]:
+    """Sort events first by timestamp and if history base by sequence index"""
+    return (
+        event.get_timestamp(),
+        event.sequence_index if isinstance(event, HistoryBaseEntry) else 1,
+    )
 
 
 class EventsHistorian:
@@ -309,6 +335,134 @@ class EventsHistorian:
         )
         return events, filter_total_found  # type: ignore  # event is guaranteed HistoryEvent
 
+    def _stream_db_entries(
+            self,
+            query_chunk: Callable[['DBCursor', Optional[DBAfterEntryFilter]], Sequence[T]],
+            identifier_field: str,
+            entry_identifier: Optional[Callable[['DBCursor', T], Union[int, str]]] = None,
+    ) -> Iterator[T]:
+        """Reads entries from the DB in chunks ordered by timestamp and identifier_field
+
+        query_chunk should return the next chunk of entries that come after the given
+        filter or the first chunk if None is given. Each chunk is read in its own read
+        context so that nothing stays open while the entries are consumed.
+
+        entry_identifier returns the identifier_field value of an entry if it's not
+        the identifier of the entry.
+        """
+        after_filter = None
+        while True:
+            with self.db.conn.read_ctx() as cursor:
+                entries = query_chunk(cursor, after_filter)
+                if len(entries) == 0:
+                    break
+
+                last_entry = entries[-1]
+                if entry_identifier is not None:
+                    last_identifier = entry_identifier(cursor, last_entry)
+                else:
+                    last_identifier = last_entry.identifier  # type: ignore[attr-defined]  # all streamed entries have it  # noqa: E501
+
+            yield from entries
+            after_filter = DBAfterEntryFilter(
+                and_op=True,
+                timestamp=last_entry.timestamp,  # type: ignore[attr-defined]  # all streamed entries have it  # noqa: E501
+                identifier=last_identifier,
+                identifier_field=identifier_field,
+            )
+
+    def _stream_trades(self, end_ts: Timestamp) -> Iterator[Trade]:
+        """Trades and asset movements are paged by rowid after the timestamp so that
+        the ones with the same timestamp keep the order they were added in"""
+        def query_chunk(cursor: 'DBCursor', after_filter: Optional[DBAfterEntryFilter]) -> list[Trade]:  # noqa: E501
+            filter_query = TradesFilterQuery.make(
+                to_ts=end_ts,
+                order_by_rules=[('timestamp', True), ('rowid', True)],
+                limit=HISTORY_STREAM_CHUNK_SIZE,
+                offset=0,
+            )
+            if after_filter is not None:
+                filter_query.filters.append(after_filter)
+            # we need all trades for accounting -- limit happens later
+            return self.db.get_trades(cursor, filter_query=filter_query, has_premium=True)
+
+        return self._stream_db_entries(
+            query_chunk=query_chunk,
+            identifier_field='rowid',
+            entry_identifier=lambda cursor, trade: cursor.execute(
+                'SELECT rowid FROM trades WHERE id=?', (trade.identifier,),
+            ).fetchone()[0],
+        )
+
+    def _stream_asset_movements(self, end_ts: Timestamp) -> Iterator[AssetMovement]:
+        def query_chunk(cursor: 'DBCursor', after_filter: Optional[DBAfterEntryFilter]) -> list[AssetMovement]:  # noqa: E501
+            filter_query = AssetMovementsFilterQuery.make(
+                to_ts=end_ts,
+                order_by_rules=[('timestamp', True), ('rowid', True)],
+                limit=HISTORY_STREAM_CHUNK_SIZE,
+                offset=0,
+            )
+            if after_filter is not None:
+                filter_query.filters.append(after_filter)
+            # we need all asset movements for accounting -- limit happens later
+            return self.db.get_asset_movements(cursor, filter_query=filter_query, has_premium=True)  # noqa: E501
+
+        return self._stream_db_entries(
+            query_chunk=query_chunk,
+            identifier_field='rowid',
+            entry_identifier=lambda cursor, movement: cursor.execute(
+                'SELECT rowid FROM asset_movements WHERE id=?', (movement.identifier,),
+            ).fetchone()[0],
+        )
+
+    def _stream_ledger_actions(self, end_ts: Timestamp) -> Iterator['LedgerAction']:
+        dbledger = DBLedgerActions(self.db, self.msg_aggregator)
+        has_premium = self.chains_aggregator.premium is not None
+
+        def query_chunk(cursor: 'DBCursor', after_filter: Optional[DBAfterEntryFilter]) -> list['LedgerAction']:  # noqa: E501
+            filter_query = LedgerActionsFilterQuery.make(
+                to_ts=end_ts,
+                order_by_rules=[('timestamp', True), ('identifier', True)],
+                limit=HISTORY_STREAM_CHUNK_SIZE,
+                offset=0,
+            )
+            if after_filter is not None:
+                filter_query.filters.append(after_filter)
+            return dbledger.get_ledger_actions(cursor, filter_query=filter_query, has_premium=has_premium)  # noqa: E501
+
+        return self._stream_db_entries(query_chunk=query_chunk, identifier_field='identifier')
+
+    def _stream_history_events(self, end_ts: Timestamp) -> Iterator[HistoryBaseEntry]:
+        """History events are stored with millisecond timestamps but sorted for accounting
+        by their timestamp in seconds and then by sequence index. So events read in
+        timestamp order are re-sorted within each second."""
+        history_events_db = DBHistoryEvents(self.db)
+
+        def query_chunk(cursor: 'DBCursor', after_filter: Optional[DBAfterEntryFilter]) -> list[HistoryBaseEntry]:  # noqa: E501
+            filter_query = HistoryEventFilterQuery.make(
+                # We need to have history since before the range
+                from_ts=Timestamp(0),
+                to_ts=end_ts,
+                order_by_rules=[('timestamp', True), ('history_events.identifier', True)],
+                limit=HISTORY_STREAM_CHUNK_SIZE,
+                offset=0,
+            )
+            if after_filter is not None:
+                filter_query.filters.append(after_filter)
+            return history_events_db.get_history_events(
+                cursor=cursor,
+                filter_query=filter_query,
+                has_premium=True,  # ignore limits here. Limit applied at processing
+                group_by_event_ids=False,
+            )
+
+        events = self._stream_db_entries(
+            query_chunk=query_chunk,
+            identifier_field='history_events.identifier',
+        )
+        for _, same_second_events in groupby(events, key=lambda x: x.get_timestamp()):
+            yield from sorted(same_second_events, key=history_sort_key)
+
     def get_history(
             self,
             start_ts: Timestamp,
@@ -319,6 +473,26 @@ class EventsHistorian:
         Creates all events history from start_ts to end_ts. Returns it
         sorted by ascending timestamp.
         """
+        empty_or_error, history = self.get_history_stream(
+            start_ts=start_ts,
+            end_ts=end_ts,
+            has_premium=has_premium,
+        )
+        return empty_or_error, list(history)
+
+    def get_history_stream(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            has_premium: bool,
+    ) -> tuple[str, Iterable['AccountingEventMixin']]:
+        """
+        Queries all services for history from start_ts to end_ts and returns a lazy
+        iterable over all events sorted by ascending timestamp. It can be consumed once.
+
+        The events are not all loaded in memory. Each source is read from the DB in
+        chunks as the iterator is consumed and all sources are merged together.
+        """
         self._reset_variables()
         step = 0
         total_steps = (
@@ -330,8 +504,8 @@ class EventsHistorian:
             start_ts=start_ts,
             end_ts=end_ts,
         )
-        # start creating the all trades history list
-        history: list['AccountingEventMixin'] = []
+        # start creating the iterators of all the history sources
+        sources: list[Iterable['AccountingEventMixin']] = []
         empty_or_error = ''
 
         def fail_history_cb(error_msg: str) -> None:
@@ -345,67 +519,61 @@ class EventsHistorian:
             step = self._increase_progress(step, total_steps)
             self.processing_state_name = state_name
 
-        for exchange in self.exchange_manager.iterate_exchanges():
-            self.processing_state_name = f'Querying {exchange.name} exchange history'
-            exchange.query_history_with_callbacks(
-                # We need to have history of exchanges since before the range
-                start_ts=Timestamp(0),
-                end_ts=end_ts,
-                fail_callback=fail_history_cb,
-                new_step_data=(new_step_cb, exchange.name),
-            )
-            # each exchange instance executes STEPS_PER_CEX steps out of the total_steps
-            step = self._increase_progress(step, total_steps, step_by=STEPS_PER_CEX)
-
-        # Query all trades, asset movements and margin positions from the DB for all
+        self.processing_state_name = 'Querying exchanges history'
+        pool = Pool(size=EXCHANGES_HISTORY_QUERY_CONCURRENCY)
+        greenlets = [pool.spawn(
+            exchange.query_history_with_callbacks,
+            # We need to have history of exchanges since before the range
+            start_ts=Timestamp(0),
+            end_ts=end_ts,
+            fail_callback=fail_history_cb,
+            new_step_data=(new_step_cb, exchange.name),
+        ) for exchange in self.exchange_manager.iterate_exchanges()]
+        try:
+            for greenlet in gevent.iwait(greenlets):
+                greenlet.get()  # re-raise any unexpected error of an exchange query
+                # each exchange instance executes STEPS_PER_CEX steps out of the total_steps
+                step = self._increase_progress(step, total_steps, step_by=STEPS_PER_CEX)
+        finally:  # don't leave queries running if a query failed or we got killed
+            gevent.killall(greenlets)
+
+        # Include all trades, asset movements and margin positions from the DB for all
         # possible locations.
         self.processing_state_name = 'Reading trades, asset movements and margin positions from the DB'  # noqa: E501
-        with self.db.conn.read_ctx() as cursor:
-            # Include all trades
-            trades = self.db.get_trades(
-                cursor,
-                filter_query=TradesFilterQuery.make(to_ts=end_ts),
-                has_premium=True,  # we need all trades for accounting -- limit happens later
-            )
-            history.extend(trades)
-
-            # Include all asset movements
-            asset_movements = self.db.get_asset_movements(
-                cursor,
-                filter_query=AssetMovementsFilterQuery.make(to_ts=end_ts),
-                has_premium=True,  # we need all trades for accounting -- limit happens later
-            )
-            history.extend(asset_movements)
-
-            # Include all margin positions
+        sources.append(self._stream_trades(end_ts=end_ts))
+        sources.append(self._stream_asset_movements(end_ts=end_ts))
+        with self.db.conn.read_ctx() as cursor:  # margin positions are few. Read them at once
             margin_positions = self.db.get_margin_positions(cursor, to_ts=end_ts)
-            history.extend(margin_positions)
-
+        sources.append(sorted(margin_positions, key=history_sort_key))
         step = self._increase_progress(step, total_steps)
 
+        self.processing_state_name = 'Querying EVM transactions history'
+        tx_filter_query = EvmTransactionsFilterQuery.make(
+            limit=None,
+            offset=None,
+            # We need to have history of transactions since before the range
+            from_ts=Timestamp(0),
+            to_ts=end_ts,
+        )
+        # type ignore since mypy can't tell that these chain ids are all supported chain ids
+        chain_ids: tuple[SUPPORTED_CHAIN_IDS, ...] = tuple(x.to_chain_id() for x in EVM_CHAINS_WITH_TRANSACTIONS)  # type: ignore[misc]  # noqa: E501
+        errors = self.chains_aggregator.query_evm_transactions(
+            filter_query=tx_filter_query,
+            chain_ids=chain_ids,
+        )
+        for chain_id, error in errors.items():
+            str_blockchain = str(chain_id.to_blockchain())
+            msg = str(error)
+            self.msg_aggregator.add_error(
+                f'There was an error when querying {str_blockchain} etherscan for transactions: {msg}'  # noqa: E501
+                f'The final history result will not include {str_blockchain} transactions',
+            )
+            empty_or_error += '\n' + msg
+        step = self._increase_progress(step, total_steps, step_by=len(EVM_CHAINS_WITH_TRANSACTIONS))  # noqa: E501
+
         for blockchain in EVM_CHAINS_WITH_TRANSACTIONS:
             str_blockchain = str(blockchain)
-            self.processing_state_name = f'Querying {str_blockchain} transactions history'
             evm_manager = self.chains_aggregator.get_chain_manager(blockchain)
-            tx_filter_query = EvmTransactionsFilterQuery.make(
-                limit=None,
-                offset=None,
-                # We need to have history of transactions since before the range
-                from_ts=Timestamp(0),
-                to_ts=end_ts,
-                chain_id=blockchain.to_chain_id(),  # type: ignore[arg-type]
-            )
-            try:
-                evm_manager.transactions.query_chain(filter_query=tx_filter_query)
-            except RemoteError as e:
-                msg = str(e)
-                self.msg_aggregator.add_error(
-                    f'There was an error when querying {str_blockchain} etherscan for transactions: {msg}'  # noqa: E501
-                    f'The final history result will not include {str_blockchain} transactions',
-                )
-                empty_or_error += '\n' + msg
-
-            step = self._increase_progress(step, total_steps)
             self.processing_state_name = f'Querying {str_blockchain} transaction receipts'
             evm_manager.transactions.get_receipts_for_transactions_missing_them()
             step = self._increase_progress(step, total_steps)
@@ -416,11 +584,7 @@ class EventsHistorian:
 
         # include all ledger actions
         self.processing_state_name = 'Querying ledger actions history'
-        ledger_actions, _ = self.query_ledger_actions(
-            filter_query=LedgerActionsFilterQuery.make(to_ts=end_ts),
-            only_cache=True,
-        )
-        history.extend(ledger_actions)
+        sources.append(self._stream_ledger_actions(end_ts=end_ts))
         step = self._increase_progress(step, total_steps)
 
         # include eth2 staking events
@@ -432,7 +596,7 @@ class EventsHistorian:
                     from_timestamp=Timestamp(0),
                     to_timestamp=end_ts,
                 )
-                history.extend(eth2_events)
+                sources.append(sorted(eth2_events, key=history_sort_key))
             except RemoteError as e:
                 self.msg_aggregator.add_error(
                     f'Eth2 events are not included in the PnL report due to {e!s}',
@@ -441,25 +605,9 @@ class EventsHistorian:
         step = self._increase_progress(step, total_steps)
         self.processing_state_name = 'Querying base history events'
         # Include all base history entries
-        history_events_db = DBHistoryEvents(self.db)
-        with self.db.conn.read_ctx() as cursor:
-            base_entries = history_events_db.get_history_events(
-                cursor=cursor,
-                filter_query=HistoryEventFilterQuery.make(
-                    # We need to have history since before the range
-                    from_ts=Timestamp(0),
-                    to_ts=end_ts,
-                ),
-                has_premium=True,  # ignore limits here. Limit applied at processing
-                group_by_event_ids=False,
-            )
-        history.extend(base_entries)
+        sources.append(self._stream_history_events(end_ts=end_ts))
         self._increase_progress(step, total_steps)
 
-        history.sort(  # sort events first by timestamp and if history base by sequence index
-            key=lambda x: (
-                x.get_timestamp(),
-                x.sequence_index if isinstance(x, HistoryBaseEntry) else 1,
-            ),
-        )
-        return empty_or_error, history
+        # Each source is already sorted. Merging keeps the order of the sources for
+        # events with the same sort key, same as sorting all of them together would.
+        return empty_or_error, heapq.merge(*sources, key=history_sort_key)
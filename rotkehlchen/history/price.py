@@ -11,6 +11,7 @@ from rotkehlchen.errors.asset import UnknownAsset, WrongAssetType
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
 from rotkehlchen.fval import FVal
+from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.globaldb.manual_price_oracles import ManualPriceOracle
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -151,6 +152,39 @@ class PriceHistorian():
             return Price(usd_price * price_mapping)
         return None
 
+    @staticmethod
+    def _remember_price_misses(
+            from_asset: Asset,
+            to_asset: Asset,
+            timestamp: Timestamp,
+            oracles: list[HistoricalPriceOracle],
+    ) -> None:
+        """Store the oracles that had no price so they are skipped until the misses expire.
+
+        Manual prices are not remembered since they are local and the user can add them
+        at any point."""
+        oracles = [x for x in oracles if x != HistoricalPriceOracle.MANUAL]
+        if len(oracles) == 0:
+            return
+
+        GlobalDBHandler().add_historical_price_misses(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            timestamp=timestamp,
+            oracles=oracles,
+        )
+
+    @staticmethod
+    def prefetch_historical_prices(queries: list[tuple[Asset, Asset, Timestamp]]) -> None:
+        """Look up what the DB has for the given (from_asset, to_asset, timestamp) queries
+        in batches so that the following query_historical_price calls for them don't need
+        to go to the DB one by one."""
+        oracles = PriceHistorian()._oracles
+        assert isinstance(oracles, list), (
+            'PriceHistorian should never be called before setting the oracles'
+        )
+        GlobalDBHandler().prefetch_historical_prices(queries=queries, sources=oracles)
+
     @staticmethod
     def query_historical_price(
             from_asset: Asset,
@@ -210,7 +244,16 @@ class PriceHistorian():
             'PriceHistorian should never be called before setting the oracles'
         )
         rate_limited = False
+        known_misses = GlobalDBHandler().get_historical_price_misses(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            timestamp=timestamp,
+        )
+        new_misses = []
         for oracle, oracle_instance in zip(oracles, oracle_instances):
+            if oracle in known_misses:
+                continue
+
             can_query_history = oracle_instance.can_query_history(
                 from_asset=from_asset,
                 to_asset=to_asset,
@@ -225,12 +268,16 @@ class PriceHistorian():
                     to_asset=to_asset,
                     timestamp=timestamp,
                 )
+            except NoPriceForGivenTimestamp as e:
+                if e.rate_limited is False:
+                    new_misses.append(oracle)
+                continue
             except (
                 PriceQueryUnsupportedAsset,
-                NoPriceForGivenTimestamp,
                 UnknownAsset,
                 WrongAssetType,
             ):
+                new_misses.append(oracle)
                 continue
             except RemoteError as e:
                 # Raise the flag if any of the services was rate limited
@@ -247,8 +294,10 @@ class PriceHistorian():
                 to_asset=to_asset,
                 timestamp=timestamp,
             )
+            PriceHistorian._remember_price_misses(from_asset, to_asset, timestamp, new_misses)
             return price
 
+        PriceHistorian._remember_price_misses(from_asset, to_asset, timestamp, new_misses)
         raise NoPriceForGivenTimestamp(
             from_asset=from_asset,
             to_asset=to_asset,
@@ -1,12 +1,13 @@
+import json
 import logging
 import operator
-from collections.abc import Iterable, Sequence
-from contextlib import suppress
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager, suppress
 from enum import auto
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Union
 
-from rotkehlchen.assets.asset import Asset, EvmToken, FiatAsset, UnderlyingToken
+from rotkehlchen.assets.asset import Asset, AssetWithOracles, EvmToken, FiatAsset, UnderlyingToken
 from rotkehlchen.assets.utils import TokenSeenAt, get_or_create_evm_token
 from rotkehlchen.chain.ethereum.defi.price import handle_defi_price_query
 from rotkehlchen.chain.ethereum.utils import token_normalized_value_decimals
@@ -75,7 +76,12 @@ from rotkehlchen.externalapis.xratescom import (
     get_historical_xratescom_exchange_rates,
 )
 from rotkehlchen.fval import FVal
-from rotkehlchen.globaldb.cache import globaldb_get_general_cache_values, read_curve_pool_tokens
+from rotkehlchen.globaldb.cache import (
+    globaldb_delete_general_cache,
+    globaldb_get_general_cache_values,
+    globaldb_set_general_cache_values,
+    read_curve_pool_tokens,
+)
 from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.interfaces import CurrentPriceOracleInterface
@@ -113,6 +119,9 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 CURRENT_PRICE_CACHE_SECS = 300  # 5 mins
+# Cached prices older than CURRENT_PRICE_CACHE_SECS are still used up to this age while
+# they get refreshed in the background
+CURRENT_PRICE_STALE_SECS = DAY_IN_SECONDS
 DEFAULT_RATE_LIMIT_WAITING_TIME = 60  # seconds
 BTC_PER_BSQ = FVal('0.00000100')
 
@@ -271,6 +280,9 @@ class Inquirer():
     __instance: Optional['Inquirer'] = None
     _cached_forex_data: dict
     _cached_current_price: dict[tuple[Asset, Asset], CachedPriceEntry]
+    _stale_current_prices: set[tuple[Asset, Asset]]
+    _fresh_current_prices_users: int
+    _current_prices_saved_ts: Timestamp
     _data_directory: Path
     _cryptocompare: 'Cryptocompare'
     _coingecko: 'Coingecko'
@@ -318,6 +330,9 @@ class Inquirer():
         Inquirer._defillama = defillama
         Inquirer._manualcurrent = manualcurrent
         Inquirer._cached_current_price = {}
+        Inquirer._stale_current_prices = set()
+        Inquirer._fresh_current_prices_users = 0
+        Inquirer._current_prices_saved_ts = Timestamp(0)
         Inquirer._evm_managers = {}
         Inquirer._msg_aggregator = msg_aggregator
         Inquirer.special_tokens = {
@@ -389,12 +404,44 @@ class Inquirer():
             cache_key: tuple[Asset, Asset],
             match_main_currency: bool,
     ) -> Optional[CachedPriceEntry]:
-        cache = Inquirer()._cached_current_price.get(cache_key, None)
-        if cache is None or ts_now() - cache.time > CURRENT_PRICE_CACHE_SECS or cache.used_main_currency != match_main_currency:  # noqa: E501
+        """Returns the cached price entry of the pair if it can still be used
+
+        Entries older than CURRENT_PRICE_CACHE_SECS are returned up to CURRENT_PRICE_STALE_SECS
+        and marked as stale, so that update_current_prices_cache refreshes them in the
+        background. Prices in the main currency are never served stale and neither are any
+        prices while in the fresh_current_prices context.
+        """
+        instance = Inquirer()
+        cache = instance._cached_current_price.get(cache_key, None)
+        if cache is None or cache.used_main_currency != match_main_currency:
+            return None
+
+        age = ts_now() - cache.time
+        if age <= CURRENT_PRICE_CACHE_SECS:
+            return cache
+
+        if (
+                age > CURRENT_PRICE_STALE_SECS or
+                cache.used_main_currency is True or
+                instance._fresh_current_prices_users != 0
+        ):
             return None
 
+        instance._stale_current_prices.add(cache_key)
         return cache
 
+    @staticmethod
+    @contextmanager
+    def fresh_current_prices() -> Iterator[None]:
+        """Within this context cached current prices are only served while they are
+        CURRENT_PRICE_CACHE_SECS old, as for queries whose results are saved in the DB.
+        It applies to all the current price queries made meanwhile."""
+        Inquirer._fresh_current_prices_users += 1
+        try:
+            yield
+        finally:
+            Inquirer._fresh_current_prices_users -= 1
+
     @staticmethod
     def remove_cache_prices_for_asset(pairs_to_invalidate: list[tuple[Asset, Asset]]) -> None:
         """Deletes all prices cache that contains any asset in the possible pairs."""
@@ -411,6 +458,114 @@ class Inquirer():
     def remove_cached_current_price_entry(cache_key: tuple[Asset, Asset]) -> None:
         Inquirer()._cached_current_price.pop(cache_key, None)
 
+    @staticmethod
+    def should_update_current_prices_cache() -> bool:
+        """Whether there are stale cached prices to refresh or new prices to save"""
+        instance = Inquirer()
+        if len(instance._stale_current_prices) != 0:
+            return True
+
+        if ts_now() - instance._current_prices_saved_ts < CURRENT_PRICE_CACHE_SECS:
+            return False
+
+        return any(
+            entry.time > instance._current_prices_saved_ts
+            for entry in instance._cached_current_price.values()
+        )
+
+    @staticmethod
+    def update_current_prices_cache() -> None:
+        """Refreshes the stale cached prices, all USD prices in one batch, and saves the
+        cached prices in the global DB. If no new price is found for a stale entry the
+        stale entry is kept."""
+        instance = Inquirer()
+        stale_entries = {
+            cache_key: entry for cache_key in instance._stale_current_prices
+            if (entry := instance._cached_current_price.get(cache_key)) is not None
+        }
+        instance._stale_current_prices = set()
+        if len(stale_entries) != 0:
+            log.debug(f'Refreshing {len(stale_entries)} stale cached current prices')
+            instance.find_usd_prices(
+                assets=[from_asset for from_asset, to_asset in stale_entries if to_asset == A_USD],  # noqa: E501
+                ignore_cache=True,
+            )
+            for from_asset, to_asset in stale_entries:
+                if to_asset != A_USD:
+                    instance.find_price(from_asset=from_asset, to_asset=to_asset, ignore_cache=True)  # noqa: E501
+
+            for cache_key, entry in stale_entries.items():
+                new_entry = instance._cached_current_price.get(cache_key)
+                if new_entry is None or new_entry.price == ZERO_PRICE:
+                    instance._cached_current_price[cache_key] = entry
+
+        instance.save_current_prices_cache()
+
+    @staticmethod
+    def save_current_prices_cache() -> None:
+        """Saves the cached prices that could be served later in the global DB so that
+        they can be used from the start of the next session"""
+        instance = Inquirer()
+        now = ts_now()
+        values = [
+            json.dumps([
+                from_asset.identifier,
+                to_asset.identifier,
+                str(entry.price),
+                entry.oracle.serialize(),
+                entry.time,
+            ])
+            for (from_asset, to_asset), entry in list(instance._cached_current_price.items())
+            if (
+                entry.used_main_currency is False and
+                entry.price != ZERO_PRICE and
+                now - entry.time <= CURRENT_PRICE_STALE_SECS
+            )
+        ]
+        with GlobalDBHandler().conn.write_ctx() as write_cursor:
+            globaldb_delete_general_cache(
+                write_cursor=write_cursor,
+                key_parts=(GeneralCacheType.CURRENT_PRICE,),
+            )
+            globaldb_set_general_cache_values(
+                write_cursor=write_cursor,
+                key_parts=(GeneralCacheType.CURRENT_PRICE,),
+                values=values,
+            )
+        instance._current_prices_saved_ts = now
+        log.debug(f'Saved {len(values)} cached current prices in the global DB')
+
+    @staticmethod
+    def load_current_prices_cache() -> None:
+        """Loads the cached prices saved in the global DB that are not in memory already.
+        Entries older than CURRENT_PRICE_STALE_SECS are skipped."""
+        instance = Inquirer()
+        with GlobalDBHandler().conn.read_ctx() as cursor:
+            values = globaldb_get_general_cache_values(
+                cursor=cursor,
+                key_parts=(GeneralCacheType.CURRENT_PRICE,),
+            )
+
+        now = ts_now()
+        for value in values:
+            try:
+                from_identifier, to_identifier, price, oracle, timestamp = json.loads(value)
+                cache_key = (Asset(from_identifier), Asset(to_identifier))
+                entry = CachedPriceEntry(
+                    price=Price(FVal(price)),
+                    time=Timestamp(timestamp),
+                    oracle=CurrentPriceOracle.deserialize(oracle),
+                    used_main_currency=False,
+                )
+            except (json.JSONDecodeError, TypeError, ValueError, DeserializationError) as e:
+                log.error(f'Skipping saved cached current price {value} due to {e!s}')
+                continue
+
+            if now - entry.time <= CURRENT_PRICE_STALE_SECS and cache_key not in instance._cached_current_price:  # noqa: E501
+                instance._cached_current_price[cache_key] = entry
+
+        instance._current_prices_saved_ts = now
+
     @staticmethod
     def set_oracles_order(oracles: list[CurrentPriceOracle]) -> None:
         assert len(oracles) != 0 and len(oracles) == len(set(oracles)), (
@@ -640,6 +795,154 @@ class Inquirer():
             match_main_currency=match_main_currency,
         )
 
+    @staticmethod
+    def find_usd_prices(
+            assets: Sequence[Asset],
+            ignore_cache: bool = False,
+            skip_onchain: bool = False,
+    ) -> dict[Asset, Price]:
+        """Returns the current USD price of each of the given assets
+
+        Assets that are priced by the oracles are queried together, so that oracles that
+        can query many prices at once do so, and only the assets an oracle found no price
+        for are passed on to the next oracles. Assets that need special handling
+        (fiat, tokens of known protocols etc.) are priced as in find_usd_price.
+
+        Prices that can't be found are ZERO_PRICE.
+        """
+        instance = Inquirer()
+        prices: dict[Asset, Price] = {}
+        to_query: dict[AssetWithOracles, Asset] = {}
+        for asset in assets:
+            if asset in prices or asset in to_query:
+                continue
+
+            if ignore_cache is False:
+                cache = instance.get_cached_current_price_entry(cache_key=(asset, A_USD), match_main_currency=False)  # noqa: E501
+                if cache is not None:
+                    prices[asset] = cache.price
+                    continue
+
+            if (asset_with_oracles := instance._asset_with_only_oracle_price(asset)) is not None:
+                to_query[asset_with_oracles] = asset
+            else:
+                prices[asset] = instance.find_usd_price(
+                    asset=asset,
+                    ignore_cache=ignore_cache,
+                    skip_onchain=skip_onchain,
+                )
+
+        if len(to_query) != 0:
+            oracle_prices = instance._query_oracle_instances_for_usd_prices(
+                from_assets=list(to_query),
+                skip_onchain=skip_onchain,
+            )
+            for asset_with_oracles, price in oracle_prices.items():
+                prices[to_query[asset_with_oracles]] = price
+
+        return prices
+
+    @staticmethod
+    def _asset_with_only_oracle_price(asset: Asset) -> Optional[AssetWithOracles]:
+        """Returns the asset resolved if its USD price only comes from the oracles and
+        None if it needs any of the special handling of _find_usd_price"""
+        if asset in (A_USD, A_BSQ, A_KFEE) or asset.identifier in Inquirer().special_tokens:
+            return None
+
+        try:
+            asset_with_oracles = asset.resolve_to_asset_with_oracles()
+        except (UnknownAsset, WrongAssetType):
+            return None
+
+        if isinstance(asset_with_oracles, FiatAsset):
+            return None
+
+        if isinstance(asset_with_oracles, EvmToken) and (
+            asset_with_oracles.protocol in ProtocolsWithPriceLogic or
+            asset_with_oracles.underlying_tokens is not None
+        ):
+            return None
+
+        return asset_with_oracles
+
+    @staticmethod
+    def _query_oracle_instances_for_usd_prices(
+            from_assets: list[AssetWithOracles],
+            skip_onchain: bool,
+    ) -> dict[AssetWithOracles, Price]:
+        """Queries the USD prices of many assets from the oracles and caches them
+
+        Each oracle is asked for the prices of all the assets that the previous oracles
+        found no price for. Prices that no oracle found are ZERO_PRICE.
+        """
+        instance = Inquirer()
+        assert (
+            isinstance(instance._oracles, list) and
+            isinstance(instance._oracle_instances, list) and
+            isinstance(instance._oracles_not_onchain, list) and
+            isinstance(instance._oracle_instances_not_onchain, list)
+        ), (
+            'Inquirer should never be called before the setting the oracles'
+        )
+        if skip_onchain:
+            oracles = instance._oracles_not_onchain
+            oracle_instances = instance._oracle_instances_not_onchain
+        else:
+            oracles = instance._oracles
+            oracle_instances = instance._oracle_instances
+
+        usd = A_USD.resolve_to_asset_with_oracles()
+        found: dict[AssetWithOracles, tuple[Price, CurrentPriceOracle]] = {}
+        remaining = from_assets
+        for oracle, oracle_instance in zip(oracles, oracle_instances):
+            if len(remaining) == 0:
+                break
+
+            if (
+                isinstance(oracle_instance, CurrentPriceOracleInterface) and
+                (
+                    oracle_instance.rate_limited_in_last(DEFAULT_RATE_LIMIT_WAITING_TIME) is True or  # noqa: E501
+                    isinstance(oracle_instance, PenalizablePriceOracleMixin) and oracle_instance.is_penalized() is True  # noqa: E501
+                )
+            ):
+                continue
+
+            try:
+                oracle_prices = oracle_instance.query_multiple_current_prices(
+                    from_assets=remaining,
+                    to_asset=usd,
+                )
+            except RecursionError:
+                # Can happen if the user created a loop of manual current prices
+                instance._msg_aggregator.add_warning(
+                    'Was not able to find USD prices using your manual latest prices since '
+                    'they form a loop. For now, other oracles will be used.',
+                )
+                continue
+
+            for asset, price in oracle_prices.items():
+                if price != ZERO_PRICE:
+                    found[asset] = price, oracle
+            remaining = [x for x in remaining if x not in found]
+            log.debug(
+                f'Current price oracle {oracle} got {len(oracle_prices)} USD prices',
+                remaining=len(remaining),
+            )
+
+        now = ts_now()
+        prices = {}
+        for asset in from_assets:
+            price, oracle = found.get(asset, (ZERO_PRICE, CurrentPriceOracle.BLOCKCHAIN))
+            prices[asset] = price
+            Inquirer._cached_current_price[(asset, A_USD)] = CachedPriceEntry(
+                price=price,
+                time=now,
+                oracle=oracle,
+                used_main_currency=False,
+            )
+
+        return prices
+
     @staticmethod
     def _find_usd_price(
             asset: Asset,
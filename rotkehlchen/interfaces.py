@@ -1,9 +1,18 @@
 import abc
+import logging
 from typing import Any, Optional
 
 from rotkehlchen.assets.asset import Asset, AssetWithOracles
+from rotkehlchen.constants.misc import ZERO_PRICE
+from rotkehlchen.errors.defi import DefiPoolError
+from rotkehlchen.errors.misc import RemoteError
+from rotkehlchen.errors.price import PriceQueryUnsupportedAsset
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import Price, Timestamp
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
 
 class CurrentPriceOracleInterface(metaclass=abc.ABCMeta):
     """
@@ -37,6 +46,45 @@ class CurrentPriceOracleInterface(metaclass=abc.ABCMeta):
         2. Whether returned price is in main currency
         """
 
+    def query_multiple_current_prices(
+            self,
+            from_assets: list[AssetWithOracles],
+            to_asset: AssetWithOracles,
+    ) -> dict[AssetWithOracles, Price]:
+        """Returns the current prices of from_assets in to_asset that the oracle found.
+        Assets whose price could not be found are not in the result.
+
+        By default the price of each asset is queried on its own. Oracles that can query
+        the prices of many assets at once should override it.
+        """
+        prices = {}
+        for from_asset in from_assets:
+            try:
+                price, _ = self.query_current_price(
+                    from_asset=from_asset,
+                    to_asset=to_asset,
+                    match_main_currency=False,
+                )
+            except (DefiPoolError, PriceQueryUnsupportedAsset, RemoteError) as e:
+                log.warning(
+                    f'Current price oracle {self.name} failed to request {to_asset.identifier} '
+                    f'price for {from_asset.identifier} due to: {e!s}.',
+                )
+                continue
+            except RecursionError:
+                # Can happen if the user created a loop of manual current prices. Only the
+                # assets in the loop are affected so keep querying the rest.
+                log.warning(
+                    f'Current price oracle {self.name} failed to request {to_asset.identifier} '
+                    f'price for {from_asset.identifier} since manual latest prices form a loop.',
+                )
+                continue
+
+            if price != ZERO_PRICE:
+                prices[from_asset] = price
+
+        return prices
+
 
 class HistoricalPriceOracleInterface(CurrentPriceOracleInterface):
     """Query prices for certain timestamps. Oracle could be rate limited"""
@@ -6,11 +6,13 @@ import logging.config
 import os
 import time
 from collections import defaultdict
+from functools import partial
 from pathlib import Path
 from types import FunctionType
-from typing import TYPE_CHECKING, Any, Literal, Optional, Union, cast, overload
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, Union, cast, overload
 
 import gevent
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.accountant import Accountant
 from rotkehlchen.accounting.structures.balance import Balance, BalanceType
@@ -111,6 +113,11 @@ MAIN_LOOP_SECS_DELAY = 10
 ICONS_BATCH_SIZE = 3
 ICONS_QUERY_SLEEP = 60
 
+# Number of balance sources (exchanges, blockchains etc.) queried at the same time
+BALANCE_QUERY_CONCURRENCY = 4
+# Seconds after which the balance query of a source is given up
+BALANCE_QUERY_TIMEOUT = 300
+
 
 class Rotkehlchen():
     def __init__(self, args: argparse.Namespace) -> None:
@@ -390,6 +397,7 @@ class Rotkehlchen():
             saddle=saddle_oracle,
         )
         Inquirer().set_oracles_order(settings.current_price_oracles)
+        Inquirer().load_current_prices_cache()
 
         self.chains_aggregator = ChainsAggregator(
             blockchain_accounts=blockchain_accounts,
@@ -419,6 +427,7 @@ class Rotkehlchen():
             msg_aggregator=self.msg_aggregator,
             evm_accounting_aggregators=evm_accounting_aggregators,
             premium=self.premium,
+            greenlet_manager=self.greenlet_manager,
         )
         self.events_historian = EventsHistorian(
             user_directory=self.user_directory,
@@ -480,6 +489,9 @@ class Rotkehlchen():
 
         self.deactivate_premium_status()
         self.greenlet_manager.clear()
+        for blockchain in EVM_CHAINS_WITH_TRANSACTIONS:
+            self.chains_aggregator.get_chain_manager(blockchain).node_inquirer.save_nodes_stats()
+        Inquirer().save_current_prices_cache()
         del self.chains_aggregator
         self.exchange_manager.delete_all_exchanges()
 
@@ -805,7 +817,7 @@ class Rotkehlchen():
             start_ts: Timestamp,
             end_ts: Timestamp,
     ) -> tuple[int, str]:
-        error_or_empty, events = self.events_historian.get_history(
+        error_or_empty, events = self.events_historian.get_history_stream(
             start_ts=start_ts,
             end_ts=end_ts,
             has_premium=self.premium is not None,
@@ -843,11 +855,77 @@ class Rotkehlchen():
             requested_save_data=requested_save_data,
             save_despite_errors=save_despite_errors,
         )
+        with self.data.db.conn.read_ctx() as cursor:
+            allowed_to_save = requested_save_data or self.data.db.should_save_balances(cursor)
+
+        # a snapshot that gets saved should not record prices served stale from the cache
+        with Inquirer().fresh_current_prices() if allowed_to_save else contextlib.nullcontext():  # noqa: E501
+            result_dict, problem_free = self._query_all_balances(ignore_cache=ignore_cache)
+
+        if (problem_free or save_despite_errors) and allowed_to_save:
+            if not timestamp:
+                timestamp = Timestamp(int(time.time()))
+            with self.data.db.user_write() as write_cursor:
+                self.data.db.save_balances_data(
+                    write_cursor=write_cursor,
+                    data=result_dict,
+                    timestamp=timestamp,
+                )
+            log.debug('query_balances data saved')
+        else:
+            log.debug(
+                'query_balances data not saved',
+                allowed_to_save=allowed_to_save,
+                problem_free=problem_free,
+                save_despite_errors=save_despite_errors,
+            )
+
+        return result_dict
+
+    def _query_all_balances(self, ignore_cache: bool) -> tuple[dict[str, Any], bool]:
+        """Queries all balance sources and returns the balances along with whether
+        all of the sources were queried without problems"""
+        # query all balance sources at the same time and then process their results in order
+        exchanges = {
+            f'{exchange.location!s}:{exchange.name}': exchange
+            for exchange in self.exchange_manager.iterate_exchanges()
+        }
+        sources: dict[str, Callable[[], Any]] = {
+            name: partial(exchange.query_balances, ignore_cache=ignore_cache)
+            for name, exchange in exchanges.items()
+        }
+        sources['blockchain'] = partial(
+            self.chains_aggregator.query_balances,
+            blockchain=None,
+            ignore_cache=ignore_cache,
+        )
+        if self.chains_aggregator.get_module('loopring'):
+            sources['loopring'] = self.chains_aggregator.get_loopring_balances
+        if (nfts := self.chains_aggregator.get_module('nfts')) is not None:
+            sources['nfts'] = partial(nfts.get_db_nft_balances, filter_query=NFTFilterQuery.make())  # noqa: E501
+
+        durations: dict[str, float] = {}
+        pool = Pool(size=BALANCE_QUERY_CONCURRENCY)
+        greenlets = {
+            name: pool.spawn(self._query_balance_source, name=name, query=query, durations=durations)  # noqa: E501
+            for name, query in sources.items()
+        }
+        try:
+            gevent.joinall(list(greenlets.values()))
+        finally:  # don't leave queries running if we got killed
+            gevent.killall(list(greenlets.values()))
+        log.debug('query_balances sources queried', durations=durations)
 
         balances: dict[str, dict[Asset, Balance]] = {}
         problem_free = True
-        for exchange in self.exchange_manager.iterate_exchanges():
-            exchange_balances, error_msg = exchange.query_balances(ignore_cache=ignore_cache)
+        for name, exchange in exchanges.items():
+            try:
+                exchange_balances, error_msg = cast(
+                    tuple[Optional[dict[Asset, Balance]], str],
+                    greenlets[name].get(),
+                )
+            except RemoteError as e:
+                exchange_balances, error_msg = None, str(e)
             # If we got an error, disregard that exchange but make sure we don't save data
             if not isinstance(exchange_balances, dict):
                 problem_free = False
@@ -857,20 +935,18 @@ class Rotkehlchen():
                 )
             else:
                 location_str = str(exchange.location)
-                if location_str not in balances:  # need to widen type at assignment here
-                    balances[location_str] = cast(dict[Asset, Balance], exchange_balances)
+                if location_str not in balances:
+                    balances[location_str] = exchange_balances
                 else:  # multiple exchange of same type. Combine balances
                     balances[location_str] = combine_dicts(
                         balances[location_str],
-                        exchange_balances,  # type: ignore
+                        exchange_balances,
                     )
 
         liabilities: dict[Asset, Balance]
         try:
-            blockchain_result = self.chains_aggregator.query_balances(
-                blockchain=None,
-                ignore_cache=ignore_cache,
-            )  # copies below since if cache is used we end up modifying the balance sheet object
+            blockchain_result = greenlets['blockchain'].get()
+            # copies below since if cache is used we end up modifying the balance sheet object
             if len(blockchain_result.totals.assets) != 0:
                 balances[str(Location.BLOCKCHAIN)] = blockchain_result.totals.assets.copy()
             liabilities = blockchain_result.totals.liabilities.copy()
@@ -892,10 +968,10 @@ class Rotkehlchen():
             manual_liabilities_as_dict[manual_liability.asset] += manual_liability.value
 
         liabilities = combine_dicts(liabilities, manual_liabilities_as_dict)
-        # retrieve loopring balances if module is activated
-        if self.chains_aggregator.get_module('loopring'):
+        # add loopring balances if module is activated
+        if 'loopring' in greenlets:
             try:
-                loopring_balances = self.chains_aggregator.get_loopring_balances()
+                loopring_balances = greenlets['loopring'].get()
             except RemoteError as e:
                 problem_free = False
                 self.msg_aggregator.add_message(
@@ -906,11 +982,10 @@ class Rotkehlchen():
                 if len(loopring_balances) != 0:
                     balances[str(Location.LOOPRING)] = loopring_balances
 
-        # retrieve nft balances if module is activated
-        nfts = self.chains_aggregator.get_module('nfts')
-        if nfts is not None:
+        # add nft balances if module is activated
+        if 'nfts' in greenlets:
             try:
-                nft_balances = nfts.get_db_nft_balances(filter_query=NFTFilterQuery.make())['entries']  # noqa: E501
+                nft_balances = greenlets['nfts'].get()['entries']
             except RemoteError as e:
                 log.error(
                     f'At balance snapshot NFT balances query failed due to {e!s}. Error '
@@ -978,28 +1053,34 @@ class Rotkehlchen():
             'liabilities': liabilities_as_dict,
             'location': location_stats,
             'net_usd': net_usd,
+            'durations': durations,
         }
-        with self.data.db.conn.read_ctx() as cursor:
-            allowed_to_save = requested_save_data or self.data.db.should_save_balances(cursor)
-            if (problem_free or save_despite_errors) and allowed_to_save:
-                if not timestamp:
-                    timestamp = Timestamp(int(time.time()))
-                with self.data.db.user_write() as write_cursor:
-                    self.data.db.save_balances_data(
-                        write_cursor=write_cursor,
-                        data=result_dict,
-                        timestamp=timestamp,
-                    )
-                log.debug('query_balances data saved')
-            else:
-                log.debug(
-                    'query_balances data not saved',
-                    allowed_to_save=allowed_to_save,
-                    problem_free=problem_free,
-                    save_despite_errors=save_despite_errors,
-                )
+        return result_dict, problem_free
 
-        return result_dict
+    @staticmethod
+    def _query_balance_source(
+            name: str,
+            query: Callable[[], Any],
+            durations: dict[str, float],
+    ) -> Any:
+        """Runs the balance query of a source and adds the seconds it took to durations
+
+        May raise:
+        - RemoteError if the query takes longer than BALANCE_QUERY_TIMEOUT
+        - Any exception the query itself raises
+        """
+        start = time.monotonic()
+        timeout = gevent.Timeout(BALANCE_QUERY_TIMEOUT)
+        timeout.start()
+        try:
+            return query()
+        except gevent.Timeout as e:
+            if e is not timeout:
+                raise
+            raise RemoteError(f'Balance query took longer than {BALANCE_QUERY_TIMEOUT} seconds') from e  # noqa: E501
+        finally:
+            timeout.close()
+            durations[name] = round(time.monotonic() - start, 2)
 
     def set_settings(self, settings: ModifiableDBSettings) -> tuple[bool, str]:
         """Tries to set new settings. Returns True in success or False with message if error"""
@@ -1110,3 +1191,8 @@ class Rotkehlchen():
                 to_asset=to_asset,
                 purge_old=purge_old,
             )
+            GlobalDBHandler().delete_historical_price_misses(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                oracle=oracle,
+            )
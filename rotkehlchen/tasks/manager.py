@@ -37,6 +37,7 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.history.price import PriceHistorian
 from rotkehlchen.history.types import HistoricalPriceOracle
+from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.premium.premium import Premium, premium_create_and_verify
 from rotkehlchen.premium.sync import PremiumSyncManager
@@ -159,6 +160,8 @@ class TaskManager():
             self._maybe_query_produced_blocks,
             self._maybe_query_withdrawals,
             self._maybe_run_events_processing,
+            self._maybe_save_rpc_nodes_stats,
+            self._maybe_update_current_prices_cache,
         ]
         if self.premium_sync_manager is not None:
             self.potential_tasks.append(self._maybe_schedule_db_upload)
@@ -298,10 +301,13 @@ class TaskManager():
         return greenlets
 
     def _maybe_query_evm_transactions(self) -> Optional[list[gevent.Greenlet]]:
-        """Schedules the evm transaction query task if enough time has passed"""
-        shuffled_chains = list(EVM_CHAINS_WITH_TRANSACTIONS)
-        random.shuffle(shuffled_chains)
-        for blockchain in shuffled_chains:
+        """Schedules the evm transaction query tasks if enough time has passed
+
+        Since these tasks are heavy only one address per chain is queried. The chains
+        use different etherscan instances so they are queried at the same time.
+        """
+        greenlets = []
+        for blockchain in EVM_CHAINS_WITH_TRANSACTIONS:
             with self.database.conn.read_ctx() as cursor:
                 accounts = self.database.get_blockchain_accounts(cursor).get(blockchain)
                 if len(accounts) == 0:
@@ -323,8 +329,7 @@ class TaskManager():
             task_name = f'Query {blockchain!s} transactions for {address}'
             log.debug(f'Scheduling task to {task_name}')
             self.last_evm_tx_query_ts[(address, blockchain)] = now
-            # Since this task is heavy we spawn it only for one chain at a time.
-            return [self.greenlet_manager.spawn_and_track(
+            greenlets.append(self.greenlet_manager.spawn_and_track(
                 after_seconds=None,
                 task_name=task_name,
                 exception_is_error=True,
@@ -332,8 +337,9 @@ class TaskManager():
                 address=address,
                 start_ts=0,
                 end_ts=now,
-            )]
-        return None
+            ))
+
+        return greenlets if len(greenlets) != 0 else None
 
     def _maybe_schedule_evm_txreceipts(self) -> Optional[list[gevent.Greenlet]]:
         """Schedules the evm transaction receipts query task
@@ -702,6 +708,37 @@ class TaskManager():
 
         return None
 
+    def _maybe_save_rpc_nodes_stats(self) -> Optional[list[gevent.Greenlet]]:
+        """Schedules saving the latency and error rate measured for the rpc nodes of the
+        chains whose stats were not saved for NODE_STATS_SAVE_INTERVAL seconds"""
+        greenlets = []
+        for blockchain in EVM_CHAINS_WITH_TRANSACTIONS:
+            node_inquirer = self.chains_aggregator.get_chain_manager(blockchain).node_inquirer
+            if node_inquirer.node_scheduler.should_save() is False:
+                continue
+
+            greenlets.append(self.greenlet_manager.spawn_and_track(
+                after_seconds=None,
+                task_name=f'Save {blockchain.name.lower()} rpc nodes stats',
+                exception_is_error=True,
+                method=node_inquirer.save_nodes_stats,
+            ))
+
+        return greenlets if len(greenlets) != 0 else None
+
+    def _maybe_update_current_prices_cache(self) -> Optional[list[gevent.Greenlet]]:
+        """Schedules refreshing the stale cached current prices and saving the cached
+        prices in the global DB"""
+        if Inquirer().should_update_current_prices_cache() is False:
+            return None
+
+        return [self.greenlet_manager.spawn_and_track(
+            after_seconds=None,
+            task_name='Update current prices cache',
+            exception_is_error=True,
+            method=Inquirer().update_current_prices_cache,
+        )]
+
     def _schedule(self) -> None:
         """Schedules background tasks"""
         self.greenlet_manager.clear_finished()
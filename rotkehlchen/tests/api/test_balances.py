@@ -9,13 +9,19 @@ import pytest
 import requests
 from flaky import flaky
 
-from rotkehlchen.accounting.structures.balance import BalanceType
+from rotkehlchen.accounting.structures.balance import Balance, BalanceType
 from rotkehlchen.balances.manual import ManuallyTrackedBalance
 from rotkehlchen.chain.bitcoin import get_bitcoin_addresses_balances
-from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_EUR
-from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_EUR, A_USD
+from rotkehlchen.constants.misc import ONE, ZERO
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.fval import FVal
+from rotkehlchen.inquirer import (
+    CURRENT_PRICE_CACHE_SECS,
+    CachedPriceEntry,
+    CurrentPriceOracle,
+    Inquirer,
+)
 from rotkehlchen.tests.utils.api import (
     ASYNC_TASK_WAIT_TIMEOUT,
     api_url_for,
@@ -61,8 +67,9 @@ def assert_all_balances(
 
     got_external = any(x.location == Location.EXTERNAL for x in setup.manually_tracked_balances)
 
-    assert len(result) == 4
+    assert len(result) == 5
     assert result['liabilities'] == {}
+    assert {'binance:binance', 'poloniex:poloniex', 'blockchain'} <= result['durations'].keys()
     assets = result['assets']
     assert FVal(assets['ETH']['amount']) == total_eth
     assert assets['ETH']['usd_value'] is not None
@@ -523,6 +530,7 @@ def test_balance_snapshot_error_message(
         )
 
     result = assert_proper_response_with_result(response)
+    assert result.pop('durations').keys() == {'binance:binance', 'blockchain'}
     assert result == {'assets': {}, 'liabilities': {}, 'location': {}, 'net_usd': '0'}
     websocket_connection.wait_until_messages_num(num=2, timeout=10)
     assert websocket_connection.messages_num() == 2
@@ -546,6 +554,113 @@ def test_balance_snapshot_error_message(
     assert websocket_connection.messages_num() == 0
 
 
+@pytest.mark.parametrize('number_of_eth_accounts', [0])
+@pytest.mark.parametrize('added_exchanges', [(Location.BINANCE, Location.POLONIEX)])
+@pytest.mark.parametrize('legacy_messages_via_websockets', [True])
+def test_balance_snapshot_source_timeout(
+        rotkehlchen_api_server_with_exchanges,
+        websocket_connection,
+):
+    """Test that balance sources are queried at the same time and that a source that takes
+    too long is reported as an error without failing the query of the others"""
+    rotki = rotkehlchen_api_server_with_exchanges.rest_api.rotkehlchen
+    binance = try_get_first_exchange(rotki.exchange_manager, Location.BINANCE)
+    poloniex = try_get_first_exchange(rotki.exchange_manager, Location.POLONIEX)
+
+    def mock_binance_balances(ignore_cache):  # pylint: disable=unused-argument
+        gevent.sleep(5)
+        return {}, ''
+
+    def mock_poloniex_balances(ignore_cache):  # pylint: disable=unused-argument
+        gevent.sleep(0.5)
+        return {A_BTC: Balance(amount=ONE, usd_value=ONE)}, ''
+
+    with ExitStack() as stack:
+        stack.enter_context(patch('rotkehlchen.rotkehlchen.BALANCE_QUERY_TIMEOUT', new=1))
+        stack.enter_context(patch.object(binance, 'query_balances', side_effect=mock_binance_balances))  # noqa: E501
+        stack.enter_context(patch.object(poloniex, 'query_balances', side_effect=mock_poloniex_balances))  # noqa: E501
+        response = requests.get(
+            api_url_for(
+                rotkehlchen_api_server_with_exchanges,
+                'allbalancesresource',
+            ),
+        )
+
+    result = assert_proper_response_with_result(response)
+    assert result['assets']['BTC']['amount'] == '1'
+    assert result['location'].keys() == {'poloniex'}
+    assert 1 <= result['durations']['binance:binance'] < 2
+    assert 0.5 <= result['durations']['poloniex:poloniex'] < 1
+    websocket_connection.wait_until_messages_num(num=1, timeout=10)
+    assert websocket_connection.pop_message() == {
+        'type': 'balance_snapshot_error',
+        'data': {
+            'location': 'binance',
+            'error': 'Balance query took longer than 1 seconds',
+        },
+    }
+
+
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+@pytest.mark.parametrize('number_of_eth_accounts', [0])
+@pytest.mark.parametrize('manually_tracked_balances', [[ManuallyTrackedBalance(
+    id=-1,
+    asset=A_BTC,
+    label='BTC wallet',
+    amount=FVal(2),
+    location=Location.EXTERNAL,
+    tags=None,
+    balance_type=BalanceType.ASSET,
+)]])
+def test_balance_snapshot_no_stale_prices(rotkehlchen_api_server):
+    """Test that a saved balance snapshot does not record current prices served stale
+    from the cache while a balances query that is not saved can use them"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    inquirer = Inquirer()
+    inquirer.set_oracles_order(oracles=[CurrentPriceOracle.COINGECKO])
+
+    def add_stale_btc_price():
+        inquirer._cached_current_price[(A_BTC, A_USD)] = CachedPriceEntry(
+            price=Price(FVal(20000)),
+            time=Timestamp(ts_now() - CURRENT_PRICE_CACHE_SECS - 1),
+            oracle=CurrentPriceOracle.COINGECKO,
+            used_main_currency=False,
+        )
+
+    add_stale_btc_price()
+    coingecko_patch = patch.object(
+        inquirer._coingecko,
+        'query_current_price',
+        return_value=(Price(FVal(30000)), False),
+    )
+    with coingecko_patch as coingecko:
+        response = requests.get(
+            api_url_for(rotkehlchen_api_server, 'allbalancesresource'),
+            json={'save_data': True},
+        )
+        result = assert_proper_response_with_result(response)
+        assert coingecko.call_count == 1
+        assert result['assets']['BTC']['usd_value'] == '60000'
+        with rotki.data.db.conn.read_ctx() as cursor:
+            btc_balances = rotki.data.db.query_timed_balances(
+                cursor=cursor,
+                asset=A_BTC,
+                balance_type=BalanceType.ASSET,
+            )
+        assert len(btc_balances) == 1
+        assert btc_balances[0].usd_value == FVal(60000)
+
+        # a query that is not saved is served the stale price until it gets refreshed
+        add_stale_btc_price()
+        response = requests.get(
+            api_url_for(rotkehlchen_api_server, 'allbalancesresource'),
+            json={'save_data': False},
+        )
+        result = assert_proper_response_with_result(response)
+        assert coingecko.call_count == 1
+        assert result['assets']['BTC']['usd_value'] == '40000'
+
+
 @pytest.mark.parametrize('number_of_eth_accounts', [2])
 @pytest.mark.parametrize('btc_accounts', [[UNIT_BTC_ADDRESS1, UNIT_BTC_ADDRESS2]])
 @pytest.mark.parametrize('separate_blockchain_calls', [True, False])
@@ -216,17 +216,16 @@ def assert_force_redecode_txns_works(api_server: 'APIServer', hashes: Optional[l
         'get_evm_transactions',
         wraps=rotki.chains_aggregator.ethereum.transactions_decoder.dbevmtx.get_evm_transactions,  # noqa: E501
     )
-    get_or_decode_txn_events_patch = patch.object(
+    decode_txn_events_patch = patch.object(
         rotki.chains_aggregator.ethereum.transactions_decoder,
-        '_get_or_decode_transaction_events',
-        wraps=rotki.chains_aggregator.ethereum.transactions_decoder._get_or_decode_transaction_events,  # noqa: E501
+        '_decode_transaction_events',
+        wraps=rotki.chains_aggregator.ethereum.transactions_decoder._decode_transaction_events,
     )
     get_or_query_txn_receipt_patch = patch('rotkehlchen.chain.ethereum.transactions.EthereumTransactions.get_or_query_transaction_receipt')  # noqa: 501
     with ExitStack() as stack:
-        function_call_counters = []
-        function_call_counters.append(stack.enter_context(get_or_decode_txn_events_patch))
-        function_call_counters.append(stack.enter_context(get_eth_txns_patch))
-        function_call_counters.append(stack.enter_context(get_or_query_txn_receipt_patch))
+        decode_txn_events_mock = stack.enter_context(decode_txn_events_patch)
+        get_eth_txns_mock = stack.enter_context(get_eth_txns_patch)
+        get_or_query_txn_receipt_mock = stack.enter_context(get_or_query_txn_receipt_patch)
 
         response = requests.put(
             api_url_for(
@@ -242,13 +241,10 @@ def assert_force_redecode_txns_works(api_server: 'APIServer', hashes: Optional[l
             },
         )
         assert_proper_response(response)
-        if hashes is None:
-            for fn in function_call_counters:
-                assert fn.call_count == 14
-        else:
-            txn_hashes_len = len(hashes)
-            for fn in function_call_counters:
-                assert fn.call_count == txn_hashes_len
+        # all transactions are decoded again. They are loaded from the DB in a single batch
+        # and only those missing a receipt are queried one by one
+        assert decode_txn_events_mock.call_count == (14 if hashes is None else len(hashes))
+        assert get_eth_txns_mock.call_count == 1 + get_or_query_txn_receipt_mock.call_count
 
 
 def _write_transactions_to_db(
@@ -6,8 +6,9 @@ import pytest
 import requests
 
 from rotkehlchen.constants import ZERO
-from rotkehlchen.constants.assets import A_CRV, A_USD
+from rotkehlchen.constants.assets import A_BTC, A_CRV, A_USD
 from rotkehlchen.fval import FVal
+from rotkehlchen.history.types import HistoricalPriceOracle
 from rotkehlchen.tests.utils.api import (
     api_url_for,
     assert_error_response,
@@ -16,6 +17,7 @@ from rotkehlchen.tests.utils.api import (
     assert_simple_ok_response,
     wait_for_async_task_with_result,
 )
+from rotkehlchen.types import Timestamp
 
 
 @pytest.mark.parametrize('mocked_price_queries', [{
@@ -334,3 +336,64 @@ def test_manual_historical_price(rotkehlchen_api_server, globaldb):
         status_code=HTTPStatus.CONFLICT,
         result_exists=True,
     )
+
+
+def test_historical_price_misses(rotkehlchen_api_server, globaldb):
+    """Test that historical price misses can be queried, configured and purged via the API"""
+    for oracle, timestamp in (
+            (HistoricalPriceOracle.COINGECKO, 1611166335),
+            (HistoricalPriceOracle.CRYPTOCOMPARE, 1611166335),
+            (HistoricalPriceOracle.COINGECKO, 1611176335),
+    ):
+        globaldb.add_historical_price_misses(
+            from_asset=A_CRV,
+            to_asset=A_USD,
+            timestamp=Timestamp(timestamp),
+            oracles=[oracle],
+        )
+    globaldb.add_historical_price_misses(
+        from_asset=A_BTC,
+        to_asset=A_USD,
+        timestamp=Timestamp(1611166335),
+        oracles=[HistoricalPriceOracle.DEFILLAMA],
+    )
+
+    response = requests.get(
+        api_url_for(rotkehlchen_api_server, 'historicalpricemissesresource'),
+        json={'from_asset': A_CRV.identifier},
+    )
+    result = assert_proper_response_with_result(response)
+    assert result['ttl'] == 604800
+    assert [(x['timestamp'], x['oracle'], x['expired']) for x in result['entries']] == [
+        (1611165600, 'coingecko', False),
+        (1611165600, 'cryptocompare', False),
+        (1611172800, 'coingecko', False),
+    ]
+
+    # setting a TTL of 0 makes everything expired
+    response = requests.patch(
+        api_url_for(rotkehlchen_api_server, 'historicalpricemissesresource'),
+        json={'ttl': 0},
+    )
+    assert_simple_ok_response(response)
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'historicalpricemissesresource'))  # noqa: E501
+    result = assert_proper_response_with_result(response)
+    assert result['ttl'] == 0
+    assert len(result['entries']) == 4
+    assert all(x['expired'] is True for x in result['entries'])
+
+    response = requests.patch(
+        api_url_for(rotkehlchen_api_server, 'historicalpricemissesresource'),
+        json={'ttl': -1},
+    )
+    assert_error_response(response=response, status_code=HTTPStatus.BAD_REQUEST)
+
+    # purge by oracle and then everything
+    response = requests.delete(
+        api_url_for(rotkehlchen_api_server, 'historicalpricemissesresource'),
+        json={'from_asset': A_CRV.identifier, 'oracle': 'coingecko'},
+    )
+    assert assert_proper_response_with_result(response) == 2
+    response = requests.delete(api_url_for(rotkehlchen_api_server, 'historicalpricemissesresource'))  # noqa: E501
+    assert assert_proper_response_with_result(response) == 2
+    assert globaldb.get_all_historical_price_misses() == []
@@ -75,11 +75,13 @@ def test_query_history(rotkehlchen_api_server_with_exchanges, start_ts, end_ts):
     assert report_result['entries_found'] == 1
     assert report_result['entries_limit'] == FREE_REPORTS_LOOKUP_LIMIT
     report = report_result['entries'][0]
-    assert len(report) == 11  # 11 entries in the report api endpoint
+    assert len(report) == 13  # 13 entries in the report api endpoint
     assert report['first_processed_timestamp'] == 1428994442
     assert report['last_processed_timestamp'] == end_ts if end_ts == 1539713238 else 1566572401
     assert report['identifier'] == report_id
     assert report['size_on_disk'] > 0
+    assert report['events_flushes'] >= 1
+    assert report['events_flush_seconds'] >= 0
 
     overview = report['overview']
     if start_ts == 0:
@@ -121,22 +123,31 @@ def test_query_history(rotkehlchen_api_server_with_exchanges, start_ts, end_ts):
     # And now make sure that warnings have also been generated for the query of
     # the unsupported/unknown assets
     rotki = rotkehlchen_api_server_with_exchanges.rest_api.rotkehlchen
+    # The exchanges are queried concurrently so only the messages of each exchange
+    # are in order
     warnings = rotki.msg_aggregator.consume_warnings()
     assert len(warnings) == 8
-    assert 'poloniex trade with unknown asset NOEXISTINGASSET' in warnings[0]
-    assert 'poloniex trade with unsupported asset BALLS' in warnings[1]
-    assert 'withdrawal of unknown poloniex asset IDONTEXIST' in warnings[2]
-    assert 'withdrawal of unsupported poloniex asset DIS' in warnings[3]
-    assert 'deposit of unknown poloniex asset IDONTEXIST' in warnings[4]
-    assert 'deposit of unsupported poloniex asset EBT' in warnings[5]
-    assert 'bittrex trade with unsupported asset PTON' in warnings[6]
-    assert 'bittrex trade with unknown asset IDONTEXIST' in warnings[7]
+    poloniex_warnings = [x for x in warnings if 'poloniex' in x]
+    assert len(poloniex_warnings) == 6
+    assert 'poloniex trade with unknown asset NOEXISTINGASSET' in poloniex_warnings[0]
+    assert 'poloniex trade with unsupported asset BALLS' in poloniex_warnings[1]
+    assert 'withdrawal of unknown poloniex asset IDONTEXIST' in poloniex_warnings[2]
+    assert 'withdrawal of unsupported poloniex asset DIS' in poloniex_warnings[3]
+    assert 'deposit of unknown poloniex asset IDONTEXIST' in poloniex_warnings[4]
+    assert 'deposit of unsupported poloniex asset EBT' in poloniex_warnings[5]
+    bittrex_warnings = [x for x in warnings if 'bittrex' in x]
+    assert len(bittrex_warnings) == 2
+    assert 'bittrex trade with unsupported asset PTON' in bittrex_warnings[0]
+    assert 'bittrex trade with unknown asset IDONTEXIST' in bittrex_warnings[1]
 
     errors = rotki.msg_aggregator.consume_errors()
     assert len(errors) == 3
-    assert 'bittrex trade with unprocessable pair %$#%$#%#$%' in errors[0]
-    assert 'Failed to read ledger event from kraken' in errors[1]
-    assert 'Failed to read ledger event from kraken ' in errors[2]
+    bittrex_errors = [x for x in errors if 'bittrex' in x]
+    assert len(bittrex_errors) == 1
+    assert 'bittrex trade with unprocessable pair %$#%$#%#$%' in bittrex_errors[0]
+    kraken_errors = [x for x in errors if 'kraken' in x]
+    assert len(kraken_errors) == 2
+    assert all('Failed to read ledger event from kraken' in x for x in kraken_errors)
 
     response = requests.get(
         api_url_for(
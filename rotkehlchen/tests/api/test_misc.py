@@ -383,6 +383,44 @@ def test_manage_nodes(rotkehlchen_api_server):
         assert_proper_response(response)
 
 
+def test_query_nodes_stats(rotkehlchen_api_server):
+    """Test that the latency and error rate measured for the rpc nodes can be queried"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    node_inquirer = rotki.chains_aggregator.ethereum.node_inquirer
+    node = node_inquirer.etherscan_node.node_info
+    node_inquirer.node_scheduler.get(node).record_success('_get_code', 0.5)
+    node_inquirer.node_scheduler.get(node).record_error('_get_code', 1.5)
+
+    response = requests.get(
+        api_url_for(rotkehlchen_api_server, 'rpcnodesstatsresource', blockchain='ETH'),
+    )
+    result = assert_proper_response_with_result(response)
+    assert len(result) == len(rotki.data.db.get_rpc_nodes(blockchain=SupportedBlockchain.ETHEREUM))  # noqa: E501
+    etherscan_stats = next(x for x in result if x['name'] == ETHEREUM_ETHERSCAN_NODE_NAME)
+    assert etherscan_stats == {
+        'identifier': 1,
+        'name': ETHEREUM_ETHERSCAN_NODE_NAME,
+        'endpoint': '',
+        'owned': False,
+        'connected': True,
+        'latency': 600,
+        'error_rate': 10.0,
+        'queries': 2,
+        'errors': 1,
+        'cancelled': 0,
+    }
+    assert all(x['latency'] is None for x in result if x['name'] != ETHEREUM_ETHERSCAN_NODE_NAME)  # noqa: E501
+
+    response = requests.get(
+        api_url_for(rotkehlchen_api_server, 'rpcnodesstatsresource', blockchain='KSM'),
+    )
+    assert_error_response(
+        response=response,
+        contained_in_msg='is not allowed in this endpoint',
+        status_code=HTTPStatus.BAD_REQUEST,
+    )
+
+
 @pytest.mark.parametrize('max_size_in_mb_all_logs', [659])
 def test_configuration(rotkehlchen_api_server):
     """Test that the configuration endpoint returns the expected information"""
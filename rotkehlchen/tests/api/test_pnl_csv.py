@@ -9,6 +9,7 @@ from pathlib import Path
 from unittest.mock import patch
 
 import _bootlocale
+import gevent
 import pytest
 import requests
 
@@ -20,7 +21,13 @@ from rotkehlchen.accounting.structures.types import HistoryEventSubType, History
 from rotkehlchen.chain.evm.constants import GENESIS_HASH
 from rotkehlchen.constants.assets import A_ETH
 from rotkehlchen.fval import FVal
-from rotkehlchen.tests.utils.api import api_url_for, assert_error_response, assert_proper_response
+from rotkehlchen.tests.utils.api import (
+    ASYNC_TASK_WAIT_TIMEOUT,
+    api_url_for,
+    assert_error_response,
+    assert_ok_async_response,
+    assert_proper_response,
+)
 from rotkehlchen.tests.utils.constants import ETH_ADDRESS1, ETH_ADDRESS2, ETH_ADDRESS3
 from rotkehlchen.tests.utils.history import prepare_rotki_for_history_processing_test, prices
 from rotkehlchen.tests.utils.pnl_report import query_api_create_and_get_report
@@ -116,6 +123,26 @@ def test_history_export_download_csv(
         directory_path=csv_dir2,
     ))
     assert_csv_export_response(response, csv_dir2)
+    # now query it asynchronously and check that the timing of the export jobs is shown
+    csv_dir3 = str(tmpdir_factory.mktemp('test_csv_dir3'))
+    response = requests.get(
+        api_url_for(rotkehlchen_api_server_with_exchanges, 'historyexportingresource'),
+        json={'directory_path': csv_dir3, 'async_query': True},
+    )
+    task_id = assert_ok_async_response(response)
+    with gevent.Timeout(ASYNC_TASK_WAIT_TIMEOUT):
+        while (task_result := requests.get(api_url_for(
+            rotkehlchen_api_server_with_exchanges,
+            'specific_async_tasks_resource',
+            task_id=task_id,
+        )).json()['result'])['status'] == 'pending':
+            gevent.sleep(0.5)
+    assert task_result['outcome']['result'] is True
+    assert {x['task_name'] for x in task_result['process_jobs']} == {
+        'PnL report CSV rows',
+        'PnL report CSV write',
+    }
+    assert_csv_export_response(response, csv_dir3, is_download=True)
     # query it again and make sure that csv is recreated and events are not duplicated
 
     query_api_create_and_get_report(
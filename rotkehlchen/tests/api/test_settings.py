@@ -234,6 +234,30 @@ def test_disable_taxfree_after_period(rotkehlchen_api_server):
     )
 
 
+def test_set_fixed_point_cost_basis(rotkehlchen_api_server):
+    """Test that the fixed point cost basis setting can be turned on and off"""
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'settingsresource'))
+    assert assert_proper_response_with_result(response)['fixed_point_cost_basis'] is False
+
+    for value in (True, False):
+        response = requests.put(
+            api_url_for(rotkehlchen_api_server, 'settingsresource'),
+            json={'settings': {'fixed_point_cost_basis': value}},
+        )
+        assert assert_proper_response_with_result(response)['fixed_point_cost_basis'] is value
+        response = requests.get(api_url_for(rotkehlchen_api_server, 'settingsresource'))
+        assert assert_proper_response_with_result(response)['fixed_point_cost_basis'] is value
+
+    # other settings can be modified without giving it
+    response = requests.put(
+        api_url_for(rotkehlchen_api_server, 'settingsresource'),
+        json={'settings': {'ui_floating_precision': 4}},
+    )
+    result = assert_proper_response_with_result(response)
+    assert result['ui_floating_precision'] == 4
+    assert result['fixed_point_cost_basis'] is False
+
+
 def test_set_unknown_settings(rotkehlchen_api_server):
     """Test that setting an unknown setting results in an error
 
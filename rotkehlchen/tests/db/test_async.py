@@ -8,18 +8,18 @@ from rotkehlchen.constants.assets import A_ETH
 from rotkehlchen.db.filtering import LedgerActionsFilterQuery
 from rotkehlchen.db.ledger_actions import DBLedgerActions
 from rotkehlchen.fval import FVal
-from rotkehlchen.types import Location
+from rotkehlchen.types import AssetAmount, Location, Price, Timestamp
 
 
-def make_ledger_action():
+def make_ledger_action() -> LedgerAction:
     return LedgerAction(
         identifier=1,
-        timestamp=randint(1, 16433333),
+        timestamp=Timestamp(randint(1, 16433333)),
         asset=A_ETH,
         action_type=LedgerActionType.INCOME,
         location=Location.BLOCKCHAIN,
-        amount=FVal(randint(1, 1642323)),
-        rate=FVal(uniform(0.00001, 5)),
+        amount=AssetAmount(FVal(randint(1, 1642323))),
+        rate=Price(FVal(uniform(0.00001, 5))),
         link='dasd',
         notes='asdsad',
     )
@@ -32,12 +32,14 @@ from rotkehlchen.db.settings import (
     DEFAULT_DATE_DISPLAY_FORMAT,
     DEFAULT_DISPLAY_DATE_IN_LOCALTIME,
     DEFAULT_ETH_STAKING_TAXABLE_AFTER_WITHDRAWAL_ENABLED,
+    DEFAULT_FIXED_POINT_COST_BASIS,
     DEFAULT_HISTORICAL_PRICE_ORACLES,
     DEFAULT_INCLUDE_CRYPTO2CRYPTO,
     DEFAULT_INCLUDE_FEES_IN_COST_BASIS,
     DEFAULT_INCLUDE_GAS_COSTS,
     DEFAULT_LAST_DATA_MIGRATION,
     DEFAULT_MAIN_CURRENCY,
+    DEFAULT_PNL_CHECKPOINTS_INTERVAL,
     DEFAULT_PNL_CSV_HAVE_SUMMARY,
     DEFAULT_PNL_CSV_WITH_FORMULAS,
     DEFAULT_SSF_GRAPH_MULTIPLIER,
@@ -384,6 +386,8 @@ def test_writing_fetching_data(data_dir, username, sql_vm_instructions_cb):
         'eth_staking_taxable_after_withdrawal_enabled': DEFAULT_ETH_STAKING_TAXABLE_AFTER_WITHDRAWAL_ENABLED,  # noqa: E501
         'address_name_priority': DEFAULT_ADDRESS_NAME_PRIORITY,
         'include_fees_in_cost_basis': DEFAULT_INCLUDE_FEES_IN_COST_BASIS,
+        'pnl_checkpoints_interval': DEFAULT_PNL_CHECKPOINTS_INTERVAL,
+        'fixed_point_cost_basis': DEFAULT_FIXED_POINT_COST_BASIS,
     }
     assert len(expected_dict) == len(DBSettings()), 'One or more settings are missing'
 
@@ -1500,6 +1500,64 @@ def test_upgrade_db_36_to_37(user_data_dir):  # pylint: disable=unused-argument
     ).fetchone()[0] == '42'
 
 
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_upgrade_db_37_to_38(user_data_dir):  # pylint: disable=unused-argument
+    """Test upgrading the DB from version 37 to version 38"""
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v36_rotkehlchen.db')
+    db_v37 = _init_db_with_target_version(
+        target_version=37,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db_v37.conn.cursor()
+    index_query = 'SELECT name FROM sqlite_master WHERE type="index" AND name LIKE "idx_%"'
+    assert cursor.execute(index_query).fetchall() == []
+    history_events_num = cursor.execute('SELECT COUNT(*) FROM history_events').fetchone()[0]
+    rpc_nodes = cursor.execute('SELECT * FROM rpc_nodes').fetchall()
+    db_v37.logout()
+
+    # Execute upgrade
+    db = _init_db_with_target_version(
+        target_version=38,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db.conn.cursor()
+    assert {x[0] for x in cursor.execute(index_query)} == {
+        'idx_trades_timestamp',
+        'idx_trades_location_timestamp',
+        'idx_trades_base_asset_timestamp',
+        'idx_trades_quote_asset_timestamp',
+        'idx_asset_movements_timestamp',
+        'idx_asset_movements_location_timestamp',
+        'idx_asset_movements_asset_timestamp',
+        'idx_ledger_actions_timestamp',
+        'idx_ledger_actions_location_timestamp',
+        'idx_ledger_actions_asset_timestamp',
+        'idx_history_events_timestamp',
+        'idx_history_events_location_timestamp',
+        'idx_history_events_asset_timestamp',
+        'idx_evm_events_info_tx_hash',
+        'idx_evm_events_info_counterparty',
+        'idx_eth_staking_events_info_validator_index',
+        'idx_evm_transactions_timestamp',
+        'idx_evmtx_address_mappings_tx_hash',
+        'idx_timed_balances_currency_timestamp',
+        'idx_eth2_daily_staking_details_timestamp',
+    }
+    assert cursor.execute('SELECT COUNT(*) FROM history_events').fetchone()[0] == history_events_num  # noqa: E501
+    # the rpc nodes got the latency and error rate columns
+    assert cursor.execute('SELECT * FROM rpc_nodes').fetchall() == [(*x, None, 0) for x in rpc_nodes]  # noqa: E501
+    assert table_exists(cursor, 'exchange_trade_cursors') is True
+    # the indexes of the upgrade are the same as the ones of a new DB
+    index_sql_query = 'SELECT name, sql FROM sqlite_master WHERE type="index" AND name LIKE "idx_%"'  # noqa: E501
+    upgraded_indexes = set(cursor.execute(index_sql_query))
+    cursor.execute('DROP INDEX idx_trades_timestamp')
+    db.conn.executescript(DB_SCRIPT_CREATE_TABLES)
+    assert set(cursor.execute(index_sql_query)) == upgraded_indexes
+
+
 def test_latest_upgrade_adds_remove_tables(user_data_dir):
     """
     This is a test that we can only do for the last upgrade.
@@ -1,26 +1,50 @@
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Optional
+from unittest.mock import patch
+
+import pytest
+
 from rotkehlchen.chain.accounts import BlockchainAccountData
+from rotkehlchen.chain.evm.structures import EvmTxReceipt, EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import EvmAccount
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.evmtx import DBEvmTx
 from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
 from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.tests.utils.constants import (
     ETH_ADDRESS1,
     ETH_ADDRESS2,
     ETH_ADDRESS3,
     MOCK_INPUT_DATA,
 )
-from rotkehlchen.tests.utils.factories import make_evm_address
+from rotkehlchen.tests.utils.factories import (
+    make_ethereum_transaction,
+    make_evm_address,
+    make_evm_tx_hash,
+    make_random_bytes,
+)
 from rotkehlchen.types import (
     ChainID,
     EvmInternalTransaction,
     EvmTransaction,
+    EVMTxHash,
     SupportedBlockchain,
     Timestamp,
     deserialize_evm_tx_hash,
 )
 from rotkehlchen.user_messages import MessagesAggregator
 
+if TYPE_CHECKING:
+    from rotkehlchen.chain.ethereum.decoding.decoder import EthereumTransactionDecoder
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
 
 def test_add_get_evm_transactions(data_dir, username, sql_vm_instructions_cb):
     """Test that adding and retrieving evm transactions from the DB works fine.
@@ -314,3 +338,147 @@ def test_query_also_internal_evm_transactions(data_dir, username, sql_vm_instruc
             has_premium=True,
         )
         assert result == [tx1, tx3, tx4]
+
+
+@pytest.mark.parametrize('use_custom_database', ['ethtxs.db'])
+def test_get_receipts(database: 'DBHandler'):
+    """Test that the receipts loaded in bulk contain all the logs and topics of the DB in
+    the right order and that missing receipts or other chains are skipped"""
+    dbevmtx = DBEvmTx(database)
+    with database.conn.read_ctx() as cursor:
+        tx_hashes = [EVMTxHash(x[0]) for x in cursor.execute('SELECT tx_hash FROM evmtx_receipts WHERE chain_id=1')]  # noqa: E501
+        assert len(tx_hashes) != 0
+        missing_hash = make_evm_tx_hash()
+        receipts = dbevmtx.get_receipts(
+            cursor=cursor,
+            tx_hashes=[*tx_hashes, missing_hash],
+            chain_id=ChainID.ETHEREUM,
+        )
+        assert set(receipts) == set(tx_hashes)
+        for tx_hash, receipt in receipts.items():
+            assert receipt.tx_hash == tx_hash
+            assert receipt.chain_id == ChainID.ETHEREUM
+            assert [x.log_index for x in receipt.logs] == sorted(x.log_index for x in receipt.logs)  # noqa: E501
+            for receipt_log in receipt.logs:
+                assert receipt_log.topics == [x[0] for x in cursor.execute(
+                    'SELECT topic FROM evmtx_receipt_log_topics WHERE tx_hash=? AND '
+                    'chain_id=1 AND log_index=? ORDER BY topic_index',
+                    (tx_hash, receipt_log.log_index),
+                )]
+
+        assert cursor.execute('SELECT COUNT(*) FROM evmtx_receipt_logs WHERE chain_id=1').fetchone()[0] == sum(len(x.logs) for x in receipts.values())  # noqa: E501
+        assert dbevmtx.get_receipt(cursor, tx_hashes[0], ChainID.ETHEREUM) == receipts[tx_hashes[0]]  # noqa: E501
+        assert dbevmtx.get_receipt(cursor, missing_hash, ChainID.ETHEREUM) is None
+        assert dbevmtx.get_receipts(cursor, tx_hashes, ChainID.OPTIMISM) == {}
+
+
+def _get_receipt_per_log(
+        cursor: 'DBCursor',
+        tx_hash: EVMTxHash,
+) -> Optional[EvmTxReceipt]:
+    """How receipts were read before the bulk loading. One query for the receipt, one for
+    its logs and one for the topics of each log"""
+    result = cursor.execute(
+        'SELECT contract_address, status, type from evmtx_receipts WHERE tx_hash=? AND chain_id=1',  # noqa: E501
+        (tx_hash,),
+    ).fetchone()
+    if result is None:
+        return None
+
+    tx_receipt = EvmTxReceipt(
+        tx_hash=tx_hash,
+        chain_id=ChainID.ETHEREUM,
+        contract_address=result[0],
+        status=bool(result[1]),
+        type=result[2],
+    )
+    for log_result in cursor.execute(
+        'SELECT log_index, data, address, removed from evmtx_receipt_logs WHERE tx_hash=? AND chain_id=1',  # noqa: E501
+        (tx_hash,),
+    ).fetchall():
+        tx_receipt_log = EvmTxReceiptLog(
+            log_index=log_result[0],
+            data=log_result[1],
+            address=log_result[2],
+            removed=bool(log_result[3]),
+        )
+        tx_receipt_log.topics = [x[0] for x in cursor.execute(
+            'SELECT topic from evmtx_receipt_log_topics WHERE tx_hash=? AND log_index=? AND '
+            'chain_id=1 ORDER BY topic_index ASC',
+            (tx_hash, log_result[0]),
+        )]
+        tx_receipt.logs.append(tx_receipt_log)
+
+    return tx_receipt
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+def test_decode_stored_transactions_benchmark(
+        database: 'DBHandler',
+        ethereum_transaction_decoder: 'EthereumTransactionDecoder',
+):
+    """Measure loading 10k stored transactions with their receipts for decoding, as the
+    decoder used to do it one transaction and one log at a time and as it does now in
+    batches. The decoding of the events themselves is the same for both and is skipped."""
+    dbevmtx, tx_hashes = DBEvmTx(database), []
+    with database.user_write() as write_cursor:
+        for _ in range(10000):
+            transaction = make_ethereum_transaction(tx_hash=make_evm_tx_hash())
+            dbevmtx.add_evm_transactions(write_cursor, [transaction], relevant_address=None)
+            dbevmtx.add_receipt_data(write_cursor=write_cursor, chain_id=ChainID.ETHEREUM, data={
+                'transactionHash': transaction.tx_hash.hex(),
+                'contractAddress': None,
+                'logs': [{
+                    'logIndex': log_index,
+                    'data': '0x' + '00' * 32,
+                    'address': transaction.to_address,
+                    'removed': False,
+                    'topics': ['0x' + make_random_bytes(32).hex() for _ in range(3)],
+                } for log_index in range(4)],
+            })
+            tx_hashes.append(transaction.tx_hash)
+
+    start = time.perf_counter()
+    old_receipts = []
+    for tx_hash in tx_hashes:
+        with database.conn.read_ctx() as cursor:
+            old_receipts.append(_get_receipt_per_log(cursor, tx_hash))
+            dbevmtx.get_evm_transactions(
+                cursor=cursor,
+                filter_=EvmTransactionsFilterQuery.make(tx_hash=tx_hash, chain_id=ChainID.ETHEREUM),  # noqa: E501
+                has_premium=True,
+            )
+    per_transaction_seconds = time.perf_counter() - start
+
+    decoded: list[tuple[EvmTransaction, EvmTxReceipt]] = []
+
+    def mock_decode_transaction_events(
+            transaction: EvmTransaction,
+            tx_receipt: EvmTxReceipt,
+            internal_txs: Optional[list[EvmInternalTransaction]] = None,
+    ) -> tuple[list, bool]:
+        """Only keep what the decoder was given to decode"""
+        decoded.append((transaction, tx_receipt))
+        return [], False
+
+    patched_decode = patch.object(
+        ethereum_transaction_decoder,
+        '_decode_transaction_events',
+        side_effect=mock_decode_transaction_events,
+    )
+    patched_write = patch.object(ethereum_transaction_decoder, '_write_decoded_events')
+    with patched_decode, patched_write:
+        start = time.perf_counter()
+        ethereum_transaction_decoder.decode_transaction_hashes(ignore_cache=False, tx_hashes=tx_hashes)  # noqa: E501
+        batched_seconds = time.perf_counter() - start
+
+    log.info(
+        f'Loading 10000 transactions for decoding: per transaction {per_transaction_seconds:.2f}s, '  # noqa: E501
+        f'batched {batched_seconds:.2f}s',
+    )
+    assert [x[0].tx_hash for x in decoded] == tx_hashes
+    assert [x[1] for x in decoded] == old_receipts
+    assert batched_seconds < per_transaction_seconds, f'per transaction {per_transaction_seconds:.2f}s, batched {batched_seconds:.2f}s'  # noqa: E501
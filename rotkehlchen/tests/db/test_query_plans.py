@@ -0,0 +1,234 @@
+"""Regression tests for the query plans of the filter queries on the user DB
+
+Each case builds a common filter query shape with the *FilterQuery.make classes and
+checks with EXPLAIN QUERY PLAN that sqlite uses an index for it instead of scanning
+the whole table. If one of these tests fails after a schema or filtering change the
+change most probably made that filter slow for users with a big history.
+"""
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from rotkehlchen.accounting.structures.evm_event import EvmProduct
+from rotkehlchen.chain.evm.types import EvmAccount
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_EUR
+from rotkehlchen.db.filtering import (
+    ALL_EVENTS_DATA_JOIN,
+    AssetMovementsFilterQuery,
+    DBAfterEntryFilter,
+    DBFilterQuery,
+    Eth2DailyStatsFilterQuery,
+    EthStakingEventFilterQuery,
+    EvmEventFilterQuery,
+    EvmTransactionsFilterQuery,
+    HistoryEventFilterQuery,
+    LedgerActionsFilterQuery,
+    TradesFilterQuery,
+)
+from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash
+from rotkehlchen.types import ChainID, Location, Timestamp
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+    from rotkehlchen.db.drivers.gevent import DBCursor
+
+FROM_TS, TO_TS = Timestamp(1600000000), Timestamp(1700000000)
+
+
+def _query_plan(cursor: 'DBCursor', query: str, bindings: list[Any]) -> list[str]:
+    """Returns the details column of the query plan rows"""
+    return [row[-1] for row in cursor.execute(f'EXPLAIN QUERY PLAN {query}', bindings)]
+
+
+def _assert_searches(
+        cursor: 'DBCursor',
+        base_query: str,
+        filter_query: DBFilterQuery,
+        tables: tuple[str, ...],
+) -> None:
+    """Checks that the filtered query, both as it is used to get the entries and to count
+    them, accesses the given tables only via index searches"""
+    for with_pagination in (True, False):
+        query, bindings = filter_query.prepare(with_pagination=with_pagination)
+        plan = _query_plan(cursor, base_query + query, bindings)
+        for table in tables:
+            assert not any(x.startswith(f'SCAN {table}') for x in plan), (
+                f'Query {base_query + query} scans {table}. Plan: {plan}'
+            )
+            assert any(x.startswith(f'SEARCH {table}') for x in plan), (
+                f'Query {base_query + query} does not search {table}. Plan: {plan}'
+            )
+
+
+@pytest.mark.parametrize('filter_query', [
+    TradesFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS),
+    TradesFilterQuery.make(location=Location.KRAKEN),
+    TradesFilterQuery.make(location=Location.KRAKEN, from_ts=FROM_TS, to_ts=TO_TS),
+    TradesFilterQuery.make(base_assets=(A_ETH,), from_ts=FROM_TS),
+    TradesFilterQuery.make(quote_assets=(A_EUR,)),
+    TradesFilterQuery.make(base_assets=(A_ETH, A_BTC), limit=10, offset=10),
+])
+def test_trades_query_plans(database: 'DBHandler', filter_query: TradesFilterQuery):
+    with database.conn.read_ctx() as cursor:
+        _assert_searches(cursor, 'SELECT * from trades ', filter_query, ('trades',))
+        _assert_searches(cursor, 'SELECT COUNT(*) from trades ', filter_query, ('trades',))
+
+
+@pytest.mark.parametrize('filter_query', [
+    AssetMovementsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS),
+    AssetMovementsFilterQuery.make(location=Location.KRAKEN, to_ts=TO_TS),
+    AssetMovementsFilterQuery.make(assets=(A_ETH,), from_ts=FROM_TS, to_ts=TO_TS),
+    AssetMovementsFilterQuery.make(assets=(A_ETH, A_BTC)),
+])
+def test_asset_movements_query_plans(
+        database: 'DBHandler',
+        filter_query: AssetMovementsFilterQuery,
+):
+    with database.conn.read_ctx() as cursor:
+        for base_query in ('SELECT * from asset_movements ', 'SELECT COUNT(*) from asset_movements '):  # noqa: E501
+            _assert_searches(cursor, base_query, filter_query, ('asset_movements',))
+
+
+@pytest.mark.parametrize('filter_query', [
+    LedgerActionsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS),
+    LedgerActionsFilterQuery.make(location=Location.EXTERNAL, from_ts=FROM_TS),
+    LedgerActionsFilterQuery.make(assets=(A_ETH,)),
+])
+def test_ledger_actions_query_plans(
+        database: 'DBHandler',
+        filter_query: LedgerActionsFilterQuery,
+):
+    with database.conn.read_ctx() as cursor:
+        for base_query in ('SELECT * from ledger_actions ', 'SELECT COUNT(*) from ledger_actions '):  # noqa: E501
+            _assert_searches(cursor, base_query, filter_query, ('ledger_actions',))
+
+
+@pytest.mark.parametrize('filter_query', [
+    EvmTransactionsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS),
+    EvmTransactionsFilterQuery.make(tx_hash=make_evm_tx_hash(), chain_id=ChainID.ETHEREUM),
+    EvmTransactionsFilterQuery.make(
+        accounts=[EvmAccount(address=make_evm_address(), chain_id=ChainID.ETHEREUM)],
+        from_ts=FROM_TS,
+    ),
+])
+def test_evm_transactions_query_plans(
+        database: 'DBHandler',
+        filter_query: EvmTransactionsFilterQuery,
+):
+    with database.conn.read_ctx() as cursor:
+        _assert_searches(
+            cursor=cursor,
+            base_query='SELECT DISTINCT evm_transactions.tx_hash FROM evm_transactions ',
+            filter_query=filter_query,
+            tables=('evm_transactions',),
+        )
+
+
+@pytest.mark.parametrize(('filter_query', 'tables'), [
+    (HistoryEventFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), ('history_events',)),
+    (HistoryEventFilterQuery.make(location=Location.KRAKEN), ('history_events',)),
+    (HistoryEventFilterQuery.make(location=Location.ETHEREUM, from_ts=FROM_TS, to_ts=TO_TS), ('history_events',)),  # noqa: E501
+    (HistoryEventFilterQuery.make(assets=(A_ETH,), from_ts=FROM_TS), ('history_events',)),
+    (HistoryEventFilterQuery.make(event_identifiers=['foo', 'bar']), ('history_events',)),
+    (EvmEventFilterQuery.make(tx_hashes=[make_evm_tx_hash()]), ('history_events', 'evm_events_info')),  # noqa: E501
+    (EvmEventFilterQuery.make(counterparties=['uniswap-v2', 'gas']), ('history_events', 'evm_events_info')),  # noqa: E501
+    (EvmEventFilterQuery.make(products=[EvmProduct.POOL], from_ts=FROM_TS, to_ts=TO_TS), ('history_events',)),  # noqa: E501
+    (EthStakingEventFilterQuery.make(validator_indices=[1, 2]), ('history_events', 'eth_staking_events_info')),  # noqa: E501
+])
+def test_history_events_query_plans(
+        database: 'DBHandler',
+        filter_query: HistoryEventFilterQuery,
+        tables: tuple[str, ...],
+):
+    with database.conn.read_ctx() as cursor:
+        for base_query in (f'SELECT * {ALL_EVENTS_DATA_JOIN}', filter_query.get_count_query()):
+            _assert_searches(cursor, base_query, filter_query, tables)
+
+
+def test_eth2_daily_stats_query_plans(database: 'DBHandler'):
+    filter_query = Eth2DailyStatsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS)
+    with database.conn.read_ctx() as cursor:
+        _assert_searches(
+            cursor=cursor,
+            base_query='SELECT * from eth2_daily_staking_details ',
+            filter_query=filter_query,
+            tables=('eth2_daily_staking_details',),
+        )
+        filter_query = Eth2DailyStatsFilterQuery.make(validators=[1, 2], from_ts=FROM_TS)
+        _assert_searches(
+            cursor=cursor,
+            base_query='SELECT * from eth2_daily_staking_details ',
+            filter_query=filter_query,
+            tables=('eth2_daily_staking_details',),
+        )
+
+
+@pytest.mark.parametrize('filter_query', [
+    TradesFilterQuery.make(),
+    AssetMovementsFilterQuery.make(),
+    LedgerActionsFilterQuery.make(),
+    EvmTransactionsFilterQuery.make(),
+    HistoryEventFilterQuery.make(),
+])
+def test_unfiltered_queries_do_not_sort(database: 'DBHandler', filter_query: DBFilterQuery):
+    """Unfiltered queries read everything anyway but the default ordering should come
+    from an index instead of sorting the whole table in a temporary b-tree"""
+    table = {
+        TradesFilterQuery: 'trades',
+        AssetMovementsFilterQuery: 'asset_movements',
+        LedgerActionsFilterQuery: 'ledger_actions',
+        EvmTransactionsFilterQuery: 'evm_transactions',
+        HistoryEventFilterQuery: 'history_events',
+    }[type(filter_query)]
+    query, bindings = filter_query.prepare()
+    with database.conn.read_ctx() as cursor:
+        plan = _query_plan(cursor, f'SELECT * FROM {table} {query}', bindings)
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in plan, plan
+
+
+def test_timed_balances_query_plan(database: 'DBHandler'):
+    """The balance history of a single asset is queried by currency and a time range"""
+    with database.conn.read_ctx() as cursor:
+        plan = _query_plan(
+            cursor=cursor,
+            query=(
+                'SELECT timestamp, amount, usd_value, category FROM timed_balances '
+                'WHERE timestamp BETWEEN ? AND ? AND currency=? AND category=? '
+                'ORDER BY timestamp ASC'
+            ),
+            bindings=[FROM_TS, TO_TS, A_ETH.identifier, 'A'],
+        )
+    assert plan[0].startswith('SEARCH timed_balances USING INDEX idx_timed_balances_currency_timestamp'), plan  # noqa: E501
+
+
+def test_history_stream_chunk_query_plans(database: 'DBHandler'):
+    """The PnL report reads the history in chunks that continue after the last entry
+    of the previous chunk. That continuation filter should also use the indexes"""
+    trades_filter = TradesFilterQuery.make(
+        to_ts=TO_TS,
+        order_by_rules=[('timestamp', True), ('id', True)],
+        limit=1000,
+        offset=0,
+    )
+    trades_filter.filters.append(DBAfterEntryFilter(
+        and_op=True,
+        timestamp=FROM_TS,
+        identifier='foo',
+        identifier_field='id',
+    ))
+    events_filter = HistoryEventFilterQuery.make(
+        from_ts=Timestamp(0),
+        to_ts=TO_TS,
+        order_by_rules=[('timestamp', True), ('history_events.identifier', True)],
+        limit=1000,
+        offset=0,
+    )
+    events_filter.filters.append(DBAfterEntryFilter(
+        and_op=True,
+        timestamp=FROM_TS * 1000,
+        identifier=1,
+        identifier_field='history_events.identifier',
+    ))
+    with database.conn.read_ctx() as cursor:
+        _assert_searches(cursor, 'SELECT * from trades ', trades_filter, ('trades',))
+        _assert_searches(cursor, f'SELECT * {ALL_EVENTS_DATA_JOIN}', events_filter, ('history_events',))  # noqa: E501
@@ -0,0 +1,221 @@
+import logging
+import os
+import statistics
+import time
+from pathlib import Path
+
+import gevent
+import pytest
+
+from rotkehlchen.db.drivers.gevent import ContextError, DBConnection, DBConnectionType
+from rotkehlchen.db.filtering import LedgerActionsFilterQuery
+from rotkehlchen.db.ledger_actions import DBLedgerActions
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.tests.db.test_async import make_ledger_action, write_actions
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+
+def _make_pooled_connection(path: Path, pool_size: int = 2) -> DBConnection:
+    conn = DBConnection(
+        path=path,
+        connection_type=DBConnectionType.GLOBAL,
+        sql_vm_instructions_cb=100,
+    )
+    conn.execute('CREATE TABLE a(b INTEGER PRIMARY KEY)')
+    conn.start_read_pool(size=pool_size)
+    return conn
+
+
+def test_reads_see_last_committed_state(tmp_path):
+    """Test that while a write transaction is open reads from other greenlets don't see
+    its uncommitted changes and don't wait for it, but reads from its greenlet do"""
+    def read_values(conn: DBConnection) -> list[tuple[int]]:
+        with conn.read_ctx() as cursor:
+            return cursor.execute('SELECT b FROM a').fetchall()
+
+    conn = _make_pooled_connection(tmp_path / 'test.db')
+    with conn.write_ctx() as write_cursor:
+        write_cursor.execute('INSERT INTO a VALUES (1)')
+
+    with conn.write_ctx() as write_cursor:
+        write_cursor.execute('INSERT INTO a VALUES (2)')
+        assert read_values(conn) == [(1,), (2,)]
+        assert gevent.spawn(read_values, conn).get(timeout=1) == [(1,)]
+
+    assert gevent.spawn(read_values, conn).get(timeout=1) == [(1,), (2,)]
+    with conn.savepoint_ctx() as savepoint_cursor:
+        savepoint_cursor.execute('INSERT INTO a VALUES (3)')
+        assert read_values(conn) == [(1,), (2,), (3,)]
+        assert gevent.spawn(read_values, conn).get(timeout=1) == [(1,), (2,)]
+
+    conn.close()
+
+
+def test_read_connections_are_reused(tmp_path):
+    """Test that nested read contexts of a greenlet share a read connection, that read
+    connections go back to the pool and that the writer is used when the pool is empty"""
+    conn = _make_pooled_connection(tmp_path / 'test.db', pool_size=1)
+    with conn.read_ctx() as cursor1, conn.read_ctx() as cursor2:
+        assert cursor1._cursor.connection is cursor2._cursor.connection
+        assert cursor1._cursor.connection is not conn._conn
+        assert conn.readers_num == 1
+
+        def other_read() -> bool:
+            with conn.read_ctx() as cursor:
+                return cursor._cursor.connection is conn._conn
+
+        assert gevent.spawn(other_read).get(timeout=1) is True, 'pool is empty. Should use the writer'  # noqa: E501
+
+    assert len(conn.lent_readers) == 0
+    assert len(conn.idle_readers) == 1
+    with pytest.raises(Exception, match='readonly'), conn.read_ctx() as cursor:
+        cursor.execute('INSERT INTO a VALUES (1)')
+
+    conn.close()
+    assert conn.readers_num == 0
+
+
+def test_wal_checkpoint_and_close(tmp_path):
+    """Test that the WAL file is emptied by a checkpoint and removed on close so that
+    the DB file can be copied"""
+    path = tmp_path / 'test.db'
+    wal_path = tmp_path / 'test.db-wal'
+    conn = _make_pooled_connection(path)
+    with conn.read_ctx() as cursor:
+        assert cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    with conn.write_ctx() as write_cursor:
+        write_cursor.executemany('INSERT INTO a VALUES (?)', [(x,) for x in range(100)])
+        with pytest.raises(ContextError):
+            conn.wal_checkpoint()
+
+    assert wal_path.stat().st_size != 0
+    conn.wal_checkpoint()
+    assert wal_path.stat().st_size == 0
+    conn.close()
+    assert not wal_path.exists()
+    conn = DBConnection(path=path, connection_type=DBConnectionType.GLOBAL, sql_vm_instructions_cb=0)  # noqa: E501
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    assert len(conn.execute('SELECT * FROM a').fetchall()) == 100
+    conn.close()
+
+
+def test_waiting_for_savepoint_wakes_up_immediately(tmp_path):
+    """Test that a write transaction waiting for a savepoint of another greenlet starts as
+    soon as the savepoint is released instead of polling for it"""
+    def write(conn: DBConnection) -> float:
+        with conn.write_ctx() as write_cursor:
+            write_cursor.execute('INSERT INTO a VALUES (2)')
+        return time.monotonic()
+
+    conn = _make_pooled_connection(tmp_path / 'test.db')
+    with conn.savepoint_ctx() as savepoint_cursor:
+        savepoint_cursor.execute('INSERT INTO a VALUES (1)')
+        greenlet = gevent.spawn(write, conn)
+        gevent.sleep(0.1)
+        assert greenlet.dead is False, 'write should wait for the savepoint'
+
+    released_at = time.monotonic()
+    assert greenlet.get(timeout=1) - released_at < 0.1
+    conn.close()
+
+
+def test_user_db_uses_read_pool(database, user_data_dir):
+    """Test that the user DB uses WAL and read connections while logged in and that the DB
+    file is self-contained again after logout"""
+    with database.conn.read_ctx() as cursor:
+        assert cursor._cursor.connection is not database.conn._conn
+        assert cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert database.get_settings(cursor) is not None
+
+    backup_path = database.create_db_backup()
+    assert backup_path.exists()
+    database.logout()
+    assert not (user_data_dir / 'rotkehlchen.db-wal').exists()
+
+
+def test_change_password_restarts_read_pool(database):
+    """Test that after a password change the read connections, both the ones opened
+    before it and the ones opened after, can read the re-keyed user DB"""
+    def read_settings() -> bool:
+        with database.conn.read_ctx() as cursor:
+            assert cursor._cursor.connection is not database.conn._conn
+            return database.get_settings(cursor) is not None
+
+    with database.conn.read_ctx() as cursor:  # opens a read connection with the old key
+        assert database.get_settings(cursor) is not None
+
+    assert database.change_password(new_password='new_password') is True
+    with database.conn.read_ctx() as cursor:
+        assert cursor._cursor.connection is not database.conn._conn
+        assert database.get_settings(cursor) is not None
+        # read from another greenlet while this one holds a read connection
+        assert gevent.spawn(read_settings).get(timeout=5) is True
+
+    assert read_settings() is True
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+@pytest.mark.parametrize('sql_vm_instructions_cb', [100])
+def test_read_latency_during_decoding_benchmark(database, function_scope_messages_aggregator):
+    """Measure the latency of API reads and writes while a long decoding-like task keeps
+    writing history in savepoints, with and without the read connection pool.
+
+    Before the read pool and the event based waits the API write had to poll for the
+    savepoints in steps of one second and reads shared the writer connection.
+    """
+    write_actions(database, 500)
+    dbla = DBLedgerActions(database, function_scope_messages_aggregator)
+
+    def heavy_decoding(rounds: int) -> None:
+        for _ in range(rounds):
+            with database.conn.savepoint_ctx() as cursor:
+                for _ in range(20):  # decode a batch of transactions, yielding in between
+                    cursor.execute(
+                        'INSERT INTO ledger_actions(timestamp, type, location, amount, asset, '
+                        'rate, rate_asset, link, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        make_ledger_action().serialize_for_db(),
+                    )
+                    gevent.sleep(0.005)
+
+    def api_requests(num: int) -> tuple[list[float], list[float]]:
+        read_latencies, write_latencies = [], []
+        for _ in range(num):
+            start = time.monotonic()
+            with database.conn.read_ctx() as cursor:
+                dbla.get_ledger_actions(cursor, LedgerActionsFilterQuery.make(limit=10), has_premium=True)  # noqa: E501
+            read_latencies.append(time.monotonic() - start)
+            start = time.monotonic()
+            with database.user_write() as write_cursor:
+                write_cursor.execute(
+                    'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
+                    ('last_data_upload_ts', '1'),
+                )
+            write_latencies.append(time.monotonic() - start)
+            gevent.sleep(0.01)
+        return read_latencies, write_latencies
+
+    results = {}
+    for pool_size in (4, 0):
+        if pool_size == 0:
+            database.conn._close_read_pool()
+        decoding = gevent.spawn(heavy_decoding, rounds=5)
+        gevent.sleep(0.01)  # let decoding start
+        read_latencies, write_latencies = gevent.spawn(api_requests, num=10).get()
+        decoding.get()
+        results[pool_size] = (statistics.median(read_latencies), max(write_latencies))
+        log.info(
+            f'read pool size {pool_size}: median read latency '
+            f'{results[pool_size][0] * 1000:.1f}ms, max write latency '
+            f'{results[pool_size][1] * 1000:.1f}ms',
+        )
+
+    for pool_size, (median_read_latency, max_write_latency) in results.items():
+        # reads never wait for the decoding and writes only wait for the current savepoint
+        assert median_read_latency < 0.05, f'pool size {pool_size}: {median_read_latency:.3f}s'
+        assert max_write_latency < 0.5, f'pool size {pool_size}: {max_write_latency:.3f}s'
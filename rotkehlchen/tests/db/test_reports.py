@@ -1,7 +1,13 @@
-from rotkehlchen.accounting.pnl import PnlTotals
-from rotkehlchen.db.reports import DBAccountingReports
+from rotkehlchen.accounting.mixins.event import AccountingEventType
+from rotkehlchen.accounting.pnl import PNL, PnlTotals
+from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
+from rotkehlchen.constants.assets import A_ETH
+from rotkehlchen.constants.misc import ONE, ZERO
+from rotkehlchen.db.reports import DBAccountingReports, DBReportDataWriter
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.tests.utils.constants import A_GBP
+from rotkehlchen.types import Location, Price, Timestamp
+from rotkehlchen.utils.misc import timestamp_to_date
 
 
 def test_report_settings(database):
@@ -55,3 +61,68 @@ def test_report_settings(database):
         else:
             value = getattr(settings, setting_name)
         assert returned_settings[x] == value
+
+
+def test_report_data_writer(database):
+    """Test that processed events are buffered, written in chunks and that the writes are
+    timed. Also that events of a non existing report are skipped without losing the rest"""
+    dbreport = DBAccountingReports(database)
+    report_id = dbreport.add_report(
+        first_processed_timestamp=Timestamp(1),
+        start_ts=Timestamp(0),
+        end_ts=Timestamp(100),
+        settings=DBSettings(),
+    )
+    events = [ProcessedAccountingEvent(
+        type=AccountingEventType.TRADE,
+        notes=f'Event {idx}',
+        location=Location.EXTERNAL,
+        timestamp=Timestamp(idx),
+        asset=A_ETH,
+        free_amount=ZERO,
+        taxable_amount=ONE,
+        price=Price(ONE),
+        pnl=PNL(taxable=ONE),
+        cost_basis=None,
+        index=idx,
+    ) for idx in range(1, 8)]
+
+    writer = DBReportDataWriter(database=database, report_id=report_id, chunk_size=3)
+    for event in events:
+        writer.add(event=event, ts_converter=timestamp_to_date)
+    assert writer.flushes == 2
+    assert len(writer.buffer) == 1
+    writer.flush()
+    assert writer.flushes == 3
+    assert writer.flush_seconds > 0
+    assert len(writer.buffer) == 0
+    writer.flush()  # flushing an empty buffer does nothing
+    assert writer.flushes == 3
+
+    with database.conn_transient.read_ctx() as cursor:
+        assert cursor.execute(
+            'SELECT timestamp FROM pnl_events WHERE report_id=? ORDER BY timestamp',
+            (report_id,),
+        ).fetchall() == [(x.timestamp,) for x in events]
+
+    # the report does not exist so nothing is written but the writer keeps going
+    writer = DBReportDataWriter(database=database, report_id=report_id + 1, chunk_size=3)
+    for event in events:
+        writer.add(event=event, ts_converter=timestamp_to_date)
+    writer.flush()
+    assert writer.flushes == 3
+    with database.conn_transient.read_ctx() as cursor:
+        assert cursor.execute('SELECT COUNT(*) FROM pnl_events').fetchone()[0] == len(events)
+
+    dbreport.add_report_overview(
+        report_id=report_id,
+        last_processed_timestamp=Timestamp(7),
+        processed_actions=7,
+        total_actions=7,
+        pnls=PnlTotals(),
+        events_flushes=3,
+        events_flush_seconds=writer.flush_seconds,
+    )
+    report = dbreport.get_reports(report_id=report_id, with_limit=False)[0][0]
+    assert report['events_flushes'] == 3
+    assert report['events_flush_seconds'] == writer.flush_seconds
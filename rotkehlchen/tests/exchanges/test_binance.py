@@ -896,3 +896,71 @@ def test_binance_query_trade_history_custom_markets(function_scope_binance):
         binance.query_trade_history(start_ts=0, end_ts=1564301134, only_cache=False)
 
     assert count == len(markets)
+
+
+def test_binance_query_trade_history_resumes_from_cursor(function_scope_binance):
+    """Test that trades of a market are queried after the last queried trade of the market
+    when it is before the queried range and from the start otherwise"""
+    binance = function_scope_binance
+    binance.selected_pairs = ['BNBBTC', 'ETHBTC']
+    queried_ids = {}
+
+    def mock_my_trades(url, timeout):  # pylint: disable=unused-argument
+        if 'myTrades' in url:
+            symbol = re.search(r'symbol=([A-Z]*)', url).group(1)
+            queried_ids[symbol] = int(re.search(r'fromId=(\d*)', url).group(1))
+            text = BINANCE_MYTRADES_RESPONSE if symbol == 'BNBBTC' else '[]'
+        else:
+            text = '[]'
+        return MockResponse(200, text)
+
+    with patch.object(binance.session, 'get', side_effect=mock_my_trades):
+        binance.query_trade_history(start_ts=0, end_ts=1500000000, only_cache=False)
+        assert queried_ids == {'BNBBTC': 0, 'ETHBTC': 0}
+        with binance.db.conn.read_ctx() as cursor:
+            assert binance.db.get_exchange_trade_cursors(
+                cursor=cursor,
+                name=binance.name,
+                location=binance.location,
+            ) == {'BNBBTC': (28457, Timestamp(1499865549))}
+
+        binance.query_trade_history(start_ts=0, end_ts=1600000000, only_cache=False)
+        assert queried_ids == {'BNBBTC': 28458, 'ETHBTC': 0}
+
+        # a range that does not start after the cursor queries all the trades again
+        trades, _ = binance.query_online_trade_history(start_ts=1499865549, end_ts=1600000000)
+        assert queried_ids == {'BNBBTC': 0, 'ETHBTC': 0}
+        assert len(trades) == 1
+
+
+def test_api_query_waits_for_request_weight(function_scope_binance):
+    """Test that requests wait for the next minute once the request weight used as
+    returned by binance does not leave enough for them"""
+    binance = function_scope_binance
+    now_ms = ts_now_in_ms()
+    responses = [
+        MockResponse(200, '{}', headers={'x-mbx-used-weight-1m': '15'}),
+        MockResponse(200, '{}', headers={'x-mbx-used-weight-1m': str(binance.request_weight_limit - 5)}),  # noqa: E501
+        MockResponse(200, '{}'),
+    ]
+    sleeps = []
+
+    def mock_sleep(seconds):
+        sleeps.append(seconds)
+        mocked_now.return_value += 60000  # move to the next minute
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(binance.session, 'get', side_effect=responses))
+        mocked_now = stack.enter_context(patch('rotkehlchen.exchanges.binance.ts_now_in_ms', return_value=now_ms))  # noqa: E501
+        stack.enter_context(patch('rotkehlchen.exchanges.binance.gevent.sleep', side_effect=mock_sleep))  # noqa: E501
+        binance.api_query('api', 'time')
+        assert binance.used_weight == 15
+        binance.api_query('api', 'openOrders')
+        assert binance.used_weight == binance.request_weight_limit - 5
+        assert sleeps == []
+        binance.api_query('api', 'account')
+
+    assert len(sleeps) == 1
+    assert 0 < sleeps[0] <= 60
+    assert binance.used_weight == 0
+    assert binance.pending_weight == 0
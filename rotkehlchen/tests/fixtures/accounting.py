@@ -136,6 +136,7 @@ def fixture_accountant(
         evm_accounting_aggregators,
         start_with_valid_premium,
         rotki_premium_credentials,
+        greenlet_manager,
 ) -> Optional[Accountant]:
     if not start_with_logged_in_user:
         return None
@@ -149,6 +150,7 @@ def fixture_accountant(
         evm_accounting_aggregators=evm_accounting_aggregators,
         msg_aggregator=function_scope_messages_aggregator,
         premium=premium,
+        greenlet_manager=greenlet_manager,
     )
 
     if accounting_initialize_parameters:
@@ -236,7 +238,7 @@ def _create_inquirer(
         msg_aggregator=MessagesAggregator(),
     )
 
-    mocked_methods = ('find_price', 'find_usd_price', 'find_price_and_oracle', 'find_usd_price_and_oracle', '_query_fiat_pair')  # noqa: E501
+    mocked_methods = ('find_price', 'find_usd_price', 'find_usd_prices', 'find_price_and_oracle', 'find_usd_price_and_oracle', '_query_fiat_pair')  # noqa: E501
     for x in mocked_methods:  # restore Inquirer to original state if needed
         old = f'{x}_old'
         if (original_method := getattr(Inquirer, old, None)) is not None:
@@ -384,6 +386,11 @@ def _create_inquirer(
         inquirer.find_price_and_oracle = Inquirer.find_price_and_oracle = mock_prices_with_oracles  # type: ignore  # noqa: E501
         inquirer.find_usd_price_and_oracle = Inquirer.find_usd_price_and_oracle = mock_usd_prices_with_oracles  # type: ignore  # noqa: E501
 
+    def mock_find_usd_prices(assets, ignore_cache=False, skip_onchain=False):  # pylint: disable=unused-argument  # noqa: E501
+        return {asset: Inquirer.find_usd_price(asset=asset, ignore_cache=ignore_cache) for asset in assets}  # noqa: E501
+
+    inquirer.find_usd_prices = Inquirer.find_usd_prices = mock_find_usd_prices  # type: ignore
+
     def mock_query_fiat_pair(*args, **kwargs):  # pylint: disable=unused-argument
         return (ONE, CurrentPriceOracle.FIAT)
 
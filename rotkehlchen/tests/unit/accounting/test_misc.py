@@ -1,14 +1,40 @@
+import csv
+from datetime import timedelta
+from pathlib import Path
 from typing import TYPE_CHECKING
+from unittest.mock import patch
+
 import pytest
+from freezegun import freeze_time
 
+from rotkehlchen.accounting.export.csv import (
+    CSV_EXPORT_CHUNK_SIZE,
+    CSV_EXPORT_CHUNKS_IN_FLIGHT,
+    FILENAME_ALL_CSV,
+)
 from rotkehlchen.accounting.ledger_actions import LedgerAction, LedgerActionType
 from rotkehlchen.accounting.mixins.event import AccountingEventMixin, AccountingEventType
 from rotkehlchen.accounting.pnl import PNL, PnlTotals
+from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
 from rotkehlchen.constants import ONE, ZERO
-from rotkehlchen.constants.assets import A_ETH, A_ETH2, A_EUR, A_KFEE, A_USD, A_USDT
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_ETH2, A_EUR, A_KFEE, A_USD, A_USDT
+from rotkehlchen.constants.timing import WEEK_IN_SECONDS
+from rotkehlchen.db.reports import (
+    DBAccountingReports,
+    DBReportDataWriter,
+    get_accounting_settings_hash,
+)
+from rotkehlchen.db.settings import ModifiableDBSettings
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
-from rotkehlchen.tests.utils.accounting import accounting_history_process, check_pnls_and_csv
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
+from rotkehlchen.premium.premium import SubscriptionStatus
+from rotkehlchen.tests.utils.accounting import (
+    accounting_history_process,
+    check_pnls_and_csv,
+    history1,
+)
 from rotkehlchen.tests.utils.constants import A_GBP
 from rotkehlchen.tests.utils.history import prices
 from rotkehlchen.tests.utils.messages import no_message_errors
@@ -230,3 +256,169 @@ def test_main_currency_is_respected(
     assert len(warnings) == len(errors) == 0
     # Check that the price is correctly computed in GBP
     assert accountant.pots[0].processed_events[0].price == trade_rate * mocked_price_queries['USD']['GBP'][1609537953]  # noqa: E501
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+@pytest.mark.parametrize('start_with_valid_premium', [True])
+def test_report_resumes_from_checkpoint(accountant: 'Accountant') -> None:
+    """Test that a report resumes from a checkpoint saved by an earlier report with the
+    same results as processing the entire history, and that history changes before a
+    checkpoint invalidate it"""
+    accountant.premium.status = SubscriptionStatus.ACTIVE  # type: ignore[union-attr]
+    dbpnl = DBAccountingReports(accountant.db)
+    with accountant.db.conn.read_ctx() as cursor:
+        settings_hash = get_accounting_settings_hash(accountant.db.get_settings(cursor))
+    start_ts, end_ts = Timestamp(1475000000), Timestamp(1495751688)
+
+    with accountant.db.user_write() as write_cursor:
+        accountant.db.set_settings(write_cursor, ModifiableDBSettings(pnl_checkpoints_interval=0))  # noqa: E501
+    report, _ = accounting_history_process(accountant, start_ts, end_ts, history1)
+    assert report['total_actions'] == 4
+    expected_taxable, expected_free = accountant.pots[0].pnls.taxable, accountant.pots[0].pnls.free  # noqa: E501
+    assert dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts) is None
+
+    with accountant.db.user_write() as write_cursor:
+        accountant.db.set_settings(write_cursor, ModifiableDBSettings(pnl_checkpoints_interval=WEEK_IN_SECONDS))  # noqa: E501
+    accounting_history_process(accountant, Timestamp(1436979735), end_ts, history1)
+    # checkpoints are taken at the week boundaries before the 3rd and the 4th trade
+    checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)
+    assert checkpoint is not None and checkpoint[0] == 1474502400
+
+    report, _ = accounting_history_process(accountant, start_ts, end_ts, history1)
+    assert report['total_actions'] == 1, 'processing should resume before the last trade'
+    no_message_errors(accountant.msg_aggregator)
+    assert accountant.pots[0].pnls.taxable == expected_taxable
+    assert accountant.pots[0].pnls.free == expected_free
+
+    # adding a trade invalidates the checkpoints after it but not the ones before
+    with accountant.db.user_write() as write_cursor:
+        accountant.db.add_trades(write_cursor, [history1[2]])
+    checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)
+    assert checkpoint is not None and checkpoint[0] == 1473292800
+
+    # changing the ignored assets invalidates all of them
+    with accountant.db.user_write() as write_cursor:
+        accountant.db.add_to_ignored_assets(write_cursor, A_USDT)
+    assert dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts) is None
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+@pytest.mark.parametrize('start_with_valid_premium', [True])
+def test_price_changes_invalidate_checkpoints(accountant: 'Accountant') -> None:
+    """Test that changing the price history in the global DB invalidates the checkpoints
+    taken before the change that are after the changed price"""
+    accountant.premium.status = SubscriptionStatus.ACTIVE  # type: ignore[union-attr]
+    dbpnl = DBAccountingReports(accountant.db)
+    with accountant.db.user_write() as write_cursor:
+        accountant.db.set_settings(write_cursor, ModifiableDBSettings(pnl_checkpoints_interval=WEEK_IN_SECONDS))  # noqa: E501
+        settings_hash = get_accounting_settings_hash(accountant.db.get_settings(write_cursor))
+    end_ts = Timestamp(1495751688)
+    accounting_history_process(accountant, Timestamp(1436979735), end_ts, history1)
+    checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)
+    assert checkpoint is not None and checkpoint[0] == 1474502400
+
+    def add_price(timestamp: int) -> None:
+        assert GlobalDBHandler().add_single_historical_price(HistoricalPrice(
+            from_asset=A_ETH,
+            to_asset=A_EUR,
+            source=HistoricalPriceOracle.MANUAL,
+            timestamp=Timestamp(timestamp),
+            price=Price(FVal(10)),
+        )) is True
+
+    add_price(1480000000)  # after all the checkpoints
+    checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)
+    assert checkpoint is not None and checkpoint[0] == 1474502400
+
+    add_price(1474000000)  # between the two checkpoints
+    checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)
+    assert checkpoint is not None and checkpoint[0] == 1473292800
+
+    with freeze_time(timedelta(seconds=1)):  # checkpoints taken after a change are kept
+        accounting_history_process(accountant, Timestamp(1436979735), end_ts, history1)
+        checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)  # noqa: E501
+        assert checkpoint is not None and checkpoint[0] == 1474502400
+
+        # deleting the prices invalidates the checkpoints after the earliest deleted one
+        GlobalDBHandler().delete_historical_prices(from_asset=A_ETH, to_asset=A_EUR)
+        checkpoint = dbpnl.get_latest_checkpoint(settings_hash=settings_hash, up_to_ts=end_ts)  # noqa: E501
+        assert checkpoint is not None and checkpoint[0] == 1473292800
+
+
+def test_csv_export_streams_big_report(accountant: 'Accountant', tmp_path: Path) -> None:
+    """Test that exporting a report with more events than the ones that are turned to CSV
+    rows at the same time keeps the order of the events and sums up all of them"""
+    events_num = CSV_EXPORT_CHUNK_SIZE * CSV_EXPORT_CHUNKS_IN_FLIGHT + 2 * CSV_EXPORT_CHUNK_SIZE + 7  # noqa: E501
+    with accountant.db.conn.read_ctx() as cursor:
+        settings = accountant.db.get_settings(cursor)
+    report_id = DBAccountingReports(accountant.db).add_report(
+        first_processed_timestamp=Timestamp(0),
+        start_ts=Timestamp(0),
+        end_ts=Timestamp(events_num),
+        settings=settings,
+    )
+    csvexporter = accountant.csvexporter
+    csvexporter.settings = csvexporter.settings._replace(pnl_csv_with_formulas=False, pnl_csv_have_summary=True)  # noqa: E501
+    writer = DBReportDataWriter(database=accountant.db, report_id=report_id)
+    expected_pnls = PnlTotals()
+    for idx in range(events_num):
+        event = ProcessedAccountingEvent(
+            type=AccountingEventType.TRADE if idx % 2 == 0 else AccountingEventType.FEE,
+            notes=f'event {idx}',
+            location=Location.EXTERNAL,
+            timestamp=Timestamp(idx),
+            asset=A_ETH,
+            free_amount=ZERO,
+            taxable_amount=ONE,
+            price=Price(ONE),
+            pnl=PNL(taxable=FVal(idx), free=ONE),
+            cost_basis=None,
+            index=idx,
+        )
+        expected_pnls[event.type] += event.pnl
+        writer.add(event=event, ts_converter=csvexporter.timestamp_to_date)
+    writer.flush()
+
+    assert csvexporter.export_report(report_id=report_id, directory=tmp_path) == (True, '')
+    with open(tmp_path / FILENAME_ALL_CSV, newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+
+    assert [row['notes'] for row in rows[:events_num]] == [f'event {idx}' for idx in range(events_num)]  # noqa: E501
+    assert rows[events_num]['type'] == ''  # the summary starts right after the events
+    summary_totals = {
+        row['free_amount']: PNL(taxable=FVal(row['taxable_amount']), free=FVal(row['price']))
+        for row in rows[events_num:] if row['free_amount'].endswith(' total')
+    }
+    assert summary_totals == {
+        f'{AccountingEventType.TRADE!s} total': expected_pnls[AccountingEventType.TRADE],
+        f'{AccountingEventType.FEE!s} total': expected_pnls[AccountingEventType.FEE],
+    }
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_prices_prefetched_in_batches(accountant: 'Accountant') -> None:
+    """Test that the prices of the events are prefetched one batch of events at a time,
+    before the events of the batch get processed"""
+    patched_prefetch = patch.object(
+        GlobalDBHandler,
+        'prefetch_historical_prices',
+        wraps=GlobalDBHandler.prefetch_historical_prices,
+    )
+    with patch('rotkehlchen.accounting.accountant.EVENTS_READ_AHEAD', 2), patched_prefetch as prefetch:  # noqa: E501
+        report, _ = accounting_history_process(
+            accountant=accountant,
+            start_ts=Timestamp(1436979735),
+            end_ts=Timestamp(1495751688),
+            history_list=history1,
+        )
+
+    assert report['total_actions'] == 4
+    assert [set(x.kwargs['queries']) for x in prefetch.call_args_list] == [
+        {(A_BTC, A_EUR, Timestamp(1446979735)), (A_ETH, A_EUR, Timestamp(1446979735))},
+        {
+            (A_ETH, A_EUR, Timestamp(1473505138)),
+            (A_BTC, A_EUR, Timestamp(1473505138)),
+            (A_ETH, A_EUR, Timestamp(1475042230)),
+            (A_BTC, A_EUR, Timestamp(1475042230)),
+        },
+    ]
@@ -8,6 +8,7 @@ from rotkehlchen.globaldb.migrations.manager import (
     maybe_apply_globaldb_migrations,
 )
 from rotkehlchen.globaldb.migrations.migration1 import ilk_mapping
+from rotkehlchen.globaldb.migrations.migration2 import globaldb_data_migration_2
 from rotkehlchen.tests.utils.globaldb import patch_for_globaldb_migrations
 
 
@@ -40,3 +41,23 @@ def test_migration1(globaldb):
                 (f'MAKERDAO_VAULT_ILK{ilk}',),
             )
             assert json.loads(cursor.fetchone()[0]) == list(info)
+
+
+@pytest.mark.parametrize('globaldb_upgrades', [[]])
+@pytest.mark.parametrize('run_globaldb_migrations', [False])
+@pytest.mark.parametrize('custom_globaldb', ['v4_global_before_migration1.db'])
+def test_migration2(globaldb):
+    """Test that the 2nd globalDB data migration adds the price_history index"""
+    query = 'SELECT COUNT(*) FROM sqlite_master WHERE type="index" AND name="idx_price_history_pair_timestamp"'  # noqa: E501
+    with globaldb.conn.read_ctx() as cursor:
+        assert cursor.execute(query).fetchone()[0] == 0
+
+    globaldb_data_migration_2(globaldb.conn)
+    with globaldb.conn.read_ctx() as cursor:
+        assert cursor.execute(query).fetchone()[0] == 1
+        plan = cursor.execute(
+            'EXPLAIN QUERY PLAN SELECT price FROM price_history WHERE from_asset=? AND '
+            'to_asset=? AND timestamp BETWEEN ? AND ? ORDER BY timestamp DESC LIMIT 1',
+            ('ETH', 'EUR', 1, 2),
+        ).fetchall()
+        assert 'idx_price_history_pair_timestamp' in plan[0][-1]
@@ -1,5 +1,21 @@
+import os
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from rotkehlchen.constants import ONE
 from rotkehlchen.constants.assets import A_BAL, A_BTC, A_ETH, A_USD
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
 from rotkehlchen.fval import FVal
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.globaldb.migrations.migration2 import globaldb_data_migration_2
+from rotkehlchen.globaldb.price_history_cache import (
+    APPROXIMATE_ENTRY_BYTES,
+    PRICE_SERIES_MAX_BUDGET_FRACTION,
+    PriceHistoryCache,
+)
 from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.tests.utils.constants import A_EUR
 from rotkehlchen.types import Price, Timestamp
@@ -131,3 +147,314 @@ def test_get_historical_price(globaldb, historical_price_test_data):  # pylint:
         max_seconds_distance=3600,
     )
     assert price_entry is None
+
+
+def test_get_historical_price_source(globaldb, historical_price_test_data):  # pylint: disable=unused-argument  # noqa: E501
+    """Test that the closest price lookup respects the source filter"""
+    price_entry = globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=Timestamp(1511627623),
+        max_seconds_distance=3600,
+        source=HistoricalPriceOracle.COINGECKO,
+    )
+    assert price_entry.timestamp == 1511626622
+    assert price_entry.source == HistoricalPriceOracle.COINGECKO
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=Timestamp(1618481099),
+        max_seconds_distance=3600,
+        source=HistoricalPriceOracle.COINGECKO,
+    ).timestamp == 1618481101
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=Timestamp(1511627623),
+        max_seconds_distance=3600,
+        source=HistoricalPriceOracle.MANUAL,
+    ) is None
+
+
+def test_get_historical_prices(globaldb, historical_price_test_data):  # pylint: disable=unused-argument  # noqa: E501
+    """Test that the batched lookup returns the same entries as one by one lookups"""
+    queries = [
+        (A_ETH, A_EUR, Timestamp(1511627623)),
+        (A_ETH, A_EUR, Timestamp(1618481099)),
+        (A_BTC, A_EUR, Timestamp(1428994442)),
+        (A_BTC, A_EUR, Timestamp(1428994442 + 3601)),
+        (A_BAL, A_EUR, Timestamp(1618481099)),
+        (A_ETH, A_USD, Timestamp(1618481099)),
+    ]
+    expected = [
+        globaldb.get_historical_price(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            timestamp=timestamp,
+            max_seconds_distance=3600,
+        ) for from_asset, to_asset, timestamp in queries
+    ]
+    assert expected[0].timestamp == 1511626623
+    assert expected[1].timestamp == 1618481101
+    assert expected[2].timestamp == 1428994442
+    assert expected[3:] == [None, None, None]
+    assert globaldb.get_historical_prices(queries=queries, max_seconds_distance=3600) == expected  # noqa: E501
+
+    # check that the source filter is respected
+    result = globaldb.get_historical_prices(
+        queries=queries[:2],
+        max_seconds_distance=3600,
+        source=HistoricalPriceOracle.COINGECKO,
+    )
+    assert result[0].timestamp == 1511626622
+    assert result[0].source == HistoricalPriceOracle.COINGECKO
+    assert result[1].timestamp == 1618481101
+    assert globaldb.get_historical_prices(
+        queries=queries[:2],
+        max_seconds_distance=3600,
+        source=HistoricalPriceOracle.MANUAL,
+    ) == [None, None]
+
+
+def _insert_price_series(globaldb, rows_num: int) -> range:
+    """Insert a price every 10 minutes for ETH/EUR and return the timestamps"""
+    timestamps = range(1_500_000_000, 1_500_000_000 + rows_num * 600, 600)
+    with globaldb.conn.write_ctx() as write_cursor:
+        write_cursor.executemany(
+            'INSERT INTO price_history(from_asset, to_asset, source_type, timestamp, price) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ((A_ETH.identifier, A_EUR.identifier, 'B', ts, '1500.5') for ts in timestamps),
+        )
+    return timestamps
+
+
+def _scan_closest_timestamps(globaldb, query_timestamps, max_distance):
+    """The closest price lookup as it was done before the range probes, by a full pair scan"""
+    with globaldb.conn.read_ctx() as cursor:
+        return [cursor.execute(
+            'SELECT timestamp FROM price_history WHERE from_asset=? AND to_asset=? AND '
+            'ABS(timestamp - ?) <= ? ORDER BY ABS(timestamp - ?) ASC LIMIT 1',
+            (A_ETH.identifier, A_EUR.identifier, ts, max_distance, ts),
+        ).fetchone() for ts in query_timestamps]
+
+
+def test_historical_price_lookup_paths(globaldb):
+    """Test that the full pair scan, the index range probes and the cached series
+    lookup all find an entry at the same distance"""
+    max_distance = 3600
+    timestamps = _insert_price_series(globaldb, rows_num=10_000)
+    random.seed(42)
+    query_timestamps = [Timestamp(random.choice(timestamps) + random.randint(-300, 300)) for _ in range(200)]  # noqa: E501
+    # and some outside of the series
+    query_timestamps += [Timestamp(timestamps[0] - max_distance - 1), Timestamp(timestamps[-1] + max_distance)]  # noqa: E501
+
+    scan_results = _scan_closest_timestamps(globaldb, query_timestamps, max_distance)
+    probe_results = [globaldb._get_historical_price_from_db(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=ts,
+        max_seconds_distance=max_distance,
+    ) for ts in query_timestamps]
+    cached_results = [globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=ts,
+        max_seconds_distance=max_distance,
+    ) for ts in query_timestamps]
+    assert globaldb.price_history_cache.get(A_ETH.identifier, A_EUR.identifier) is not None
+
+    assert scan_results[-2] is None and probe_results[-2] is None
+    assert probe_results[-1].timestamp == timestamps[-1]
+    assert probe_results == cached_results
+    for scan_result, probe_result, query_ts in zip(scan_results, probe_results, query_timestamps):  # noqa: E501
+        if scan_result is None:
+            assert probe_result is None
+        else:
+            assert abs(scan_result[0] - query_ts) == abs(probe_result.timestamp - query_ts)
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+def test_historical_price_lookup_benchmark(globaldb):
+    """Benchmark the index range probes against the old full pair scan on a price_history
+    table with a million rows, too many for the pair to be cached in memory"""
+    globaldb_data_migration_2(globaldb.conn)  # the test globaldb is not migrated
+    rows_num, queries_num, max_distance = 1_000_000, 500, 3600
+    timestamps = _insert_price_series(globaldb, rows_num=rows_num)
+    random.seed(42)
+    query_timestamps = [Timestamp(random.choice(timestamps) + random.randint(-300, 300)) for _ in range(queries_num)]  # noqa: E501
+    start = time.perf_counter()
+    _scan_closest_timestamps(globaldb, query_timestamps, max_distance)
+    scan_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ts in query_timestamps:
+        globaldb.get_historical_price(
+            from_asset=A_ETH,
+            to_asset=A_EUR,
+            timestamp=ts,
+            max_seconds_distance=max_distance,
+        )
+    probe_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    globaldb.get_historical_prices(
+        queries=[(A_ETH, A_EUR, ts) for ts in query_timestamps],
+        max_seconds_distance=max_distance,
+    )
+    batch_duration = time.perf_counter() - start
+
+    assert globaldb.price_history_cache.is_oversized(A_ETH.identifier, A_EUR.identifier)
+    durations_msg = (
+        f'{queries_num} lookups on {rows_num} rows. Full scan: {scan_duration:.3f}s '
+        f'range probes: {probe_duration:.3f}s batched: {batch_duration:.3f}s'
+    )
+    assert probe_duration < scan_duration, durations_msg
+    assert batch_duration < scan_duration, durations_msg
+
+
+def test_prefetch_historical_prices(globaldb):
+    """Test that the prices of pairs too big to cache are prefetched in batches, that
+    lookups of prefetched prices find what the DB lookups find and that the prefetched
+    prices of a pair are dropped when its prices change"""
+    timestamps = _insert_price_series(globaldb, rows_num=1000)
+    query_timestamps = [
+        Timestamp(timestamps[0] - DAY_IN_SECONDS - 1),
+        Timestamp(timestamps[0] - 3000),
+        Timestamp(timestamps[10] + 299),
+        Timestamp(timestamps[-1] + 3600),
+    ]
+    lookups = [
+        {'timestamp': ts, 'max_seconds_distance': distance, 'source': source}
+        for ts in query_timestamps
+        for distance in (3600, DAY_IN_SECONDS)
+        for source in (HistoricalPriceOracle.COINGECKO, HistoricalPriceOracle.MANUAL)
+    ]
+    expected = [globaldb._get_historical_price_from_db(from_asset=A_ETH, to_asset=A_EUR, **x) for x in lookups]  # noqa: E501
+    assert sum(x is not None for x in expected) == 6
+
+    cache = PriceHistoryCache(max_bytes=100 * APPROXIMATE_ENTRY_BYTES * PRICE_SERIES_MAX_BUDGET_FRACTION)  # noqa: E501
+    with patch.object(globaldb, 'price_history_cache', cache):
+        globaldb.prefetch_historical_prices(
+            queries=[(A_ETH, A_EUR, ts) for ts in query_timestamps],
+            sources=[HistoricalPriceOracle.COINGECKO, HistoricalPriceOracle.MANUAL],
+        )
+        assert cache.is_oversized(A_ETH.identifier, A_EUR.identifier) is True
+        with patch.object(
+            GlobalDBHandler,
+            '_get_historical_price_from_db',
+            wraps=GlobalDBHandler._get_historical_price_from_db,
+        ) as price_from_db:
+            assert [globaldb.get_historical_price(from_asset=A_ETH, to_asset=A_EUR, **x) for x in lookups] == expected  # noqa: E501
+            assert price_from_db.call_count == 0
+            globaldb.get_historical_price(
+                from_asset=A_ETH,
+                to_asset=A_EUR,
+                timestamp=Timestamp(timestamps[5]),
+                max_seconds_distance=3600,
+                source=HistoricalPriceOracle.COINGECKO,
+            )
+            assert price_from_db.call_count == 1, 'not prefetched timestamps go to the DB'
+
+        globaldb.add_single_historical_price(HistoricalPrice(
+            from_asset=A_ETH,
+            to_asset=A_EUR,
+            source=HistoricalPriceOracle.MANUAL,
+            timestamp=Timestamp(timestamps[10] + 300),
+            price=Price(FVal(1)),
+        ))
+        assert cache.prefetched == {}
+        assert globaldb.get_historical_price(
+            from_asset=A_ETH,
+            to_asset=A_EUR,
+            timestamp=Timestamp(timestamps[10] + 299),
+            max_seconds_distance=3600,
+            source=HistoricalPriceOracle.MANUAL,
+        ).price == ONE
+
+
+def test_price_history_cache(globaldb, historical_price_test_data):  # pylint: disable=unused-argument  # noqa: E501
+    """Test that pair series are cached on lookup and invalidated when the DB changes"""
+    cache = globaldb.price_history_cache
+    assert cache.get(A_ETH.identifier, A_EUR.identifier) is None
+    price_entry = globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    )
+    assert price_entry.timestamp == 1511626623
+    series = cache.get(A_ETH.identifier, A_EUR.identifier)
+    assert series is not None
+    assert len(series) == 9
+    # make sure the cached lookup gives the same result as the DB one for all sources
+    for source in (None, HistoricalPriceOracle.COINGECKO, HistoricalPriceOracle.MANUAL):
+        for timestamp in (1439048640, 1511627623, 1618481099, 1618481196 + 3601):
+            assert globaldb.get_historical_price(
+                from_asset=A_ETH,
+                to_asset=A_EUR,
+                timestamp=timestamp,
+                max_seconds_distance=3600,
+                source=source,
+            ) == globaldb._get_historical_price_from_db(
+                from_asset=A_ETH,
+                to_asset=A_EUR,
+                timestamp=timestamp,
+                max_seconds_distance=3600,
+                source=source,
+            )
+
+    # adding, editing and deleting prices of the pair invalidates the cached series
+    manual_entry = HistoricalPrice(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        source=HistoricalPriceOracle.MANUAL,
+        timestamp=Timestamp(1511627623),
+        price=Price(FVal(400)),
+    )
+    globaldb.add_historical_prices([manual_entry])
+    assert cache.get(A_ETH.identifier, A_EUR.identifier) is None
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ) == manual_entry
+    assert cache.get(A_ETH.identifier, A_EUR.identifier) is not None
+    assert globaldb.edit_manual_price(manual_entry._replace(price=Price(FVal(401)))) is True
+    assert cache.get(A_ETH.identifier, A_EUR.identifier) is None
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ).price == FVal(401)
+    globaldb.delete_historical_prices(from_asset=A_ETH, to_asset=A_EUR)
+    assert cache.get(A_ETH.identifier, A_EUR.identifier) is None
+    assert globaldb.get_historical_price(
+        from_asset=A_ETH,
+        to_asset=A_EUR,
+        timestamp=1511627623,
+        max_seconds_distance=3600,
+    ) is None
+
+
+def test_price_history_cache_eviction():
+    """Test that the cache stays within its memory budget and skips oversized pairs"""
+    cache = PriceHistoryCache(max_bytes=20_000)
+    entries = [('B', ts, '1500.5') for ts in range(10)]
+    for idx in range(50):
+        cache.add(f'ASSET{idx}', 'EUR', entries)
+        assert cache.size <= cache.max_bytes
+
+    assert cache.get('ASSET0', 'EUR') is None, 'least recently used should be evicted'
+    assert cache.get('ASSET49', 'EUR') is not None
+    assert cache.add('BIG', 'EUR', [('B', ts, '1') for ts in range(cache.max_series_entries + 1)]) is None  # noqa: E501
+    assert cache.is_oversized('big', 'eur') is True
+    cache.invalidate_asset('BIG')
+    assert cache.is_oversized('BIG', 'EUR') is False
+
+    cache.invalidate_asset('eur')
+    assert cache.size == 0
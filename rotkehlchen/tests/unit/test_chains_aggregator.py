@@ -1,12 +1,22 @@
+import time
 from contextlib import ExitStack
+from unittest.mock import patch
 
+import gevent
 import pytest
 from rotkehlchen.chain.accounts import BlockchainAccountData
 
 from rotkehlchen.chain.aggregator import ChainsAggregator, _module_name_to_class
+from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
+from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.tests.utils.blockchain import setup_evm_addresses_activity_mock
 from rotkehlchen.tests.utils.factories import make_evm_address
-from rotkehlchen.types import AVAILABLE_MODULES_MAP, SupportedBlockchain
+from rotkehlchen.types import (
+    AVAILABLE_MODULES_MAP,
+    SUPPORTED_CHAIN_IDS,
+    ChainID,
+    SupportedBlockchain,
+)
 
 
 @pytest.mark.parametrize('ethereum_modules', [[]])
@@ -126,3 +136,32 @@ def test_detect_evm_accounts(blockchain: 'ChainsAggregator') -> None:
             ))
 
     assert set(accounts_in_db) == set(expected_accounts_data) and len(accounts_in_db) == len(expected_accounts_data)  # noqa: E501
+
+
+def test_query_evm_transactions(blockchain: 'ChainsAggregator') -> None:
+    """Test that the transactions of the evm chains are queried concurrently and that
+    an error in one chain does not stop the others"""
+    queried_chains: list[SUPPORTED_CHAIN_IDS] = []
+    chain_ids: tuple[SUPPORTED_CHAIN_IDS, ...] = (ChainID.ETHEREUM, ChainID.OPTIMISM)
+
+    def mock_query_chain(chain_id: SUPPORTED_CHAIN_IDS, filter_query: EvmTransactionsFilterQuery) -> None:  # pylint: disable=unused-argument  # noqa: E501
+        gevent.sleep(0.5)
+        queried_chains.append(chain_id)
+        if chain_id == ChainID.ETHEREUM:
+            raise RemoteError('etherscan is down')
+
+    with ExitStack() as stack:
+        for chain_id in chain_ids:
+            stack.enter_context(patch.object(
+                blockchain.get_evm_manager(chain_id).transactions,
+                'query_chain',
+                side_effect=lambda filter_query, chain_id=chain_id: mock_query_chain(chain_id, filter_query),  # noqa: E501
+            ))
+        start = time.perf_counter()
+        errors = blockchain.query_evm_transactions(filter_query=EvmTransactionsFilterQuery.make())
+        seconds = time.perf_counter() - start
+
+    assert set(queried_chains) == set(chain_ids)
+    assert seconds < 1
+    assert list(errors) == [ChainID.ETHEREUM]
+    assert str(errors[ChainID.ETHEREUM]) == 'etherscan is down'
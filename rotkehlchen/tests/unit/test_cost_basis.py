@@ -1,5 +1,10 @@
 import csv
+import json
+import logging
+import os
+import random
 import tempfile
+import time
 from itertools import zip_longest
 from pathlib import Path
 
@@ -7,6 +12,7 @@ import pytest
 
 from rotkehlchen.accounting.accountant import Accountant
 from rotkehlchen.accounting.cost_basis import AssetAcquisitionEvent
+from rotkehlchen.accounting.cost_basis.base import CostBasisEvents
 from rotkehlchen.accounting.export.csv import FILENAME_ALL_CSV
 from rotkehlchen.accounting.mixins.event import AccountingEventType
 from rotkehlchen.accounting.pnl import PNL, PnlTotals
@@ -21,7 +27,8 @@ from rotkehlchen.constants.misc import ONE, ZERO
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
-from rotkehlchen.tests.utils.accounting import accounting_history_process
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.tests.utils.accounting import accounting_history_process, export_csv_in_memory
 from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash
 from rotkehlchen.types import (
     AssetAmount,
@@ -32,6 +39,10 @@ from rotkehlchen.types import (
     Timestamp,
     TradeType,
 )
+from rotkehlchen.utils.serialization import rlk_jsondumps
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
 
 EXAMPLE_TIMESTAMP = Timestamp(1675483017)
 
@@ -950,7 +961,8 @@ def test_accounting_average_cost_basis(accountant):
     # like this.
     with tempfile.TemporaryDirectory() as tmpdir:
         path_dir = Path(tmpdir)
-        accountant.csvexporter.export(
+        export_csv_in_memory(
+            csvexporter=accountant.csvexporter,
             events=pot.processed_events,
             pnls=pot.pnls,
             directory=path_dir,
@@ -1078,6 +1090,12 @@ def test_taxable_acquisition(accountant):
     (
         {'cost_basis_method': CostBasisMethod.ACB, 'include_fees_in_cost_basis': True},
         [ZERO, ZERO, ZERO, FVal(3485), ZERO, ZERO, ZERO, ZERO, ZERO, FVal(-16), ZERO, ZERO],
+    ), (
+        {'cost_basis_method': CostBasisMethod.FIFO, 'include_fees_in_cost_basis': False, 'fixed_point_cost_basis': True},  # noqa: E501
+        [ZERO, ZERO, FVal(-10), FVal(3500), ZERO, FVal(-10), ZERO, ZERO, FVal(-10), FVal(1600), ZERO, FVal(-10)],  # noqa: E501
+    ), (
+        {'cost_basis_method': CostBasisMethod.ACB, 'include_fees_in_cost_basis': True, 'fixed_point_cost_basis': True},  # noqa: E501
+        [ZERO, ZERO, ZERO, FVal(3485), ZERO, ZERO, ZERO, ZERO, ZERO, FVal(-16), ZERO, ZERO],
     ),
 ])
 def test_fees(accountant: 'Accountant', expected_pnls: list[FVal]):
@@ -1137,7 +1155,163 @@ def test_fees(accountant: 'Accountant', expected_pnls: list[FVal]):
         accountant=accountant,
         start_ts=Timestamp(0),
         end_ts=Timestamp(1677593077),
-        history_list=history,  # type: ignore[arg-type]  # invariant problem
+        history_list=history,
     )
     for event, expected_pnl in zip(accountant.pots[0].processed_events, expected_pnls):
         assert event.pnl.taxable == expected_pnl
+
+
+@pytest.mark.parametrize('db_settings', [
+    {'cost_basis_method': CostBasisMethod.FIFO},
+    {'cost_basis_method': CostBasisMethod.LIFO},
+    {'cost_basis_method': CostBasisMethod.HIFO},
+    {'cost_basis_method': CostBasisMethod.ACB},
+    {'cost_basis_method': CostBasisMethod.FIFO, 'fixed_point_cost_basis': True},
+    {'cost_basis_method': CostBasisMethod.LIFO, 'fixed_point_cost_basis': True},
+    {'cost_basis_method': CostBasisMethod.HIFO, 'fixed_point_cost_basis': True},
+    {'cost_basis_method': CostBasisMethod.ACB, 'fixed_point_cost_basis': True},
+])
+def test_cost_basis_state_restore(accountant):
+    """Test that continuing from a restored cost basis state gives the same results as
+    continuing without interruption"""
+    pot = accountant.pots[0]
+    cost_basis = pot.cost_basis
+    for amount, price in ((2, 10), (1, 20), (3, 15)):
+        add_acquisition(pot, amount=FVal(amount), price=FVal(price))
+    add_spend(pot, amount=FVal('2.5'), price=FVal(18))
+    add_spend(pot, amount=ONE, asset=A_BTC, price=FVal(100))  # missing acquisition
+    state = cost_basis.serialize_state()
+
+    add_spend(pot, amount=FVal(2), price=FVal(25))
+    expected_pnl = pot.processed_events[-1].pnl
+    expected_state = cost_basis.serialize_state()
+
+    cost_basis.reset(pot.settings)
+    cost_basis.restore_state(json.loads(rlk_jsondumps(state)))
+    assert cost_basis.serialize_state() == state
+    assert cost_basis.missing_acquisitions == [MissingAcquisition(
+        asset=A_BTC,
+        time=EXAMPLE_TIMESTAMP,
+        found_amount=ZERO,
+        missing_amount=ONE,
+    )]
+    add_spend(pot, amount=FVal(2), price=FVal(25))
+    assert pot.processed_events[-1].pnl == expected_pnl
+    assert cost_basis.serialize_state() == expected_state
+
+
+@pytest.mark.parametrize('accounting_initialize_parameters', [True])
+@pytest.mark.parametrize('cost_basis_method', list(CostBasisMethod))
+def test_fixed_point_cost_basis_matches_decimal(accountant, cost_basis_method):
+    """Test that processing the same history with fixed point arithmetic gives the same
+    results as the Decimal path. The ACB average is a division so there the results may
+    differ after the 18th significant digit"""
+    pot = accountant.pots[0]
+    random.seed(42)
+    history = []
+    for idx in range(600):
+        amount = FVal(random.randint(1, 10 ** 12)) / FVal(10 ** 8)
+        price = FVal(random.randint(1, 10 ** 12)) / FVal(10 ** 8)
+        history.append((random.random() < 0.55, amount, price, Timestamp(EXAMPLE_TIMESTAMP + idx * 86400)))  # noqa: E501
+
+    results = []
+    for fixed_point in (False, True):
+        pot.reset(
+            settings=pot.settings._replace(
+                cost_basis_method=cost_basis_method,
+                fixed_point_cost_basis=fixed_point,
+                taxfree_after_period=86400 * 30,
+            ),
+            start_ts=Timestamp(0),
+            end_ts=Timestamp(0),
+            report_id=1,
+        )
+        for is_acquisition, amount, price, timestamp in history:
+            kwargs = {
+                'event_type': AccountingEventType.TRANSACTION_EVENT,
+                'notes': 'Test',
+                'location': Location.BLOCKCHAIN,
+                'timestamp': timestamp,
+                'asset': A_ETH,
+                'amount': amount,
+                'given_price': price,
+            }
+            if is_acquisition:
+                pot.add_acquisition(taxable=False, **kwargs)
+            else:
+                pot.add_spend(taxable=True, count_entire_amount_spend=False, **kwargs)
+        results.append((
+            pot.processed_events,
+            pot.cost_basis.missing_acquisitions,
+            pot.cost_basis.get_calculated_asset_amount(A_ETH),
+        ))
+
+    (decimal_events, decimal_missing, decimal_amount), (fixed_events, fixed_missing, fixed_amount) = results  # noqa: E501
+    assert len(decimal_events) == len(fixed_events) == len(history)
+    assert decimal_missing == fixed_missing
+    for decimal_event, fixed_event in zip(decimal_events, fixed_events):
+        if cost_basis_method == CostBasisMethod.ACB:
+            assert decimal_event.pnl.taxable.is_close(fixed_event.pnl.taxable, max_diff='1e-9')
+            assert decimal_event.pnl.free.is_close(fixed_event.pnl.free, max_diff='1e-9')
+            continue
+
+        assert type(fixed_event.pnl.taxable) is FVal
+        assert decimal_event.pnl == fixed_event.pnl
+        assert decimal_event.taxable_amount == fixed_event.taxable_amount
+        assert decimal_event.free_amount == fixed_event.free_amount
+        if decimal_event.cost_basis is not None:
+            assert decimal_event.cost_basis == fixed_event.cost_basis
+
+    assert decimal_amount is not None and fixed_amount is not None
+    assert decimal_amount.is_close(fixed_amount, max_diff='1e-12')
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+@pytest.mark.parametrize('cost_basis_method', [CostBasisMethod.FIFO, CostBasisMethod.LIFO, CostBasisMethod.HIFO])  # noqa: E501
+def test_fixed_point_cost_basis_benchmark(cost_basis_method):
+    """Benchmark the spend processing loop with fixed point and Decimal arithmetic
+    directly on the acquisitions manager and make sure both give the same results"""
+    random.seed(42)
+    acquisitions_num, spends_num = 20000, 10000
+    acquisitions = [(
+        FVal(random.randint(10 ** 8, 10 ** 10)) / FVal(10 ** 8),
+        FVal(random.randint(1, 10 ** 12)) / FVal(10 ** 8),
+    ) for _ in range(acquisitions_num)]
+    spends = [FVal(random.randint(10 ** 8, 2 * 10 ** 10)) / FVal(10 ** 8) for _ in range(spends_num)]  # noqa: E501
+
+    durations, results = [], []
+    for fixed_point in (False, True):
+        settings = DBSettings(cost_basis_method=cost_basis_method, fixed_point_cost_basis=fixed_point)  # noqa: E501
+        events = CostBasisEvents(cost_basis_method, fixed_point)
+        manager = events.acquisitions_manager
+        for idx, (amount, rate) in enumerate(acquisitions):
+            manager.add_acquisition(AssetAcquisitionEvent(
+                amount=manager.to_number(amount),
+                timestamp=Timestamp(1500000000 + idx),
+                rate=manager.to_number(rate),
+                index=idx,
+            ))
+        spend_amounts = [manager.to_number(x) for x in spends]
+        missing_acquisitions: list[MissingAcquisition] = []
+        start = time.perf_counter()
+        infos = [manager.calculate_spend_cost_basis(
+            spending_amount=amount,
+            spending_asset=A_ETH,
+            timestamp=Timestamp(1600000000),
+            missing_acquisitions=missing_acquisitions,
+            used_acquisitions=events.used_acquisitions,
+            settings=settings,
+            timestamp_to_date=str,
+        ) for amount in spend_amounts]
+        durations.append(time.perf_counter() - start)
+        results.append(([x.to_fval() for x in infos], missing_acquisitions))
+
+    log.info(
+        f'{spends_num} {cost_basis_method} spends over {acquisitions_num} acquisitions. '
+        f'Decimal: {durations[0]:.3f}s fixed point: {durations[1]:.3f}s',
+    )
+    assert results[0] == results[1]
+    assert durations[1] < durations[0], f'Decimal: {durations[0]:.3f}s fixed point: {durations[1]:.3f}s'  # noqa: E501
@@ -249,7 +249,7 @@ def test_update_rpc_nodes(data_updater: RotkiDataUpdater) -> None:
     # check that 3 nodes are present in the user db including the custom node added.
     # 9 nodes were deleted since the updated rpc nodes data did not contain them.
     with data_updater.user_db.conn.read_ctx() as cursor:
-        nodes = cursor.execute('SELECT * FROM rpc_nodes').fetchall()
+        nodes = cursor.execute('SELECT identifier, name, endpoint, owned, active, weight, blockchain FROM rpc_nodes').fetchall()  # noqa: E501
 
     assert nodes == [
         (7, 'optimism official', 'https://mainnet.optimism.io', 0, 1, '0.20', 'OPTIMISM'),
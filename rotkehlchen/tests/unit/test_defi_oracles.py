@@ -6,8 +6,19 @@ import pytest
 from rotkehlchen.assets.asset import Asset, EvmToken
 from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.assets.types import AssetType
+from rotkehlchen.chain.ethereum.oracles.uniswap import PoolPrice
+from rotkehlchen.chain.evm.constants import ZERO_ADDRESS
 from rotkehlchen.chain.evm.types import string_to_evm_address
-from rotkehlchen.constants.assets import A_1INCH, A_BTC, A_DOGE, A_ETH, A_LINK, A_USDC, A_WETH
+from rotkehlchen.constants.assets import (
+    A_1INCH,
+    A_BTC,
+    A_DAI,
+    A_DOGE,
+    A_ETH,
+    A_LINK,
+    A_USDC,
+    A_WETH,
+)
 from rotkehlchen.constants.misc import ONE, ZERO_PRICE
 from rotkehlchen.errors.defi import DefiPoolError
 from rotkehlchen.errors.price import PriceQueryUnsupportedAsset
@@ -165,3 +176,57 @@ def test_invalid_token_kind_price_query(inquirer_defi: 'Inquirer'):
             to_asset=A_USDC.resolve_to_evm_token(),
             match_main_currency=False,
         )
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_uniswap_pools_and_routes_cache(inquirer_defi: 'Inquirer'):
+    """
+    Test that the pools found by the uniswap oracles, including the missing ones, and the
+    routes between tokens are cached in the global DB, and that the prices of all the
+    pools of a route are queried in one multicall
+    """
+    uniswap = inquirer_defi._uniswapv2
+    assert uniswap is not None
+    inch, dai, usdc = A_1INCH.resolve_to_evm_token(), A_DAI.resolve_to_evm_token(), A_USDC.resolve_to_evm_token()  # noqa: E501
+    inch_dai_pool = string_to_evm_address('0x0000000000000000000000000000000000000001')
+    dai_usdc_pool = string_to_evm_address('0x0000000000000000000000000000000000000002')
+    pools = {
+        frozenset((inch, dai)): inch_dai_pool,
+        frozenset((usdc, dai)): dai_usdc_pool,
+    }
+    pool_prices = {
+        inch_dai_pool: PoolPrice(price=FVal('0.5'), token_0=inch, token_1=dai),
+        dai_usdc_pool: PoolPrice(price=FVal('2'), token_0=usdc, token_1=dai),
+    }
+    get_pool_patch = patch.object(
+        uniswap,
+        'get_pool',
+        side_effect=lambda token_0, token_1: [pools.get(frozenset((token_0, token_1)), ZERO_ADDRESS)],  # noqa: E501
+    )
+    multicall_patch = patch.object(uniswap.ethereum, 'multicall', return_value=[b''] * 6)
+    decode_patch = patch.object(
+        uniswap,
+        'decode_pool_price',
+        side_effect=lambda pool_contract, output: pool_prices[pool_contract.address],
+    )
+    with get_pool_patch as get_pool, multicall_patch as multicall, decode_patch:
+        assert uniswap.query_current_price(inch, usdc, False) == (Price(FVal('0.25')), False)
+        # there is no 1inch/weth pool, so the route goes through dai
+        assert get_pool.call_count == 3
+        assert multicall.call_count == 1
+        assert len(multicall.call_args.kwargs['calls']) == 6
+
+        assert uniswap.query_current_price(inch, usdc, False) == (Price(FVal('0.25')), False)
+        assert get_pool.call_count == 3
+        assert multicall.call_count == 2
+        assert uniswap.get_cached_pool(inch, A_WETH.resolve_to_evm_token()) == []
+        assert uniswap.get_cached_pool(dai, inch) == [inch_dai_pool]
+        assert get_pool.call_count == 3
+
+        # if a pool of the route fails the pools and the route are queried again
+        decode_patch.stop()
+        with patch.object(uniswap, 'decode_pool_price', side_effect=DefiPoolError('no reserves')), pytest.raises(DefiPoolError):  # noqa: E501
+            uniswap.query_current_price(inch, usdc, False)
+        decode_patch.start()
+        assert uniswap.query_current_price(inch, usdc, False) == (Price(FVal('0.25')), False)
+        assert get_pool.call_count == 5
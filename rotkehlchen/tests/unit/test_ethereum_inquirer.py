@@ -1,26 +1,53 @@
+import logging
+import os
+import time
 from unittest.mock import patch
 
 import pytest
 
 from rotkehlchen.chain.accounts import BlockchainAccountData
-from rotkehlchen.chain.ethereum.constants import ETHEREUM_ETHERSCAN_NODE_NAME
+from rotkehlchen.chain.ethereum.constants import (
+    ETHEREUM_ETHERSCAN_NODE,
+    ETHEREUM_ETHERSCAN_NODE_NAME,
+)
 from rotkehlchen.chain.evm.constants import ZERO_ADDRESS
 from rotkehlchen.chain.evm.decoding.constants import ERC20_OR_ERC721_TRANSFER
+from rotkehlchen.chain.evm.logquery import (
+    ETHERSCAN_LOGQUERY_BLOCK_RANGE,
+    ETHERSCAN_LOGQUERY_MIN_BLOCK_RANGE,
+    ETHERSCAN_LOGS_TARGET,
+    LOGS_CACHE_REORG_BLOCKS,
+    LogQueryRange,
+)
+from rotkehlchen.chain.evm.node_scheduler import (
+    DEFAULT_HEDGE_DELAY,
+    HEDGE_DELAY_MIN_SAMPLES,
+    MIN_HEDGE_DELAY,
+    NodeScheduler,
+    NodeStats,
+)
 from rotkehlchen.chain.evm.structures import EvmTxReceipt, EvmTxReceiptLog
-from rotkehlchen.chain.evm.types import string_to_evm_address
+from rotkehlchen.chain.evm.types import NodeName, Web3Node, WeightedNode, string_to_evm_address
+from rotkehlchen.constants import ONE
 from rotkehlchen.db.evmtx import DBEvmTx
-from rotkehlchen.errors.misc import EventNotInABI
+from rotkehlchen.errors.misc import EventNotInABI, RemoteError
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.tests.utils.checks import assert_serialized_dicts_equal
 from rotkehlchen.tests.utils.ethereum import (
     ETHEREUM_FULL_TEST_PARAMETERS,
     ETHEREUM_NODES_PARAMETERS_WITH_PRUNED_AND_NOT_ARCHIVED,
     ETHEREUM_TEST_PARAMETERS,
+    StubJsonRpcNode,
+    make_raw_receipt,
     wait_until_all_nodes_connected,
 )
-from rotkehlchen.tests.utils.factories import make_evm_address
+from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash
 from rotkehlchen.types import ChainID, EvmTransaction, SupportedBlockchain, deserialize_evm_tx_hash
 from rotkehlchen.utils.hexbytes import hexstring_to_bytes
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
 
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
 def test_get_block_by_number(ethereum_inquirer, call_order, ethereum_manager_connect_at_start):
@@ -429,3 +456,373 @@ def test_get_contract_deployed_block(ethereum_inquirer):
     """
     assert ethereum_inquirer.get_contract_deployed_block('0x5a464C28D19848f44199D003BeF5ecc87d090F87') == 12251871  # noqa: E501
     assert ethereum_inquirer.get_contract_deployed_block('0x9531C059098e3d194fF87FebB587aB07B30B1306') is None  # noqa: E501
+
+
+def _connect_stub_node(ethereum_inquirer, stub_node: StubJsonRpcNode, name: str) -> WeightedNode:
+    """Start the stub node and connect the inquirer to it. Returns it as a call order entry"""
+    node = NodeName(
+        name=name,
+        endpoint=stub_node.start(),
+        owned=False,
+        blockchain=SupportedBlockchain.ETHEREUM,
+    )
+    web3, _ = ethereum_inquirer._init_web3(node)
+    ethereum_inquirer.web3_mapping[node] = Web3Node(
+        web3_instance=web3,
+        is_pruned=False,
+        is_archive=True,
+    )
+    return WeightedNode(node_info=node, active=True, weight=ONE)
+
+
+def test_get_transaction_receipts_batched(ethereum_inquirer):
+    """Test that receipts are queried from nodes in JSON-RPC batches that are split if the
+    node rejects them, that blocks with many of the transactions are queried whole and that
+    receipts a node fails to return are queried from the next node"""
+    tx_hashes = [make_evm_tx_hash() for _ in range(10)]
+    tx_blocks = {tx_hash: 100 if idx < 4 else 101 + idx for idx, tx_hash in enumerate(tx_hashes)}  # noqa: E501
+    raw_receipts = [make_raw_receipt(tx_hash, block_number=tx_blocks[tx_hash], logs_num=2) for tx_hash in tx_hashes]  # noqa: E501
+    raw_receipts.append(make_raw_receipt(make_evm_tx_hash(), block_number=100))  # not wanted
+    first_node = StubJsonRpcNode(raw_receipts, max_batch_size=4, failing_hashes=tx_hashes[8:])
+    second_node = StubJsonRpcNode(raw_receipts, block_receipts=False)
+    try:
+        call_order = [
+            _connect_stub_node(ethereum_inquirer, first_node, 'first'),
+            _connect_stub_node(ethereum_inquirer, second_node, 'second'),
+        ]
+        receipts = ethereum_inquirer.get_transaction_receipts(
+            tx_hashes=tx_hashes,
+            tx_blocks=tx_blocks,
+            call_order=call_order,
+        )
+    finally:
+        first_node.stop()
+        second_node.stop()
+
+    assert list(receipts) == tx_hashes
+    for tx_hash in tx_hashes:
+        receipt = receipts[tx_hash]
+        assert receipt['transactionHash'] == tx_hash.hex()
+        assert receipt['blockNumber'] == tx_blocks[tx_hash]
+        assert receipt['status'] == 1
+        assert receipt['gasUsed'] == 21000
+        assert [x['logIndex'] for x in receipt['logs']] == [0, 1]
+        assert [x['blockNumber'] for x in receipt['logs']] == [tx_blocks[tx_hash]] * 2
+
+    # one block query and the 6 other receipts in a batch of 6 that is split in two of 3
+    assert first_node.requests == [
+        ['eth_getBlockReceipts'],
+        ['eth_getTransactionReceipt'] * 6,
+        ['eth_getTransactionReceipt'] * 3,
+        ['eth_getTransactionReceipt'] * 3,
+    ]
+    assert second_node.requests == [['eth_getTransactionReceipt'] * 2]
+
+
+def test_get_transaction_receipts_without_block_receipts(ethereum_inquirer):
+    """Test that a node that does not support eth_getBlockReceipts is remembered and that
+    receipts are queried one by one in batches from it"""
+    tx_hashes = [make_evm_tx_hash() for _ in range(5)]
+    stub_node = StubJsonRpcNode([make_raw_receipt(x, block_number=100) for x in tx_hashes], block_receipts=False)  # noqa: E501
+    try:
+        call_order = [_connect_stub_node(ethereum_inquirer, stub_node, 'stub')]
+        for _ in range(2):
+            receipts = ethereum_inquirer.get_transaction_receipts(
+                tx_hashes=tx_hashes,
+                tx_blocks=dict.fromkeys(tx_hashes, 100),
+                call_order=call_order,
+            )
+            assert set(receipts) == set(tx_hashes)
+    finally:
+        stub_node.stop()
+
+    assert stub_node.requests == [
+        ['eth_getBlockReceipts'],
+        ['eth_getTransactionReceipt'] * 5,
+        ['eth_getTransactionReceipt'] * 5,
+    ]
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+def test_get_transaction_receipts_benchmark(ethereum_inquirer):
+    """Measure querying receipts one by one as the transactions module used to against the
+    batched queries, with a local node that takes 5ms to answer each HTTP request"""
+    tx_hashes = [make_evm_tx_hash() for _ in range(100)]
+    tx_blocks = {tx_hash: 1000 + idx // 5 for idx, tx_hash in enumerate(tx_hashes)}
+    stub_node = StubJsonRpcNode(
+        receipts=[make_raw_receipt(tx_hash, block_number=tx_blocks[tx_hash], logs_num=4) for tx_hash in tx_hashes],  # noqa: E501
+        latency=0.005,
+    )
+    try:
+        call_order = [_connect_stub_node(ethereum_inquirer, stub_node, 'stub')]
+        start = time.perf_counter()
+        for tx_hash in tx_hashes:
+            ethereum_inquirer.get_transaction_receipt(tx_hash, call_order=call_order)
+        one_by_one_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        receipts = ethereum_inquirer.get_transaction_receipts(
+            tx_hashes=tx_hashes,
+            tx_blocks=tx_blocks,
+            call_order=call_order,
+        )
+        batched_seconds = time.perf_counter() - start
+    finally:
+        stub_node.stop()
+
+    log.info(
+        f'Querying {len(tx_hashes)} receipts: one by one {one_by_one_seconds:.2f}s, '
+        f'batched {batched_seconds:.2f}s',
+    )
+    assert len(receipts) == len(tx_hashes)
+    assert len(stub_node.requests) == len(tx_hashes) + 1  # all 20 blocks in one batch
+    assert batched_seconds < one_by_one_seconds, f'one by one {one_by_one_seconds:.2f}s, batched {batched_seconds:.2f}s'  # noqa: E501
+
+
+def test_node_stats():
+    """Test the hedging delay and the score that the stats of a node give"""
+    stats = NodeStats()
+    assert stats.hedge_delay('_get_code') == DEFAULT_HEDGE_DELAY
+    assert stats.score() == 1
+    for seconds in (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2):
+        stats.record_success('_get_code', seconds)
+    assert stats.hedge_delay('_get_code') == 1.1
+    assert stats.hedge_delay('_get_logs') == DEFAULT_HEDGE_DELAY
+    latency = stats.latency
+    stats.record_success('_get_logs', 60)
+    assert stats.latency == latency, 'log queries should not count in the node latency'
+    for _ in range(5):
+        stats.record_success('_get_block_by_number', 0.01)
+    assert stats.hedge_delay('_get_block_by_number') == MIN_HEDGE_DELAY
+    good_node_score = stats.score()
+    stats.record_error('_get_code', 30)
+    assert stats.error_rate == pytest.approx(0.1)
+    assert stats.score() < good_node_score
+    assert stats.queries == 17
+    assert stats.errors == 1
+
+
+def test_query_hedged_to_next_node(ethereum_inquirer):
+    """Test that if a node does not respond within its hedging delay the next node is
+    queried too, that the first response is used and that the slow query gets cancelled"""
+    tx_hash = make_evm_tx_hash()
+    raw_receipts = [make_raw_receipt(tx_hash, block_number=100)]
+    slow_node = StubJsonRpcNode(raw_receipts, latency=2)
+    fast_node = StubJsonRpcNode(raw_receipts)
+    try:
+        call_order = [
+            _connect_stub_node(ethereum_inquirer, slow_node, 'slow'),
+            _connect_stub_node(ethereum_inquirer, fast_node, 'fast'),
+        ]
+        slow_stats = ethereum_inquirer.node_scheduler.get(call_order[0].node_info)
+        for _ in range(HEDGE_DELAY_MIN_SAMPLES):  # the slow node used to be fast
+            slow_stats.record_success('_get_transaction_receipt', 0.05)
+        start = time.perf_counter()
+        receipt = ethereum_inquirer.maybe_get_transaction_receipt(tx_hash, call_order=call_order)  # noqa: E501
+        seconds = time.perf_counter() - start
+    finally:
+        slow_node.stop()
+        fast_node.stop()
+
+    assert receipt['transactionHash'] == tx_hash.hex()
+    assert MIN_HEDGE_DELAY <= seconds < 1
+    assert fast_node.requests == [['eth_getTransactionReceipt']]
+    fast_stats = ethereum_inquirer.node_scheduler.get(call_order[1].node_info)
+    assert fast_stats.queries == 1
+    assert slow_stats.queries == HEDGE_DELAY_MIN_SAMPLES
+    assert slow_stats.cancelled == 1
+    assert slow_stats.method_latencies['_get_transaction_receipt'][-1] >= MIN_HEDGE_DELAY
+
+
+def test_query_failed_node(ethereum_inquirer):
+    """Test that a failed node query moves on to the next node without waiting for the
+    hedging delay and that the failure counts in the stats of the node"""
+    tx_hash = make_evm_tx_hash()
+    raw_receipts = [make_raw_receipt(tx_hash, block_number=100)]
+    failing_node = StubJsonRpcNode(raw_receipts, failing_hashes=[tx_hash])
+    good_node = StubJsonRpcNode(raw_receipts)
+    try:
+        call_order = [
+            _connect_stub_node(ethereum_inquirer, failing_node, 'failing'),
+            _connect_stub_node(ethereum_inquirer, good_node, 'good'),
+        ]
+        start = time.perf_counter()
+        receipt = ethereum_inquirer.maybe_get_transaction_receipt(tx_hash, call_order=call_order)  # noqa: E501
+        seconds = time.perf_counter() - start
+        with pytest.raises(RemoteError):
+            ethereum_inquirer.maybe_get_transaction_receipt(tx_hash, call_order=call_order[:1])  # noqa: E501
+    finally:
+        failing_node.stop()
+        good_node.stop()
+
+    assert receipt['transactionHash'] == tx_hash.hex()
+    assert seconds < DEFAULT_HEDGE_DELAY
+    failing_stats = ethereum_inquirer.node_scheduler.get(call_order[0].node_info)
+    assert failing_stats.errors == failing_stats.queries == 2
+    assert failing_stats.error_rate == pytest.approx(0.19)
+    assert ethereum_inquirer.node_scheduler.get(call_order[1].node_info).errors == 0
+
+
+def test_node_stats_saved(database, ethereum_inquirer):
+    """Test that the stats of the nodes are saved in the DB and loaded at start"""
+    node = WeightedNode(
+        node_info=NodeName(
+            name='my node',
+            endpoint='http://localhost:8545',
+            owned=False,
+            blockchain=SupportedBlockchain.ETHEREUM,
+        ),
+        active=True,
+        weight=ONE,
+    )
+    database.add_rpc_node(node)
+    stats = ethereum_inquirer.node_scheduler.get(node.node_info)
+    stats.record_success('_get_code', 0.2)
+    stats.record_error('_get_code', 0.4)
+    ethereum_inquirer.save_nodes_stats()
+
+    node_scheduler = NodeScheduler(database=database, blockchain=SupportedBlockchain.ETHEREUM)
+    saved_stats = node_scheduler.get(node.node_info)
+    assert saved_stats.latency == pytest.approx(0.22)
+    assert saved_stats.error_rate == pytest.approx(0.1)
+    assert saved_stats.queries == 0, 'counters are only for the current session'
+    other_node = node.node_info._replace(endpoint='http://localhost:8546')
+    assert node_scheduler.get(other_node).latency is None
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+def test_query_hedged_benchmark(ethereum_inquirer):
+    """Measure queries when the first node in the call order became slow, waiting for it
+    as _query used to against hedging to the next node"""
+    tx_hash = make_evm_tx_hash()
+    raw_receipts = [make_raw_receipt(tx_hash, block_number=100)]
+    slow_node = StubJsonRpcNode(raw_receipts, latency=0.5)
+    fast_node = StubJsonRpcNode(raw_receipts, latency=0.01)
+    try:
+        call_order = [
+            _connect_stub_node(ethereum_inquirer, slow_node, 'slow'),
+            _connect_stub_node(ethereum_inquirer, fast_node, 'fast'),
+        ]
+        results = {}
+        for hedged in (False, True):
+            # the slow node used to be fast
+            ethereum_inquirer.node_scheduler.stats.pop(call_order[0].node_info, None)
+            for _ in range(HEDGE_DELAY_MIN_SAMPLES):
+                ethereum_inquirer.node_scheduler.get(call_order[0].node_info).record_success('_get_transaction_receipt', 0.05)  # noqa: E501
+            methods_not_to_hedge = () if hedged else ('_get_transaction_receipt',)
+            with patch.object(ethereum_inquirer, 'methods_not_to_hedge', methods_not_to_hedge):  # noqa: E501
+                start = time.perf_counter()
+                for _ in range(10):
+                    ethereum_inquirer.maybe_get_transaction_receipt(tx_hash, call_order=call_order)  # noqa: E501
+                results[hedged] = time.perf_counter() - start
+    finally:
+        slow_node.stop()
+        fast_node.stop()
+
+    log.info(f'10 queries with a slow first node: sequential {results[False]:.2f}s, hedged {results[True]:.2f}s')  # noqa: E501
+    assert results[True] < results[False], f'sequential {results[False]:.2f}s, hedged {results[True]:.2f}s'  # noqa: E501
+
+
+def test_log_query_range(globaldb):  # pylint: disable=unused-argument
+    """Test that the block range of log queries follows the density of the logs and that
+    the last range is where the next queries start from"""
+    contract_address = make_evm_address()
+
+    def make_range():
+        return LogQueryRange(
+            node_kind='etherscan',
+            chain_id=ChainID.ETHEREUM,
+            contract_address=contract_address,
+            event_name='Transfer',
+            max_range=ETHERSCAN_LOGQUERY_BLOCK_RANGE,
+            min_range=ETHERSCAN_LOGQUERY_MIN_BLOCK_RANGE,
+            target_logs=ETHERSCAN_LOGS_TARGET,
+        )
+
+    block_range = make_range()
+    assert block_range.block_range == ETHERSCAN_LOGQUERY_BLOCK_RANGE
+    block_range.update(logs_num=1000, blocks_num=20000)
+    assert block_range.block_range == 10000
+    block_range.update(logs_num=1, blocks_num=10000)  # sparse logs, grow at most twice
+    assert block_range.block_range == 20000
+    block_range.update(logs_num=0, blocks_num=20000)
+    assert block_range.block_range == 40000
+    block_range.update(logs_num=10000, blocks_num=40000)
+    assert block_range.block_range == 2000
+    block_range.update(logs_num=1000, blocks_num=1)
+    assert block_range.block_range == ETHERSCAN_LOGQUERY_MIN_BLOCK_RANGE
+    assert block_range.shrink() is False
+    block_range.update(logs_num=250, blocks_num=100)
+    assert block_range.block_range == 200
+    assert block_range.shrink() is True
+    assert block_range.block_range == 100
+    block_range.save()
+
+    assert make_range().block_range == 100
+    other_range = LogQueryRange(
+        node_kind='mainnet.infura.io',
+        chain_id=ChainID.ETHEREUM,
+        contract_address=contract_address,
+        event_name='Transfer',
+        max_range=50000,
+        min_range=50,
+        target_logs=5000,
+    )
+    assert other_range.block_range == 50000
+
+
+def test_get_logs_cached(ethereum_inquirer):
+    """Test that logs queried up to the latest block are cached and that queries of the
+    same logs only query the blocks after the cached ones"""
+    contract_address = string_to_evm_address('0xdF5e0e81Dff6FAF3A7e52BA697820c5e32D806A8')
+    latest_block, queried_ranges = 2000, []
+
+    def mock_get_logs(contract_address, topics, from_block, to_block):  # pylint: disable=unused-argument  # noqa: E501
+        queried_ranges.append((from_block, to_block))
+        return [{
+            'address': contract_address,
+            'blockNumber': hex(block_number),
+            'data': '0x01',
+            'gasPrice': '0x1',
+            'gasUsed': '0x1',
+            'logIndex': '0x0',
+            'timeStamp': hex(block_number * 12),
+            'topics': topics,
+            'transactionHash': make_evm_tx_hash().hex(),
+            'transactionIndex': '0x0',
+        } for block_number in range(from_block, to_block + 1, 100)]
+
+    def get_logs(from_block):
+        return ethereum_inquirer.get_logs(
+            contract_address=contract_address,
+            abi=ethereum_inquirer.contracts.abi('ERC20_TOKEN'),
+            event_name='Transfer',
+            argument_filters={'to': contract_address},
+            from_block=from_block,
+            call_order=[ETHEREUM_ETHERSCAN_NODE],
+        )
+
+    with (
+        patch.object(ethereum_inquirer.etherscan, 'get_logs', side_effect=mock_get_logs),
+        patch.object(ethereum_inquirer.etherscan, 'get_latest_block_number', side_effect=lambda: latest_block),  # noqa: E501
+    ):
+        events = get_logs(from_block=1000)
+        assert queried_ranges == [(1000, 2000)]
+        assert [x['blockNumber'] for x in events] == list(range(1000, 2001, 100))
+
+        latest_block = 3000
+        queried_ranges.clear()
+        new_events = get_logs(from_block=1000)
+        first_uncached = 2000 - LOGS_CACHE_REORG_BLOCKS + 1
+        assert queried_ranges == [(first_uncached, 3000)]
+        assert new_events[:10] == events[:10]
+        assert [x['blockNumber'] for x in new_events] == list(range(1000, 1901, 100)) + list(range(first_uncached, 3001, 100))  # noqa: E501
+
+        queried_ranges.clear()
+        get_logs(from_block=500)  # starts before the cached blocks
+        assert queried_ranges == [(500, 3000)]
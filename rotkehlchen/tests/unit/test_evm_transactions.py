@@ -1,5 +1,11 @@
+import time
 from unittest.mock import patch
+
+import gevent
+
+from rotkehlchen.api.websockets.typedefs import EvmTransactionsSyncStep, WSMessageType
 from rotkehlchen.chain.ethereum.transactions import EthereumTransactions
+from rotkehlchen.chain.evm.transactions import ADDRESSES_QUERY_CONCURRENCY
 from rotkehlchen.chain.evm.types import EvmAccount
 from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
 from rotkehlchen.tests.utils.factories import make_evm_address
@@ -35,3 +41,42 @@ def test_query_transactions_single_chain(eth_transactions: 'EthereumTransactions
         ))
 
     assert queried_addresses == [ADDR_2, ADDR_3]
+
+
+def test_query_chain_concurrently(eth_transactions: 'EthereumTransactions'):
+    """Test that the addresses of a chain are queried concurrently, no more than
+    ADDRESSES_QUERY_CONCURRENCY at a time, and that the progress is sent via websockets"""
+    addresses = [make_evm_address() for _ in range(6)]
+    running, max_running = 0, 0
+
+    def mock_single_address_query_transactions(address, **kwargs):  # pylint: disable=unused-argument  # noqa: E501
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        gevent.sleep(0.2)
+        running -= 1
+
+    with (
+        patch.object(eth_transactions, 'single_address_query_transactions', side_effect=mock_single_address_query_transactions),  # noqa: E501
+        patch.object(eth_transactions.msg_aggregator, 'add_message') as add_message,
+    ):
+        start = time.perf_counter()
+        eth_transactions.query_chain(filter_query=EvmTransactionsFilterQuery.make(
+            accounts=[EvmAccount(address=x, chain_id=ChainID.ETHEREUM) for x in addresses],
+        ))
+        seconds = time.perf_counter() - start
+
+    assert max_running == ADDRESSES_QUERY_CONCURRENCY
+    assert seconds < 0.2 * len(addresses) / 2
+    sync_messages = [
+        x.kwargs['data'] for x in add_message.call_args_list
+        if x.kwargs['message_type'] == WSMessageType.EVM_TRANSACTIONS_SYNC_STATUS
+    ]
+    assert sync_messages[0] == {
+        'evm_chain': 'ethereum',
+        'status': str(EvmTransactionsSyncStep.QUERYING_CHAIN_STARTED),
+        'queried_addresses': 0,
+        'total_addresses': len(addresses),
+    }
+    assert [x['queried_addresses'] for x in sync_messages[1:-1]] == list(range(1, len(addresses) + 1))  # noqa: E501
+    assert sync_messages[-1]['status'] == str(EvmTransactionsSyncStep.QUERYING_CHAIN_FINISHED)
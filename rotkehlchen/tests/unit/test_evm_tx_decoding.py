@@ -1,4 +1,8 @@
-from typing import TYPE_CHECKING
+import dataclasses
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any
 from unittest.mock import patch
 
 import pytest
@@ -10,18 +14,31 @@ from rotkehlchen.accounting.structures.base import (
     HistoryEventType,
 )
 from rotkehlchen.accounting.structures.evm_event import EvmEvent
+from rotkehlchen.assets.asset import EvmToken
+from rotkehlchen.assets.types import AssetType
 from rotkehlchen.chain.ethereum.decoding.decoder import EthereumTransactionDecoder
 from rotkehlchen.chain.evm.constants import GENESIS_HASH
 from rotkehlchen.chain.evm.decoding.constants import CPT_GAS
+from rotkehlchen.chain.evm.decoding.decoder import EventRule
+from rotkehlchen.chain.evm.decoding.structures import DEFAULT_DECODING_OUTPUT, DecodingOutput
+from rotkehlchen.chain.evm.decoding.token_cache import EvmTokenCache
+from rotkehlchen.chain.evm.decoding.utils import decoding_rule_for
+from rotkehlchen.chain.evm.structures import EvmTxReceiptLog
 from rotkehlchen.chain.evm.types import EvmAccount, string_to_evm_address
-from rotkehlchen.constants.assets import A_ETH, A_SAI
+from rotkehlchen.constants.assets import A_DAI, A_ETH, A_SAI
 from rotkehlchen.db.evmtx import DBEvmTx
 from rotkehlchen.db.filtering import EvmEventFilterQuery, EvmTransactionsFilterQuery
 from rotkehlchen.db.history_events import DBHistoryEvents
+from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.fval import FVal
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.tests.utils.factories import make_evm_address, make_evm_tx_hash, make_random_bytes
 from rotkehlchen.types import (
     ChainID,
     ChecksumEvmAddress,
+    EvmInternalTransaction,
+    EvmTokenKind,
     EvmTransaction,
     EVMTxHash,
     Location,
@@ -37,6 +54,9 @@ if TYPE_CHECKING:
     from rotkehlchen.chain.optimism.transactions import OptimismTransactions
     from rotkehlchen.db.dbhandler import DBHandler
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
 
 def _add_transactions_to_db(
         db: 'DBHandler',
@@ -270,3 +290,311 @@ def test_genesis_remove_address(
         )
 
     assert len(genesis_tx) == 0, 'Genesis transaction should have been deleted'
+
+
+def _add_value_transfers(
+        database: 'DBHandler',
+        from_address: ChecksumEvmAddress,
+        num: int,
+        logs_num: int = 0,
+) -> list[EVMTxHash]:
+    """Add `num` ETH transfers of `from_address` with their receipts to the DB. Every other
+    transaction also sends ETH back to `from_address` in an internal transaction and each
+    receipt has `logs_num` logs that no decoding rule matches"""
+    dbevmtx, tx_hashes = DBEvmTx(database), []
+    with database.user_write() as write_cursor:
+        for idx in range(num):
+            transaction = EvmTransaction(
+                tx_hash=make_evm_tx_hash(),
+                chain_id=ChainID.ETHEREUM,
+                timestamp=Timestamp(1600000000 + idx),
+                block_number=idx,
+                from_address=from_address,
+                to_address=make_evm_address(),
+                value=10 ** 18,
+                gas=21000,
+                gas_price=10 ** 9,
+                gas_used=21000,
+                input_data=b'',
+                nonce=idx,
+            )
+            dbevmtx.add_evm_transactions(write_cursor, [transaction], relevant_address=from_address)  # noqa: E501
+            dbevmtx.add_receipt_data(write_cursor=write_cursor, chain_id=ChainID.ETHEREUM, data={
+                'transactionHash': transaction.tx_hash.hex(),
+                'contractAddress': None,
+                'logs': [{
+                    'logIndex': log_index,
+                    'data': '0x',
+                    'address': make_evm_address(),
+                    'removed': False,
+                    'topics': ['0x' + make_random_bytes(32).hex()],
+                } for log_index in range(logs_num)],
+            })
+            if idx % 2 == 1:
+                dbevmtx.add_evm_internal_transactions(write_cursor, [EvmInternalTransaction(
+                    parent_tx_hash=transaction.tx_hash,
+                    chain_id=ChainID.ETHEREUM,
+                    trace_id=1,
+                    timestamp=transaction.timestamp,
+                    block_number=idx,
+                    from_address=transaction.to_address,  # type: ignore[arg-type]  # is set
+                    to_address=from_address,
+                    value=10 ** 17,
+                )], relevant_address=from_address)
+            tx_hashes.append(transaction.tx_hash)
+
+    return tx_hashes
+
+
+@pytest.mark.parametrize('ethereum_accounts', [[make_evm_address()]])
+def test_decode_transaction_hashes_in_batches(
+        database: 'DBHandler',
+        ethereum_accounts: list[ChecksumEvmAddress],
+        ethereum_transaction_decoder: 'EthereumTransactionDecoder',
+):
+    """Test that transactions are decoded in batches that are saved in one DB transaction
+    each, that events come back in the order of the hashes and that decoded transactions
+    are read from the DB unless the cache is ignored"""
+    decoder = ethereum_transaction_decoder
+    tx_hashes = _add_value_transfers(database, ethereum_accounts[0], num=5)
+    patched_batch_size = patch('rotkehlchen.chain.evm.decoding.decoder.DECODING_BATCH_SIZE', 2)
+    patched_write = patch.object(database, 'user_write', wraps=database.user_write)
+    patched_decode = patch.object(decoder, '_decode_transaction_events', wraps=decoder._decode_transaction_events)  # noqa: E501
+    with patched_batch_size, patched_write as user_write, patched_decode as decode_mock:
+        events = decoder.decode_transaction_hashes(ignore_cache=False, tx_hashes=tx_hashes)
+        assert user_write.call_count == 3
+        assert decode_mock.call_count == 5
+        expected_hashes = []
+        for idx, tx_hash in enumerate(tx_hashes):  # gas, transfer and maybe internal transfer
+            expected_hashes.extend([tx_hash] * (3 if idx % 2 == 1 else 2))
+        assert [x.tx_hash for x in events] == expected_hashes
+        transfer_notes = [x.notes for x in events if x.tx_hash == tx_hashes[1]][1]
+        assert transfer_notes is not None and transfer_notes.startswith('Receive 0.1 ETH')
+        assert len(DBEvmTx(database).get_transaction_hashes_not_decoded(
+            chain_id=ChainID.ETHEREUM,
+            limit=None,
+            addresses=None,
+        )) == 0
+
+        # decoded events are read from the DB without writing anything
+        cached_events = decoder.decode_transaction_hashes(ignore_cache=False, tx_hashes=tx_hashes)  # noqa: E501
+        assert len(cached_events) == len(events)
+        for cached_event, event in zip(cached_events, events):
+            assert_events_equal(cached_event, event)
+        assert user_write.call_count == 3
+        assert decode_mock.call_count == 5
+
+        # unless the cache is ignored. Then the old events are replaced in one DB transaction
+        new_events = decoder.decode_transaction_hashes(ignore_cache=True, tx_hashes=tx_hashes[:2])  # noqa: E501
+        assert decode_mock.call_count == 7
+        assert user_write.call_count == 4
+        assert [x.notes for x in new_events] == [x.notes for x in events[:5]]
+        with database.conn.read_ctx() as cursor:
+            assert cursor.execute('SELECT COUNT(*) FROM history_events').fetchone()[0] == len(events)  # noqa: E501
+
+    # if decoding fails while ignoring the cache the old events are kept
+    patched_decode = patch.object(decoder, '_decode_transaction_events', side_effect=RemoteError('boom'))  # noqa: E501
+    with patched_decode, pytest.raises(RemoteError):
+        decoder.decode_transaction_hashes(ignore_cache=True, tx_hashes=tx_hashes[:2])
+    with database.conn.read_ctx() as cursor:
+        assert cursor.execute('SELECT COUNT(*) FROM history_events').fetchone()[0] == len(events)  # noqa: E501
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+@pytest.mark.parametrize('ethereum_accounts', [[make_evm_address()]])
+def test_decode_undecoded_transactions_benchmark(
+        database: 'DBHandler',
+        ethereum_accounts: list[ChecksumEvmAddress],
+        ethereum_transaction_decoder: 'EthereumTransactionDecoder',
+):
+    """Measure decoding stored transactions one by one as the decoder used to, with a DB
+    transaction per decoded transaction, against the batch pipeline"""
+    decoder, dbevmtx = ethereum_transaction_decoder, DBEvmTx(database)
+    old_hashes = _add_value_transfers(database, ethereum_accounts[0], num=2000, logs_num=4)
+    new_hashes = _add_value_transfers(database, ethereum_accounts[0], num=2000, logs_num=4)
+
+    start = time.perf_counter()
+    for tx_hash in old_hashes:
+        with database.conn.read_ctx() as cursor:
+            receipt = dbevmtx.get_receipt(cursor, tx_hash, ChainID.ETHEREUM)
+            transaction = dbevmtx.get_evm_transactions(
+                cursor=cursor,
+                filter_=EvmTransactionsFilterQuery.make(tx_hash=tx_hash, chain_id=ChainID.ETHEREUM),  # noqa: E501
+                has_premium=True,
+            )[0]
+        decoder._get_or_decode_transaction_events(transaction, receipt, ignore_cache=False)  # type: ignore[arg-type]  # noqa: E501
+    per_transaction_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoder.get_and_decode_undecoded_transactions(limit=None)
+    batched_seconds = time.perf_counter() - start
+
+    log.info(
+        f'Decoding 2000 transactions: one by one {per_transaction_seconds:.2f}s, '
+        f'batched {batched_seconds:.2f}s',
+    )
+    with database.conn.read_ctx() as cursor:
+        assert cursor.execute(
+            'SELECT COUNT(*) FROM evm_tx_mappings WHERE tx_hash IN (?, ?)',
+            (old_hashes[0], new_hashes[-1]),
+        ).fetchone()[0] == 2
+    assert batched_seconds < per_transaction_seconds, f'one by one {per_transaction_seconds:.2f}s, batched {batched_seconds:.2f}s'  # noqa: E501
+
+
+def test_event_rules_dispatch_by_topic(ethereum_transaction_decoder: 'EthereumTransactionDecoder'):  # noqa: E501
+    """Test that a log is only given to the event rules that declared its topic0 and to the
+    ones that declared no topic, in the order they were registered, and that the declared
+    token kinds are respected"""
+    decoder = ethereum_transaction_decoder
+    topic_a, topic_b = make_random_bytes(32), make_random_bytes(32)
+    calls: list[str] = []
+
+    def make_rule(name: str) -> Any:
+        def rule(**kwargs: Any) -> DecodingOutput:
+            calls.append(name)
+            return DEFAULT_DECODING_OUTPUT
+        return rule
+
+    event_rules = [
+        make_rule('all_1'),
+        decoding_rule_for(topic_a)(make_rule('a')),
+        make_rule('all_2'),
+        decoding_rule_for(topic_a, topic_b)(make_rule('a_b')),
+        decoding_rule_for(topic_b, token_kinds=(EvmTokenKind.ERC721,))(make_rule('b_erc721')),
+        decoding_rule_for(token_kinds=(EvmTokenKind.ERC20,))(make_rule('all_erc20')),
+    ]
+    with patch.object(decoder, 'rules', dataclasses.replace(decoder.rules, event_rules=event_rules)):  # noqa: E501
+        decoder.event_rules_by_topic, decoder.catch_all_event_rules = decoder._build_event_rules_dispatch()  # noqa: E501
+
+    def try_rules(topics: list[bytes], token: Any = None) -> list[str]:
+        calls.clear()
+        decoder.try_all_rules(
+            token=token,
+            tx_log=EvmTxReceiptLog(log_index=0, data=b'', address=make_evm_address(), removed=False, topics=topics),  # noqa: E501
+            transaction=None,  # type: ignore[arg-type]  # not used by the rules
+            decoded_events=[],
+            action_items=[],
+            all_logs=[],
+        )
+        return calls.copy()
+
+    event_rule_logs, event_rule_calls = decoder.event_rule_logs, decoder.event_rule_calls
+    assert try_rules([topic_a]) == ['all_1', 'a', 'all_2', 'a_b']
+    assert try_rules([topic_b, topic_a]) == ['all_1', 'all_2', 'a_b']
+    erc721_token = EvmToken.initialize(
+        address=make_evm_address(),
+        chain_id=ChainID.ETHEREUM,
+        token_kind=EvmTokenKind.ERC721,
+    )
+    assert try_rules([topic_b], token=erc721_token) == ['all_1', 'all_2', 'a_b', 'b_erc721']
+    assert try_rules([make_random_bytes(32)]) == ['all_1', 'all_2']
+    assert try_rules([], token=A_DAI.resolve_to_evm_token()) == ['all_1', 'all_2', 'all_erc20']
+    assert decoder.event_rule_logs - event_rule_logs == 5
+    assert decoder.event_rule_calls - event_rule_calls == 16
+
+
+@pytest.mark.skipif(
+    'ROTKI_BENCHMARKS' not in os.environ,
+    reason='BENCHMARK -- set ROTKI_BENCHMARKS to run it',
+)
+@pytest.mark.parametrize('use_custom_database', ['ethtxs.db'])
+def test_event_rules_dispatch_benchmark(
+        database: 'DBHandler',
+        ethereum_transaction_decoder: 'EthereumTransactionDecoder',
+):
+    """Measure decoding the recorded mainnet transactions of the test DB with the topic
+    dispatch of the generic event rules against giving every log to every rule as the
+    decoder used to. Both should produce the same events"""
+    decoder, dbevmtx = ethereum_transaction_decoder, DBEvmTx(database)
+    with database.conn.read_ctx() as cursor:
+        transactions = dbevmtx.get_evm_transactions(
+            cursor=cursor,
+            filter_=EvmTransactionsFilterQuery.make(chain_id=ChainID.ETHEREUM),
+            has_premium=True,
+        )
+        receipts = dbevmtx.get_receipts(cursor, [x.tx_hash for x in transactions], ChainID.ETHEREUM)  # noqa: E501
+    transactions = [x for x in transactions if x.tx_hash in receipts]
+    assert len(transactions) != 0
+
+    def decode_all() -> tuple[list[list[EvmEvent]], float, float]:
+        """Returns the events of each transaction, the seconds it took to decode them and
+        the rule calls per log given to the generic event rules"""
+        event_rule_logs, event_rule_calls = decoder.event_rule_logs, decoder.event_rule_calls
+        start = time.perf_counter()
+        for _ in range(5):
+            events = [
+                decoder._decode_transaction_events(transaction, receipts[transaction.tx_hash])[0]  # noqa: E501
+                for transaction in transactions
+            ]
+        seconds = time.perf_counter() - start
+        return events, seconds, (decoder.event_rule_calls - event_rule_calls) / (decoder.event_rule_logs - event_rule_logs)  # noqa: E501
+
+    dispatched_events, dispatched_seconds, dispatched_calls = decode_all()
+    all_rules = [EventRule(rule=x, token_kinds=None) for x in decoder.rules.event_rules]
+    with patch.object(decoder, 'event_rules_by_topic', {}), patch.object(decoder, 'catch_all_event_rules', all_rules):  # noqa: E501
+        all_rules_events, all_rules_seconds, all_rules_calls = decode_all()
+
+    log.info(
+        f'Decoding {len(transactions)} transactions 5 times: all rules {all_rules_seconds:.2f}s '
+        f'with {all_rules_calls:.1f} rule calls per log, dispatched {dispatched_seconds:.2f}s '
+        f'with {dispatched_calls:.1f} rule calls per log',
+    )
+    for tx_events_1, tx_events_2 in zip(dispatched_events, all_rules_events):
+        assert len(tx_events_1) == len(tx_events_2)
+        for event_1, event_2 in zip(tx_events_1, tx_events_2):
+            assert_events_equal(event_1, event_2)
+    assert dispatched_calls < all_rules_calls, f'all rules {all_rules_calls:.1f} rule calls per log, dispatched {dispatched_calls:.1f}'  # noqa: E501
+
+
+def test_evm_token_cache(globaldb: GlobalDBHandler):
+    """Test that the token cache remembers tokens and addresses that are not tokens, that
+    it evicts the least recently used addresses and that only the address of an EVM token
+    that is added, edited or deleted is dropped from it"""
+    token_cache = EvmTokenCache(chain_id=ChainID.ETHEREUM, maxsize=2)
+    dai = A_DAI.resolve_to_evm_token()
+    address = make_evm_address()
+    with patch.object(GlobalDBHandler, 'get_evm_token', wraps=GlobalDBHandler.get_evm_token) as get_evm_token:  # noqa: E501
+        assert token_cache.get(dai.evm_address) == dai
+        assert token_cache.get(address) is None
+        assert token_cache.get(dai.evm_address) == dai
+        assert token_cache.get(address) is None
+        assert get_evm_token.call_count == 2
+        assert (token_cache.hits, token_cache.misses) == (2, 2)
+
+        token_cache.get(make_evm_address())  # evicts dai which was used the longest ago
+        assert token_cache.get(address) is None
+        assert token_cache.get(dai.evm_address) == dai
+        assert get_evm_token.call_count == 4
+
+        token = EvmToken.initialize(
+            address=address,
+            chain_id=ChainID.ETHEREUM,
+            token_kind=EvmTokenKind.ERC20,
+            decimals=18,
+            name='Cached token',
+            symbol='CACHED',
+        )
+        globaldb.add_asset(asset_id=token.identifier, asset_type=AssetType.EVM_TOKEN, data=token)  # noqa: E501
+        assert token_cache.get(address) == token
+        assert token_cache.get(dai.evm_address) == dai  # other addresses stay cached
+        token = EvmToken.initialize(
+            address=address,
+            chain_id=ChainID.ETHEREUM,
+            token_kind=EvmTokenKind.ERC20,
+            decimals=6,
+            name='Cached token',
+            symbol='CACHED',
+        )
+        globaldb.edit_evm_token(token)
+        assert token_cache.get(address).decimals == 6  # type: ignore[union-attr]  # exists
+        globaldb.delete_evm_token(address=address, chain_id=ChainID.ETHEREUM)
+        assert token_cache.get(address) is None
+        assert get_evm_token.call_count == 7
+        assert (token_cache.hits, token_cache.misses) == (4, 7)
+
+    assert token_cache.get(dai.evm_address) == dai
+    token_cache.clear()
+    assert len(token_cache.cache) == 0
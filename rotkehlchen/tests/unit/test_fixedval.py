@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+import pytest
+
+from rotkehlchen.fixedval import FIXEDVAL_SCALE, FixedVal
+from rotkehlchen.fval import FVal
+
+
+def test_simple_arithmetic():
+    a = FixedVal('5.21')
+    b = FixedVal('2.12')
+    c = FixedVal('-23.124')
+
+    assert a + b == FixedVal('7.33')
+    assert a - b == FixedVal('3.09')
+    assert a * b == FixedVal('11.0452')
+    assert a / b == FixedVal('2.457547169811320755')
+    assert -a == FixedVal('-5.21')
+    assert abs(c) == FixedVal('23.124')
+    assert isinstance(a + b, FixedVal)
+    assert isinstance(a / b, FixedVal)
+
+    a += b
+    assert a == FixedVal('7.33')
+
+    with pytest.raises(NotImplementedError):
+        _ = a + 5.23
+
+
+def test_arithmetic_with_int():
+    a = FixedVal('5.21')
+
+    assert a - 2 == FixedVal('3.21')
+    assert a + 2 == FixedVal('7.21')
+    assert a * 2 == FixedVal('10.42')
+    assert a / 2 == FixedVal('2.605')
+
+    # and now the reverse operations
+    assert 2 + a == FixedVal('7.21')
+    assert 2 - a == FixedVal('-3.21')
+    assert 2 * a == FixedVal('10.42')
+    assert 2 / a == FixedVal('0.383877159309021113')
+
+
+def test_rounding():
+    """Test that results are rounded to 18 decimals with ties going to the even neighbour"""
+    assert FixedVal(1) / 3 == FixedVal('0.333333333333333333')
+    assert FixedVal(2) / 3 == FixedVal('0.666666666666666667')
+    assert FixedVal(-2) / 3 == FixedVal('-0.666666666666666667')
+    assert FixedVal(2) / -3 == FixedVal('-0.666666666666666667')
+    # ties
+    half_unit = FixedVal('0.000000000000000001') / 2
+    assert half_unit == FixedVal(0)
+    assert FixedVal('0.000000000000000003') / 2 == FixedVal('0.000000000000000002')
+    assert FixedVal('0.000000000000000001') * FixedVal('0.5') == FixedVal(0)
+    assert FixedVal('0.000000000000000003') * FixedVal('0.5') == FixedVal('0.000000000000000002')  # noqa: E501
+    # conversion
+    assert FixedVal('0.0000000000000000005') == FixedVal(0)
+    assert FixedVal('0.0000000000000000015') == FixedVal('0.000000000000000002')
+    assert FixedVal('0.12345678901234567891') == FixedVal('0.123456789012345679')
+    assert FixedVal(FVal(1) / FVal(3)).value == FIXEDVAL_SCALE // 3
+    # big numbers are not rounded to a number of significant digits like Decimal does
+    big = FixedVal(5006337207657766294397)
+    assert big + FixedVal('0.000000000000000001') > big
+    assert FVal(5006337207657766294397) + FVal('0.000000000000000001') == FVal(5006337207657766294397)  # noqa: E501
+
+
+def test_fval_interoperability():
+    a = FixedVal('1.348938409')
+    b = FVal('1.348938409')
+    c = FVal('0.123432434')
+
+    assert a == b
+    assert b == a
+    assert a != c
+    assert a > c
+    assert c < a
+    assert a >= b
+    assert b <= a
+    assert hash(a) == hash(b)
+    assert str(a) == str(b) == '1.348938409'
+    assert a.to_fval() == b
+    assert type(a.to_fval()) is FVal
+    assert a.to_fval().num == b.num
+    assert FixedVal(a) == a
+    assert FixedVal(Decimal('1.348938409')) == a
+
+    # mixed operations return FixedVal whatever the operand order
+    for result in (a + c, c + a, a - c, c - a, a * c, c * a, a / c, c / a):
+        assert isinstance(result, FixedVal)
+    assert a + c == FVal('1.472370843')
+    assert c - a == FVal('-1.225505975')
+
+    # operations not implemented by FixedVal fall back to FVal
+    power = FixedVal('1.5') ** 2
+    assert type(power) is FVal
+    assert power == FVal('2.25')
+    assert FixedVal('2.5').to_int(exact=False) == 2
+    assert FixedVal('2.5').is_close(FVal('2.5000001'), max_diff='1e-6')
+
+
+def test_representation():
+    assert str(FixedVal(0)) == '0'
+    assert str(FixedVal(-12)) == '-12'
+    assert str(FixedVal('-0.5')) == '-0.5'
+    assert str(FixedVal('0.000000000000000001')) == '0.000000000000000001'
+    assert repr(FixedVal('1.10')) == 'FixedVal(1.1)'
+    assert FixedVal('1.10').num == Decimal('1.1')
+    assert FixedVal.from_scaled(FIXEDVAL_SCALE // 4) == FVal('0.25')
+
+
+def test_invalid_input():
+    for value in (5.21, True, None, b'1'):
+        with pytest.raises(ValueError):
+            FixedVal(value)
+    for value in ('foo', 'NaN', 'Infinity', '-inf'):
+        with pytest.raises(ValueError):
+            FixedVal(value)
+    with pytest.raises(ValueError):
+        FixedVal(FVal('Infinity'))
+    with pytest.raises(NotImplementedError):
+        _ = FixedVal(1) + True
+    with pytest.raises(ZeroDivisionError):
+        _ = FixedVal(1) / 0
+    assert FixedVal(1) != 'foo'
+    assert FixedVal(1) != True  # noqa: E712
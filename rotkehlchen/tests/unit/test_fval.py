@@ -1,7 +1,10 @@
+import pickle
+
 import pytest
 
 from rotkehlchen.constants import ZERO
 from rotkehlchen.errors.serialization import ConversionError
+from rotkehlchen.fixedval import FixedVal
 from rotkehlchen.fval import FVal
 from rotkehlchen.utils.serialization import rlk_jsondumps
 
@@ -121,6 +124,16 @@ def test_encoding():
     )
 
 
+def test_pickling():
+    """FVals are sent to the worker processes of the process pool pickled"""
+    for value in (FVal('1.1E-30'), FVal(-5), FVal('123456789012345678901234567890.123')):
+        unpickled = pickle.loads(pickle.dumps(value))  # noqa: S301
+        assert unpickled == value
+        assert unpickled.num.as_tuple() == value.num.as_tuple()
+        assert type(unpickled) is FVal
+    assert type(pickle.loads(pickle.dumps(FixedVal('1.25')))) is FixedVal  # noqa: S301
+
+
 def test_conversion():
     a = 2.0123
     b = FVal('2.0123')
@@ -1,3 +1,6 @@
+import heapq
+from unittest.mock import patch
+
 import pytest
 
 from rotkehlchen.accounting.ledger_actions import LedgerAction, LedgerActionType
@@ -10,13 +13,16 @@ from rotkehlchen.chain.ethereum.modules.eth2.structures import ValidatorDailySta
 from rotkehlchen.constants import ONE, ZERO
 from rotkehlchen.constants.assets import A_ETH, A_ETH2, A_USDC
 from rotkehlchen.db.filtering import LedgerActionsFilterQuery
+from rotkehlchen.db.history_events import DBHistoryEvents
 from rotkehlchen.db.ledger_actions import DBLedgerActions
+from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
+from rotkehlchen.history.events import history_sort_key
 from rotkehlchen.history.types import HistoricalPriceOracle
 from rotkehlchen.tests.utils.accounting import accounting_history_process, check_pnls_and_csv
 from rotkehlchen.tests.utils.history import prices
 from rotkehlchen.tests.utils.messages import no_message_errors
-from rotkehlchen.types import Location
+from rotkehlchen.types import AssetAmount, Location, Price, Timestamp, TimestampMS, TradeType
 
 
 def test_query_ledger_actions(events_historian, function_scope_messages_aggregator):
@@ -82,6 +88,61 @@ def test_query_ledger_actions(events_historian, function_scope_messages_aggregat
     assert length == 2
 
 
+def test_history_stream_is_sorted(events_historian):
+    """Test that the history sources are read from the DB in chunks and merged in the
+    same order as sorting all of the events together would give"""
+    history_events = [HistoryEvent(
+        event_identifier=f'event_{idx}',
+        sequence_index=sequence_index,
+        timestamp=TimestampMS(timestamp),
+        location=Location.KRAKEN,
+        asset=A_ETH,
+        balance=Balance(amount=ONE),
+        event_type=HistoryEventType.STAKING,
+        event_subtype=HistoryEventSubType.REWARD,
+    ) for idx, (timestamp, sequence_index) in enumerate((
+        (1000500, 3),
+        (1000900, 0),
+        (1000100, 1),
+        (2000000, 1),
+        (2000000, 0),
+        (5000000, 0),
+    ))]
+    trades = [Trade(
+        timestamp=Timestamp(timestamp),
+        location=Location.EXTERNAL,
+        base_asset=A_ETH,
+        quote_asset=A_USDC,
+        trade_type=TradeType.BUY,
+        amount=AssetAmount(FVal(idx + 1)),
+        rate=Price(ONE),
+        fee=None,
+        fee_currency=None,
+        link=None,
+    ) for idx, timestamp in enumerate((2000, 1000, 2000, 1000, 1500))]
+    with events_historian.db.user_write() as write_cursor:
+        DBHistoryEvents(events_historian.db).add_history_events(write_cursor, history_events)
+        events_historian.db.add_trades(write_cursor, trades)
+
+    end_ts = Timestamp(4000)  # the last history event is after the end
+    with patch('rotkehlchen.history.events.HISTORY_STREAM_CHUNK_SIZE', 2):
+        streamed_events = list(events_historian._stream_history_events(end_ts=end_ts))
+        streamed_trades = list(events_historian._stream_trades(end_ts=end_ts))
+        merged = list(heapq.merge(
+            events_historian._stream_trades(end_ts=end_ts),
+            events_historian._stream_history_events(end_ts=end_ts),
+            key=history_sort_key,
+        ))
+
+    assert [(x.timestamp, x.sequence_index) for x in streamed_events] == [
+        (1000900, 0), (1000100, 1), (1000500, 3), (2000000, 0), (2000000, 1),
+    ]
+    assert sorted(streamed_trades, key=lambda x: x.timestamp) == streamed_trades
+    assert len(streamed_trades) == 5
+    assert merged == sorted(streamed_trades + streamed_events, key=history_sort_key)
+    assert [x.get_timestamp() for x in merged] == [1000] * 5 + [1500] + [2000] * 4
+
+
 @pytest.mark.parametrize(('value', 'result'), [
     ('manual', HistoricalPriceOracle.MANUAL),
     ('coingecko', HistoricalPriceOracle.COINGECKO),
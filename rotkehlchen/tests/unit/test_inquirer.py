@@ -34,7 +34,9 @@ from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.inquirer import (
     CURRENT_PRICE_CACHE_SECS,
+    CURRENT_PRICE_STALE_SECS,
     DEFAULT_RATE_LIMIT_WAITING_TIME,
+    CachedPriceEntry,
     CurrentPriceOracle,
     _query_currency_converterapi,
 )
@@ -191,7 +193,7 @@ def test_find_usd_price_cache(inquirer, freezer):  # pylint: disable=unused-argu
         nonlocal call_count
         if call_count == 0:
             price = Price(FVal('1'))
-        elif call_count in (1, 2):
+        elif call_count in (1, 2, 3):
             price = Price(FVal('2'))
         else:
             raise AssertionError('Called too many times for this test')
@@ -199,40 +201,120 @@ def test_find_usd_price_cache(inquirer, freezer):  # pylint: disable=unused-argu
         call_count += 1
         return price, False
 
+    def mock_query_prices(from_assets, to_asset):
+        return {x: mock_query_price(x, to_asset, False)[0] for x in from_assets}
+
     cc_patch = patch.object(
         inquirer._cryptocompare,
         'query_current_price',
         wraps=mock_query_price,
     )
+    cc_multiple_patch = patch.object(
+        inquirer._cryptocompare,
+        'query_multiple_current_prices',
+        wraps=mock_query_prices,
+    )
     inquirer.set_oracles_order(oracles=[CurrentPriceOracle.CRYPTOCOMPARE])
 
-    with cc_patch as cc:
+    with cc_patch, cc_multiple_patch:
         price = inquirer.find_usd_price(A_ETH)
-        assert cc.call_count == 1
+        assert call_count == 1
         assert price == Price(FVal('1'))
 
         # next time we run, make sure it's the cache
         price = inquirer.find_usd_price(A_ETH)
-        assert cc.call_count == 1
+        assert call_count == 1
         assert price == Price(FVal('1'))
 
-        # now move forward in time to invalidate the cache
+        # now move forward in time so that the cache is stale. It is still served
+        # until the cache update refreshes it
         freezer.move_to(datetime.datetime.fromtimestamp(
             ts_now() + CURRENT_PRICE_CACHE_SECS + 1,
             tz=datetime.timezone.utc,
         ))
         price = inquirer.find_usd_price(A_ETH)
-        assert cc.call_count == 2
+        assert call_count == 1
+        assert price == Price(FVal('1'))
+        assert inquirer.should_update_current_prices_cache() is True
+        inquirer.update_current_prices_cache()
+        assert call_count == 2
+        assert inquirer.should_update_current_prices_cache() is False
+        price = inquirer.find_usd_price(A_ETH)
+        assert call_count == 2
         assert price == Price(FVal('2'))
 
         # also test that ignore_cache works
-        price = inquirer.find_usd_price(A_ETH)
-        assert cc.call_count == 2
-        assert price == Price(FVal('2'))
         price = inquirer.find_usd_price(A_ETH, ignore_cache=True)
-        assert cc.call_count == 3
+        assert call_count == 3
         assert price == Price(FVal('2'))
 
+        # entries older than the stale period are queried again right away
+        freezer.move_to(datetime.datetime.fromtimestamp(
+            ts_now() + CURRENT_PRICE_STALE_SECS + 1,
+            tz=datetime.timezone.utc,
+        ))
+        price = inquirer.find_usd_price(A_ETH)
+        assert call_count == 4
+        assert price == Price(FVal('2'))
+
+
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_current_prices_cache_persistence(inquirer):
+    """Test that the cached current prices are saved in the global DB and loaded back,
+    so that a new session serves them while they get refreshed"""
+    stale_ts = Timestamp(ts_now() - CURRENT_PRICE_CACHE_SECS - 1)
+    inquirer._cached_current_price[(A_BTC, A_USD)] = CachedPriceEntry(
+        price=Price(FVal(30000)),
+        time=stale_ts,
+        oracle=CurrentPriceOracle.COINGECKO,
+        used_main_currency=False,
+    )
+    inquirer._cached_current_price[(A_ETH, A_EUR)] = CachedPriceEntry(
+        price=Price(FVal(1800)),
+        time=ts_now(),
+        oracle=CurrentPriceOracle.COINGECKO,
+        used_main_currency=True,
+    )
+    inquirer._cached_current_price[(A_DAI, A_USD)] = CachedPriceEntry(
+        price=Price(FVal(1)),
+        time=Timestamp(ts_now() - CURRENT_PRICE_STALE_SECS - 1),
+        oracle=CurrentPriceOracle.COINGECKO,
+        used_main_currency=False,
+    )
+    inquirer.save_current_prices_cache()
+    inquirer._cached_current_price.clear()
+    inquirer.load_current_prices_cache()
+    # only the entries that can be served stale and are not in the main currency are kept
+    assert inquirer._cached_current_price == {(A_BTC, A_USD): CachedPriceEntry(
+        price=Price(FVal(30000)),
+        time=stale_ts,
+        oracle=CurrentPriceOracle.COINGECKO,
+        used_main_currency=False,
+    )}
+
+    inquirer.set_oracles_order(oracles=[CurrentPriceOracle.COINGECKO])
+    with patch.object(inquirer._coingecko, 'query_multiple_current_prices', return_value={}) as coingecko:  # noqa: E501
+        assert inquirer.find_usd_price(A_BTC) == Price(FVal(30000))
+        assert coingecko.call_count == 0
+        # the refresh did not find a price so the stale price is kept
+        inquirer.update_current_prices_cache()
+        assert coingecko.call_count == 1
+        assert inquirer.find_usd_price(A_BTC) == Price(FVal(30000))
+
+    # prices for queries whose results get saved are never served stale
+    inquirer._cached_current_price[(A_BTC, A_USD)] = CachedPriceEntry(
+        price=Price(FVal(30000)),
+        time=stale_ts,
+        oracle=CurrentPriceOracle.COINGECKO,
+        used_main_currency=False,
+    )
+    with patch.object(inquirer._coingecko, 'query_current_price', return_value=(Price(FVal(31000)), False)) as coingecko:  # noqa: E501
+        with inquirer.fresh_current_prices():
+            assert inquirer.find_usd_price(A_BTC) == Price(FVal(31000))
+        assert coingecko.call_count == 1
+        assert inquirer.find_usd_price(A_BTC) == Price(FVal(31000))
+        assert coingecko.call_count == 1
+
 
 def test_set_oracles_order(inquirer):
     inquirer.set_oracles_order([CurrentPriceOracle.COINGECKO])
@@ -299,6 +381,59 @@ def test_find_usd_price_via_second_oracle(inquirer):
         assert oracle_instance.query_current_price.call_count == 1
 
 
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_find_usd_prices(inquirer):
+    """Test that the prices of many assets are queried together from each oracle and that
+    only the assets an oracle found no price for are passed on to the next oracle"""
+    coingecko_calls, cryptocompare_calls = [], []
+
+    def mock_coingecko(url, **kwargs):  # pylint: disable=unused-argument
+        coingecko_calls.append(url)
+        return MockResponse(HTTPStatus.OK, '{"bitcoin": {"usd": 30000}, "ethereum": {"usd": 2000}}')  # noqa: E501
+
+    def mock_cryptocompare(url, **kwargs):  # pylint: disable=unused-argument
+        cryptocompare_calls.append(url)
+        return MockResponse(HTTPStatus.OK, '{"DAI": {"USD": 1.01}}')
+
+    coingecko_patch = patch.object(inquirer._coingecko.session, 'get', side_effect=mock_coingecko)  # noqa: E501
+    cryptocompare_patch = patch.object(inquirer._cryptocompare.session, 'get', side_effect=mock_cryptocompare)  # noqa: E501
+    inquirer.set_oracles_order(oracles=[CurrentPriceOracle.COINGECKO, CurrentPriceOracle.CRYPTOCOMPARE])  # noqa: E501
+    with coingecko_patch, cryptocompare_patch:
+        prices = inquirer.find_usd_prices([A_BTC, A_ETH, A_DAI, A_KFEE, A_USD, A_BTC])
+        assert prices == {
+            A_BTC: Price(FVal(30000)),
+            A_ETH: Price(FVal(2000)),
+            A_DAI: Price(FVal('1.01')),
+            A_KFEE: Price(FVal('0.01')),
+            A_USD: Price(FVal(1)),
+        }
+        assert len(coingecko_calls) == 1
+        assert 'ids=bitcoin%2Cethereum%2Cdai&' in coingecko_calls[0]
+        assert len(cryptocompare_calls) == 1
+        assert 'pricemulti?fsyms=DAI&tsyms=USD' in cryptocompare_calls[0]
+
+        # the prices are cached for the single asset queries too
+        assert inquirer.find_usd_price_and_oracle(A_DAI) == (Price(FVal('1.01')), CurrentPriceOracle.CRYPTOCOMPARE, False)  # noqa: E501
+        assert inquirer.find_usd_prices([A_BTC, A_ETH]) == {A_BTC: Price(FVal(30000)), A_ETH: Price(FVal(2000))}  # noqa: E501
+        assert len(coingecko_calls) == 1
+
+
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_find_usd_prices_manual_prices_loop(inquirer, globaldb):
+    """Test that a loop of manual current prices only affects the prices of the assets
+    in the loop when querying the prices of many assets together"""
+    globaldb.add_manual_latest_price(from_asset=A_BTC, to_asset=A_ETH, price=Price(FVal(10)))
+    globaldb.add_manual_latest_price(from_asset=A_ETH, to_asset=A_BTC, price=Price(FVal('0.1')))  # noqa: E501
+    globaldb.add_manual_latest_price(from_asset=A_DAI, to_asset=A_USD, price=Price(FVal('1.01')))  # noqa: E501
+    inquirer.set_oracles_order(oracles=[CurrentPriceOracle.MANUALCURRENT])
+    assert inquirer.find_usd_prices([A_BTC, A_DAI, A_ETH]) == {
+        A_BTC: ZERO_PRICE,
+        A_DAI: Price(FVal('1.01')),
+        A_ETH: ZERO_PRICE,
+    }
+
+
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 @pytest.mark.parametrize('should_mock_current_price_queries', [True])
 @pytest.mark.parametrize('mocked_current_prices', [UNDERLYING_ASSET_PRICES])
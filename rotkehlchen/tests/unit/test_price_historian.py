@@ -4,6 +4,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.assets import A_BTC, A_USD
 from rotkehlchen.errors.price import NoPriceForGivenTimestamp, PriceQueryUnsupportedAsset
 from rotkehlchen.externalapis.coingecko import Coingecko
@@ -158,6 +159,68 @@ def test_token_to_fiat_no_price_found_exception(fake_price_historian):
             assert oracle_instance.query_historical_price.call_count == 1
 
 
+def test_price_misses_are_remembered(globaldb, fake_price_historian):
+    """Test that oracles that had no price for a pair and hour are not queried again
+    until the misses expire, while rate limited misses are not remembered."""
+    price_historian = fake_price_historian
+    oracle_instances = price_historian._oracle_instances
+    oracle_instances[1].query_historical_price.side_effect = NoPriceForGivenTimestamp(from_asset=A_BTC, to_asset=A_USD, time=0, rate_limited=True)  # noqa: E501
+    oracle_instances[2].query_historical_price.side_effect = PriceQueryUnsupportedAsset('bitcoin')  # noqa: E501
+    oracle_instances[3].query_historical_price.side_effect = NoPriceForGivenTimestamp(from_asset=A_BTC, to_asset=A_USD, time=0)  # noqa: E501
+
+    for timestamp in (1611595466, 1611595466 + 60):  # same hour bucket
+        with pytest.raises(NoPriceForGivenTimestamp):
+            price_historian.query_historical_price(
+                from_asset=A_BTC,
+                to_asset=A_USD,
+                timestamp=Timestamp(timestamp),
+            )
+
+    # the rate limited oracle is queried again but the others are not
+    assert oracle_instances[1].query_historical_price.call_count == 2
+    assert oracle_instances[2].query_historical_price.call_count == 1
+    assert oracle_instances[3].query_historical_price.call_count == 1
+    assert globaldb.get_historical_price_misses(
+        from_asset=A_BTC,
+        to_asset=A_USD,
+        timestamp=Timestamp(1611595466),
+    ) == {HistoricalPriceOracle.COINGECKO, HistoricalPriceOracle.DEFILLAMA}
+
+    # a different hour is not affected
+    with pytest.raises(NoPriceForGivenTimestamp):
+        price_historian.query_historical_price(
+            from_asset=A_BTC,
+            to_asset=A_USD,
+            timestamp=Timestamp(1611595466 + 3600),
+        )
+    assert oracle_instances[3].query_historical_price.call_count == 2
+
+    # with a TTL of 0 the misses are ignored and after purging they are gone
+    globaldb.add_setting_value('historical_price_misses_ttl', 0)
+    assert globaldb.get_historical_price_misses(
+        from_asset=A_BTC,
+        to_asset=A_USD,
+        timestamp=Timestamp(1611595466),
+    ) == set()
+    assert globaldb.delete_historical_price_misses(from_asset=A_BTC, only_expired=True) == 4
+    assert globaldb.get_all_historical_price_misses() == []
+
+
+def test_purge_price_misses_matches_identifiers_literally(globaldb):
+    """Test that purging the price misses of a pair does not treat the LIKE wildcards
+    in the asset identifiers as wildcards and so does not purge other pairs"""
+    for from_id, to_id in (('FOO_1', 'BAR%'), ('FOOx1', 'BAR%'), ('FOO_1', 'BARx')):
+        globaldb.add_historical_price_misses(
+            from_asset=Asset(from_id),
+            to_asset=Asset(to_id),
+            timestamp=Timestamp(1611595466),
+            oracles=[HistoricalPriceOracle.COINGECKO],
+        )
+
+    assert globaldb.delete_historical_price_misses(to_asset=Asset('BAR%'), from_asset=Asset('FOO_1')) == 1  # noqa: E501
+    assert {(x['from_asset'], x['to_asset']) for x in globaldb.get_all_historical_price_misses()} == {('FOOx1', 'BAR%'), ('FOO_1', 'BARx')}  # noqa: E501
+
+
 def test_token_to_fiat_via_second_oracle(fake_price_historian):
     """Test price is returned via the second oracle when the first oracle fails
     requesting the historical price from token to fiat.
@@ -0,0 +1,107 @@
+import os
+import time
+
+import gevent
+import pytest
+
+from rotkehlchen.errors.misc import ProcessPoolError
+from rotkehlchen.greenlets.manager import GreenletManager, get_process_jobs_stats
+from rotkehlchen.greenlets.process_pool import ProcessPool
+
+
+def _busy_job(seconds: float) -> int:
+    """Keeps the CPU busy for the given seconds and returns the pid it ran in"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return os.getpid()
+
+
+def _failing_job(message: str) -> None:
+    raise ValueError(message)
+
+
+def _unpicklable_result_job() -> object:
+    return lambda: None
+
+
+def _exiting_job() -> None:
+    os._exit(1)
+
+
+@pytest.fixture(name='process_pool_greenlet_manager')
+def fixture_process_pool_greenlet_manager(function_scope_messages_aggregator):
+    greenlet_manager = GreenletManager(
+        msg_aggregator=function_scope_messages_aggregator,
+        process_pool_size=1,
+    )
+    yield greenlet_manager
+    greenlet_manager.clear()
+
+
+def test_run_in_process(process_pool_greenlet_manager):
+    """Test that jobs run in a reused worker process and that their timing is recorded
+    in the greenlet that ran them"""
+    def task() -> list[int]:
+        return [process_pool_greenlet_manager.run_in_process(
+            task_name='busy',
+            method=_busy_job,
+            seconds=0.1,
+        ) for _ in range(2)]
+
+    greenlet = gevent.spawn(task)
+    pids = greenlet.get(timeout=30)
+    assert pids[0] == pids[1] != os.getpid()
+    stats = get_process_jobs_stats(greenlet)
+    assert len(stats) == 1
+    assert stats[0].task_name == 'busy'
+    assert stats[0].jobs == 2
+    assert stats[0].run_seconds >= 0.2
+    assert stats[0].serialize().keys() == {'task_name', 'jobs', 'queued_seconds', 'run_seconds'}  # noqa: E501
+
+
+def test_gevent_loop_not_blocked(process_pool_greenlet_manager):
+    """Test that other greenlets keep running while a CPU heavy job runs in the pool"""
+    gaps = []
+
+    def ticker() -> None:
+        last = time.perf_counter()
+        while True:
+            gevent.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    process_pool_greenlet_manager.run_in_process(task_name='warmup', method=_busy_job, seconds=0)  # noqa: E501
+    ticker_greenlet = gevent.spawn(ticker)
+    job = process_pool_greenlet_manager.spawn_in_process(
+        task_name='busy',
+        method=_busy_job,
+        seconds=1,
+    )
+    job.get(timeout=30)
+    ticker_greenlet.kill()
+    assert len(gaps) > 50
+    assert max(gaps) < 0.2
+
+
+def test_job_errors(process_pool_greenlet_manager):
+    """Test that exceptions of jobs are raised in the caller and that the pool keeps
+    working after a job failed or a worker died"""
+    with pytest.raises(ValueError, match='oops'):
+        process_pool_greenlet_manager.run_in_process(task_name='fail', method=_failing_job, message='oops')  # noqa: E501
+    with pytest.raises(ProcessPoolError, match='Could not send the result'):
+        process_pool_greenlet_manager.run_in_process(task_name='fail', method=_unpicklable_result_job)  # noqa: E501
+    with pytest.raises(ProcessPoolError, match='died'):
+        process_pool_greenlet_manager.run_in_process(task_name='fail', method=_exiting_job)
+    assert process_pool_greenlet_manager.process_pool.workers_num == 0
+    assert process_pool_greenlet_manager.run_in_process(task_name='busy', method=_busy_job, seconds=0) != os.getpid()  # noqa: E501
+
+
+def test_pool_without_workers():
+    """Test that with a size of 0 jobs run in the calling process"""
+    pool = ProcessPool(size=0)
+    result = pool.run(method=_busy_job, kwargs={'seconds': 0.01})
+    assert result.result == os.getpid()
+    assert result.run_seconds >= 0.01
+    assert pool.workers_num == 0
@@ -3,6 +3,7 @@ import time
 from json.decoder import JSONDecodeError
 from unittest.mock import patch
 
+import gevent
 import pytest
 from eth_typing import HexAddress, HexStr
 from eth_utils import to_checksum_address
@@ -24,6 +25,7 @@ from rotkehlchen.utils.misc import (
     timestamp_to_date,
 )
 from rotkehlchen.utils.mixins.cacheable import CacheableMixIn, cache_response_timewise
+from rotkehlchen.utils.network import TokenBucket
 from rotkehlchen.utils.serialization import jsonloads_dict, jsonloads_list
 from rotkehlchen.utils.version_check import get_current_version
 
@@ -393,3 +395,25 @@ def test_pairwise():
     a = [1, 2, 3, 4, 5]
     assert [x + y for x, y in pairwise(a)] == [3, 7]
     assert list(pairwise_longest(a)) == [(1, 2), (3, 4), (5, None)]
+
+
+def test_token_bucket():
+    """Test that the token bucket lets a burst of queries through at once and then
+    throttles the greenlets sharing it to its rate"""
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.perf_counter()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.perf_counter() - start < 0.05
+
+    finish_times = []
+
+    def query():
+        bucket.acquire()
+        finish_times.append(time.perf_counter() - start)
+
+    gevent.joinall([gevent.spawn(query) for _ in range(4)])
+    assert finish_times[-1] == pytest.approx(0.2, abs=0.05)
+    assert finish_times == sorted(finish_times)
+    bucket.acquire(tokens=2)  # a heavier query waits for more tokens
+    assert time.perf_counter() - start == pytest.approx(0.3, abs=0.05)
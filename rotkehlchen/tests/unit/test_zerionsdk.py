@@ -1,11 +1,20 @@
 import warnings as test_warnings
+from unittest.mock import patch
 
 import pytest
 
-from rotkehlchen.chain.ethereum.defi.zerionsdk import KNOWN_ZERION_PROTOCOL_NAMES, ZerionSDK
+from rotkehlchen.chain.ethereum.defi.zerionsdk import (
+    KNOWN_ZERION_PROTOCOL_NAMES,
+    WEIGHTED_NODES_WITH_HIGH_GAS_LIMIT,
+    ZerionSDK,
+)
+from rotkehlchen.chain.evm.contracts import EvmContract
+from rotkehlchen.constants.assets import A_DAI
+from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.ethereum import (
     ETHEREUM_TEST_PARAMETERS,
+    PRUNED_AND_NOT_ARCHIVED_NODE,
     wait_until_all_nodes_connected,
 )
 
@@ -78,3 +87,102 @@ def test_protocol_names_are_known(
             test_warnings.warn(
                 UserWarning(f'Unknown protocol "{name}" seen in Zerion protocol names'),
             )
+
+
+@pytest.mark.parametrize('mocked_current_prices', [{A_DAI.identifier: FVal('1')}])
+def test_query_protocol_balances_for_accounts(
+        ethereum_inquirer,
+        function_scope_messages_aggregator,
+        inquirer,  # pylint: disable=unused-argument
+        database,
+):
+    """Test that the protocol balances of many accounts are queried in multicalls that
+    start from different nodes, and that calls failing in a multicall are queried alone"""
+    zerion = ZerionSDK(ethereum_inquirer, function_scope_messages_aggregator, database)
+    accounts = [
+        '0xf753beFE986e8Be8EBE7598C9d2b6297D9DD6662',
+        '0x2B888954421b424C5D3D9Ce9bB67c9bD47537d12',
+        '0x9531C059098e3d194fF87FebB587aB07B30B1306',
+    ]
+    call_order = [WEIGHTED_NODES_WITH_HIGH_GAS_LIMIT[0], PRUNED_AND_NOT_ARCHIVED_NODE]
+    dai_protocol_balance = (
+        ('Dai Savings Rate', 'Decentralized lending protocol', 'makerdao.com', 'dai.png', 0),
+        [(
+            ('Dai Savings Rate', 'Asset', 'Asset'),
+            [((('0x6B175474E89094C44Da98b954EedeAC495271d0F', 'Dai Stablecoin', 'DAI', 18), 5 * 10 ** 18), [])],  # noqa: E501
+        )],
+    )
+
+    def mock_multicall_2(calls, require_success, call_order):
+        assert require_success is False
+        return [(idx != 3, b'') for idx in range(len(calls))]
+
+    def mock_decode(result, method_name, arguments):  # pylint: disable=unused-argument
+        account, protocol_names = arguments
+        return ([dai_protocol_balance] if account == accounts[0] and 'Dai Savings Rate' in protocol_names else [],)  # noqa: E501
+
+    protocol_names_patch = patch.object(zerion, '_get_protocol_names', return_value=list(KNOWN_ZERION_PROTOCOL_NAMES))  # noqa: E501
+    own_node_patch = patch.object(ethereum_inquirer, 'get_own_node_info', return_value=None)
+    chunk_size_patch = patch(
+        'rotkehlchen.chain.ethereum.defi.zerionsdk.get_chunk_size_call_order',
+        return_value=(200, call_order),
+    )
+    multicall_patch = patch.object(ethereum_inquirer, 'multicall_2', side_effect=mock_multicall_2)
+    decode_patch = patch.object(EvmContract, 'decode', side_effect=mock_decode)
+    call_patch = patch.object(EvmContract, 'call', return_value=[])
+    with protocol_names_patch, own_node_patch, chunk_size_patch, multicall_patch as multicall, decode_patch, call_patch as call:  # noqa: E501
+        balances = zerion.all_balances_for_accounts(accounts)
+
+    # 3 protocol name chunks per account, 5 calls per multicall
+    assert multicall.call_count == 2
+    assert [len(x.kwargs['calls']) for x in multicall.call_args_list] == [5, 4]
+    assert [x.kwargs['call_order'][0] for x in multicall.call_args_list] == call_order
+    assert call.call_count == 2
+    assert set(balances) == set(accounts)
+    assert balances[accounts[1]] == balances[accounts[2]] == []
+    assert len(balances[accounts[0]]) == 1
+    assert balances[accounts[0]][0].protocol.name == 'Dai Savings Rate'
+    assert balances[accounts[0]][0].base_balance.balance.amount == FVal(5)
+    assert balances[accounts[0]][0].base_balance.balance.usd_value == FVal(5)
+
+
+@pytest.mark.parametrize('mocked_current_prices', [{A_DAI.identifier: FVal('1')}])
+def test_query_protocol_balances_multicall_fails(
+        ethereum_inquirer,
+        function_scope_messages_aggregator,
+        inquirer,  # pylint: disable=unused-argument
+        database,
+):
+    """Test that if a whole multicall of protocol balances fails, for example by going
+    over the gas limit of the node, its calls are queried one by one"""
+    zerion = ZerionSDK(ethereum_inquirer, function_scope_messages_aggregator, database)
+    accounts = [
+        '0xf753beFE986e8Be8EBE7598C9d2b6297D9DD6662',
+        '0x2B888954421b424C5D3D9Ce9bB67c9bD47537d12',
+    ]
+    dai_protocol_balance = (
+        ('Dai Savings Rate', 'Decentralized lending protocol', 'makerdao.com', 'dai.png', 0),
+        [(
+            ('Dai Savings Rate', 'Asset', 'Asset'),
+            [((('0x6B175474E89094C44Da98b954EedeAC495271d0F', 'Dai Stablecoin', 'DAI', 18), 5 * 10 ** 18), [])],  # noqa: E501
+        )],
+    )
+
+    def mock_call(node_inquirer, method_name, arguments):  # pylint: disable=unused-argument
+        account, protocol_names = arguments
+        return [dai_protocol_balance] if account == accounts[0] and 'Dai Savings Rate' in protocol_names else []  # noqa: E501
+
+    protocol_names_patch = patch.object(zerion, '_get_protocol_names', return_value=list(KNOWN_ZERION_PROTOCOL_NAMES))  # noqa: E501
+    own_node_patch = patch.object(ethereum_inquirer, 'get_own_node_info', return_value=None)
+    multicall_patch = patch.object(ethereum_inquirer, 'multicall_2', side_effect=RemoteError('out of gas'))  # noqa: E501
+    call_patch = patch.object(EvmContract, 'call', side_effect=mock_call)
+    with protocol_names_patch, own_node_patch, multicall_patch as multicall, call_patch as call:
+        balances = zerion.all_balances_for_accounts(accounts)
+
+    # 3 protocol name chunks per account in 2 multicalls that fail
+    assert multicall.call_count == 2
+    assert call.call_count == 6
+    assert balances[accounts[1]] == []
+    assert len(balances[accounts[0]]) == 1
+    assert balances[accounts[0]][0].protocol.name == 'Dai Savings Rate'
+    assert balances[accounts[0]][0].base_balance.balance.usd_value == FVal(5)
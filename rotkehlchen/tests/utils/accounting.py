@@ -1,9 +1,11 @@
 import csv
 import tempfile
+from collections.abc import Sequence
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional
+from zipfile import ZipFile
 
-from rotkehlchen.accounting.export.csv import CSV_INDEX_OFFSET, FILENAME_ALL_CSV
+from rotkehlchen.accounting.export.csv import CSV_INDEX_OFFSET, FILENAME_ALL_CSV, _dict_to_csv_file
 from rotkehlchen.accounting.mixins.event import AccountingEventMixin, AccountingEventType
 from rotkehlchen.accounting.pnl import PNL, PnlTotals
 from rotkehlchen.accounting.structures.processed_event import ProcessedAccountingEvent
@@ -18,6 +20,7 @@ from rotkehlchen.utils.version_check import get_current_version
 
 if TYPE_CHECKING:
     from rotkehlchen.accounting.accountant import Accountant
+    from rotkehlchen.accounting.export.csv import CSVExporter
     from rotkehlchen.db.dbhandler import DBHandler
     from rotkehlchen.rotkehlchen import Rotkehlchen
     from rotkehlchen.tests.fixtures.google import GoogleService
@@ -99,7 +102,7 @@ def accounting_history_process(
         accountant: 'Accountant',
         start_ts: Timestamp,
         end_ts: Timestamp,
-        history_list: list[AccountingEventMixin],
+        history_list: Sequence[AccountingEventMixin],
 ) -> tuple[dict[str, Any], list[ProcessedAccountingEvent]]:
     report_id = accountant.process_history(
         start_ts=start_ts,
@@ -241,6 +244,21 @@ def upload_csv_and_check(
         offset += 1
 
 
+def export_csv_in_memory(
+        csvexporter: 'CSVExporter',
+        events: list[ProcessedAccountingEvent],
+        pnls: PnlTotals,
+        directory: Path,
+) -> None:
+    """Export the given events and the summary as CSV in the given directory, all in
+    memory and in the calling process. Used to check the CSV export of the saved report
+    against the processed events of the accountant"""
+    rows = [csvexporter.to_csv_entry(x) for x in events]
+    rows.extend(csvexporter._summary_rows(events_num=len(rows), pnls=pnls))
+    directory.mkdir(parents=True, exist_ok=True)
+    _dict_to_csv_file(directory / FILENAME_ALL_CSV, rows)
+
+
 def assert_csv_export(
         accountant: 'Accountant',
         expected_pnls: PnlTotals,
@@ -258,7 +276,8 @@ def assert_csv_export(
         tmpdir = Path(tmpdirname)
         # first make sure we export without formulas
         csvexporter.settings = csvexporter.settings._replace(pnl_csv_with_formulas=False)
-        accountant.csvexporter.export(
+        export_csv_in_memory(
+            csvexporter=csvexporter,
             events=accountant.pots[0].processed_events,
             pnls=accountant.pots[0].pnls,
             directory=tmpdir,
@@ -282,7 +301,8 @@ def assert_csv_export(
 
         # export with formulas and summary
         csvexporter.settings = csvexporter.settings._replace(pnl_csv_with_formulas=True, pnl_csv_have_summary=True)  # noqa: E501
-        accountant.csvexporter.export(
+        export_csv_in_memory(
+            csvexporter=csvexporter,
             events=accountant.pots[0].processed_events,
             pnls=accountant.pots[0].pnls,
             directory=tmpdir,
@@ -319,6 +339,20 @@ def assert_csv_export(
 
                 index += 1
 
+        # the export streamed from the DB report, in a directory and in a zip, is the same
+        report_id = accountant.pots[0].report_id
+        if report_id is not None:
+            with open(tmpdir / FILENAME_ALL_CSV, newline='') as csvfile:
+                in_memory_csv = csvfile.read()
+            streamed_dir = tmpdir / 'streamed'
+            assert csvexporter.export_report(report_id=report_id, directory=streamed_dir) == (True, '')  # noqa: E501
+            with open(streamed_dir / FILENAME_ALL_CSV, newline='') as csvfile:
+                assert csvfile.read() == in_memory_csv
+            success, zip_path = csvexporter.create_zip(report_id=report_id)
+            assert success is True
+            with ZipFile(zip_path) as csv_zip:
+                assert csv_zip.read(FILENAME_ALL_CSV).decode() == in_memory_csv
+
         if google_service is not None:
             upload_csv_and_check(
                 service=google_service,
@@ -1,9 +1,13 @@
+import json
 import logging
 import os
 import random
+from collections import defaultdict
+from collections.abc import Iterable
 from typing import Any, Optional, cast
 
 import gevent
+from gevent.pywsgi import WSGIServer
 
 from rotkehlchen.accounting.structures.evm_event import EvmEvent
 from rotkehlchen.chain.accounts import BlockchainAccountData
@@ -23,6 +27,7 @@ from rotkehlchen.db.evmtx import DBEvmTx
 from rotkehlchen.db.filtering import EvmTransactionsFilterQuery
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.tests.utils.decoders import patch_decoder_reload_data
+from rotkehlchen.tests.utils.factories import make_evm_address, make_random_bytes
 from rotkehlchen.types import (
     ChainID,
     EvmTransaction,
@@ -434,3 +439,98 @@ def get_decoded_events_of_transaction(
     with patch_decoder_reload_data():
         result = decoder.decode_transaction_hashes(ignore_cache=True, tx_hashes=[tx_hash])
     return result, decoder
+
+
+def make_raw_receipt(tx_hash: EVMTxHash, block_number: int, logs_num: int = 1) -> dict[str, Any]:  # noqa: E501
+    """Make a transaction receipt as returned by eth_getTransactionReceipt"""
+    block_hash = '0x' + make_random_bytes(32).hex()
+    return {
+        'transactionHash': tx_hash.hex(),
+        'blockHash': block_hash,
+        'blockNumber': hex(block_number),
+        'from': make_evm_address().lower(),
+        'to': make_evm_address().lower(),
+        'contractAddress': None,
+        'cumulativeGasUsed': hex(21000),
+        'gasUsed': hex(21000),
+        'effectiveGasPrice': hex(10 ** 9),
+        'logsBloom': '0x' + '00' * 256,
+        'status': '0x1',
+        'transactionIndex': '0x0',
+        'type': '0x2',
+        'logs': [{
+            'address': make_evm_address().lower(),
+            'topics': ['0x' + make_random_bytes(32).hex()],
+            'data': '0x',
+            'blockNumber': hex(block_number),
+            'blockHash': block_hash,
+            'transactionHash': tx_hash.hex(),
+            'transactionIndex': '0x0',
+            'logIndex': hex(idx),
+            'removed': False,
+        } for idx in range(logs_num)],
+    }
+
+
+class StubJsonRpcNode():
+    """A local JSON-RPC node that serves the given raw transaction receipts
+
+    It lets tests query receipts via a web3 node without network access. It can emulate
+    a per request latency, a limit on the size of batch requests, nodes that don't
+    support eth_getBlockReceipts and transactions that fail to be queried. Needs the
+    tests to run with a gevent monkey patched socket module.
+    """
+
+    def __init__(
+            self,
+            receipts: Iterable[dict[str, Any]],
+            max_batch_size: Optional[int] = None,
+            block_receipts: bool = True,
+            failing_hashes: Iterable[EVMTxHash] = (),
+            latency: float = 0,
+    ) -> None:
+        self.receipts = {x['transactionHash']: x for x in receipts}
+        self.blocks: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+        for receipt in self.receipts.values():
+            self.blocks[receipt['blockNumber']].append(receipt)
+        self.max_batch_size = max_batch_size
+        self.block_receipts = block_receipts
+        self.failing_hashes = {x.hex() for x in failing_hashes}
+        self.latency = latency
+        self.requests: list[list[str]] = []  # the methods called by each HTTP request
+        self.server = WSGIServer(('127.0.0.1', 0), self._handle_request, log=None)
+
+    def start(self) -> str:
+        """Start serving and return the endpoint of the node"""
+        self.server.start()
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def stop(self) -> None:
+        self.server.stop()
+
+    def _call(self, method: str, params: list[Any]) -> dict[str, Any]:
+        if method == 'eth_getTransactionReceipt':
+            if params[0] in self.failing_hashes:
+                return {'error': {'code': -32000, 'message': 'internal error'}}
+            return {'result': self.receipts.get(params[0])}
+        if method == 'eth_getBlockReceipts' and self.block_receipts is True:
+            return {'result': self.blocks.get(params[0], [])}
+        return {'error': {'code': -32601, 'message': f'the method {method} does not exist'}}
+
+    def _handle_request(self, environ: dict[str, Any], start_response: Any) -> list[bytes]:
+        body = json.loads(environ['wsgi.input'].read())
+        if self.latency != 0:
+            gevent.sleep(self.latency)
+        calls = body if isinstance(body, list) else [body]
+        self.requests.append([x['method'] for x in calls])
+        response: Any
+        if self.max_batch_size is not None and len(calls) > self.max_batch_size:
+            response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch too large'}}  # noqa: E501
+        else:
+            response = [{'jsonrpc': '2.0', 'id': x['id'], **self._call(x['method'], x['params'])} for x in calls]  # noqa: E501
+            if not isinstance(body, list):
+                response = response[0]
+
+        data = json.dumps(response).encode()
+        start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', str(len(data)))])  # noqa: E501
+        return [data]
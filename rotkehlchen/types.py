@@ -802,6 +802,14 @@ class GeneralCacheType(Enum):
     MAKERDAO_VAULT_ILK = auto()  # ilk(collateral type) to info (underlying_asset, join address)
     CURVE_GAUGE_ADDRESS = auto()  # get gauge address by pool address
     CURVE_POOL_UNDERLYING_TOKENS = auto()  # get underlying tokens by pool address
+    NO_HISTORICAL_PRICE = auto()  # pair and time bucket to oracles that had no price for it
+    LOG_QUERY_RANGE = auto()  # node kind, contract and event to the last good logs block range
+    LOG_QUERY_BLOCKS = auto()  # contract and topics to the block range of the cached logs
+    LOG_QUERY_EVENTS = auto()  # contract and topics to the cached logs
+    CURRENT_PRICE = auto()  # the cached current prices of the Inquirer
+    UNISWAP_POOLS = auto()  # uniswap version and pair of tokens to the pools of the pair
+    UNISWAP_ROUTE = auto()  # uniswap version, from and to token to the pools between them
+    PRICE_HISTORY_CHANGES = auto()  # earliest timestamp affected by a price history change
 
     def serialize(self) -> str:
         # Using custom serialize method instead of SerializableEnumMixin since mixin replaces
@@ -1,10 +1,12 @@
 import json
 import logging
+import time
 from http import HTTPStatus
 from typing import Any, Callable, Literal, Union, overload
 
 import gevent
 import requests
+from gevent.lock import Semaphore
 
 from rotkehlchen.constants import GLOBAL_REQUESTS_TIMEOUT
 from rotkehlchen.constants.timing import DEFAULT_TIMEOUT_TUPLE, QUERY_RETRY_TIMES
@@ -15,6 +17,36 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 
+class TokenBucket():
+    """Rate budget of a remote service shared by all greenlets that query it
+
+    Holds up to capacity tokens and gains rate tokens per second. Each query takes
+    some tokens and waits until there are enough. Greenlets waiting for tokens are
+    served in the order they asked for them.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = Semaphore()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Waits until the given number of tokens are available and takes them"""
+        with self.lock:
+            self._refill()
+            if self.tokens < tokens:
+                gevent.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
 def request_get(
         url: str,
         timeout: int = GLOBAL_REQUESTS_TIMEOUT,